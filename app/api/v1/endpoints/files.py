@@ -8,6 +8,7 @@ from fastapi import APIRouter, status, File, UploadFile, BackgroundTasks
 
 from app.middleware.errors import ApiError
 from app.core.config import settings
+from app.core.metrics import INGEST_JOBS
 from app.schemas import FileIngestionResponse, FileResult
 from app.utils import save_upload
 from app.services.public import ingest_files
@@ -25,6 +26,7 @@ async def _run_ingest(
     collection_name: str,
 ) -> None:
     """Wrapper that runs the async ingest_files inside BackgroundTasks."""
+    INGEST_JOBS.labels("queued").dec()
     await ingest_files(job_id, file_paths, filenames, collection_name)
 
 
@@ -84,6 +86,7 @@ async def upload_and_ingest(
     # Create job in Redis and schedule background processing
     job_id = str(uuid.uuid4())
     create_job(job_id, collection_name, filenames)
+    INGEST_JOBS.labels("queued").inc()
     background_tasks.add_task(
         _run_ingest, job_id, saved_paths, filenames, collection_name
     )
@@ -33,8 +33,13 @@ async def get_job(job_id: str) -> JobStatusResponse:
             status=fdata.get("status", "pending"),
             error=fdata.get("error", ""),
             chunks=int(fdata.get("chunks", 0)),
+            embedding_cache_hits=int(fdata.get("embed_cache_hits", 0)),
+            embedding_cache_misses=int(fdata.get("embed_cache_misses", 0)),
         )
 
+    cache_hits = int(data.get("embed_cache_hits", 0))
+    cache_lookups = cache_hits + int(data.get("embed_cache_misses", 0))
+
     return JobStatusResponse(
         job_id=job_id,
         status=data["status"],
@@ -43,6 +48,11 @@ async def get_job(job_id: str) -> JobStatusResponse:
         processed=data["processed"],
         failed_cnt=data["failed_cnt"],
         documents_ingested=data["documents_ingested"],
+        embedding_cache_hits=cache_hits,
+        embedding_cache_misses=cache_lookups - cache_hits,
+        embedding_cache_hit_rate=(
+            round(cache_hits / cache_lookups, 4) if cache_lookups else 0.0
+        ),
         error=data.get("error", ""),
         created_at=data["created_at"],
         updated_at=data["updated_at"],
@@ -0,0 +1,24 @@
+"""Prometheus scrape endpoint."""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services.public.metrics import render_metrics
+
+router = APIRouter(tags=["Metrics"])
+
+_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    summary="Prometheus metrics",
+    description=(
+        "Latency histograms (HTTP routes, embedding, LLM, Milvus, GPU lock), "
+        "throughput counters and cache/pool gauges in the Prometheus text "
+        "format."
+    ),
+)
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(render_metrics(), media_type=_CONTENT_TYPE)
@@ -2,6 +2,7 @@
 
 from fastapi import APIRouter
 
+from app.core.deadline import degradations
 from app.schemas.search import SearchRequest, SearchResponse
 from app.services.public.search import search_documents
 
@@ -35,4 +36,5 @@ async def search(
         search_type=request.search_type,
         total_results=len(results),
         results=results,
+        degradations=degradations(),
     )
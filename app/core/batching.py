@@ -0,0 +1,163 @@
+"""Asyncio micro-batching: coalesce concurrent single-item calls into batches.
+
+Callers ``await batcher.submit(item)`` and receive their own result, while
+the batcher groups items that arrive within a short window and hands them
+to one ``handler(items) -> results`` call.
+
+A batch is flushed when the first of these happens:
+
+- ``max_items`` items are pending,
+- the summed item weight reaches ``max_weight`` (optional),
+- ``max_wait_ms`` has elapsed since the first pending item arrived.
+
+The batcher binds lazily to the running event loop, so a module-level
+instance works across application restarts and per-test event loops.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class BatchStats:
+    """Counters describing achieved batch sizes."""
+
+    batches: int = 0
+    items: int = 0
+    weight: int = 0
+    max_items: int = 0  # configured capacity, for occupancy
+    max_weight: Optional[int] = None
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+
+    @property
+    def occupancy(self) -> float:
+        """Mean fraction of capacity filled per flushed batch.
+
+        Capacity is ``max_weight`` when a weight budget is configured,
+        otherwise ``max_items``.
+        """
+        if not self.batches:
+            return 0.0
+        if self.max_weight:
+            return self.weight / self.batches / self.max_weight
+        return self.mean_batch_size / self.max_items if self.max_items else 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "weight": self.weight,
+            "mean_batch_size": round(self.mean_batch_size, 3),
+            "occupancy": round(self.occupancy, 4),
+        }
+
+
+class MicroBatcher(Generic[T, R]):
+    """Collect concurrently submitted items and process them in batches.
+
+    Args:
+        handler: Coroutine mapping a list of items to a same-length list of
+            results.  If it raises, every caller in the batch receives the
+            exception.
+        max_items: Flush as soon as this many items are pending.
+        max_wait_ms: Maximum time the first item of a batch waits.
+        weigher: Optional per-item weight (e.g. characters or pairs).
+        max_weight: Flush once the pending weight reaches this value.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[list[T]], Awaitable[list[R]]],
+        *,
+        max_items: int,
+        max_wait_ms: float,
+        weigher: Optional[Callable[[T], int]] = None,
+        max_weight: Optional[int] = None,
+    ) -> None:
+        self._handler = handler
+        self.max_items = max(1, max_items)
+        self.max_wait_ms = max_wait_ms
+        self._weigher = weigher
+        self.max_weight = max_weight
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: list[tuple[T, asyncio.Future[R]]] = []
+        self._pending_weight = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+        self.stats = BatchStats(max_items=self.max_items, max_weight=max_weight)
+
+    async def submit(self, item: T) -> R:
+        """Queue *item* and wait for its result."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Bound to a previous (closed) loop: start afresh.
+            self._loop = loop
+            self._pending = []
+            self._pending_weight = 0
+            self._timer = None
+
+        weight = self._weigher(item) if self._weigher else 0
+        if (
+            self.max_weight is not None
+            and self._pending
+            and self._pending_weight + weight > self.max_weight
+        ):
+            # Adding this item would overflow the weight budget.
+            self._flush()
+
+        future: asyncio.Future[R] = loop.create_future()
+        self._pending.append((item, future))
+        self._pending_weight += weight
+
+        if len(self._pending) >= self.max_items or (
+            self.max_weight is not None and self._pending_weight >= self.max_weight
+        ):
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000.0, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        weight, self._pending_weight = self._pending_weight, 0
+        if not batch:
+            return
+
+        self.stats.batches += 1
+        self.stats.items += len(batch)
+        self.stats.weight += weight
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)  # keep a strong reference until done
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[T, asyncio.Future[R]]]) -> None:
+        items = [item for item, _ in batch]
+        try:
+            results = await self._handler(items)
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"Batch handler returned {len(results)} results for {len(items)} items"
+                )
+        except BaseException as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            if not isinstance(exc, Exception):
+                raise
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,142 @@
+"""Thread-safe in-process LRU cache with optional TTL and byte budget.
+
+Used as the first (process-local) tier in front of slower shared stores
+such as Redis or remote APIs.  The cache is safe to use both from the event
+loop and from ``run_in_executor`` worker threads.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Hashable, Optional
+
+
+@dataclass
+class CacheStats:
+    """Counters describing cache effectiveness."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "hit_ratio": round(self.hit_ratio, 4)}
+
+
+class LRUCache:
+    """Least-recently-used cache bounded by entry count and/or total bytes.
+
+    Args:
+        max_entries: Maximum number of entries kept (``None`` = unbounded).
+        ttl_sec: Entry lifetime in seconds (``None`` = never expires).
+        max_bytes: Maximum total size of all values (``None`` = unbounded).
+            Requires *sizeof* to measure values.
+        sizeof: Callable returning the approximate size in bytes of a value.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: Optional[int] = None,
+        ttl_sec: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ) -> None:
+        if max_bytes is not None and sizeof is None:
+            raise ValueError("max_bytes requires a sizeof callable")
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        # key -> (value, expires_at, size)
+        self._data: OrderedDict[Hashable, tuple[Any, float, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value for *key*, or ``None`` on miss/expiry."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.stats.misses += 1
+                return None
+            value, expires_at, _ = item
+            if expires_at and expires_at <= time.monotonic():
+                self._remove(key)
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Insert or replace *key*, evicting least-recently-used entries."""
+        size = self._sizeof(value) if self._sizeof else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return  # never cache a single value larger than the whole budget
+        expires_at = time.monotonic() + self.ttl_sec if self.ttl_sec else 0.0
+
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+            self._evict()
+
+    def pop(self, key: Hashable) -> None:
+        """Remove *key* if present."""
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return a JSON-serialisable view of size and hit/miss counters."""
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            **self.stats.as_dict(),
+        }
+
+    # ------------------------------------------------------------------
+    # Internals (caller holds the lock)
+    # ------------------------------------------------------------------
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+
+    def _evict(self) -> None:
+        while self._data and (
+            (self.max_entries is not None and len(self._data) > self.max_entries)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.stats.evictions += 1
@@ -27,27 +27,91 @@ class Settings(BaseSettings):
     MAX_TOKENS: int = 1024
     OVERLAP_TOKENS: int = 200
 
+    # ingestion pipeline (extract -> chunk -> title -> embed -> upsert)
+    INGEST_PIPELINE_QUEUE_SIZE: int = 4  # batches buffered between stages per file
+    INGEST_TEXT_BLOCK_CHARS: int = 65_536  # .txt/.md read in blocks of ~this size
+
     # title generation
     TITLE_GEN_ENABLED: bool = False
     TITLE_GEN_MODEL: str = "gemma-3-27b-it"
     TITLE_MAX_TOKENS: int = 50
+    TITLE_GEN_MAX_CONCURRENCY: int = 8  # title requests in flight per process
 
     # Speech to text
     SPEECH_TO_TEXT_MODEL_SIZE: str = "medium"
 
+    # GPU residency (reranker / speech-to-text share one device)
+    GPU_IDLE_EVICT_SEC: float = 60.0  # offload an idle resident model; 0 = after every call
+
     # embedding
     EMBEDDING_MODEL: str = "gemini-embedding-001"
     EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_BATCH_MAX_CHARS: int = 60_000  # ~15k tokens, under the request limit
+    EMBEDDING_BATCH_WINDOW_MS: float = 20.0  # wait for chunks of other files to pack
+    EMBEDDING_MAX_CONCURRENT_BATCHES: int = 4  # document batches in flight per process
     EMBEDDING_DIM: int = 768  # must match the actual dimension of the embedding model
 
+    # query embedding cache (in-process LRU + shared Redis tier)
+    QUERY_EMBEDDING_CACHE_ENABLED: bool = True
+    QUERY_EMBEDDING_CACHE_MAX_ENTRIES: int = 4096  # per-process LRU capacity
+    QUERY_EMBEDDING_CACHE_TTL_SEC: int = 86400  # 1 day, applies to both tiers
+    QUERY_EMBEDDING_CACHE_REDIS_ENABLED: bool = True
+
+    # query embedding micro-batching (coalesces concurrent cache misses)
+    QUERY_EMBEDDING_BATCH_WINDOW_MS: float = 3.0  # 0 disables coalescing
+    QUERY_EMBEDDING_BATCH_MAX_ITEMS: int = 32
+
+    # content-addressed chunk embedding cache (Redis; re-ingestion skips Gemini)
+    CHUNK_EMBEDDING_CACHE_ENABLED: bool = True
+    CHUNK_EMBEDDING_CACHE_TTL_SEC: int = 30 * 86400
+
     # hybrid search fusion parameters
     FUSION_METHOD: Literal["weighted", "dbsf", "rrf"] = "weighted"
     RRF_K: int = 2
     FUSION_ALPHA: float = 0.7
+    # "server": Milvus hybrid_search after embedding; "speculative": BM25 leg
+    # overlaps the embedding call and the legs are fused client-side.
+    HYBRID_EXECUTION_MODE: Literal["server", "speculative"] = "server"
+
+    # search_type="auto" query routing (see services/internal/query_router)
+    SEARCH_ROUTER_SPARSE_MAX_TOKENS: int = 3  # keyword queries: BM25 only
+    SEARCH_ROUTER_RARE_TOKEN_MIN_CHARS: int = 9
+    SEARCH_ROUTER_DENSE_MIN_TOKENS: int = 8  # sentences: dense only
+    SEARCH_ROUTER_DENSE_MIN_STOPWORD_RATIO: float = 0.3
 
     # reranking
     RERANKER_MODEL: str = "BAAI/bge-reranker-v2-m3"
+    RERANKER_BACKEND: Literal["torch", "onnx-int8"] = "torch"  # onnx-int8 runs on CPU
+    RERANKER_ONNX_QUANTIZATION: Literal["arm64", "avx2", "avx512", "avx512_vnni"] = (
+        "avx512_vnni"
+    )
+    RERANKER_ONNX_THREADS: int = 0  # intra-op threads; 0 = onnxruntime default
     OVERFETCH_MULTIPLIER: float = 2.0  # scales top_k by this factor before reranking
+    # candidate pruning before reranking (every rule is off by default)
+    RERANK_PRUNE_MIN_SCORE: dict[str, float] = {}  # search_type -> retrieval score floor
+    RERANK_PRUNE_MIN_SCORE_RATIO: float = 0.0  # keep hits >= ratio * best score
+    RERANK_PRUNE_DENSE_RADIUS: Optional[float] = None  # Milvus range search (COSINE)
+
+    # diversity-aware selection (MMR over chunk vectors + per-source cap)
+    DIVERSITY_ENABLED: bool = False
+    DIVERSITY_MMR_LAMBDA: float = 0.7  # 1 = retrieval order (cap only)
+    DIVERSITY_MAX_PER_SOURCE: int = 2  # chunks per source_filename; 0 = no cap
+    DIVERSITY_POOL_MULTIPLIER: float = 2.0  # candidates retrieved per selected hit
+    RERANK_MAX_BATCH_PAIRS: int = 256  # (query, candidate) pairs per scheduled batch
+    RERANK_MAX_WAIT_MS: float = 5.0  # how long a rerank job waits for batch-mates
+    RERANK_MODEL_BATCH_SIZE: int = 32  # forward-pass batch size inside the model
+    RERANK_SCORE_CACHE_ENABLED: bool = True  # reuse (query, doc_id) scores
+    RERANK_SCORE_CACHE_MAX_ENTRIES: int = 100_000
+    RERANK_SCORE_CACHE_TTL_SEC: int = 3600
+
+    # search result cache (invalidated by per-collection version counters)
+    SEARCH_CACHE_ENABLED: bool = True
+    SEARCH_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # per-process LRU budget
+    SEARCH_CACHE_TTL_SEC: int = 600
+    SEARCH_CACHE_REDIS_ENABLED: bool = False  # also share results across workers
+    # 0 = read the version on every lookup; > 0 = memoize, so other workers'
+    # writes may be missed (and stale cache entries served) for this long
+    COLLECTION_VERSION_REFRESH_SEC: float = 0.0
 
     # generation (RAG chat)
     GENERATION_MODEL: str = "gemma-3-27b-it"
@@ -55,7 +119,56 @@ class Settings(BaseSettings):
     GENERATION_TEMPERATURE: float = 0.7
     GENERATION_HISTORY_TURNS: int = 10  # max conversation turns sent to LLM
     GENERATION_RAG_TOP_K: int = 5  # docs to retrieve per query
-    GENERATION_SEARCH_TYPE: Literal["dense", "sparse", "hybrid"] = "hybrid"
+    GENERATION_SEARCH_TYPE: Literal["dense", "sparse", "hybrid", "auto"] = "hybrid"
+    CONTEXT_MERGE_ADJACENT_CHUNKS: bool = True  # stitch neighbours, drop overlap
+
+    # request deadlines (budget from DEADLINE_HEADER or the longest matching
+    # path prefix; optional work is shed when the budget runs low)
+    DEADLINE_HEADER: str = "X-Request-Deadline-Ms"
+    DEADLINE_ROUTE_DEFAULTS_MS: dict[str, float] = {
+        "/api/v1/search": 5_000.0,
+        "/api/v1/conversations": 60_000.0,
+        "/api/v1/chat/completions": 60_000.0,
+        "/chat/completions": 60_000.0,
+    }
+    DEADLINE_MAX_MS: float = 120_000.0  # cap on client-supplied budgets
+    DEADLINE_EMBED_RESERVE_MS: float = 300.0  # kept for Milvus; else sparse-only
+    DEADLINE_FULL_OVERFETCH_MS: float = 1_500.0  # below: rerank without overfetch
+    DEADLINE_RERANK_MIN_MS: float = 250.0  # below: skip reranking
+    DEADLINE_GENERATION_RESERVE_MS: float = 10_000.0  # chat: left for the LLM
+
+    # Gemini call resilience (hedging at the observed latency quantile,
+    # jittered retries of transient errors, circuit breaker)
+    PROVIDER_HEDGING_ENABLED: bool = True
+    PROVIDER_HEDGE_QUANTILE: float = 0.95
+    PROVIDER_HEDGE_MIN_DELAY_MS: float = 50.0
+    PROVIDER_HEDGE_MAX_DELAY_MS: float = 2_000.0  # also used until warmed up
+    PROVIDER_HEDGE_MIN_SAMPLES: int = 20  # latencies needed before adapting
+    PROVIDER_HEDGE_MAX_WORKERS: int = 32
+    PROVIDER_LATENCY_WINDOW: int = 256
+    PROVIDER_MAX_ATTEMPTS: int = 3  # 1 = no retries
+    PROVIDER_RETRY_BASE_MS: float = 100.0
+    PROVIDER_RETRY_MAX_MS: float = 2_000.0
+    PROVIDER_BREAKER_FAILURES: int = 5  # consecutive transient failures
+    PROVIDER_BREAKER_RESET_SEC: float = 30.0
+
+    # Gemini quota governor: token buckets (requests/minute) shared by all
+    # workers through Redis, plus per-process AIMD concurrency per model.
+    # Interactive calls (query embedding, generation) keep a reserve of each
+    # bucket and are admitted before waiting ingestion (batch) calls.
+    QUOTA_ENABLED: bool = True
+    QUOTA_REDIS_ENABLED: bool = True  # False = per-process buckets only
+    QUOTA_MODEL_RPM: dict[str, float] = {}  # model -> requests/min; unset = no limit
+    QUOTA_CALL_RPM: dict[str, float] = {}  # call name -> requests/min
+    QUOTA_BURST_SEC: float = 5.0  # bucket capacity, in seconds of rate
+    QUOTA_INTERACTIVE_RESERVE: float = 0.2  # bucket share batch calls cannot use
+    QUOTA_MAX_CONCURRENCY: int = 16  # AIMD ceiling per model and process
+    QUOTA_MIN_CONCURRENCY: int = 1
+    QUOTA_AIMD_DECREASE: float = 0.5  # limit multiplier on a 429
+    QUOTA_BATCH_SHARE: float = 0.75  # of the concurrency limit, for batch calls
+    QUOTA_COOLDOWN_MS: float = 1_000.0  # batch calls pause on all workers after a 429
+    QUOTA_MAX_WAIT_SEC: float = 60.0  # then QuotaExceededError
+    QUOTA_EXECUTOR_WORKERS: int = 32  # threads per priority for governed calls
 
     # milvus connection
     MILVUS_URI: str = "http://localhost:19530"
@@ -64,6 +177,13 @@ class Settings(BaseSettings):
     MILVUS_PASSWORD: str = ""
     MILVUS_TOKEN: str = ""
     MILVUS_TIMEOUT_SEC: float = 30.0
+    MILVUS_COLLECTION_STATE_TTL_SEC: float = 30.0  # cache of exists/loaded state
+    MILVUS_READ_POOL_SIZE: int = 4  # dedicated connections for searches/reads
+    MILVUS_WRITE_POOL_SIZE: int = 2  # dedicated connections for upserts/DDL
+    MILVUS_READ_TIMEOUT_SEC: float = 10.0
+    MILVUS_WRITE_TIMEOUT_SEC: float = 60.0
+    MILVUS_POOL_ACQUIRE_TIMEOUT_SEC: float = 30.0
+    MILVUS_POOL_HEALTHCHECK_SEC: float = 60.0  # ping connections idle longer than this
 
     # milvus index / search
     MILVUS_METRIC_TYPE: str = "COSINE"
@@ -102,6 +222,27 @@ class Settings(BaseSettings):
             raise ValueError("FUSION_ALPHA must be between 0 and 1.")
         return v
 
+    @field_validator("DIVERSITY_MMR_LAMBDA")
+    @classmethod
+    def mmr_lambda_must_be_between_0_and_1(cls, v: float) -> float:
+        if not (0.0 <= v <= 1.0):
+            raise ValueError("DIVERSITY_MMR_LAMBDA must be between 0 and 1.")
+        return v
+
+    @field_validator("RERANK_PRUNE_MIN_SCORE_RATIO")
+    @classmethod
+    def prune_ratio_must_be_between_0_and_1(cls, v: float) -> float:
+        if not (0.0 <= v <= 1.0):
+            raise ValueError("RERANK_PRUNE_MIN_SCORE_RATIO must be between 0 and 1.")
+        return v
+
+    @field_validator("QUOTA_INTERACTIVE_RESERVE", "QUOTA_BATCH_SHARE")
+    @classmethod
+    def quota_share_must_be_between_0_and_1(cls, v: float) -> float:
+        if not (0.0 <= v <= 1.0):
+            raise ValueError("Quota shares must be between 0 and 1.")
+        return v
+
     @field_validator("RRF_K")
     @classmethod
     def rrf_k_must_be_positive(cls, v: int) -> int:
@@ -122,6 +263,10 @@ class Settings(BaseSettings):
     def CHUNK_STORAGE_PATH(self) -> Path:
         return Path(self.LOCAL_STORAGE_PATH) / "chunks"
 
+    @property
+    def MODEL_STORAGE_PATH(self) -> Path:
+        return Path(self.LOCAL_STORAGE_PATH) / "models"
+
 
 settings = Settings()
 
@@ -0,0 +1,130 @@
+"""Per-request time budgets and graceful-degradation records.
+
+A :class:`Deadline` is attached to each request by ``middleware/deadline``
+(from the ``X-Request-Deadline-Ms`` header or a per-route default) and
+read by the RAG pipeline through a contextvar.  Stages consult the budget
+to shed optional work (reranking, overfetch, the dense leg of a search)
+and report each such decision with :func:`degrade`.  Decisions are
+returned to the client (``X-Degradations`` header, response metadata) and
+counted on ``pipeline_degradations_total``.
+
+Without an active deadline (background jobs, tests calling services
+directly) every helper is a no-op and nothing is ever shed.
+"""
+
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Iterator, Optional, TypeVar
+
+from app.core.logging import logger
+from app.core.metrics import DEADLINE_EXCEEDED, PIPELINE_DEGRADATIONS
+
+T = TypeVar("T")
+
+
+class Deadline:
+    """Absolute expiry time plus the degradations decided under it."""
+
+    def __init__(
+        self, budget_ms: float, *, degradations: Optional[list[str]] = None
+    ) -> None:
+        self.budget_ms = budget_ms
+        self._expires_at = time.monotonic() + budget_ms / 1000
+        # Shared with child deadlines so every decision ends up on the request.
+        self.degradations = degradations if degradations is not None else []
+        self.shed_count = 0  # decisions made under this deadline (not deduped)
+
+    def remaining_ms(self) -> float:
+        return max(0.0, (self._expires_at - time.monotonic()) * 1000)
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self._expires_at
+
+    def child(self, reserve_ms: float) -> "Deadline":
+        """Deadline *reserve_ms* earlier than this one (same degradations)."""
+        return Deadline(
+            self.remaining_ms() - reserve_ms, degradations=self.degradations
+        )
+
+
+deadline_ctx: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar(
+    "deadline", default=None
+)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return deadline_ctx.get()
+
+
+def remaining_ms() -> Optional[float]:
+    """Milliseconds left on the active deadline (``None`` = unbounded)."""
+    deadline = deadline_ctx.get()
+    return None if deadline is None else deadline.remaining_ms()
+
+
+def degrade(decision: str) -> None:
+    """Record that optional work was shed to stay within the deadline."""
+    deadline = deadline_ctx.get()
+    if deadline is None:
+        return
+    deadline.shed_count += 1
+    if decision not in deadline.degradations:
+        deadline.degradations.append(decision)
+    PIPELINE_DEGRADATIONS.labels(decision).inc()
+    logger.info(
+        f"Degraded: {decision} ({deadline.remaining_ms():.0f}ms left)",
+        extra={"degradation": decision},
+    )
+
+
+def degradations() -> list[str]:
+    """Decisions recorded on the active deadline so far."""
+    deadline = deadline_ctx.get()
+    return list(deadline.degradations) if deadline is not None else []
+
+
+def shed_count() -> int:
+    """Number of :func:`degrade` calls under the active deadline."""
+    deadline = deadline_ctx.get()
+    return deadline.shed_count if deadline is not None else 0
+
+
+@contextmanager
+def reserve(ms: float) -> Iterator[None]:
+    """Run the block under a deadline *ms* earlier than the active one.
+
+    Lets an early stage (retrieval) leave budget for a later one
+    (generation).  No-op when no deadline is active.
+    """
+    deadline = deadline_ctx.get()
+    if deadline is None:
+        yield
+        return
+    token = deadline_ctx.set(deadline.child(ms))
+    try:
+        yield
+    finally:
+        deadline_ctx.reset(token)
+
+
+async def run_within(
+    aw: Awaitable[T], *, stage: str, reserve_ms: float = 0.0, shield: bool = False
+) -> T:
+    """Await *aw*, giving up when the deadline (minus *reserve_ms*) passes.
+
+    Raises ``TimeoutError`` when the budget runs out; the caller decides
+    how to degrade.  With *shield*, the underlying work keeps running after
+    a timeout so its result still lands in the caches.
+    """
+    deadline = deadline_ctx.get()
+    if deadline is None:
+        return await aw
+    timeout = max(0.0, deadline.remaining_ms() - reserve_ms) / 1000
+    try:
+        return await asyncio.wait_for(asyncio.shield(aw) if shield else aw, timeout)
+    except TimeoutError:
+        DEADLINE_EXCEEDED.labels(stage).inc()
+        raise
@@ -1,11 +1,150 @@
-"""Shared GPU lock for serialising CUDA access across services.
+"""Shared GPU lock and model residency manager.
 
 Both the reranker (CrossEncoder) and speech-to-text (faster-whisper) models
 need exclusive GPU access when running on a 4 GB VRAM device.  This module
 provides a single ``threading.Lock`` that both services acquire before
-moving their model onto the GPU.
+using the GPU, plus a :class:`GpuResidency` manager built on top of it.
+
+Residency:
+    Instead of loading and evicting its weights on every call, a service
+    asks the manager to make it the *resident* model.  The resident stays on
+    the device between calls and is only offloaded when
+
+    - another service needs the GPU (it is evicted before the newcomer
+      loads), or
+    - it has been idle for ``GPU_IDLE_EVICT_SEC`` seconds.
+
+    ``GPU_IDLE_EVICT_SEC=0`` restores the old evict-after-every-call
+    behaviour.
 """
 
 import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import GPU_LOCK_HOLD_SECONDS, GPU_LOCK_WAIT_SECONDS
 
 gpu_lock = threading.Lock()
+
+
+class GpuResidency:
+    """Negotiate which model occupies the GPU.
+
+    Args:
+        lock: Lock serialising all GPU work.
+        idle_timeout_sec: Offload the resident model after this much idle
+            time (``0`` = offload right after every use).
+    """
+
+    def __init__(self, lock: threading.Lock, idle_timeout_sec: float) -> None:
+        self._lock = lock
+        self.idle_timeout_sec = idle_timeout_sec
+        self._resident: Optional[str] = None
+        self._unload: Optional[Callable[[], None]] = None
+        self._last_used = 0.0
+        self._timer: Optional[threading.Timer] = None
+        self._timer_lock = threading.Lock()
+        self.stats = {"loads": 0, "evictions_idle": 0, "evictions_preempted": 0}
+
+    @property
+    def resident(self) -> Optional[str]:
+        return self._resident
+
+    @contextmanager
+    def use(
+        self,
+        owner: str,
+        *,
+        load: Callable[[], None],
+        unload: Callable[[], None],
+    ) -> Iterator[float]:
+        """Hold the GPU exclusively with *owner*'s model resident.
+
+        *load* runs only if *owner* is not already resident; any other
+        resident model is unloaded first.  *unload* is remembered and called
+        later, on idle timeout or when another owner needs the device.
+
+        Yields the time spent waiting for the GPU lock, in milliseconds.
+        Wait and hold times are also observed on the ``gpu_lock_*`` metrics.
+        """
+        start = time.perf_counter()
+        with self._lock:
+            acquired = time.perf_counter()
+            wait_ms = (acquired - start) * 1000
+            GPU_LOCK_WAIT_SECONDS.labels(owner).observe(acquired - start)
+            if self._resident != owner:
+                if self._resident is not None:
+                    self._evict_locked("preempted")
+                load()
+                self._resident = owner
+                self._unload = unload
+                self.stats["loads"] += 1
+                logger.debug(f"GPU residency: '{owner}' loaded")
+            try:
+                yield wait_ms
+            finally:
+                self._last_used = time.monotonic()
+                if self.idle_timeout_sec <= 0:
+                    self._evict_locked("idle")
+                GPU_LOCK_HOLD_SECONDS.labels(owner).observe(
+                    time.perf_counter() - acquired
+                )
+
+        if self._resident is not None:
+            self._arm_idle_timer(self.idle_timeout_sec)
+
+    def evict(self) -> None:
+        """Offload the resident model now (blocks until the GPU is free)."""
+        with self._lock:
+            if self._resident is not None:
+                self._evict_locked("idle")
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"resident": self._resident, **self.stats}
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _evict_locked(self, reason: str) -> None:
+        owner, unload = self._resident, self._unload
+        self._resident = None
+        self._unload = None
+        if unload is not None:
+            try:
+                unload()
+            except Exception as exc:
+                logger.error(f"GPU residency: failed to unload '{owner}': {exc}")
+        self.stats[f"evictions_{reason}"] += 1
+        logger.debug(f"GPU residency: '{owner}' offloaded ({reason})")
+
+    def _arm_idle_timer(self, delay: float) -> None:
+        with self._timer_lock:
+            if self._timer is not None:
+                return
+            timer = threading.Timer(delay, self._on_idle)
+            timer.daemon = True
+            self._timer = timer
+            timer.start()
+
+    def _on_idle(self) -> None:
+        with self._timer_lock:
+            self._timer = None
+        if not self._lock.acquire(blocking=False):
+            return  # in use; the holder re-arms the timer on release
+        try:
+            if self._resident is None:
+                return
+            idle = time.monotonic() - self._last_used
+            if idle >= self.idle_timeout_sec:
+                self._evict_locked("idle")
+                return
+        finally:
+            self._lock.release()
+        self._arm_idle_timer(self.idle_timeout_sec - idle)
+
+
+gpu_residency = GpuResidency(gpu_lock, settings.GPU_IDLE_EVICT_SEC)
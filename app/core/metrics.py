@@ -0,0 +1,378 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Counters, gauges and fixed-bucket histograms with optional labels.  The
+hot path is deliberately minimal:
+
+- Label children are created once (under a lock) and cached; callers that
+  observe often should bind them up front, e.g.
+  ``_SEARCH = MILVUS_OP_SECONDS.labels("search")``.
+- ``inc`` / ``observe`` are plain attribute and list-slot updates with no
+  locks and no allocations.  They rely on the GIL; an increment racing
+  another on the same slot can very rarely be lost, which is acceptable
+  for monitoring.
+- Values owned by other modules (cache hit ratios, pool occupancy, ...)
+  are read only at scrape time through :class:`GaugeFunc` callbacks.
+
+``render()`` produces the ``GET /metrics`` payload.
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterator, Sequence
+
+# Seconds; covers sub-millisecond cache hits up to long LLM generations.
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)  # fmt: skip
+
+_registry: list["_Metric"] = []
+_registry_lock = threading.Lock()
+
+
+def _fmt(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _new_child(self) -> object:
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Return the child for *values* (created on first use)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    type_name = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in list(self._children.items()):
+            labels = _label_str(self.labelnames, values)
+            yield f"{self.name}{labels} {_fmt(child.value)}"
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    type_name = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in list(self._children.items()):
+            labels = _label_str(self.labelnames, values)
+            yield f"{self.name}{labels} {_fmt(child.value)}"
+
+
+class GaugeFunc(_Metric):
+    """Gauge whose samples are computed at scrape time.
+
+    *fn* returns ``{label_values: value}``; use ``{(): value}`` when the
+    gauge has no labels.
+    """
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        fn: Callable[[], dict[tuple[str, ...], float]],
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._fn = fn
+
+    def _samples(self) -> Iterator[str]:
+        for values, value in self._fn().items():
+            labels = _label_str(self.labelnames, values)
+            yield f"{self.name}{labels} {_fmt(value)}"
+
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "_counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)  # last slot: +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect_left(self._bounds, value)] += 1
+        self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of the enclosed block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+
+class Histogram(_Metric):
+    """Distribution over fixed, cumulative ``le`` buckets."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        self._bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self._bounds)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in list(self._children.items()):
+            counts = list(child._counts)
+            cumulative = 0
+            for bound, count in zip((*self._bounds, math.inf), counts):
+                cumulative += count
+                le = _label_str(self.labelnames, values, f'le="{_fmt(bound)}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            labels = _label_str(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_fmt(child.sum)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+@contextmanager
+def observe_call(
+    seconds: _HistogramChild, errors: _CounterChild | None = None
+) -> Iterator[None]:
+    """Observe the block's duration on *seconds*; count exceptions on *errors*."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        if errors is not None:
+            errors.inc()
+        raise
+    finally:
+        seconds.observe(time.perf_counter() - start)
+
+
+def render() -> str:
+    """Render every registered metric in Prometheus text format."""
+    with _registry_lock:
+        metrics = list(_registry)
+    return "\n".join(m.render() for m in metrics) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Application metrics (observed at their call sites)
+# ---------------------------------------------------------------------------
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template (until the body is fully sent).",
+    ("method", "route", "status"),
+)
+EMBEDDING_SECONDS = Histogram(
+    "embedding_request_duration_seconds",
+    "Latency of embedding API calls.",
+    ("kind",),  # query | document
+)
+EMBEDDING_ERRORS = Counter(
+    "embedding_errors_total", "Failed embedding API calls.", ("kind",)
+)
+LLM_SECONDS = Histogram(
+    "llm_request_duration_seconds",
+    "Latency of LLM generation calls (streams: until the last token).",
+    ("mode",),  # invoke | stream
+)
+LLM_TTFT_SECONDS = Histogram(
+    "llm_time_to_first_token_seconds", "Time to the first streamed LLM token."
+)
+LLM_ERRORS = Counter("llm_errors_total", "Failed LLM generation calls.", ("mode",))
+MILVUS_OP_SECONDS = Histogram(
+    "milvus_operation_duration_seconds",
+    "Latency of Milvus data operations.",
+    ("op",),  # search | hybrid_search | query | upsert | delete
+)
+RERANK_BATCH_JOBS = Histogram(
+    "rerank_batch_jobs",
+    "Rerank jobs (requests) packed into one model batch.",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+RERANK_BATCH_PAIRS = Histogram(
+    "rerank_batch_pairs",
+    "(query, candidate) pairs scored per model batch.",
+    buckets=(8, 16, 32, 64, 128, 256, 512, 1024),
+)
+RERANK_PRUNED_CANDIDATES = Histogram(
+    "rerank_pruned_candidates",
+    "Candidates dropped by the pruning rules before reranking, per search.",
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100),
+)
+GPU_LOCK_WAIT_SECONDS = Histogram(
+    "gpu_lock_wait_seconds", "Time spent waiting for the GPU lock.", ("owner",)
+)
+GPU_LOCK_HOLD_SECONDS = Histogram(
+    "gpu_lock_hold_seconds", "Time the GPU lock was held.", ("owner",)
+)
+INGEST_FILES = Counter(
+    "ingest_files_total",
+    "Ingested files by outcome; rate() gives files/sec.",
+    ("status",),  # completed | failed
+)
+INGEST_CHUNKS = Counter(
+    "ingest_chunks_total", "Chunks written to Milvus; rate() gives chunks/sec."
+)
+INGEST_JOB_SECONDS = Histogram(
+    "ingest_job_duration_seconds", "Wall time of ingestion jobs."
+)
+INGEST_JOBS = Gauge(
+    "ingest_jobs",
+    "Ingestion jobs by state (queued = accepted, not started yet).",
+    ("state",),  # queued | running
+)
+PIPELINE_DEGRADATIONS = Counter(
+    "pipeline_degradations_total",
+    "Optional work shed to meet a request deadline.",
+    ("decision",),  # rerank_skipped | overfetch_reduced | sparse_fallback | ...
+)
+DEADLINE_EXCEEDED = Counter(
+    "deadline_exceeded_total",
+    "Stages cut short because the request deadline ran out.",
+    ("stage",),
+)
+PROVIDER_HEDGES = Counter(
+    "provider_hedges_total",
+    "Duplicate provider requests sent for slow calls, and how many won.",
+    ("call", "event"),  # event: fired | won
+)
+PROVIDER_RETRIES = Counter(
+    "provider_retries_total",
+    "Provider calls retried after a transient error.",
+    ("call",),
+)
+SEARCH_ROUTES = Counter(
+    "search_routes_total",
+    "search_type=\"auto\" queries by chosen search type and classifier rule.",
+    ("route", "reason"),
+)
+SEARCH_ROUTE_SAVED_SECONDS = Counter(
+    "search_route_embedding_saved_seconds_total",
+    "Estimated query-embedding time skipped by routing to sparse search.",
+)
+CONTEXT_TOKENS_SAVED = Counter(
+    "llm_context_tokens_saved_total",
+    "Estimated prompt tokens saved by merging overlapping adjacent chunks.",
+)
+QUOTA_WAIT_SECONDS = Histogram(
+    "quota_wait_seconds",
+    "Time provider calls waited for quota tokens and a concurrency slot.",
+    ("call", "priority"),  # priority: interactive | batch
+)
+QUOTA_RATE_LIMITED = Counter(
+    "quota_rate_limited_total",
+    "Provider calls rejected with 429 / RESOURCE_EXHAUSTED, per model.",
+    ("model",),
+)
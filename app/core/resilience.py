@@ -0,0 +1,396 @@
+"""Hedging, retries and circuit breaking for blocking provider calls.
+
+Google API latency has a long tail: most embedding and generation calls
+return quickly, but a few stall for seconds and hold up the whole request.
+:class:`ResilientCall` wraps such a call (it runs in an executor thread)
+and combines:
+
+- **Hedging** — if the call has not returned after the observed
+  ``PROVIDER_HEDGE_QUANTILE`` latency, an identical request is sent and
+  the first to finish wins.  The threshold adapts from a sliding window
+  of recorded latencies (clamped to ``[min, max]``; ``max`` until enough
+  samples are in).  The losing call runs to completion in the background
+  and its result is discarded.
+- **Retries** — transient errors (timeouts, 429, 5xx) are retried with
+  full-jitter exponential backoff, unless the request deadline
+  (``core/deadline``) would pass before the backoff ends.
+- **Circuit breaker** — after ``PROVIDER_BREAKER_FAILURES`` consecutive
+  transient failures, calls fail fast with :class:`CircuitOpenError` for
+  ``PROVIDER_BREAKER_RESET_SEC``; then one trial call decides whether to
+  close it again.
+
+Hedges fired and won, retries and breaker trips are counted per call name
+(``stats`` and the ``provider_*`` metrics).
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Optional, TypeVar
+
+from app.core.config import settings
+from app.core.deadline import remaining_ms
+from app.core.logging import logger
+from app.core.metrics import PROVIDER_HEDGES, PROVIDER_RETRIES
+
+T = TypeVar("T")
+
+_TRANSIENT_STATUS = {408, 429, 500, 502, 503, 504}
+_TRANSIENT_NAMES = {
+    "DeadlineExceeded",
+    "InternalServerError",
+    "ModelRateLimitError",  # langchain_core; base of GoogleRateLimitError
+    "ResourceExhausted",
+    "ServiceUnavailable",
+    "TooManyRequests",
+}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+def _error_chain(exc: BaseException) -> list[BaseException]:
+    """*exc* and the errors it was raised from.
+
+    LangChain's Gemini wrappers raise a bare ``GoogleGenerativeAIError``
+    ``from`` the ``google.genai`` ``ClientError``/``ServerError`` that
+    carries the status code, so the cause has to be inspected too.
+    """
+    chain: list[BaseException] = []
+    current: Optional[BaseException] = exc
+    while current is not None and all(current is not seen for seen in chain):
+        chain.append(current)
+        current = current.__cause__ or (
+            None if current.__suppress_context__ else current.__context__
+        )
+    return chain
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    for attr in ("code", "status_code"):
+        code = getattr(exc, attr, None)
+        code = getattr(code, "value", code)  # grpc/http status enums
+        if isinstance(code, int):
+            return code
+    return None
+
+
+def _has_class_named(exc: BaseException, names: set[str]) -> bool:
+    return any(cls.__name__ in names for cls in type(exc).__mro__)
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Whether *exc* (or an error it was raised from) is retryable.
+
+    Matches by status code or class name (including base classes) so that
+    neither the Google SDK nor the LangChain wrappers have to be imported
+    here.
+    """
+    for err in _error_chain(exc):
+        if isinstance(err, (TimeoutError, ConnectionError)):
+            return True
+        if _has_class_named(err, _TRANSIENT_NAMES):
+            return True
+        if _status_code(err) in _TRANSIENT_STATUS:
+            return True
+    return False
+
+
+_RATE_LIMITED_NAMES = {"ModelRateLimitError", "ResourceExhausted", "TooManyRequests"}
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """Whether *exc* (or an error it was raised from) is a quota rejection
+    (429 / ``RESOURCE_EXHAUSTED``)."""
+    return any(
+        _has_class_named(err, _RATE_LIMITED_NAMES) or _status_code(err) == 429
+        for err in _error_chain(exc)
+    )
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open trial."""
+
+    def __init__(self, failure_threshold: int, reset_sec: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_sec = reset_sec
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._trial_thread: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_sec:
+                return False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True  # half-open: let one call through
+            self._trial_thread = threading.get_ident()
+            return True
+
+    def release_trial(self) -> None:
+        """End this thread's half-open trial without a verdict.
+
+        For trials that ended in an error that says nothing about the
+        provider's health; the next call after this becomes the new trial.
+        """
+        with self._lock:
+            if self._trial_in_flight and self._trial_thread == threading.get_ident():
+                self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Count a failure; return ``True`` if this opened the circuit."""
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or (
+                self._opened_at is None and self._failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+                return True
+            return False
+
+
+class LatencyWindow:
+    """Sliding window of recent call latencies (seconds)."""
+
+    def __init__(self, size: int) -> None:
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+@dataclass
+class ResilienceStats:
+    """Counters of one wrapped provider call."""
+
+    calls: int = 0
+    failures: int = 0
+    retries: int = 0
+    hedges_fired: int = 0
+    hedges_won: int = 0
+    breaker_opened: int = 0
+    breaker_rejected: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        fired = self.hedges_fired
+        return {
+            **asdict(self),
+            "hedge_rate": round(fired / self.calls, 4) if self.calls else 0.0,
+            "hedge_win_rate": round(self.hedges_won / fired, 4) if fired else 0.0,
+        }
+
+
+_pool_lock = threading.Lock()
+_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=settings.PROVIDER_HEDGE_MAX_WORKERS,
+                thread_name_prefix="provider-hedge",
+            )
+        return _pool
+
+
+_registry: dict[str, "ResilientCall"] = {}
+
+
+class ResilientCall:
+    """Wrap blocking calls to one provider endpoint.
+
+    Args:
+        name: Label for stats, metrics and logs (e.g. ``"embed_query"``).
+        hedge: Send a duplicate request when the first one is slow.
+        Remaining keyword arguments default to the ``PROVIDER_*`` settings.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        hedge: bool = True,
+        hedge_quantile: Optional[float] = None,
+        hedge_min_delay_ms: Optional[float] = None,
+        hedge_max_delay_ms: Optional[float] = None,
+        hedge_min_samples: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        retry_base_ms: Optional[float] = None,
+        retry_max_ms: Optional[float] = None,
+        breaker_failures: Optional[int] = None,
+        breaker_reset_sec: Optional[float] = None,
+    ) -> None:
+        def pick(value, default):
+            return default if value is None else value
+
+        self.name = name
+        self.hedge = hedge and settings.PROVIDER_HEDGING_ENABLED
+        self.hedge_quantile = pick(hedge_quantile, settings.PROVIDER_HEDGE_QUANTILE)
+        self.hedge_min_delay = (
+            pick(hedge_min_delay_ms, settings.PROVIDER_HEDGE_MIN_DELAY_MS) / 1000
+        )
+        self.hedge_max_delay = (
+            pick(hedge_max_delay_ms, settings.PROVIDER_HEDGE_MAX_DELAY_MS) / 1000
+        )
+        self.hedge_min_samples = pick(
+            hedge_min_samples, settings.PROVIDER_HEDGE_MIN_SAMPLES
+        )
+        self.max_attempts = max(1, pick(max_attempts, settings.PROVIDER_MAX_ATTEMPTS))
+        self.retry_base = pick(retry_base_ms, settings.PROVIDER_RETRY_BASE_MS) / 1000
+        self.retry_max = pick(retry_max_ms, settings.PROVIDER_RETRY_MAX_MS) / 1000
+        self.breaker = CircuitBreaker(
+            pick(breaker_failures, settings.PROVIDER_BREAKER_FAILURES),
+            pick(breaker_reset_sec, settings.PROVIDER_BREAKER_RESET_SEC),
+        )
+        self.latencies = LatencyWindow(settings.PROVIDER_LATENCY_WINDOW)
+        self.stats = ResilienceStats()
+        self._lock = threading.Lock()
+        self._hedges_fired = PROVIDER_HEDGES.labels(name, "fired")
+        self._hedges_won = PROVIDER_HEDGES.labels(name, "won")
+        self._retries = PROVIDER_RETRIES.labels(name)
+        _registry[name] = self
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait before hedging: the observed quantile, clamped."""
+        if len(self.latencies) < self.hedge_min_samples:
+            return self.hedge_max_delay
+        observed = self.latencies.quantile(self.hedge_quantile) or 0.0
+        return min(self.hedge_max_delay, max(self.hedge_min_delay, observed))
+
+    def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``fn(*args, **kwargs)`` with hedging, retries and the breaker."""
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("breaker_rejected")
+            raise CircuitOpenError(f"{self.name}: circuit open after repeated failures")
+
+        try:
+            return self._call_with_retries(fn, args, kwargs)
+        finally:
+            # A trial is settled by record_success/record_failure; any other
+            # exit (non-transient error) must not leave it in flight forever.
+            self.breaker.release_trial()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _call_with_retries(self, fn: Callable[..., T], args: tuple, kwargs: dict) -> T:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                result = self._attempt(fn, args, kwargs)
+            except Exception as exc:
+                if not is_transient(exc):
+                    self._count("failures")
+                    raise
+                if self.breaker.record_failure():
+                    self._count("breaker_opened")
+                    logger.warning(f"{self.name}: circuit opened ({exc})")
+                if attempt == self.max_attempts or self.breaker.is_open:
+                    self._count("failures")
+                    raise
+                delay = random.uniform(
+                    0, min(self.retry_max, self.retry_base * 2 ** (attempt - 1))
+                )
+                left_ms = remaining_ms()
+                if left_ms is not None and delay * 1000 >= left_ms:
+                    self._count("failures")
+                    logger.info(
+                        f"{self.name}: transient error ({exc}); no retry, "
+                        f"{left_ms:.0f}ms left before the deadline"
+                    )
+                    raise
+                self._count("retries")
+                self._retries.inc()
+                logger.info(
+                    f"{self.name}: transient error ({exc}); "
+                    f"retry {attempt}/{self.max_attempts - 1} in {delay * 1000:.0f}ms"
+                )
+                time.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+        raise AssertionError("unreachable")
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            setattr(self.stats, field, getattr(self.stats, field) + 1)
+
+    def _timed(
+        self, start: float, fn: Callable[..., T], args: tuple, kwargs: dict
+    ) -> T:
+        # *start* is taken at submission, so time queued for a hedge-pool
+        # thread counts: the samples are the latency the caller sees.
+        result = fn(*args, **kwargs)
+        self.latencies.add(time.perf_counter() - start)
+        return result
+
+    def _attempt(self, fn: Callable[..., T], args: tuple, kwargs: dict) -> T:
+        if not self.hedge:
+            return self._timed(time.perf_counter(), fn, args, kwargs)
+
+        pool = _get_pool()
+        primary = pool.submit(self._timed, time.perf_counter(), fn, args, kwargs)
+        done, _ = wait([primary], timeout=self.hedge_delay())
+        if done:
+            return primary.result()
+
+        self._count("hedges_fired")
+        self._hedges_fired.inc()
+        hedge = pool.submit(self._timed, time.perf_counter(), fn, args, kwargs)
+
+        pending: set[Future] = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count("hedges_won")
+                        self._hedges_won.inc()
+                    return future.result()
+                error = future.exception()
+        raise error  # both copies failed
+
+
+def get_resilience_stats() -> dict[str, dict[str, Any]]:
+    """Return hedge/retry/breaker counters of every wrapped provider call."""
+    return {
+        name: {
+            **call.stats.as_dict(),
+            "hedge_delay_ms": round(call.hedge_delay() * 1000, 1),
+            "circuit_open": call.breaker.is_open,
+        }
+        for name, call in _registry.items()
+    }
@@ -0,0 +1,93 @@
+"""Per-request stage timings (span-style tracing).
+
+A :class:`Trace` is attached to each HTTP request by
+``middleware/tracing``; service code marks stages with ``span(name)`` or
+reports externally measured durations with ``record(name, ms)``.  When no
+trace is active (background jobs, tests calling services directly) both
+are no-ops apart from the clock reads.
+
+Durations of repeated stages are summed, so a stage run for two queries
+(or two concurrent legs) reports its total time.  The collected timings
+are emitted as a ``Server-Timing`` header and one structured log line keyed
+by ``request_id``.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from app.core.logging import logger
+
+
+class Trace:
+    """Ordered stage durations of one request."""
+
+    def __init__(self, request_id: str, name: str = "") -> None:
+        self.request_id = request_id
+        self.name = name
+        self._start = time.perf_counter()
+        self._durations: dict[str, float] = {}
+
+    def add(self, stage: str, duration_ms: float) -> None:
+        self._durations[stage] = self._durations.get(stage, 0.0) + duration_ms
+
+    def merge(self, other: "Trace") -> None:
+        """Add every stage of *other* (e.g. a shared batch) to this trace."""
+        for stage, duration_ms in other._durations.items():
+            self.add(stage, duration_ms)
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def durations(self) -> dict[str, float]:
+        """Stage -> total milliseconds, in first-seen order."""
+        return {k: round(v, 2) for k, v in self._durations.items()}
+
+    def server_timing(self) -> str:
+        """Render a ``Server-Timing`` header value (stages so far + total)."""
+        parts = [f"{k};dur={v:.1f}" for k, v in self._durations.items()]
+        parts.append(f"total;dur={self.elapsed_ms:.1f}")
+        return ", ".join(parts)
+
+    def log(self, **fields: Any) -> None:
+        """Emit the trace as one structured log line."""
+        durations = self.durations()
+        total_ms = round(self.elapsed_ms, 2)
+        summary = " ".join(f"{k}={v:.1f}ms" for k, v in durations.items())
+        logger.info(
+            f"trace {self.name} total={total_ms:.1f}ms {summary}".rstrip(),
+            extra={
+                "request_id": self.request_id,
+                "stages_ms": durations,
+                "total_ms": total_ms,
+                **fields,
+            },
+        )
+
+
+trace_ctx: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar(
+    "trace", default=None
+)
+
+
+def current_trace() -> Optional[Trace]:
+    return trace_ctx.get()
+
+
+def record(stage: str, duration_ms: float) -> None:
+    """Add an externally measured duration to the active trace."""
+    trace = trace_ctx.get()
+    if trace is not None:
+        trace.add(stage, duration_ms)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time the enclosed block as *stage* on the active trace."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, (time.perf_counter() - start) * 1000)
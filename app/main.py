@@ -3,18 +3,26 @@
 from fastapi import FastAPI
 
 from app.api import router
+from app.core.config import settings
+from app.api.v1.endpoints.metrics import router as metrics_router
 from app.api.v1.endpoints.openai_compat import router as openai_router
 from app.middleware import (
     ApiError,
     api_error_handler,
     auth_middleware,
+    deadline_middleware,
     rate_limit_middleware,
     request_context_middleware,
+    tracing_middleware,
     unhandled_error_handler,
 )
+from app.services.internal.rerank import check_backend
 
 
 def create_app() -> FastAPI:
+    # Fail fast on a reranker backend whose optional packages are missing.
+    check_backend(settings.RERANKER_BACKEND)
+
     application = FastAPI(
         title="Audio RAG Service",
         version="1.0.0",
@@ -22,10 +30,14 @@ def create_app() -> FastAPI:
     )
 
     # Middleware executes in reverse registration order.
-    # request_context first (outermost), then rate-limit, then auth (innermost).
+    # request_context first (outermost), then rate-limit, then auth, then
+    # tracing (so stage timings are keyed by the request id), then deadline
+    # (innermost, so the budget starts after auth and rate limiting).
+    application.middleware("http")(deadline_middleware)
+    application.middleware("http")(tracing_middleware)
     # application.middleware("http")(auth_middleware)
     # application.middleware("http")(rate_limit_middleware)
-    # application.middleware("http")(request_context_middleware)
+    application.middleware("http")(request_context_middleware)
 
     # Exception handlers
     application.add_exception_handler(ApiError, api_error_handler)  # type: ignore[arg-type]
@@ -34,6 +46,7 @@ def create_app() -> FastAPI:
     # Routers
     application.include_router(router)
     application.include_router(openai_router)  # /v1/models, /v1/chat/completions
+    application.include_router(metrics_router)  # /metrics (Prometheus scrape)
 
     return application
 
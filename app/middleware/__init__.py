@@ -7,16 +7,20 @@ from .errors import (
     unhandled_error_handler,
 )
 from .auth import auth_middleware
+from .deadline import deadline_middleware
 from .rate_limit import rate_limit_middleware, rate_limiter
 from .request_context import request_context_middleware
+from .tracing import tracing_middleware
 
 __all__ = [
     "ApiError",
     "RateLimitError",
     "api_error_handler",
     "auth_middleware",
+    "deadline_middleware",
     "rate_limit_middleware",
     "rate_limiter",
     "request_context_middleware",
+    "tracing_middleware",
     "unhandled_error_handler",
 ]
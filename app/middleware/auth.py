@@ -10,7 +10,9 @@ from starlette.responses import JSONResponse
 _STATIC_API_KEY: str = os.getenv("API_KEY", "dev-secret-key")
 
 # Paths that bypass authentication.
-_PUBLIC_PATHS: frozenset[str] = frozenset({"/docs", "/redoc", "/openapi.json"})
+_PUBLIC_PATHS: frozenset[str] = frozenset(
+    {"/docs", "/redoc", "/openapi.json", "/metrics"}
+)
 _PUBLIC_PREFIXES: tuple[str, ...] = ("/api/v1/health", "/api/v1/ready")
 
 
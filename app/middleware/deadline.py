@@ -0,0 +1,50 @@
+"""Attaches a request deadline and reports the degradations it caused.
+
+The budget comes from the ``DEADLINE_HEADER`` request header (milliseconds,
+capped at ``DEADLINE_MAX_MS``) or, failing that, from the longest
+``DEADLINE_ROUTE_DEFAULTS_MS`` prefix matching the path.  Routes without a
+budget run unbounded.  Work shed to meet the deadline is listed in the
+``X-Degradations`` response header.
+"""
+
+from __future__ import annotations
+
+from fastapi import Request
+
+from app.core.config import settings
+from app.core.deadline import Deadline, deadline_ctx
+
+
+def _budget_ms(request: Request) -> float | None:
+    header = request.headers.get(settings.DEADLINE_HEADER)
+    if header:
+        try:
+            value = float(header)
+        except ValueError:
+            value = 0.0
+        if value > 0:
+            return min(value, settings.DEADLINE_MAX_MS)
+
+    path = request.url.path
+    matches = [p for p in settings.DEADLINE_ROUTE_DEFAULTS_MS if path.startswith(p)]
+    if not matches:
+        return None
+    budget = settings.DEADLINE_ROUTE_DEFAULTS_MS[max(matches, key=len)]
+    return budget if budget > 0 else None
+
+
+async def deadline_middleware(request: Request, call_next):
+    budget = _budget_ms(request)
+    if budget is None:
+        return await call_next(request)
+
+    deadline = Deadline(budget)
+    token = deadline_ctx.set(deadline)
+    try:
+        response = await call_next(request)
+    finally:
+        deadline_ctx.reset(token)
+
+    if deadline.degradations:
+        response.headers["X-Degradations"] = ",".join(deadline.degradations)
+    return response
@@ -0,0 +1,64 @@
+"""Attaches a stage-timing trace to each request.
+
+Stages recorded before the response starts are sent in the
+``Server-Timing`` header.  The structured ``trace`` log line is written
+and the request latency is observed on ``http_request_duration_seconds``
+once the body has been fully sent.  That way streamed responses also report
+time-to-first-token, generation and persistence.
+"""
+
+from __future__ import annotations
+
+from fastapi import Request
+
+from app.core.logging import request_id_ctx
+from app.core.metrics import HTTP_REQUEST_SECONDS
+from app.core.tracing import Trace, trace_ctx
+
+
+def _route_template(request: Request) -> str:
+    """Matched path with parameters folded back (``.../{conversation_id}``).
+
+    Labelling by template rather than raw path keeps the metric's
+    cardinality bounded; unmatched paths (404s) share one label.  The
+    template is rebuilt from the path params because routes of included
+    routers do not carry their full prefix on every FastAPI version.
+    """
+    if request.scope.get("route") is None:
+        return "unmatched"
+    by_value = {str(v): f"{{{k}}}" for k, v in request.path_params.items()}
+    segments = request.url.path.split("/")
+    return "/".join(by_value.get(seg, seg) for seg in segments)
+
+
+def _finish(request: Request, trace: Trace, status_code: int) -> None:
+    trace.log(status_code=status_code)
+    HTTP_REQUEST_SECONDS.labels(
+        request.method, _route_template(request), str(status_code)
+    ).observe(trace.elapsed_ms / 1000)
+
+
+async def tracing_middleware(request: Request, call_next):
+    trace = Trace(request_id_ctx.get(), name=f"{request.method} {request.url.path}")
+    token = trace_ctx.set(trace)
+    try:
+        response = await call_next(request)
+    except Exception:
+        _finish(request, trace, 500)
+        raise
+    finally:
+        trace_ctx.reset(token)
+
+    response.headers["Server-Timing"] = trace.server_timing()
+
+    body = response.body_iterator
+
+    async def body_then_log():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            _finish(request, trace, response.status_code)
+
+    response.body_iterator = body_then_log()
+    return response
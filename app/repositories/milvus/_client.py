@@ -1,7 +1,34 @@
+"""Milvus client construction and connection pools.
+
+Sync traffic is split into two pools of dedicated connections (each
+``MilvusClient`` owns its own gRPC channel):
+
+- **read** — searches and conversation reads (``read_client()``),
+- **write** — upserts, deletes, flushes, collection DDL (``write_client()``),
+
+so heavy ingestion cannot queue in front of interactive searches.  Clients
+are checked out exclusively; idle connections are health-checked before
+reuse and rebuilt after connection failures.  Wait time and occupancy are
+reported by ``get_pool_stats()``.
+
+``get_client()`` remains for one-off admin calls (e.g. listing collections).
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from functools import lru_cache
-from pymilvus import MilvusClient
+from typing import Any, Callable, Iterator, Literal, Optional
+
+import grpc
+from pymilvus import AsyncMilvusClient, MilvusClient
+from pymilvus.exceptions import ConnectError, MilvusUnavailableException
 
 from app.core.config import settings
+from app.core.logging import logger
 
 
 def _build_client_kwargs() -> dict:
@@ -27,3 +54,207 @@ def _build_client_kwargs() -> dict:
 @lru_cache(maxsize=1)
 def get_client() -> MilvusClient:
     return MilvusClient(**_build_client_kwargs())
+
+
+# ---------------------------------------------------------------------------
+# Connection pools (sync)
+# ---------------------------------------------------------------------------
+
+_CONNECTION_ERRORS = (ConnectError, MilvusUnavailableException, grpc.RpcError)
+
+
+def _dedicated_client() -> MilvusClient:
+    return MilvusClient(**_build_client_kwargs(), dedicated=True)
+
+
+@dataclass
+class _Slot:
+    client: Optional[MilvusClient] = None
+    last_used: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class PoolStats:
+    """Counters describing pool usage."""
+
+    size: int
+    in_use: int = 0
+    peak_in_use: int = 0
+    acquisitions: int = 0
+    wait_ms_total: float = 0.0
+    wait_ms_max: float = 0.0
+    timeouts: int = 0
+    connects: int = 0
+    reconnects: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        mean_wait = self.wait_ms_total / self.acquisitions if self.acquisitions else 0.0
+        return {
+            "size": self.size,
+            "in_use": self.in_use,
+            "peak_in_use": self.peak_in_use,
+            "occupancy": round(self.in_use / self.size, 4) if self.size else 0.0,
+            "acquisitions": self.acquisitions,
+            "wait_ms_mean": round(mean_wait, 3),
+            "wait_ms_max": round(self.wait_ms_max, 3),
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+        }
+
+
+class MilvusClientPool:
+    """Fixed-size pool of dedicated ``MilvusClient`` connections.
+
+    Args:
+        name: Pool label used in logs and stats.
+        size: Number of connections (created lazily on first use).
+        acquire_timeout: Max seconds to wait for a free connection.
+        healthcheck_sec: Ping a connection idle for longer than this
+            before handing it out (``0`` disables).
+        factory: Builds a new connection.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        size: int,
+        *,
+        acquire_timeout: float,
+        healthcheck_sec: float,
+        factory: Callable[[], MilvusClient] = _dedicated_client,
+    ) -> None:
+        self.name = name
+        self.acquire_timeout = acquire_timeout
+        self.healthcheck_sec = healthcheck_sec
+        self._factory = factory
+        self._idle: queue.LifoQueue[_Slot] = queue.LifoQueue()
+        for _ in range(max(1, size)):
+            self._idle.put(_Slot())
+        self._lock = threading.Lock()
+        self.stats = PoolStats(size=max(1, size))
+
+    @contextmanager
+    def client(self) -> Iterator[MilvusClient]:
+        """Check out a connection for the duration of the ``with`` block."""
+        start = time.monotonic()
+        try:
+            slot = self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            with self._lock:
+                self.stats.timeouts += 1
+            raise TimeoutError(
+                f"No Milvus {self.name} connection free within {self.acquire_timeout}s"
+            )
+
+        wait_ms = (time.monotonic() - start) * 1000
+        with self._lock:
+            s = self.stats
+            s.acquisitions += 1
+            s.wait_ms_total += wait_ms
+            s.wait_ms_max = max(s.wait_ms_max, wait_ms)
+            s.in_use += 1
+            s.peak_in_use = max(s.peak_in_use, s.in_use)
+
+        try:
+            yield self._ensure_healthy(slot)
+        except _CONNECTION_ERRORS as exc:
+            # Drop the broken channel; the next checkout reconnects.
+            logger.warning(f"Milvus {self.name} connection failed, discarding: {exc}")
+            self._discard(slot)
+            raise
+        finally:
+            slot.last_used = time.monotonic()
+            with self._lock:
+                self.stats.in_use -= 1
+            self._idle.put(slot)
+
+    def _ensure_healthy(self, slot: _Slot) -> MilvusClient:
+        if slot.client is not None and self.healthcheck_sec > 0:
+            if time.monotonic() - slot.last_used > self.healthcheck_sec:
+                try:
+                    slot.client.get_server_version(timeout=settings.MILVUS_TIMEOUT_SEC)
+                except Exception as exc:
+                    logger.warning(f"Milvus {self.name} health check failed: {exc}")
+                    self._discard(slot)
+
+        if slot.client is None:
+            reconnect = self.stats.connects >= self.stats.size
+            slot.client = self._factory()
+            with self._lock:
+                self.stats.connects += 1
+                if reconnect:
+                    self.stats.reconnects += 1
+        return slot.client
+
+    def _discard(self, slot: _Slot) -> None:
+        client, slot.client = slot.client, None
+        if client is not None:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        while True:
+            try:
+                slot = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(slot)
+
+
+@lru_cache(maxsize=None)
+def _get_pool(kind: Literal["read", "write"]) -> MilvusClientPool:
+    size = (
+        settings.MILVUS_READ_POOL_SIZE if kind == "read" else settings.MILVUS_WRITE_POOL_SIZE
+    )
+    return MilvusClientPool(
+        kind,
+        size,
+        acquire_timeout=settings.MILVUS_POOL_ACQUIRE_TIMEOUT_SEC,
+        healthcheck_sec=settings.MILVUS_POOL_HEALTHCHECK_SEC,
+    )
+
+
+def read_client():
+    """Context manager checking out a connection from the read pool."""
+    return _get_pool("read").client()
+
+
+def write_client():
+    """Context manager checking out a connection from the write pool."""
+    return _get_pool("write").client()
+
+
+def get_pool_stats() -> dict[str, dict[str, Any]]:
+    """Return wait-time and occupancy counters of both pools."""
+    return {kind: _get_pool(kind).stats.as_dict() for kind in ("read", "write")}
+
+
+# ---------------------------------------------------------------------------
+# Async clients
+# ---------------------------------------------------------------------------
+
+# AsyncMilvusClient multiplexes requests over one channel, so no checkout is
+# needed; reads and writes still get separate (dedicated) channels.  The
+# channels are bound to the event loop they first run on, so the clients are
+# rebuilt if the running loop changes (app restart, per-test loops).
+_async_clients: dict[str, AsyncMilvusClient] = {}
+_async_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_async_client(kind: Literal["read", "write"] = "read") -> AsyncMilvusClient:
+    """Return the read or write ``AsyncMilvusClient`` for the running loop."""
+    global _async_loop
+    loop = asyncio.get_running_loop()
+    if _async_loop is not loop:
+        _async_clients.clear()
+        _async_loop = loop
+    client = _async_clients.get(kind)
+    if client is None:
+        client = _async_clients[kind] = AsyncMilvusClient(
+            **_build_client_kwargs(), dedicated=True
+        )
+    return client
@@ -2,7 +2,9 @@ from pymilvus import MilvusClient, DataType, Function, FunctionType, CollectionS
 
 from app.core.config import settings
 from app.core.logging import logger
-from ._client import get_client
+from app.repositories.redis.collection_version import bump_collection_version
+from . import _registry
+from ._client import write_client
 
 
 def _create_index_params(client: MilvusClient):
@@ -88,29 +90,33 @@ def _create_schema(client: MilvusClient) -> CollectionSchema:
 
 
 def create_collection(collection_name: str) -> None:
-    client = get_client()
-
-    if client.has_collection(collection_name):
-        logger.info(
-            f"Collection '{collection_name}' already exists. Skipping creation."
+    with write_client() as client:
+        if _registry.has_collection(client, collection_name):
+            logger.debug(
+                f"Collection '{collection_name}' already exists. Skipping creation."
+            )
+            return
+
+        logger.info(f"Creating collection '{collection_name}'...")
+
+        schema = _create_schema(client)
+        index_params = _create_index_params(client)
+        client.create_collection(
+            collection_name, schema=schema, index_params=index_params
         )
-        return
-
-    logger.info(f"Creating collection '{collection_name}'...")
-
-    schema = _create_schema(client)
-    index_params = _create_index_params(client)
-    client.create_collection(collection_name, schema=schema, index_params=index_params)
+    # Creating with index params also loads the collection.
+    _registry.mark_loaded(collection_name)
 
 
 def delete_collection(collection_name: str) -> None:
-    client = get_client()
-
-    if not client.has_collection(collection_name):
-        logger.info(
-            f"Collection '{collection_name}' does not exist. Skipping deletion."
-        )
-        return
-
-    logger.info(f"Deleting collection '{collection_name}'...")
-    client.drop_collection(collection_name)
+    with write_client() as client:
+        if not _registry.has_collection(client, collection_name):
+            logger.info(
+                f"Collection '{collection_name}' does not exist. Skipping deletion."
+            )
+            return
+
+        logger.info(f"Deleting collection '{collection_name}'...")
+        client.drop_collection(collection_name)
+    _registry.invalidate(collection_name)
+    bump_collection_version(collection_name)
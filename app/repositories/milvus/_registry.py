@@ -0,0 +1,221 @@
+"""Process-local registry of Milvus collection state.
+
+Hot paths used to call ``has_collection`` and ``load_collection`` on every
+request, adding two RPCs to each search and conversation read.  The
+registry remembers that a collection exists and is loaded for
+``MILVUS_COLLECTION_STATE_TTL_SEC``:
+
+- Only positive existence is cached, so a collection created by another
+  worker becomes visible immediately.
+- Entries are updated on create and dropped on drop by this process.
+- State changed elsewhere (a release or drop by another process) surfaces
+  as a Milvus error.  ``call_with_reload`` loads the collection if needed
+  and runs the operation; it handles "collection not loaded" by reloading
+  and retrying once, and "collection not found" (from the load or the
+  operation) by dropping the entry and returning the caller's ``missing``
+  result (searches return empty hits, as for a collection that was never
+  created).
+
+Each helper has an ``a``-prefixed twin for ``AsyncMilvusClient``; both
+share the same state.
+"""
+
+import threading
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from pymilvus import AsyncMilvusClient, MilvusClient, MilvusException
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import MILVUS_OP_SECONDS
+
+T = TypeVar("T")
+
+_COLLECTION_NOT_FOUND = 100  # server error codes
+_COLLECTION_NOT_LOADED = 101
+
+# name -> {"exists_at": float, "loaded_at": float | None}
+_states: dict[str, dict[str, float | None]] = {}
+_lock = threading.Lock()
+
+
+def _fresh(ts: float | None) -> bool:
+    return ts is not None and time.monotonic() - ts < settings.MILVUS_COLLECTION_STATE_TTL_SEC
+
+
+def _known_to_exist(name: str) -> bool:
+    with _lock:
+        state = _states.get(name)
+        return state is not None and _fresh(state["exists_at"])
+
+
+def _known_loaded(name: str) -> bool:
+    with _lock:
+        state = _states.get(name)
+        return state is not None and _fresh(state["loaded_at"])
+
+
+def _record_exists(name: str, exists: bool) -> None:
+    with _lock:
+        if exists:
+            state = _states.setdefault(name, {"exists_at": None, "loaded_at": None})
+            state["exists_at"] = time.monotonic()
+        else:
+            _states.pop(name, None)
+
+
+def has_collection(client: MilvusClient, name: str) -> bool:
+    """Cached ``client.has_collection``."""
+    if _known_to_exist(name):
+        return True
+    exists = client.has_collection(name)
+    _record_exists(name, exists)
+    return exists
+
+
+def ensure_loaded(client: MilvusClient, name: str) -> None:
+    """Cached ``client.load_collection``."""
+    if _known_loaded(name):
+        return
+    client.load_collection(name)
+    mark_loaded(name)
+
+
+async def ahas_collection(client: AsyncMilvusClient, name: str) -> bool:
+    """Cached ``await client.has_collection``."""
+    if _known_to_exist(name):
+        return True
+    exists = await client.has_collection(name)
+    _record_exists(name, exists)
+    return exists
+
+
+async def aensure_loaded(client: AsyncMilvusClient, name: str) -> None:
+    """Cached ``await client.load_collection``."""
+    if _known_loaded(name):
+        return
+    await client.load_collection(name)
+    mark_loaded(name)
+
+
+def mark_loaded(name: str) -> None:
+    """Record that *name* exists and is loaded (e.g. right after creation)."""
+    now = time.monotonic()
+    with _lock:
+        _states[name] = {"exists_at": now, "loaded_at": now}
+
+
+def invalidate(name: str) -> None:
+    """Forget everything about *name* (after a drop or a state error)."""
+    with _lock:
+        _states.pop(name, None)
+
+
+def reset_registry() -> None:
+    """Forget all collections."""
+    with _lock:
+        _states.clear()
+
+
+def _is_not_loaded(exc: MilvusException) -> bool:
+    return (
+        getattr(exc, "code", None) == _COLLECTION_NOT_LOADED
+        or "not loaded" in str(exc).lower()
+    )
+
+
+def _is_not_found(exc: MilvusException) -> bool:
+    message = str(exc).lower()
+    return (
+        getattr(exc, "code", None) == _COLLECTION_NOT_FOUND
+        or "collection not found" in message
+        or "can't find collection" in message
+    )
+
+
+def _on_missing(
+    name: str, exc: MilvusException, missing: Optional[Callable[[], T]]
+) -> T:
+    invalidate(name)  # dropped by another process while cached as existing
+    if missing is None:
+        raise exc
+    logger.warning(f"Collection '{name}' no longer exists; treating it as missing")
+    return missing()
+
+
+def call_with_reload(
+    client: MilvusClient,
+    name: str,
+    fn: Callable[[], T],
+    *,
+    op: str = "search",
+    missing: Optional[Callable[[], T]] = None,
+) -> T:
+    """Ensure *name* is loaded and run *fn*; on "collection not loaded",
+    reload *name* and retry once.
+
+    On "collection not found", from the load or from *fn*, the cached state
+    is dropped and ``missing()`` is returned (or the error re-raised if no
+    *missing* is given).  The whole call (including any load) is timed as
+    Milvus operation *op*.
+    """
+    with MILVUS_OP_SECONDS.labels(op).time():
+        return _call_with_reload(client, name, fn, missing)
+
+
+def _call_with_reload(
+    client: MilvusClient,
+    name: str,
+    fn: Callable[[], T],
+    missing: Optional[Callable[[], T]],
+) -> T:
+    try:
+        ensure_loaded(client, name)
+        return fn()
+    except MilvusException as exc:
+        if _is_not_found(exc):
+            return _on_missing(name, exc, missing)
+        if not _is_not_loaded(exc):
+            invalidate(name)  # state may have changed under us
+            raise
+        logger.warning(f"Collection '{name}' was not loaded; reloading and retrying")
+        invalidate(name)
+        client.load_collection(name)
+        mark_loaded(name)
+        return fn()
+
+
+async def acall_with_reload(
+    client: AsyncMilvusClient,
+    name: str,
+    fn: Callable[[], Awaitable[T]],
+    *,
+    op: str = "search",
+    missing: Optional[Callable[[], T]] = None,
+) -> T:
+    """Async twin of :func:`call_with_reload`."""
+    with MILVUS_OP_SECONDS.labels(op).time():
+        return await _acall_with_reload(client, name, fn, missing)
+
+
+async def _acall_with_reload(
+    client: AsyncMilvusClient,
+    name: str,
+    fn: Callable[[], Awaitable[T]],
+    missing: Optional[Callable[[], T]],
+) -> T:
+    try:
+        await aensure_loaded(client, name)
+        return await fn()
+    except MilvusException as exc:
+        if _is_not_found(exc):
+            return _on_missing(name, exc, missing)
+        if not _is_not_loaded(exc):
+            invalidate(name)
+            raise
+        logger.warning(f"Collection '{name}' was not loaded; reloading and retrying")
+        invalidate(name)
+        await client.load_collection(name)
+        mark_loaded(name)
+        return await fn()
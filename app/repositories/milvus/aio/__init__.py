@@ -0,0 +1,10 @@
+"""Async Milvus repository built on ``AsyncMilvusClient``.
+
+Same function signatures as ``repositories/milvus/search.py`` and
+``storage.py``, but coroutines: services await them directly instead of
+hopping through ``run_in_executor``, so concurrency is not capped by the
+default thread pool.
+"""
+
+from .search import dense_search, sparse_search, hybrid_search
+from .storage import upsert_documents, delete_documents
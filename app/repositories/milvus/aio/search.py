@@ -0,0 +1,107 @@
+from typing import Sequence
+
+from app import models
+from app.core.config import settings
+from .. import _registry
+from .._client import get_async_client
+from ..search import (
+    SEARCH_OUTPUT_FIELDS,
+    _SPARSE_SEARCH_PARAMS,
+    _dense_search_params,
+    _fusion_ranker,
+    _hit_to_document,
+    _hybrid_requests,
+)
+
+
+async def dense_search(
+    query_vectors: list[list[float]],
+    collection_name: str,
+    top_k: int = 5,
+    output_fields: Sequence[str] = SEARCH_OUTPUT_FIELDS,
+    include_scores: bool = settings.DEBUG_MODE_ENABLED,
+    radius: float | None = None,
+) -> list[list[tuple[models.Document, float | None]]]:
+    client = get_async_client("read")
+    if not await _registry.ahas_collection(client, collection_name):
+        return [[] for _ in range(len(query_vectors))]
+
+    raw = await _registry.acall_with_reload(
+        client,
+        collection_name,
+        lambda: client.search(
+            collection_name=collection_name,
+            data=query_vectors,
+            anns_field="dense_vector",
+            limit=top_k,
+            output_fields=list(output_fields),
+            search_params=_dense_search_params(radius),
+            timeout=settings.MILVUS_READ_TIMEOUT_SEC,
+        ),
+        missing=lambda: [[] for _ in range(len(query_vectors))],
+    )
+
+    return [[_hit_to_document(h, include_scores) for h in hits] for hits in raw]
+
+
+async def sparse_search(
+    query_texts: list[str],
+    collection_name: str,
+    top_k: int = 5,
+    output_fields: Sequence[str] = SEARCH_OUTPUT_FIELDS,
+    include_scores: bool = settings.DEBUG_MODE_ENABLED,
+) -> list[list[tuple[models.Document, float | None]]]:
+    client = get_async_client("read")
+    if not await _registry.ahas_collection(client, collection_name):
+        return [[] for _ in range(len(query_texts))]
+
+    raw = await _registry.acall_with_reload(
+        client,
+        collection_name,
+        lambda: client.search(
+            collection_name=collection_name,
+            data=query_texts,
+            anns_field="sparse_vector",
+            limit=top_k,
+            output_fields=list(output_fields),
+            search_params=_SPARSE_SEARCH_PARAMS,
+            timeout=settings.MILVUS_READ_TIMEOUT_SEC,
+        ),
+        missing=lambda: [[] for _ in range(len(query_texts))],
+    )
+
+    return [[_hit_to_document(h, include_scores) for h in hits] for hits in raw]
+
+
+async def hybrid_search(
+    query_vectors: list[list[float]],
+    query_texts: list[str],
+    collection_name: str,
+    top_k: int = 5,
+    output_fields: Sequence[str] = SEARCH_OUTPUT_FIELDS,
+    include_scores: bool = settings.DEBUG_MODE_ENABLED,
+    radius: float | None = None,
+) -> list[list[tuple[models.Document, float | None]]]:
+    client = get_async_client("read")
+    if not await _registry.ahas_collection(client, collection_name):
+        return [[] for _ in range(len(query_vectors))]
+
+    reqs = _hybrid_requests(query_vectors, query_texts, top_k, radius)
+    ranker = _fusion_ranker()
+
+    raw = await _registry.acall_with_reload(
+        client,
+        collection_name,
+        lambda: client.hybrid_search(
+            collection_name=collection_name,
+            reqs=reqs,
+            limit=top_k,
+            output_fields=list(output_fields),
+            ranker=ranker,
+            timeout=settings.MILVUS_READ_TIMEOUT_SEC,
+        ),
+        missing=lambda: [[] for _ in range(len(query_vectors))],
+        op="hybrid_search",
+    )
+
+    return [[_hit_to_document(h, include_scores) for h in hits] for hits in raw]
@@ -0,0 +1,74 @@
+import asyncio
+
+from pymilvus import AsyncMilvusClient
+
+from app import models
+from app.core.config import settings
+from app.core.logging import logger
+from app.repositories.redis.collection_version import bump_collection_version
+from .. import _registry
+from .._client import get_async_client
+from .._collection import _create_index_params, _create_schema
+from ..storage import _DELETE_SECONDS, _UPSERT_SECONDS, _doc_to_entity
+
+
+async def _create_collection(client: AsyncMilvusClient, collection_name: str) -> None:
+    if await _registry.ahas_collection(client, collection_name):
+        return
+
+    logger.info(f"Creating collection '{collection_name}'...")
+
+    schema = _create_schema(client)
+    index_params = _create_index_params(client)
+    await client.create_collection(
+        collection_name, schema=schema, index_params=index_params
+    )
+    # Creating with index params also loads the collection.
+    _registry.mark_loaded(collection_name)
+
+
+async def _bump_version(collection_name: str) -> None:
+    # Redis INCR is synchronous; keep it off the event loop.
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, bump_collection_version, collection_name)
+
+
+async def upsert_documents(
+    docs: list[models.Document], collection_name: str, *, flush: bool = True
+) -> None:
+    client = get_async_client("write")
+    await _create_collection(client, collection_name)
+
+    data = [_doc_to_entity(d) for d in docs]
+    with _UPSERT_SECONDS.time():
+        res = await client.upsert(
+            collection_name, data, timeout=settings.MILVUS_WRITE_TIMEOUT_SEC
+        )
+    logger.info(
+        f"Upserted {res.get('upsert_count', 0)} documents into '{collection_name}'."
+    )
+
+    if flush:
+        await client.flush(
+            collection_name, timeout=settings.MILVUS_WRITE_TIMEOUT_SEC
+        )
+    await _bump_version(collection_name)
+
+
+async def delete_documents(doc_ids: list[int], collection_name: str) -> int:
+    if not doc_ids:
+        return 0
+
+    client = get_async_client("write")
+    if not await _registry.ahas_collection(client, collection_name):
+        return 0
+
+    with _DELETE_SECONDS.time():
+        res = await client.delete(
+            collection_name, ids=doc_ids, timeout=settings.MILVUS_WRITE_TIMEOUT_SEC
+        )
+    await client.flush(
+        collection_name, timeout=settings.MILVUS_WRITE_TIMEOUT_SEC
+    )
+    await _bump_version(collection_name)
+    return int(res.get("delete_count", 0))
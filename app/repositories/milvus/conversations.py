@@ -6,7 +6,9 @@ Two collections:
 - **_conversation_messages** — one row per message (id, conversation_id, role, content,
   sources, timestamp).  Scalar-filtered by ``conversation_id``.
 
-Both are auto-created on first write (lazy initialization).
+Both are auto-created on first write (lazy initialization).  Existence and
+load state are cached by ``_registry``, so steady-state reads issue only the
+query itself.
 """
 
 import json
@@ -17,7 +19,8 @@ from pymilvus import CollectionSchema, DataType, MilvusClient
 from app.core.config import settings
 from app.core.logging import logger
 from app.models.conversation import ConversationMeta, Message
-from ._client import get_client
+from . import _registry
+from ._client import read_client, write_client
 
 
 # ---------------------------------------------------------------------------
@@ -34,7 +37,7 @@ _MSG_COL = settings.CONVERSATION_MSG_COLLECTION
 
 
 def _ensure_meta_collection(client: MilvusClient) -> None:
-    if client.has_collection(_META_COL):
+    if _registry.has_collection(client, _META_COL):
         return
     schema = client.create_schema(enable_dynamic_field=True)
     schema.add_field(
@@ -73,11 +76,12 @@ def _ensure_meta_collection(client: MilvusClient) -> None:
         metric_type="COSINE",
     )
     client.create_collection(_META_COL, schema=schema, index_params=index_params)
+    _registry.mark_loaded(_META_COL)
     logger.info(f"Created conversation meta collection '{_META_COL}'")
 
 
 def _ensure_msg_collection(client: MilvusClient) -> None:
-    if client.has_collection(_MSG_COL):
+    if _registry.has_collection(client, _MSG_COL):
         return
     schema = client.create_schema(enable_dynamic_field=True)
     schema.add_field(
@@ -128,6 +132,7 @@ def _ensure_msg_collection(client: MilvusClient) -> None:
     )
 
     client.create_collection(_MSG_COL, schema=schema, index_params=index_params)
+    _registry.mark_loaded(_MSG_COL)
     logger.info(f"Created conversation messages collection '{_MSG_COL}'")
 
 
@@ -201,23 +206,28 @@ _META_OUTPUT_FIELDS = [
 
 def create_conversation(meta: ConversationMeta) -> None:
     """Insert a new conversation metadata row."""
-    client = get_client()
-    _ensure_meta_collection(client)
-    client.insert(_META_COL, [_meta_to_entity(meta)])
-    client.flush(_META_COL)
+    with write_client() as client:
+        _ensure_meta_collection(client)
+        client.insert(_META_COL, [_meta_to_entity(meta)], timeout=settings.MILVUS_WRITE_TIMEOUT_SEC)
+        client.flush(_META_COL, timeout=settings.MILVUS_WRITE_TIMEOUT_SEC)
 
 
 def get_conversation(conversation_id: str) -> ConversationMeta | None:
     """Retrieve conversation metadata by ID.  Returns ``None`` if not found."""
-    client = get_client()
-    _ensure_meta_collection(client)
-    client.load_collection(_META_COL)
-    results = client.query(
-        _META_COL,
-        filter=f'conversation_id == "{conversation_id}"',
-        output_fields=_META_OUTPUT_FIELDS,
-        limit=1,
-    )
+    with read_client() as client:
+        _ensure_meta_collection(client)
+        results = _registry.call_with_reload(
+            client,
+            _META_COL,
+            lambda: client.query(
+                _META_COL,
+                filter=f'conversation_id == "{conversation_id}"',
+                output_fields=_META_OUTPUT_FIELDS,
+                limit=1,
+                timeout=settings.MILVUS_READ_TIMEOUT_SEC,
+            ),
+            op="query",
+        )
     if not results:
         return None
     return _entity_to_meta(results[0])
@@ -229,49 +239,53 @@ def list_conversations(
     offset: int = 0,
 ) -> list[ConversationMeta]:
     """List conversations, optionally filtered by collection_name."""
-    client = get_client()
-    _ensure_meta_collection(client)
-    client.load_collection(_META_COL)
-
     filt = f'collection_name == "{collection_name}"' if collection_name else ""
 
-    results = client.query(
-        _META_COL,
-        filter=filt or "",
-        output_fields=_META_OUTPUT_FIELDS,
-        limit=limit,
-        offset=offset,
-    )
+    with read_client() as client:
+        _ensure_meta_collection(client)
+        results = _registry.call_with_reload(
+            client,
+            _META_COL,
+            lambda: client.query(
+                _META_COL,
+                filter=filt or "",
+                output_fields=_META_OUTPUT_FIELDS,
+                limit=limit,
+                offset=offset,
+                timeout=settings.MILVUS_READ_TIMEOUT_SEC,
+            ),
+            op="query",
+        )
     return [_entity_to_meta(r) for r in results]
 
 
 def update_conversation_title(conversation_id: str, title: str) -> None:
     """Update the title and updated_at of a conversation."""
-    client = get_client()
-    _ensure_meta_collection(client)
-    # Milvus upsert: must re-insert the full row.
+    # Milvus upsert: must re-insert the full row.  Read it before checking
+    # out a write connection so the two pools are never held together.
     meta = get_conversation(conversation_id)
     if meta is None:
         return
     meta.title = title
     meta.updated_at = datetime.now(timezone.utc)
-    client.upsert(_META_COL, [_meta_to_entity(meta)])
-    client.flush(_META_COL)
+    with write_client() as client:
+        client.upsert(_META_COL, [_meta_to_entity(meta)], timeout=settings.MILVUS_WRITE_TIMEOUT_SEC)
+        client.flush(_META_COL, timeout=settings.MILVUS_WRITE_TIMEOUT_SEC)
 
 
 def delete_conversation(conversation_id: str) -> None:
     """Delete a conversation and all its messages."""
-    client = get_client()
+    filt = f'conversation_id == "{conversation_id}"'
+    with write_client() as client:
+        # Delete meta
+        _ensure_meta_collection(client)
+        client.delete(_META_COL, filter=filt, timeout=settings.MILVUS_WRITE_TIMEOUT_SEC)
+        client.flush(_META_COL, timeout=settings.MILVUS_WRITE_TIMEOUT_SEC)
 
-    # Delete meta
-    _ensure_meta_collection(client)
-    client.delete(_META_COL, filter=f'conversation_id == "{conversation_id}"')
-    client.flush(_META_COL)
-
-    # Delete messages
-    _ensure_msg_collection(client)
-    client.delete(_MSG_COL, filter=f'conversation_id == "{conversation_id}"')
-    client.flush(_MSG_COL)
+        # Delete messages
+        _ensure_msg_collection(client)
+        client.delete(_MSG_COL, filter=filt, timeout=settings.MILVUS_WRITE_TIMEOUT_SEC)
+        client.flush(_MSG_COL, timeout=settings.MILVUS_WRITE_TIMEOUT_SEC)
 
 
 # ---------------------------------------------------------------------------
@@ -290,20 +304,20 @@ _MSG_OUTPUT_FIELDS = [
 
 def save_message(msg: Message) -> None:
     """Insert a single message."""
-    client = get_client()
-    _ensure_msg_collection(client)
-    client.insert(_MSG_COL, [_msg_to_entity(msg)])
-    client.flush(_MSG_COL)
+    with write_client() as client:
+        _ensure_msg_collection(client)
+        client.insert(_MSG_COL, [_msg_to_entity(msg)], timeout=settings.MILVUS_WRITE_TIMEOUT_SEC)
+        client.flush(_MSG_COL, timeout=settings.MILVUS_WRITE_TIMEOUT_SEC)
 
 
 def save_messages(msgs: list[Message]) -> None:
     """Insert multiple messages in a batch."""
     if not msgs:
         return
-    client = get_client()
-    _ensure_msg_collection(client)
-    client.insert(_MSG_COL, [_msg_to_entity(m) for m in msgs])
-    client.flush(_MSG_COL)
+    with write_client() as client:
+        _ensure_msg_collection(client)
+        client.insert(_MSG_COL, [_msg_to_entity(m) for m in msgs], timeout=settings.MILVUS_WRITE_TIMEOUT_SEC)
+        client.flush(_MSG_COL, timeout=settings.MILVUS_WRITE_TIMEOUT_SEC)
 
 
 def get_messages(
@@ -311,15 +325,20 @@ def get_messages(
     limit: int = 200,
 ) -> list[Message]:
     """Retrieve messages for a conversation, ordered by created_at ascending."""
-    client = get_client()
-    _ensure_msg_collection(client)
-    client.load_collection(_MSG_COL)
-    results = client.query(
-        _MSG_COL,
-        filter=f'conversation_id == "{conversation_id}"',
-        output_fields=_MSG_OUTPUT_FIELDS,
-        limit=limit,
-    )
+    with read_client() as client:
+        _ensure_msg_collection(client)
+        results = _registry.call_with_reload(
+            client,
+            _MSG_COL,
+            lambda: client.query(
+                _MSG_COL,
+                filter=f'conversation_id == "{conversation_id}"',
+                output_fields=_MSG_OUTPUT_FIELDS,
+                limit=limit,
+                timeout=settings.MILVUS_READ_TIMEOUT_SEC,
+            ),
+            op="query",
+        )
     msgs = [_entity_to_msg(r) for r in results]
     msgs.sort(key=lambda m: m.created_at)
     return msgs
@@ -1,26 +1,39 @@
-from datetime import datetime, timezone
+from typing import Sequence
+
 from pymilvus import AnnSearchRequest, RRFRanker, WeightedRanker
 
 from app import models
 from app.core.config import settings
-from ._client import get_client
+from . import _registry
+from ._client import read_client
+
 
+# Default projection: exactly what ``SearchResult`` exposes.  Vectors are
+# never returned by default (768 floats per hit over gRPC).
+SEARCH_OUTPUT_FIELDS: tuple[str, ...] = ("title", "text", "metadata")
 
-_OUTPUT_FIELDS = [
+# Every non-vector scalar field, for callers that need the full document.
+ALL_SCALAR_FIELDS: tuple[str, ...] = (
     "title",
     "author_info",
     "tags",
     "metadata",
     "text",
-    "dense_vector",
     "created_at",
     "updated_at",
-]
+)
 
 
 def _hit_to_document(
     hit: dict, include_score: bool = settings.DEBUG_MODE_ENABLED
 ) -> tuple[models.Document, float | None]:
+    """Decode a search hit into a ``Document``.
+
+    Lean path: only the projected fields are present (no vectors), and
+    RFC3339 timestamps are left for pydantic-core to parse, so no
+    per-field work happens in Python.  (``model_construct`` was measured
+    to be slower than core validation for this model.)
+    """
     entity = dict(hit.get("entity") or {})
     # PyMilvus returns primary key in `hit['id']` and also sometimes as `hit['doc_id']`.
     doc_id = hit.get("id")
@@ -33,125 +46,155 @@ def _hit_to_document(
     entity["doc_id"] = int(doc_id)
     if not entity.get("title"):
         entity["title"] = "untitled"
-    entity.setdefault("created_at", datetime.now(timezone.utc))
-    entity.setdefault("updated_at", None)
-    entity.setdefault("sparse_vector", None)
-
-    def _parse_timestamptz(v: object) -> object:
-        if not isinstance(v, str):
-            return v
-        # Milvus often returns RFC3339 with trailing 'Z'.
-        if v.endswith("Z"):
-            v = v[:-1] + "+00:00"
-        return datetime.fromisoformat(v)
-
-    entity["created_at"] = _parse_timestamptz(entity.get("created_at"))
-    entity["updated_at"] = _parse_timestamptz(entity.get("updated_at"))
+    entity.setdefault("text", "")
 
     score = float(hit.get("distance", 0.0)) if include_score else None
 
-    return models.Document(**entity), score
+    return models.Document.model_validate(entity), score
 
 
-def dense_search(
-    query_vectors: list[list[float]],
-    collection_name: str,
-    top_k: int = 5,
-) -> list[list[tuple[models.Document, float | None]]]:
-    client = get_client()
-    if not client.has_collection(collection_name):
-        return [[] for _ in range(len(query_vectors))]
-
-    client.load_collection(collection_name)
-    search_params = {
-        "metric_type": "COSINE",
-        "params": {"ef": settings.MILVUS_HNSW_EF},
-    }
-
-    raw = client.search(
-        collection_name=collection_name,
-        data=query_vectors,
-        anns_field="dense_vector",
-        limit=top_k,
-        output_fields=_OUTPUT_FIELDS,
-        search_params=search_params,
-    )
-
-    return [[_hit_to_document(h) for h in hits] for hits in raw]
+_DENSE_SEARCH_PARAMS = {
+    "metric_type": "COSINE",
+    "params": {"ef": settings.MILVUS_HNSW_EF},
+}
+_SPARSE_SEARCH_PARAMS = {"metric_type": "BM25", "params": {}}
 
 
-def sparse_search(
-    query_texts: list[str],
-    collection_name: str,
-    top_k: int = 5,
-) -> list[list[tuple[models.Document, float | None]]]:
-    client = get_client()
-    if not client.has_collection(collection_name):
-        return [[] for _ in range(len(query_texts))]
-
-    client.load_collection(collection_name)
-    search_params = {"metric_type": "BM25", "params": {}}
-
-    raw = client.search(
-        collection_name=collection_name,
-        data=query_texts,
-        anns_field="sparse_vector",
-        limit=top_k,
-        output_fields=_OUTPUT_FIELDS,
-        search_params=search_params,
-    )
-
-    return [[_hit_to_document(h) for h in hits] for hits in raw]
+def _dense_search_params(radius: float | None = None) -> dict:
+    """Dense search params; with *radius*, a range search that only returns
+    hits whose COSINE similarity exceeds it."""
+    if radius is None:
+        return _DENSE_SEARCH_PARAMS
+    return {
+        **_DENSE_SEARCH_PARAMS,
+        "params": {**_DENSE_SEARCH_PARAMS["params"], "radius": radius},
+    }
 
 
-def hybrid_search(
+def _hybrid_requests(
     query_vectors: list[list[float]],
     query_texts: list[str],
-    collection_name: str,
-    top_k: int = 5,
-) -> list[list[tuple[models.Document, float | None]]]:
-    client = get_client()
-    if not client.has_collection(collection_name):
-        return [[] for _ in range(len(query_vectors))]
-
-    client.load_collection(collection_name)
-
+    top_k: int,
+    radius: float | None = None,
+) -> list[AnnSearchRequest]:
     if len(query_vectors) != len(query_texts):
         raise ValueError("query_vectors and query_texts must have same length")
 
     req_dense = AnnSearchRequest(
         data=query_vectors,
         anns_field="dense_vector",
-        param={
-            "metric_type": "COSINE",
-            "params": {"ef": settings.MILVUS_HNSW_EF},
-        },
+        param=_dense_search_params(radius),
         limit=top_k,
     )
     req_sparse = AnnSearchRequest(
         data=query_texts,
         anns_field="sparse_vector",
-        param={"metric_type": "BM25", "params": {}},
+        param=_SPARSE_SEARCH_PARAMS,
         limit=top_k,
     )
+    return [req_dense, req_sparse]
 
+
+def _fusion_ranker() -> WeightedRanker | RRFRanker:
     # Keep config backwards-compatible: default FUSION_METHOD is 'dbsf'.
     fusion = settings.FUSION_METHOD
     if fusion in ("weighted", "dbsf"):
-        ranker = WeightedRanker(
+        return WeightedRanker(
             settings.FUSION_ALPHA, 1 - settings.FUSION_ALPHA, norm_score=True
         )
-    elif fusion == "rrf":
-        ranker = RRFRanker(k=max(1, int(settings.RRF_K)))
-    else:
-        raise ValueError(f"Unsupported fusion method: {fusion}")
-
-    raw = client.hybrid_search(
-        collection_name=collection_name,
-        reqs=[req_dense, req_sparse],
-        limit=top_k,
-        output_fields=_OUTPUT_FIELDS,
-        ranker=ranker,
-    )
+    if fusion == "rrf":
+        return RRFRanker(k=max(1, int(settings.RRF_K)))
+    raise ValueError(f"Unsupported fusion method: {fusion}")
+
+
+def dense_search(
+    query_vectors: list[list[float]],
+    collection_name: str,
+    top_k: int = 5,
+    output_fields: Sequence[str] = SEARCH_OUTPUT_FIELDS,
+    include_scores: bool = settings.DEBUG_MODE_ENABLED,
+    radius: float | None = None,
+) -> list[list[tuple[models.Document, float | None]]]:
+    with read_client() as client:
+        if not _registry.has_collection(client, collection_name):
+            return [[] for _ in range(len(query_vectors))]
+
+        raw = _registry.call_with_reload(
+            client,
+            collection_name,
+            lambda: client.search(
+                collection_name=collection_name,
+                data=query_vectors,
+                anns_field="dense_vector",
+                limit=top_k,
+                output_fields=list(output_fields),
+                search_params=_dense_search_params(radius),
+                timeout=settings.MILVUS_READ_TIMEOUT_SEC,
+            ),
+            missing=lambda: [[] for _ in range(len(query_vectors))],
+        )
+
+    return [[_hit_to_document(h, include_scores) for h in hits] for hits in raw]
+
+
+def sparse_search(
+    query_texts: list[str],
+    collection_name: str,
+    top_k: int = 5,
+    output_fields: Sequence[str] = SEARCH_OUTPUT_FIELDS,
+    include_scores: bool = settings.DEBUG_MODE_ENABLED,
+) -> list[list[tuple[models.Document, float | None]]]:
+    with read_client() as client:
+        if not _registry.has_collection(client, collection_name):
+            return [[] for _ in range(len(query_texts))]
+
+        raw = _registry.call_with_reload(
+            client,
+            collection_name,
+            lambda: client.search(
+                collection_name=collection_name,
+                data=query_texts,
+                anns_field="sparse_vector",
+                limit=top_k,
+                output_fields=list(output_fields),
+                search_params=_SPARSE_SEARCH_PARAMS,
+                timeout=settings.MILVUS_READ_TIMEOUT_SEC,
+            ),
+            missing=lambda: [[] for _ in range(len(query_texts))],
+        )
+
+    return [[_hit_to_document(h, include_scores) for h in hits] for hits in raw]
+
+
+def hybrid_search(
+    query_vectors: list[list[float]],
+    query_texts: list[str],
+    collection_name: str,
+    top_k: int = 5,
+    output_fields: Sequence[str] = SEARCH_OUTPUT_FIELDS,
+    include_scores: bool = settings.DEBUG_MODE_ENABLED,
+    radius: float | None = None,
+) -> list[list[tuple[models.Document, float | None]]]:
+    reqs = _hybrid_requests(query_vectors, query_texts, top_k, radius)
+    ranker = _fusion_ranker()
+
+    with read_client() as client:
+        if not _registry.has_collection(client, collection_name):
+            return [[] for _ in range(len(query_vectors))]
+
+        raw = _registry.call_with_reload(
+            client,
+            collection_name,
+            lambda: client.hybrid_search(
+                collection_name=collection_name,
+                reqs=reqs,
+                limit=top_k,
+                output_fields=list(output_fields),
+                ranker=ranker,
+                timeout=settings.MILVUS_READ_TIMEOUT_SEC,
+            ),
+            missing=lambda: [[] for _ in range(len(query_vectors))],
+            op="hybrid_search",
+        )
 
-    return [[_hit_to_document(h) for h in hits] for hits in raw]
+    return [[_hit_to_document(h, include_scores) for h in hits] for hits in raw]
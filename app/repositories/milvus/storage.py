@@ -1,11 +1,18 @@
 from datetime import datetime, timezone
 from app import models
+from app.core.config import settings
 from app.core.logging import logger
+from app.core.metrics import MILVUS_OP_SECONDS
+from app.repositories.redis.collection_version import bump_collection_version
 
-from ._client import get_client
+from . import _registry
+from ._client import write_client
 from ._collection import create_collection
 
 
+_UPSERT_SECONDS = MILVUS_OP_SECONDS.labels("upsert")
+_DELETE_SECONDS = MILVUS_OP_SECONDS.labels("delete")
+
 _OUTPUT_FIELDS = [
     "doc_id",
     "title",
@@ -33,27 +40,39 @@ def _doc_to_entity(doc: models.Document) -> dict:
     return payload
 
 
-def upsert_documents(docs: list[models.Document], collection_name: str) -> None:
-    client = get_client()
+def upsert_documents(
+    docs: list[models.Document], collection_name: str, *, flush: bool = True
+) -> None:
+    # Checks out its own connection; must not run while holding one.
+    # flush=False leaves sealing to Milvus (or a later flushing upsert) --
+    # for all but the last of a run of batch upserts.
     create_collection(collection_name)
 
     data = [_doc_to_entity(d) for d in docs]
-    res = client.upsert(collection_name, data)
-    logger.info(
-        f"Upserted {res.get('upsert_count', 0)} documents into '{collection_name}'."
-    )
-
-    client.flush(collection_name)
+    with write_client() as client, _UPSERT_SECONDS.time():
+        res = client.upsert(
+            collection_name, data, timeout=settings.MILVUS_WRITE_TIMEOUT_SEC
+        )
+        logger.info(
+            f"Upserted {res.get('upsert_count', 0)} documents into '{collection_name}'."
+        )
+        if flush:
+            client.flush(collection_name, timeout=settings.MILVUS_WRITE_TIMEOUT_SEC)
+    bump_collection_version(collection_name)
 
 
 def delete_documents(doc_ids: list[int], collection_name: str) -> int:
     if not doc_ids:
         return 0
 
-    client = get_client()
-    if not client.has_collection(collection_name):
-        return 0
+    with write_client() as client:
+        if not _registry.has_collection(client, collection_name):
+            return 0
 
-    res = client.delete(collection_name, ids=doc_ids)
-    client.flush(collection_name)
+        with _DELETE_SECONDS.time():
+            res = client.delete(
+                collection_name, ids=doc_ids, timeout=settings.MILVUS_WRITE_TIMEOUT_SEC
+            )
+        client.flush(collection_name, timeout=settings.MILVUS_WRITE_TIMEOUT_SEC)
+    bump_collection_version(collection_name)
     return int(res.get("delete_count", 0))
@@ -6,3 +6,14 @@ from .job_store import (
     set_job_error,
     set_job_result,
 )
+from .vector_cache import (
+    get_vector,
+    get_vectors,
+    set_vector,
+    set_vectors,
+    pack_vector,
+    unpack_vector,
+)
+from .collection_version import get_collection_version, bump_collection_version
+from .result_cache import get_cached_payload, set_cached_payload
+from .rate_limit import take_tokens, start_cooldown
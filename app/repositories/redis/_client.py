@@ -1,4 +1,4 @@
-"""Redis client singleton."""
+"""Redis client singletons."""
 
 from functools import lru_cache
 
@@ -7,13 +7,26 @@ import redis
 from app.core.config import settings
 
 
+def _build_client_kwargs() -> dict:
+    return {
+        "host": settings.REDIS_HOST,
+        "port": settings.REDIS_PORT,
+        "password": settings.REDIS_PASSWORD or None,
+        "db": settings.REDIS_DB,
+    }
+
+
 @lru_cache(maxsize=1)
 def get_redis_client() -> redis.Redis:
     """Return a shared Redis client (lazy, cached)."""
-    return redis.Redis(
-        host=settings.REDIS_HOST,
-        port=settings.REDIS_PORT,
-        password=settings.REDIS_PASSWORD or None,
-        db=settings.REDIS_DB,
-        decode_responses=True,
-    )
+    return redis.Redis(**_build_client_kwargs(), decode_responses=True)
+
+
+@lru_cache(maxsize=1)
+def get_redis_binary_client() -> redis.Redis:
+    """Return a shared Redis client that keeps values as raw ``bytes``.
+
+    Used for binary payloads (e.g. packed float32 vectors) that must not be
+    UTF-8 decoded.
+    """
+    return redis.Redis(**_build_client_kwargs(), decode_responses=False)
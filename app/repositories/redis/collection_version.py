@@ -0,0 +1,76 @@
+"""Per-collection version counters used to invalidate derived caches.
+
+Every write to a Milvus document collection (upsert, delete, drop) bumps
+``colver:{collection}`` with ``INCR``.  Caches that depend on collection
+contents (search results, rerank scores) embed the current version in their
+keys, so a bump makes every older entry unreachable at once.
+
+By default every lookup reads the counter (one ``GET``), so a write on any
+worker invalidates the caches of all workers at once.  A positive
+``COLLECTION_VERSION_REFRESH_SEC`` memoizes reads in-process to save that
+round-trip, at the price of bounded staleness: another worker's write may
+go unseen, and stale cached results may be served, for up to that many
+seconds (the writing worker sees its own bump immediately).  If Redis is
+unavailable a process-local counter is used instead.
+"""
+
+import threading
+import time
+
+import redis
+
+from app.core.config import settings
+from app.core.logging import logger
+from ._client import get_redis_client
+
+_KEY_PREFIX = "colver"
+
+# collection -> (version, fetched_at)
+_memo: dict[str, tuple[int, float]] = {}
+_local_versions: dict[str, int] = {}
+_lock = threading.Lock()
+
+
+def _version_key(collection_name: str) -> str:
+    return f"{_KEY_PREFIX}:{collection_name}"
+
+
+def get_collection_version(collection_name: str) -> int:
+    """Return the current version of *collection_name* (``0`` if never bumped).
+
+    Up to ``COLLECTION_VERSION_REFRESH_SEC`` old when memoization is on.
+    """
+    now = time.monotonic()
+    cached = _memo.get(collection_name)
+    if cached and now - cached[1] < settings.COLLECTION_VERSION_REFRESH_SEC:
+        return cached[0]
+
+    try:
+        raw = get_redis_client().get(_version_key(collection_name))
+        version = int(raw) if raw else 0
+    except redis.RedisError as exc:
+        logger.warning(f"Collection version read failed for '{collection_name}': {exc}")
+        version = _local_versions.get(collection_name, 0)
+
+    _memo[collection_name] = (version, now)
+    return version
+
+
+def bump_collection_version(collection_name: str) -> int:
+    """Increment and return the version of *collection_name*."""
+    try:
+        version = int(get_redis_client().incr(_version_key(collection_name)))
+    except redis.RedisError as exc:
+        logger.warning(f"Collection version bump failed for '{collection_name}': {exc}")
+        with _lock:
+            version = _local_versions.get(collection_name, 0) + 1
+            _local_versions[collection_name] = version
+
+    _memo[collection_name] = (version, time.monotonic())
+    return version
+
+
+def reset_collection_versions() -> None:
+    """Forget memoized and local versions (used by tests)."""
+    _memo.clear()
+    _local_versions.clear()
@@ -10,11 +10,14 @@ Job structure (Redis hash at key ``job:{job_id}``):
     created_at  – ISO-8601 UTC timestamp
     updated_at  – ISO-8601 UTC timestamp
     documents_ingested – total document chunks written to vector store
+    embed_cache_hits   – chunk embeddings served from the embedding cache
+    embed_cache_misses – chunk embeddings computed by the provider
 
 Per-file status stored at ``job:{job_id}:files:{filename}``:
     status  – pending | transcribing | processing | completed | failed
     error   – error message (empty when ok)
     chunks  – number of chunks produced from this file
+    embed_cache_hits / embed_cache_misses – chunk-embedding cache outcome
 """
 
 import json
@@ -70,6 +73,8 @@ def create_job(
         "created_at": now,
         "updated_at": now,
         "documents_ingested": 0,
+        "embed_cache_hits": 0,
+        "embed_cache_misses": 0,
         "filenames": json.dumps(filenames),
     }
     jk = _job_key(job_id)
@@ -96,8 +101,14 @@ def update_file_status(
     *,
     error: str = "",
     chunks: int = 0,
+    cache_hits: int = 0,
+    cache_misses: int = 0,
 ) -> None:
-    """Update a single file's processing status and bump job counters."""
+    """Update a single file's processing status and bump job counters.
+
+    *cache_hits* / *cache_misses* are the file's chunk-embedding cache
+    outcome; they are stored on the file and summed on the job.
+    """
     r = get_redis_client()
     jk = _job_key(job_id)
     fk = _file_key(job_id, filename)
@@ -105,12 +116,19 @@ def update_file_status(
     file_data: dict[str, Any] = {"status": status, "error": error}
     if chunks:
         file_data["chunks"] = chunks
+    if cache_hits or cache_misses:
+        file_data["embed_cache_hits"] = cache_hits
+        file_data["embed_cache_misses"] = cache_misses
     r.hset(fk, mapping=file_data)
 
     if status == "completed":
         r.hincrby(jk, "processed", 1)
         if chunks:
             r.hincrby(jk, "documents_ingested", chunks)
+        if cache_hits:
+            r.hincrby(jk, "embed_cache_hits", cache_hits)
+        if cache_misses:
+            r.hincrby(jk, "embed_cache_misses", cache_misses)
     elif status == "failed":
         r.hincrby(jk, "processed", 1)
         r.hincrby(jk, "failed_cnt", 1)
@@ -161,6 +179,8 @@ def get_job(job_id: str) -> dict[str, Any] | None:
     data["processed"] = int(data.get("processed", 0))
     data["failed_cnt"] = int(data.get("failed_cnt", 0))
     data["documents_ingested"] = int(data.get("documents_ingested", 0))
+    data["embed_cache_hits"] = int(data.get("embed_cache_hits", 0))
+    data["embed_cache_misses"] = int(data.get("embed_cache_misses", 0))
 
     # Collect per-file statuses
     filenames: list[str] = json.loads(data.get("filenames", "[]"))
@@ -169,6 +189,8 @@ def get_job(job_id: str) -> dict[str, Any] | None:
         fdata = r.hgetall(_file_key(job_id, fname))
         if fdata:
             fdata["chunks"] = int(fdata.get("chunks", 0))
+            fdata["embed_cache_hits"] = int(fdata.get("embed_cache_hits", 0))
+            fdata["embed_cache_misses"] = int(fdata.get("embed_cache_misses", 0))
             files[fname] = fdata
     data["files"] = files
 
@@ -0,0 +1,96 @@
+"""Redis-backed token buckets shared by every worker.
+
+A bucket is a hash ``quota:{scope}:{name}`` holding ``tokens`` and the
+refill timestamp ``ts`` (Redis server time, ms).  :func:`take_tokens` runs
+one Lua script that refills the bucket, takes the tokens if at least
+*floor* would remain, and otherwise returns how long to wait — so
+concurrent workers never over-spend and no clock skew is involved.
+
+A ``quota:cooldown:{model}`` key (set after a 429) makes callers that pass
+it as *cooldown* (batch work) wait until it expires, whatever their
+*floor*.
+
+Redis errors return ``None`` so the caller can fall back to a local bucket.
+"""
+
+from typing import Optional
+
+import redis
+
+from app.core.logging import logger
+from ._client import get_redis_client
+
+_KEY_PREFIX = "quota"
+
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local floor = tonumber(ARGV[4])
+if KEYS[2] then
+  local cooldown = redis.call('PTTL', KEYS[2])
+  if cooldown > 0 then return cooldown end
+end
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+local wait = 0
+if tokens - cost >= floor then
+  tokens = tokens - cost
+else
+  wait = math.ceil((cost + floor - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return wait
+"""
+
+_take_script = None
+
+
+def bucket_key(scope: str, name: str) -> str:
+    return f"{_KEY_PREFIX}:{scope}:{name}"
+
+
+def cooldown_key(model: str) -> str:
+    return f"{_KEY_PREFIX}:cooldown:{model}"
+
+
+def take_tokens(
+    key: str,
+    rate_per_sec: float,
+    capacity: float,
+    *,
+    cost: float = 1.0,
+    floor: float = 0.0,
+    cooldown: Optional[str] = None,
+) -> Optional[float]:
+    """Take *cost* tokens from the bucket at *key*, keeping *floor* in it.
+
+    While the *cooldown* key exists nothing is taken and its remaining TTL
+    is returned as the wait.
+
+    Returns ``0.0`` when the tokens were taken, the seconds to wait before
+    trying again otherwise, or ``None`` if Redis is unavailable.
+    """
+    global _take_script
+    try:
+        if _take_script is None:
+            _take_script = get_redis_client().register_script(_TAKE_SCRIPT)
+        keys = [key, cooldown] if cooldown else [key]
+        wait_ms = _take_script(keys=keys, args=[rate_per_sec, capacity, cost, floor])
+        return int(wait_ms) / 1000
+    except redis.RedisError as exc:
+        logger.warning(f"Quota bucket '{key}' unavailable: {exc}")
+        return None
+
+
+def start_cooldown(model: str, ms: float) -> None:
+    """Pause batch calls to *model* on all workers for *ms* milliseconds."""
+    try:
+        get_redis_client().set(cooldown_key(model), 1, px=max(1, int(ms)))
+    except redis.RedisError as exc:
+        logger.warning(f"Quota cooldown for '{model}' not shared: {exc}")
@@ -0,0 +1,29 @@
+"""Redis-backed store for serialized search results.
+
+Values are opaque JSON strings written with a TTL.  Like the vector cache,
+all operations are best-effort and treat Redis errors as misses.
+"""
+
+from typing import Optional
+
+import redis
+
+from app.core.logging import logger
+from ._client import get_redis_client
+
+
+def get_cached_payload(key: str) -> Optional[str]:
+    """Return the payload stored at *key*, or ``None`` on miss / error."""
+    try:
+        return get_redis_client().get(key)
+    except redis.RedisError as exc:
+        logger.warning(f"Result cache read failed for '{key}': {exc}")
+        return None
+
+
+def set_cached_payload(key: str, payload: str, ttl_sec: int) -> None:
+    """Store *payload* at *key* with an expiry of *ttl_sec* seconds."""
+    try:
+        get_redis_client().set(key, payload, ex=ttl_sec)
+    except redis.RedisError as exc:
+        logger.warning(f"Result cache write failed for '{key}': {exc}")
@@ -0,0 +1,70 @@
+"""Redis-backed store for embedding vectors.
+
+Vectors are stored as packed little-endian float32 bytes (``4 * dim``
+bytes per vector) at caller-provided keys with a TTL, so every uvicorn
+worker shares the same warm set.
+
+All operations are best-effort: Redis errors are logged and reported as
+cache misses so an unavailable cache never fails a request.
+"""
+
+import struct
+from typing import Optional, Sequence
+
+import redis
+
+from app.core.logging import logger
+from ._client import get_redis_binary_client
+
+
+def pack_vector(vector: list[float]) -> bytes:
+    """Pack a float vector into little-endian float32 bytes."""
+    return struct.pack(f"<{len(vector)}f", *vector)
+
+
+def unpack_vector(raw: bytes) -> list[float]:
+    """Inverse of :func:`pack_vector`."""
+    return list(struct.unpack(f"<{len(raw) // 4}f", raw))
+
+
+def get_vector(key: str) -> Optional[list[float]]:
+    """Return the vector stored at *key*, or ``None`` on miss / error."""
+    try:
+        raw = get_redis_binary_client().get(key)
+    except redis.RedisError as exc:
+        logger.warning(f"Vector cache read failed for '{key}': {exc}")
+        return None
+    return unpack_vector(raw) if raw else None
+
+
+def set_vector(key: str, vector: list[float], ttl_sec: int) -> None:
+    """Store *vector* at *key* with an expiry of *ttl_sec* seconds."""
+    try:
+        get_redis_binary_client().set(key, pack_vector(vector), ex=ttl_sec)
+    except redis.RedisError as exc:
+        logger.warning(f"Vector cache write failed for '{key}': {exc}")
+
+
+def get_vectors(keys: Sequence[str]) -> list[Optional[list[float]]]:
+    """Batched :func:`get_vector` (one ``MGET``); all misses on error."""
+    if not keys:
+        return []
+    try:
+        raws = get_redis_binary_client().mget(list(keys))
+    except redis.RedisError as exc:
+        logger.warning(f"Vector cache read failed for {len(keys)} keys: {exc}")
+        return [None] * len(keys)
+    return [unpack_vector(raw) if raw else None for raw in raws]
+
+
+def set_vectors(vectors: dict[str, list[float]], ttl_sec: int) -> None:
+    """Batched :func:`set_vector` in one pipelined round-trip."""
+    if not vectors:
+        return
+    try:
+        pipe = get_redis_binary_client().pipeline(transaction=False)
+        for key, vector in vectors.items():
+            pipe.set(key, pack_vector(vector), ex=ttl_sec)
+        pipe.execute()
+    except redis.RedisError as exc:
+        logger.warning(f"Vector cache write failed for {len(vectors)} keys: {exc}")
@@ -30,7 +30,7 @@ class SendMessageRequest(BaseModel):
         min_length=1,
         description="The user message content.",
     )
-    search_type: Literal["dense", "sparse", "hybrid"] = Field(
+    search_type: Literal["dense", "sparse", "hybrid", "auto"] = Field(
         "hybrid",
         description="Search strategy for document retrieval.",
     )
@@ -111,3 +111,7 @@ class SendMessageResponse(BaseModel):
     assistant_message: MessageResponse = Field(
         ..., description="The assistant's RAG-augmented response."
     )
+    degradations: list[str] = Field(
+        default_factory=list,
+        description="Optional work shed to meet the request deadline.",
+    )
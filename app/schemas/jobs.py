@@ -10,6 +10,12 @@ class FileJobStatus(BaseModel):
     status: Literal["pending", "transcribing", "processing", "completed", "failed"]
     error: str = ""
     chunks: int = Field(0, description="Number of document chunks produced")
+    embedding_cache_hits: int = Field(
+        0, description="Chunk embeddings served from the embedding cache"
+    )
+    embedding_cache_misses: int = Field(
+        0, description="Chunk embeddings computed by the provider"
+    )
 
 
 class JobStatusResponse(BaseModel):
@@ -24,6 +30,15 @@ class JobStatusResponse(BaseModel):
     documents_ingested: int = Field(
         0, description="Total chunks written to vector store"
     )
+    embedding_cache_hits: int = Field(
+        0, description="Chunk embeddings served from the embedding cache"
+    )
+    embedding_cache_misses: int = Field(
+        0, description="Chunk embeddings computed by the provider"
+    )
+    embedding_cache_hit_rate: float = Field(
+        0.0, description="embedding_cache_hits / (hits + misses); 0 when none"
+    )
     error: str = Field("", description="Top-level error (empty when ok)")
     created_at: str
     updated_at: str
@@ -16,9 +16,12 @@ class SearchRequest(BaseModel):
         le=100,
         description="The number of top results to return.",
     )
-    search_type: Literal["dense", "sparse", "hybrid"] = Field(
+    search_type: Literal["dense", "sparse", "hybrid", "auto"] = Field(
         "hybrid",
-        description="The type of search to perform: 'dense', 'sparse', or 'hybrid'.",
+        description=(
+            "The type of search to perform: 'dense', 'sparse', 'hybrid', or "
+            "'auto' (routed by query shape)."
+        ),
     )
     rerank: bool = Field(
         False,
@@ -52,3 +55,10 @@ class SearchResponse(BaseModel):
     results: list[SearchResult] = Field(
         ..., description="A list of search results matching the query."
     )
+    degradations: list[str] = Field(
+        default_factory=list,
+        description=(
+            "Optional work shed to meet the request deadline, e.g. "
+            "'rerank_skipped' or 'sparse_fallback'."
+        ),
+    )
@@ -1,8 +1,12 @@
-from .process_files import process_files, process_single_file
-from .chunk import chunk_text, generate_titles, TextChunk
+from .process_files import process_files, process_single_file, stream_file_documents
+from .chunk import chunk_text, generate_titles, ChunkStream, TextChunk
 from .embed import dense_embed, embed_query
 from .speech_to_text import parse_audio_to_text
-from .rerank import rerank
+from .rerank import rerank, rerank_async
+from .rerank_cache import rerank_cached
+from .fusion import fuse_hits
+from .pruning import prune_candidates
+from .quota import GovernedCall, QuotaExceededError
 from .generate import (
     build_context_block,
     build_messages,
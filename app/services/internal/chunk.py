@@ -1,16 +1,20 @@
 """Text chunking with LangChain splitter + title generation via Google Generative AI."""
 
 import asyncio
+import weakref
 from dataclasses import dataclass
 from functools import lru_cache
 from typing import Optional
 
+from langchain_core.documents import Document as LCDocument
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from app.core.config import settings
 from app.core.logging import logger
+from app.core.resilience import ResilientCall
+from .quota import GovernedCall
 
 
 # ---------------------------------------------------------------------------
@@ -26,6 +30,7 @@ class TextChunk:
     index: int           # 0-based position within the source document
     source: str          # originating file path or identifier
     title: Optional[str] = None  # populated later by LLM
+    start: Optional[int] = None  # character offset in the source text
 
 
 # ---------------------------------------------------------------------------
@@ -33,6 +38,18 @@ class TextChunk:
 # ---------------------------------------------------------------------------
 
 
+def _make_splitter(
+    chunk_size: int | None, chunk_overlap: int | None, *, add_start_index: bool = False
+) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size or settings.MAX_TOKENS,
+        chunk_overlap=chunk_overlap or settings.OVERLAP_TOKENS,
+        length_function=len,
+        separators=["\n\n", "\n", ". ", " ", ""],
+        add_start_index=add_start_index,
+    )
+
+
 def chunk_text(
     text: str,
     source: str,
@@ -40,18 +57,85 @@ def chunk_text(
     chunk_overlap: int | None = None,
 ) -> list[TextChunk]:
     """Split *text* into overlapping chunks using LangChain's recursive splitter."""
-    chunk_size = chunk_size or settings.MAX_TOKENS
-    chunk_overlap = chunk_overlap or settings.OVERLAP_TOKENS
-
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        length_function=len,
-        separators=["\n\n", "\n", ". ", " ", ""],
-    )
-
-    raw_chunks = splitter.split_text(text)
-    return [TextChunk(text=c, index=i, source=source) for i, c in enumerate(raw_chunks)]
+    splitter = _make_splitter(chunk_size, chunk_overlap, add_start_index=True)
+    docs = splitter.create_documents([text])
+    return [
+        TextChunk(text=d.page_content, index=i, source=source, start=_start(d))
+        for i, d in enumerate(docs)
+    ]
+
+
+def _start(doc: LCDocument, offset: int = 0) -> Optional[int]:
+    """Offset of a splitter document in the source text (``None`` if unknown)."""
+    start = doc.metadata.get("start_index", -1)
+    return offset + start if start >= 0 else None
+
+
+class ChunkStream:
+    """Incremental :func:`chunk_text` for text that arrives in pieces (pages).
+
+    Pieces are joined with ``"\n"`` (as the loaders' pages are) into a
+    buffer.  Once the buffer spans ``_SPLIT_AT_CHUNKS`` chunk sizes it is
+    split, every chunk but the last ``_KEEP_CHUNKS`` is emitted, and the
+    buffer restarts where the first kept chunk starts -- so the splitter's
+    overlap is preserved and at most a few chunks of text are held.  Later
+    text can only move the boundaries of the kept tail chunks.
+    """
+
+    _SPLIT_AT_CHUNKS = 4
+    _KEEP_CHUNKS = 2
+
+    def __init__(
+        self,
+        source: str,
+        chunk_size: int | None = None,
+        chunk_overlap: int | None = None,
+    ) -> None:
+        self.source = source
+        self._chunk_size = chunk_size or settings.MAX_TOKENS
+        self._splitter = _make_splitter(
+            chunk_size, chunk_overlap, add_start_index=True
+        )
+        self._buffer = ""
+        self._offset = 0  # position of the buffer in the whole text
+        self._next_index = 0
+
+    def _emit(self, docs: list[LCDocument]) -> list[TextChunk]:
+        chunks = [
+            TextChunk(
+                text=d.page_content,
+                index=self._next_index + i,
+                source=self.source,
+                start=_start(d, self._offset),
+            )
+            for i, d in enumerate(docs)
+        ]
+        self._next_index += len(chunks)
+        return chunks
+
+    def feed(self, text: str) -> list[TextChunk]:
+        """Add *text*; return the chunks that can no longer change."""
+        self._buffer = f"{self._buffer}\n{text}" if self._buffer else text
+        if len(self._buffer) < self._SPLIT_AT_CHUNKS * self._chunk_size:
+            return []
+        docs = self._splitter.create_documents([self._buffer])
+        if len(docs) <= self._KEEP_CHUNKS:
+            return []
+        start = docs[-self._KEEP_CHUNKS].metadata.get("start_index", -1)
+        if start <= 0:
+            return []  # kept chunk not located; wait for more text
+        chunks = self._emit(docs[: -self._KEEP_CHUNKS])
+        self._buffer = self._buffer[start:]
+        self._offset += start
+        return chunks
+
+    def close(self) -> list[TextChunk]:
+        """Return the remaining chunks."""
+        docs = self._splitter.create_documents([self._buffer]) if self._buffer else []
+        chunks = self._emit(docs)
+        self._buffer = ""
+        self._offset = 0
+        return chunks
 
 
 # ---------------------------------------------------------------------------
@@ -80,15 +164,22 @@ _TITLE_SYSTEM_PROMPT = (
 )
 
 
+_title_calls = ResilientCall("generate_title", hedge_max_delay_ms=10_000)
+_title_quota = GovernedCall(
+    "generate_title", settings.TITLE_GEN_MODEL, priority="batch"
+)
+
+
 def _generate_title_sync(text: str) -> str | None:
     """Call Google Generative AI to generate a title for a chunk (blocking)."""
     llm = _get_title_llm()
     try:
-        response = llm.invoke(
+        response = _title_calls.call(
+            _title_quota.wrap(llm.invoke),
             [
                 SystemMessage(content=_TITLE_SYSTEM_PROMPT),
                 HumanMessage(content=text[:2000]),  # limit context
-            ]
+            ],
         )
         title = (response.content or "").strip().strip("\"'")
         return title or None
@@ -97,12 +188,33 @@ def _generate_title_sync(text: str) -> str | None:
         return None
 
 
+_title_slots: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _title_gen_slots() -> asyncio.Semaphore:
+    """Per-loop limit of ``TITLE_GEN_MAX_CONCURRENCY`` title requests."""
+    loop = asyncio.get_running_loop()
+    slots = _title_slots.get(loop)
+    if slots is None:
+        slots = asyncio.Semaphore(max(1, settings.TITLE_GEN_MAX_CONCURRENCY))
+        _title_slots[loop] = slots
+    return slots
+
+
 async def generate_titles(chunks: list[TextChunk]) -> list[TextChunk]:
-    """Generate titles for all chunks concurrently."""
+    """Generate titles for all chunks, ``TITLE_GEN_MAX_CONCURRENCY`` at a time.
+
+    The limit is shared by every file ingesting on the loop, so concurrent
+    uploads cannot multiply the threads waiting for title quota.
+    """
     loop = asyncio.get_running_loop()
+    in_flight = _title_gen_slots()
 
     async def _title_one(chunk: TextChunk) -> None:
-        chunk.title = await loop.run_in_executor(None, _generate_title_sync, chunk.text)
+        async with in_flight:
+            chunk.title = await loop.run_in_executor(
+                _title_quota.executor, _generate_title_sync, chunk.text
+            )
 
     await asyncio.gather(*[_title_one(c) for c in chunks])
     return chunks
@@ -0,0 +1,124 @@
+"""Internal service: diversity-aware selection of search hits.
+
+Chunks overlap by ``OVERLAP_TOKENS``, so the best hits for a query are
+often neighbouring, near-identical chunks of one file.  Each of them costs
+a rerank pair and prompt tokens without adding coverage.  This stage
+picks hits greedily by Maximal Marginal Relevance::
+
+    mmr(d) = λ · relevance(d) − (1 − λ) · max_{s ∈ selected} cos(d, s)
+
+over the chunks' dense vectors, and skips hits whose
+``metadata.source_filename`` already has ``DIVERSITY_MAX_PER_SOURCE``
+selected chunks.
+
+Relevance is taken from the retrieval order (``1`` for the first hit,
+falling linearly), so fused hybrid and BM25 rankings are respected as-is.
+The pairwise similarities are computed once as one matrix product; each
+greedy step is a vectorized update.
+
+The per-source cap is applied here rather than with Milvus
+``group_by_field``, which cannot group on a key inside the JSON
+``metadata`` field.
+"""
+
+from typing import Any
+
+import numpy as np
+
+from app.core.config import settings
+from app.models import Document
+from app.repositories.milvus.search import SEARCH_OUTPUT_FIELDS
+
+Hits = list[tuple[Document, float | None]]
+
+# Milvus returns the vector under the schema field name.
+VECTOR_FIELD = "dense_vector"
+
+
+def resolve_diversify(diversify: bool | None) -> bool:
+    """Per-call choice, falling back to ``settings.DIVERSITY_ENABLED``."""
+    return settings.DIVERSITY_ENABLED if diversify is None else diversify
+
+
+def pool_size(k: int) -> int:
+    """Candidates to retrieve so that *k* can be selected."""
+    return max(k, int(settings.DIVERSITY_POOL_MULTIPLIER * k))
+
+
+def diversity_options() -> dict[str, Any]:
+    """Repository arguments MMR needs: the chunk vectors (none for a pure
+    per-source cap, i.e. ``DIVERSITY_MMR_LAMBDA == 1``)."""
+    if settings.DIVERSITY_MMR_LAMBDA >= 1:
+        return {}
+    return {"output_fields": (*SEARCH_OUTPUT_FIELDS, VECTOR_FIELD)}
+
+
+def _source_of(doc: Document) -> Any:
+    metadata = doc.metadata or {}
+    return metadata.get("source_filename") or metadata.get("source")
+
+
+def _unit_vectors(hits: Hits) -> np.ndarray:
+    """Row-normalized vectors; hits without a vector get a zero row."""
+    dim = next((len(d.dense_vector) for d, _ in hits if d.dense_vector), 0)
+    matrix = np.zeros((len(hits), dim), dtype=np.float32)
+    for i, (doc, _) in enumerate(hits):
+        if doc.dense_vector:
+            matrix[i] = doc.dense_vector
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def select_diverse(
+    hits: Hits,
+    k: int,
+    *,
+    mmr_lambda: float | None = None,
+    max_per_source: int | None = None,
+) -> Hits:
+    """Pick up to *k* hits trading relevance against redundancy.
+
+    Args:
+        hits: Candidates in retrieval order (most relevant first).
+        k: Number of hits to keep.
+        mmr_lambda: Relevance weight in ``[0, 1]``; ``1`` keeps retrieval
+            order (default ``settings.DIVERSITY_MMR_LAMBDA``).
+        max_per_source: Cap on hits per source file; ``0`` = no cap
+            (default ``settings.DIVERSITY_MAX_PER_SOURCE``).
+
+    Returns:
+        The selected hits in selection order, without their vectors.
+    """
+    lam = settings.DIVERSITY_MMR_LAMBDA if mmr_lambda is None else mmr_lambda
+    cap = settings.DIVERSITY_MAX_PER_SOURCE if max_per_source is None else max_per_source
+    n = len(hits)
+    if n == 0 or k <= 0:
+        return []
+
+    relevance = 1.0 - np.arange(n, dtype=np.float32) / n
+    vectors = _unit_vectors(hits)
+    similarity = vectors @ vectors.T
+    max_sim = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    per_source: dict[Any, int] = {}
+
+    selected: list[int] = []
+    while len(selected) < k and available.any():
+        scores = lam * relevance - (1.0 - lam) * max_sim
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        available[best] = False
+
+        source = _source_of(hits[best][0])
+        if cap and source is not None:
+            if per_source.get(source, 0) >= cap:
+                continue
+            per_source[source] = per_source.get(source, 0) + 1
+
+        selected.append(best)
+        np.maximum(max_sim, similarity[best], out=max_sim)
+
+    return [
+        (hits[i][0].model_copy(update={VECTOR_FIELD: None}), hits[i][1])
+        for i in selected
+    ]
@@ -7,21 +7,59 @@ Two task types are exposed:
 
 Google Gemini produces better retrieval results when the correct task type
 is provided, because it applies asymmetric projection internally.
+
+Query embeddings are cached in two tiers: a per-process LRU and a shared
+Redis tier (packed float32), keyed by the normalized query text, model,
+dimension and task type.  Cache misses that arrive concurrently are
+coalesced by a micro-batcher into a single batched API call.
+
+Document (chunk) embeddings are content-addressed in Redis: the key hashes
+the chunk text, title, model, dimension and task type, so re-ingesting an
+edited file or the same transcript into another collection only sends the
+changed chunks to Gemini.
+
+Document chunks of all files being ingested go through one process-wide
+packer: a batch is sent once it holds ``EMBEDDING_BATCH_SIZE`` chunks or
+``EMBEDDING_BATCH_MAX_CHARS`` characters, or ``EMBEDDING_BATCH_WINDOW_MS``
+after its first chunk arrived, and each vector is routed back to the file
+that submitted it.  At most ``EMBEDDING_MAX_CONCURRENT_BATCHES`` batches
+are in flight.  A batch that fails with a transient error is retried on
+its own; chunks from batches that succeeded are kept (and cached), so
+neither a retry nor a re-run re-embeds them.
 """
 
 import asyncio
+import contextvars
+import hashlib
+import re
+import unicodedata
+import weakref
 from functools import lru_cache
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from typing import Optional
+from typing import Any, Awaitable, Callable, Optional
 
+from app.core.batching import MicroBatcher
+from app.core.cache import CacheStats, LRUCache
 from app.core.config import settings
 from app.core.logging import logger
+from app.core.metrics import EMBEDDING_ERRORS, EMBEDDING_SECONDS, observe_call
+from app.core.resilience import ResilientCall
+from app.repositories.redis.vector_cache import (
+    get_vector,
+    get_vectors,
+    set_vector,
+    set_vectors,
+)
+from .quota import GovernedCall
 
 
 # ---------------------------------------------------------------------------
 # Clients (cached singletons — one per task type)
 # ---------------------------------------------------------------------------
 
+_QUERY_TASK_TYPE = "RETRIEVAL_QUERY"
+_DOCUMENT_TASK_TYPE = "RETRIEVAL_DOCUMENT"
+
 
 @lru_cache(maxsize=1)
 def _get_document_embedding_client() -> GoogleGenerativeAIEmbeddings:
@@ -29,7 +67,7 @@ def _get_document_embedding_client() -> GoogleGenerativeAIEmbeddings:
     return GoogleGenerativeAIEmbeddings(
         model=settings.EMBEDDING_MODEL,
         google_api_key=settings.GOOGLE_API_KEY,
-        task_type="RETRIEVAL_DOCUMENT",
+        task_type=_DOCUMENT_TASK_TYPE,
         output_dimensionality=settings.EMBEDDING_DIM,
     )
 
@@ -40,7 +78,7 @@ def _get_query_embedding_client() -> GoogleGenerativeAIEmbeddings:
     return GoogleGenerativeAIEmbeddings(
         model=settings.EMBEDDING_MODEL,
         google_api_key=settings.GOOGLE_API_KEY,
-        task_type="RETRIEVAL_QUERY",
+        task_type=_QUERY_TASK_TYPE,
         output_dimensionality=settings.EMBEDDING_DIM,
     )
 
@@ -50,18 +88,237 @@ def _get_query_embedding_client() -> GoogleGenerativeAIEmbeddings:
 # ---------------------------------------------------------------------------
 
 
+_DOC_SECONDS = EMBEDDING_SECONDS.labels("document")
+_DOC_ERRORS = EMBEDDING_ERRORS.labels("document")
+_QUERY_SECONDS = EMBEDDING_SECONDS.labels("query")
+_QUERY_ERRORS = EMBEDDING_ERRORS.labels("query")
+
+# Query embeddings sit on the search critical path: hedge slow calls.
+_query_calls = ResilientCall("embed_query")
+# Document batches are bulk work: retry transient failures, never hedge.
+_document_calls = ResilientCall("embed_documents", hedge=False)
+_query_quota = GovernedCall("embed_query", settings.EMBEDDING_MODEL)
+_document_quota = GovernedCall(
+    "embed_documents", settings.EMBEDDING_MODEL, priority="batch"
+)
+
+
 def _embed_batch_sync(
     texts: list[str], titles: Optional[list[str]] = None
 ) -> list[list[float]]:
     """Embed a batch of **document** texts synchronously."""
     client = _get_document_embedding_client()
-    return client.embed_documents(texts=texts, titles=titles)
+    with observe_call(_DOC_SECONDS, _DOC_ERRORS):
+        return _document_calls.call(
+            _document_quota.wrap(client.embed_documents), texts=texts, titles=titles
+        )
 
 
 def _embed_query_sync(text: str) -> list[float]:
     """Embed a single **query** text synchronously."""
     client = _get_query_embedding_client()
-    return client.embed_query(text)
+    with observe_call(_QUERY_SECONDS, _QUERY_ERRORS):
+        return _query_calls.call(_query_quota.wrap(client.embed_query), text)
+
+
+def _embed_queries_sync(texts: list[str]) -> list[list[float]]:
+    """Embed several **query** texts in one request (``RETRIEVAL_QUERY``)."""
+    if len(texts) == 1:
+        return [_embed_query_sync(texts[0])]
+    client = _get_query_embedding_client()
+    with observe_call(_QUERY_SECONDS, _QUERY_ERRORS):
+        return _query_calls.call(
+            _query_quota.wrap(client.embed_documents),
+            texts=texts,
+            task_type=_QUERY_TASK_TYPE,
+        )
+
+
+# ---------------------------------------------------------------------------
+# Query embedding cache
+# ---------------------------------------------------------------------------
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_query_cache = LRUCache(
+    max_entries=settings.QUERY_EMBEDDING_CACHE_MAX_ENTRIES,
+    ttl_sec=settings.QUERY_EMBEDDING_CACHE_TTL_SEC,
+)
+_redis_stats = {"hits": 0, "misses": 0}
+
+
+def _normalize_query(text: str) -> str:
+    """Normalize unicode form and whitespace so trivial variants share a key."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def _query_cache_key(text: str) -> str:
+    digest = hashlib.sha256(_normalize_query(text).encode()).hexdigest()
+    return (
+        f"qemb:{settings.EMBEDDING_MODEL}:{settings.EMBEDDING_DIM}:"
+        f"{_QUERY_TASK_TYPE}:{digest}"
+    )
+
+
+# ---------------------------------------------------------------------------
+# Query micro-batching
+# ---------------------------------------------------------------------------
+
+
+async def _embed_query_batch(texts: list[str]) -> list[list[float]]:
+    """Batch handler: embed each distinct text once, fan results back out."""
+    unique = list(dict.fromkeys(texts))
+    if len(unique) > 1:
+        logger.debug(f"Coalesced {len(texts)} query embeddings into one request")
+    loop = asyncio.get_running_loop()
+    vectors = await loop.run_in_executor(
+        _query_quota.executor, _embed_queries_sync, unique
+    )
+    by_text = dict(zip(unique, vectors))
+    return [by_text[t] for t in texts]
+
+
+_query_batcher: MicroBatcher[str, list[float]] = MicroBatcher(
+    _embed_query_batch,
+    max_items=settings.QUERY_EMBEDDING_BATCH_MAX_ITEMS,
+    max_wait_ms=settings.QUERY_EMBEDDING_BATCH_WINDOW_MS,
+)
+
+
+async def _embed_query_uncached(text: str) -> list[float]:
+    if settings.QUERY_EMBEDDING_BATCH_WINDOW_MS <= 0:
+        loop = asyncio.get_running_loop()
+        # Unbatched: the request deadline bounds the retries.
+        return await loop.run_in_executor(
+            _query_quota.executor,
+            contextvars.copy_context().run,
+            _embed_query_sync,
+            text,
+        )
+    return await _query_batcher.submit(text)
+
+
+def get_query_cache_stats() -> dict[str, Any]:
+    """Return hit/miss counters for both query-embedding cache tiers."""
+    return {
+        "local": _query_cache.snapshot(),
+        "redis": dict(_redis_stats),
+        "batching": _query_batcher.stats.as_dict(),
+    }
+
+
+def clear_query_cache() -> None:
+    """Drop the in-process tier and reset counters (Redis is left untouched)."""
+    _query_cache.clear()
+    _redis_stats.update(hits=0, misses=0)
+
+
+# ---------------------------------------------------------------------------
+# Chunk embedding cache
+# ---------------------------------------------------------------------------
+
+
+def _chunk_cache_key(text: str, title: Optional[str]) -> str:
+    payload = "\x1f".join(
+        [
+            text,
+            title or "",
+            settings.EMBEDDING_MODEL,
+            str(settings.EMBEDDING_DIM),
+            _DOCUMENT_TASK_TYPE,
+        ]
+    )
+    return f"cemb:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+
+# ---------------------------------------------------------------------------
+# Document batch packing
+# ---------------------------------------------------------------------------
+
+DocumentItem = tuple[str, Optional[str]]  # (text, title)
+
+# Event loop -> semaphore (one per loop, like the batcher's own state).
+_batch_slots: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _document_batch_slots() -> asyncio.Semaphore:
+    """Per-loop limit of ``EMBEDDING_MAX_CONCURRENT_BATCHES`` requests."""
+    loop = asyncio.get_running_loop()
+    slots = _batch_slots.get(loop)
+    if slots is None:
+        slots = asyncio.Semaphore(max(1, settings.EMBEDDING_MAX_CONCURRENT_BATCHES))
+        _batch_slots[loop] = slots
+    return slots
+
+
+def _document_weight(item: DocumentItem) -> int:
+    text, title = item
+    return len(text) + len(title or "")
+
+
+async def _embed_document_batch(items: list[DocumentItem]) -> list[list[float]]:
+    """Batch handler: one Gemini request for chunks of any number of files."""
+    texts = [text for text, _ in items]
+    titles = [title for _, title in items]
+    async with _document_batch_slots():
+        logger.debug(
+            f"Embedding batch of {len(texts)} texts "
+            f"({sum(map(_document_weight, items))} chars, "
+            f"model={settings.EMBEDDING_MODEL})"
+        )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _document_quota.executor,
+            _embed_batch_sync,
+            texts,
+            titles if any(titles) else None,
+        )
+
+
+_document_batcher: MicroBatcher[DocumentItem, list[float]] = MicroBatcher(
+    _embed_document_batch,
+    max_items=settings.EMBEDDING_BATCH_SIZE,
+    max_wait_ms=settings.EMBEDDING_BATCH_WINDOW_MS,
+    weigher=_document_weight,
+    max_weight=settings.EMBEDDING_BATCH_MAX_CHARS,
+)
+
+
+async def _embed_documents(
+    texts: list[str],
+    titles: Optional[list[str]],
+    on_done: Optional[Callable[[dict[int, list[float]]], Awaitable[None]]] = None,
+) -> list[list[float]]:
+    """Embed *texts* through the process-wide document batcher.
+
+    The result keeps input order.  ``on_done`` receives the vectors that
+    were embedded (by index) before an error from a failed batch is raised,
+    so a caller can keep them.
+    """
+    results = await asyncio.gather(
+        *[
+            _document_batcher.submit((text, titles[i] if titles else None))
+            for i, text in enumerate(texts)
+        ],
+        return_exceptions=True,
+    )
+    if on_done is not None:
+        done = {
+            i: vector
+            for i, vector in enumerate(results)
+            if not isinstance(vector, BaseException)
+        }
+        if done:
+            await on_done(done)
+    for vector in results:
+        if isinstance(vector, BaseException):
+            raise vector
+    return results
+
+
+def get_document_batch_stats() -> dict[str, float]:
+    """Return achieved size and occupancy of document embedding batches."""
+    return _document_batcher.stats.as_dict()
 
 
 # ---------------------------------------------------------------------------
@@ -70,12 +327,19 @@ def _embed_query_sync(text: str) -> list[float]:
 
 
 async def dense_embed(
-    texts: list[str], titles: Optional[list[str]] = None
+    texts: list[str],
+    titles: Optional[list[str]] = None,
+    *,
+    cache_stats: Optional[CacheStats] = None,
 ) -> list[list[float]]:
     """Embed a list of *document* texts, batching as needed.
 
     Returns a list of float vectors, one per input text, each of
     dimension ``settings.EMBEDDING_DIM``.
+
+    With ``CHUNK_EMBEDDING_CACHE_ENABLED``, vectors are looked up by content
+    first; only misses (deduplicated) go to Gemini, and their vectors are
+    written back.  Hits and misses are added to *cache_stats* if given.
     """
     if not texts:
         return []
@@ -84,29 +348,87 @@ async def dense_embed(
         logger.warning("Length of titles does not match texts; expanding for embedding")
         titles = titles + [None] * (len(texts) - len(titles))
 
-    batch_size = settings.EMBEDDING_BATCH_SIZE
+    if not settings.CHUNK_EMBEDDING_CACHE_ENABLED:
+        return await _embed_documents(texts, titles)
+
     loop = asyncio.get_running_loop()
+    keys = [
+        _chunk_cache_key(text, titles[i] if titles else None)
+        for i, text in enumerate(texts)
+    ]
+    vectors: list[Optional[list[float]]] = await loop.run_in_executor(
+        None, get_vectors, keys
+    )
 
-    all_vectors: list[list[float]] = []
-    for start in range(0, len(texts), batch_size):
-        batch_texts = texts[start : start + batch_size]
-        batch_titles = titles[start : start + batch_size] if titles else None
-        logger.debug(
-            f"Embedding batch {start // batch_size + 1} "
-            f"({len(batch_texts)} texts, model={settings.EMBEDDING_MODEL})"
-        )
-        vectors = await loop.run_in_executor(
-            None, _embed_batch_sync, batch_texts, batch_titles
+    # Distinct missing keys, each embedded once.
+    missing: dict[str, int] = {}
+    for i, (key, vector) in enumerate(zip(keys, vectors)):
+        if vector is None:
+            missing.setdefault(key, i)
+
+    hits = len(texts) - sum(1 for v in vectors if v is None)
+    if cache_stats is not None:
+        cache_stats.hits += hits
+        cache_stats.misses += len(texts) - hits
+
+    if missing:
+        missing_keys = list(missing)
+        indices = list(missing.values())
+
+        async def cache_embedded(done: dict[int, list[float]]) -> None:
+            # Also after a failed batch, so a re-run keeps what was embedded.
+            fresh = {missing_keys[i]: vector for i, vector in done.items()}
+            await loop.run_in_executor(
+                None, set_vectors, fresh, settings.CHUNK_EMBEDDING_CACHE_TTL_SEC
+            )
+
+        fresh = await _embed_documents(
+            [texts[i] for i in indices],
+            [titles[i] for i in indices] if titles else None,
+            on_done=cache_embedded,
         )
-        all_vectors.extend(vectors)
+        by_key = dict(zip(missing_keys, fresh))
+        vectors = [by_key[k] if v is None else v for k, v in zip(keys, vectors)]
 
-    return all_vectors
+    logger.info(
+        f"Chunk embedding cache: {hits}/{len(texts)} hits, "
+        f"{len(missing)} embedded"
+    )
+    return vectors
 
 
 async def embed_query(text: str) -> list[float]:
     """Embed a single *search query* using ``RETRIEVAL_QUERY`` task type.
 
     Returns a float vector of dimension ``settings.EMBEDDING_DIM``.
+
+    Lookup order: in-process LRU -> Redis -> Gemini.  Vectors fetched from a
+    slower tier are written back to the faster ones.  Gemini calls from
+    concurrent requests are coalesced into batches.
     """
     loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(None, _embed_query_sync, text)
+    if not settings.QUERY_EMBEDDING_CACHE_ENABLED:
+        return await _embed_query_uncached(text)
+
+    key = _query_cache_key(text)
+    vector = _query_cache.get(key)
+    if vector is not None:
+        return vector
+
+    use_redis = settings.QUERY_EMBEDDING_CACHE_REDIS_ENABLED
+    if use_redis:
+        vector = await loop.run_in_executor(None, get_vector, key)
+        if vector is not None:
+            _redis_stats["hits"] += 1
+            _query_cache.set(key, vector)
+            return vector
+        _redis_stats["misses"] += 1
+
+    vector = await _embed_query_uncached(text)
+    _query_cache.set(key, vector)
+    if use_redis:
+        # Fire-and-forget: the caller does not wait for the shared write.
+        loop.run_in_executor(
+            None, set_vector, key, vector, settings.QUERY_EMBEDDING_CACHE_TTL_SEC
+        )
+    return vector
@@ -0,0 +1,105 @@
+"""Internal service: client-side fusion of dense and sparse hit lists.
+
+Reproduces the server-side rankers configured in
+``repositories/milvus/search._fusion_ranker`` so the two legs of a hybrid
+search can run as independent requests:
+
+- ``weighted`` / ``dbsf`` — ``WeightedRanker(alpha, 1 - alpha,
+  norm_score=True)``: each leg's raw distance is normalized the way Milvus
+  does for its metric (COSINE: ``(1 + x) / 2``; IP: ``0.5 + atan(x) /
+  pi``; BM25: ``2 * atan(x) / pi``), weighted, and summed.  A document
+  missing from one leg contributes 0 for that leg.
+- ``rrf`` — ``RRFRanker(k)``: ``sum(1 / (k + rank))`` with 1-based ranks.
+
+Both legs must be fetched with raw scores (``include_scores=True``).
+"""
+
+import math
+from typing import Literal
+
+from app.core.config import settings
+from app.models import Document
+
+Hits = list[tuple[Document, float | None]]
+
+_DENSE_METRIC = "COSINE"
+_SPARSE_METRIC = "BM25"
+
+
+def _normalize(score: float, metric: str) -> float:
+    if metric == "COSINE":
+        return (1.0 + score) / 2.0
+    if metric == "L2":
+        return 1.0 - 2.0 * math.atan(score) / math.pi
+    if metric == "BM25":  # non-negative, so mapped onto [0, 1)
+        return 2.0 * math.atan(score) / math.pi
+    # IP is an unbounded similarity.
+    return 0.5 + math.atan(score) / math.pi
+
+
+def _weighted(legs: list[tuple[Hits, str, float]]) -> dict[int, float]:
+    fused: dict[int, float] = {}
+    for hits, metric, weight in legs:
+        for doc, score in hits:
+            fused[doc.doc_id] = fused.get(doc.doc_id, 0.0) + weight * _normalize(
+                score or 0.0, metric
+            )
+    return fused
+
+
+def _rrf(legs: list[Hits], k: int) -> dict[int, float]:
+    fused: dict[int, float] = {}
+    for hits in legs:
+        for rank, (doc, _) in enumerate(hits, start=1):
+            fused[doc.doc_id] = fused.get(doc.doc_id, 0.0) + 1.0 / (k + rank)
+    return fused
+
+
+def fuse_hits(
+    dense_hits: Hits,
+    sparse_hits: Hits,
+    top_k: int,
+    *,
+    method: Literal["weighted", "dbsf", "rrf"] | None = None,
+    alpha: float | None = None,
+    rrf_k: int | None = None,
+    include_score: bool = settings.DEBUG_MODE_ENABLED,
+) -> Hits:
+    """Fuse dense and sparse hits into one ranked list of at most *top_k*.
+
+    Args:
+        dense_hits: Dense-leg hits with raw COSINE scores.
+        sparse_hits: Sparse-leg hits with raw BM25 scores.
+        top_k: Number of fused hits to return.
+        method: Fusion method (default ``settings.FUSION_METHOD``).
+        alpha: Dense weight for weighted fusion (default ``settings.FUSION_ALPHA``).
+        rrf_k: RRF constant (default ``settings.RRF_K``).
+        include_score: Attach the fused score (as the server does in
+            debug mode); otherwise scores are ``None``.
+
+    Returns:
+        ``(Document, score)`` pairs in descending fused-score order.
+    """
+    method = method or settings.FUSION_METHOD
+    if method in ("weighted", "dbsf"):
+        a = settings.FUSION_ALPHA if alpha is None else alpha
+        fused = _weighted(
+            [
+                (dense_hits, _DENSE_METRIC, a),
+                (sparse_hits, _SPARSE_METRIC, 1.0 - a),
+            ]
+        )
+    elif method == "rrf":
+        k = max(1, int(settings.RRF_K if rrf_k is None else rrf_k))
+        fused = _rrf([dense_hits, sparse_hits], k)
+    else:
+        raise ValueError(f"Unsupported fusion method: {method}")
+
+    docs: dict[int, Document] = {}
+    for doc, _ in (*dense_hits, *sparse_hits):
+        docs.setdefault(doc.doc_id, doc)
+
+    ranked = sorted(fused.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+    return [
+        (docs[doc_id], score if include_score else None) for doc_id, score in ranked
+    ]
@@ -4,18 +4,38 @@ Provides both **non-streaming** and **streaming** generation using
 ``langchain_google_genai.ChatGoogleGenerativeAI``.
 
 All synchronous SDK calls are wrapped for ``asyncio.run_in_executor`` so the
-event loop is never blocked.
+event loop is never blocked.  Both entry points take a ``cancel`` event: a
+caller that gives up (deadline passed, client gone) sets it, and the worker
+thread stops at the next chunk, closes the provider stream and releases its
+quota slot instead of generating an answer nobody reads.
+
+The context block stitches retrieved chunks that are neighbours in their
+source document (same ``metadata.source``, consecutive ``chunk_index``)
+into one passage with the splitter's overlap removed, so the overlapping
+text is sent to the model only once.
 """
 
 import asyncio
+import contextvars
+import threading
+import time
 from functools import lru_cache
-from typing import Any
+from typing import Any, Optional
 
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 from app.core.config import settings
 from app.core.logging import logger
+from app.core.metrics import (
+    CONTEXT_TOKENS_SAVED,
+    LLM_ERRORS,
+    LLM_SECONDS,
+    LLM_TTFT_SECONDS,
+    observe_call,
+)
+from app.core.resilience import ResilientCall
+from .quota import GovernedCall
 
 
 # ---------------------------------------------------------------------------
@@ -57,15 +77,100 @@ but always ground answers in the retrieved documents.
 # ---------------------------------------------------------------------------
 
 
+# Rough chars-per-token ratio for reporting savings without a tokenizer call.
+_CHARS_PER_TOKEN = 4
+
+
+def _chunk_start(src: dict[str, Any]) -> int | None:
+    """Character offset of the chunk in its document (``metadata.start_index``)."""
+    start = (src.get("metadata") or {}).get("start_index")
+    return start if isinstance(start, int) and start >= 0 else None
+
+
+def _chunk_position(src: dict[str, Any]) -> tuple[Any, int] | None:
+    metadata = src.get("metadata") or {}
+    source, index = metadata.get("source"), metadata.get("chunk_index")
+    if source is None or not isinstance(index, int):
+        return None
+    return source, index
+
+
+def merge_adjacent_sources(
+    sources: list[dict[str, Any]],
+) -> tuple[list[dict[str, Any]], int]:
+    """Stitch neighbouring chunks of the same document into passages.
+
+    Chunks are grouped by ``metadata.source``; groups keep the rank of
+    their best chunk, and passages within a group follow document order.
+    Consecutive ``chunk_index`` values are joined, and duplicate chunks are
+    dropped.  The splitter overlap is removed only where both chunks carry
+    their offset (``metadata.start_index``); chunks ingested without it are
+    joined with a newline, never trimmed by guesswork.  Sources without
+    position metadata pass through unchanged.
+
+    Returns:
+        ``(passages, chars_saved)``.  Each passage has ``title`` (of its
+        first chunk), ``text`` and ``score`` (best of its chunks).
+    """
+    groups: dict[Any, list[tuple[int, dict[str, Any]]]] = {}
+    for i, src in enumerate(sources):
+        position = _chunk_position(src)
+        key = ("unpositioned", i) if position is None else position[0]
+        groups.setdefault(key, []).append(
+            (position[1] if position else 0, src)
+        )
+
+    passages: list[dict[str, Any]] = []
+    saved = 0
+    for chunks in groups.values():
+        chunks.sort(key=lambda c: c[0])
+        current: dict[str, Any] | None = None
+        last_index = None
+        last_end: int | None = None  # offset just past the previous chunk
+        for index, src in chunks:
+            text, score = src.get("text", ""), src.get("score")
+            if current is not None and index == last_index:
+                saved += len(text)  # same chunk retrieved twice
+                continue
+            start = _chunk_start(src)
+            if current is not None and index == last_index + 1:
+                overlap = 0
+                if start is not None and last_end is not None:
+                    overlap = min(len(text), max(0, last_end - start))
+                saved += overlap
+                current["text"] += text[overlap:] if overlap else "\n" + text
+                if score is not None:
+                    current["score"] = max(current["score"] or score, score)
+            else:
+                current = {"title": src.get("title"), "text": text, "score": score}
+                passages.append(current)
+            last_index = index
+            last_end = None if start is None else start + len(text)
+    return passages, saved
+
+
 def build_context_block(sources: list[dict[str, Any]]) -> str:
     """Format retrieved documents into a context block for the LLM prompt.
 
-    Each source dict should have at least ``text`` and optionally ``title``
-    and ``score``.
+    Each source dict should have at least ``text`` and optionally ``title``,
+    ``score`` and ``metadata`` (``source`` + ``chunk_index`` enable merging
+    of adjacent chunks, see :func:`merge_adjacent_sources`).
     """
     if not sources:
         return "(No relevant documents found.)"
 
+    if settings.CONTEXT_MERGE_ADJACENT_CHUNKS:
+        merged, saved_chars = merge_adjacent_sources(sources)
+        if saved_chars:
+            saved_tokens = saved_chars // _CHARS_PER_TOKEN
+            CONTEXT_TOKENS_SAVED.inc(saved_tokens)
+            logger.info(
+                f"Context: merged {len(sources)} chunks into {len(merged)} "
+                f"passages, ~{saved_tokens} prompt tokens saved",
+                extra={"context_tokens_saved": saved_tokens},
+            )
+        sources = merged
+
     parts: list[str] = []
     for i, src in enumerate(sources, 1):
         title = src.get("title") or "Untitled"
@@ -122,17 +227,69 @@ def build_messages(
 # ---------------------------------------------------------------------------
 
 
-def _generate_sync(messages: list[BaseMessage]) -> str:
-    """Blocking call to Google Generative AI. Returns the full response text."""
+_INVOKE_SECONDS = LLM_SECONDS.labels("invoke")
+_INVOKE_ERRORS = LLM_ERRORS.labels("invoke")
+_STREAM_SECONDS = LLM_SECONDS.labels("stream")
+_STREAM_ERRORS = LLM_ERRORS.labels("stream")
+_TTFT_SECONDS = LLM_TTFT_SECONDS.labels()
+
+# Answers take seconds, so the hedge threshold may grow well past the
+# default cap.  Streams are not wrapped: tokens are already on their way.
+_generate_calls = ResilientCall("generate", hedge_max_delay_ms=30_000)
+_generate_quota = GovernedCall("generate", settings.GENERATION_MODEL)
+_stream_quota = GovernedCall("generate_stream", settings.GENERATION_MODEL)
+
+
+class GenerationCancelled(Exception):
+    """The caller stopped waiting for the answer (see ``cancel``)."""
+
+
+def _collect(
+    llm: ChatGoogleGenerativeAI,
+    messages: list[BaseMessage],
+    cancel: Optional[threading.Event],
+) -> str:
+    """Stream *messages* into one string, stopping early once *cancel* is set."""
+    stream = llm.stream(messages)
+    try:
+        parts: list[str] = []
+        for chunk in stream:
+            if cancel is not None and cancel.is_set():
+                raise GenerationCancelled("generation cancelled by the caller")
+            if chunk.content:
+                parts.append(chunk.content)
+        return "".join(parts)
+    finally:
+        stream.close()
+
+
+_governed_collect = _generate_quota.wrap(_collect)
+
+
+def _generate_sync(
+    messages: list[BaseMessage], cancel: Optional[threading.Event] = None
+) -> str:
+    """Blocking call to Google Generative AI. Returns the full response text.
+
+    The answer is streamed internally so a cancelled call stops between
+    chunks; a retry or hedge is not started once *cancel* is set.
+    """
     llm = _get_llm()
-    response = llm.invoke(messages)
-    return response.content
+
+    def attempt(msgs: list[BaseMessage]) -> str:
+        if cancel is not None and cancel.is_set():
+            raise GenerationCancelled("generation cancelled by the caller")
+        return _governed_collect(llm, msgs, cancel)
+
+    with observe_call(_INVOKE_SECONDS, _INVOKE_ERRORS):
+        return _generate_calls.call(attempt, messages)
 
 
 def _generate_stream_sync(messages: list[BaseMessage]) -> list[str]:
     """Blocking streaming call. Returns an iterable of content delta strings."""
     llm = _get_llm()
-    return [chunk.content for chunk in llm.stream(messages) if chunk.content]
+    with _stream_quota.slot():
+        return [chunk.content for chunk in llm.stream(messages) if chunk.content]
 
 
 # ---------------------------------------------------------------------------
@@ -140,38 +297,65 @@ def _generate_stream_sync(messages: list[BaseMessage]) -> list[str]:
 # ---------------------------------------------------------------------------
 
 
-async def generate(messages: list[BaseMessage]) -> str:
+async def generate(
+    messages: list[BaseMessage], *, cancel: Optional[threading.Event] = None
+) -> str:
     """Generate a complete response (non-streaming).
 
-    Offloads the blocking LangChain call to the default thread-pool executor
-    so the event loop stays free.
+    Offloads the blocking LangChain call to the quota governor's executor
+    so the event loop stays free.  Set *cancel* when the result is no longer
+    wanted; awaiting is then abandoned but the worker stops on its own.
     """
     loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(None, _generate_sync, messages)
+    # Carry the request deadline so retries know when to give up.
+    return await loop.run_in_executor(
+        _generate_quota.executor,
+        contextvars.copy_context().run,
+        _generate_sync,
+        messages,
+        cancel,
+    )
 
 
 async def generate_stream(
-    messages: list[BaseMessage],
+    messages: list[BaseMessage], *, cancel: Optional[threading.Event] = None
 ) -> asyncio.Queue[str | None]:
     """Start a streaming generation and return an ``asyncio.Queue``.
 
     The caller reads tokens from the queue.  A ``None`` sentinel signals
     end-of-stream.  The actual blocking iteration runs in a thread-pool
-    executor.
+    executor; setting *cancel* makes it stop at the next chunk.
     """
     queue: asyncio.Queue[str | None] = asyncio.Queue()
     loop = asyncio.get_running_loop()
 
     def _producer() -> None:
+        start = time.perf_counter()
+        first = True
         try:
             llm = _get_llm()
-            for chunk in llm.stream(messages):
-                if chunk.content:
-                    loop.call_soon_threadsafe(queue.put_nowait, chunk.content)
+            with _stream_quota.slot():
+                stream = llm.stream(messages)
+                try:
+                    for chunk in stream:
+                        if cancel is not None and cancel.is_set():
+                            logger.info("Streaming generation cancelled by caller")
+                            break
+                        if chunk.content:
+                            if first:
+                                _TTFT_SECONDS.observe(time.perf_counter() - start)
+                                first = False
+                            loop.call_soon_threadsafe(
+                                queue.put_nowait, chunk.content
+                            )
+                finally:
+                    stream.close()
         except Exception as exc:
+            _STREAM_ERRORS.inc()
             logger.error(f"Streaming generation error: {exc}")
         finally:
+            _STREAM_SECONDS.observe(time.perf_counter() - start)
             loop.call_soon_threadsafe(queue.put_nowait, None)
 
-    loop.run_in_executor(None, _producer)
+    loop.run_in_executor(_stream_quota.executor, _producer)
     return queue
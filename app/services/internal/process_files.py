@@ -1,13 +1,17 @@
 """Internal service: load files, chunk, generate titles, embed -> Document list.
 
 Supports multiple file types via LangChain loaders:
-- .txt, .md  -> TextLoader
+- .txt, .md  -> read in blocks (``_iter_text_blocks``)
 - .pdf       -> PyPDFLoader
 - .docx/.doc -> Docx2txtLoader
 
-Each file is processed independently.  The public ``process_single_file``
-coroutine handles one file end-to-end (load -> chunk -> title -> embed)
-and is designed to be fanned-out with ``asyncio.gather`` for concurrency.
+Each file is processed independently.  ``stream_file_documents`` runs one
+file through a pipeline of stages -- extract pages -> chunk -> title ->
+embed -- connected by bounded queues (``INGEST_PIPELINE_QUEUE_SIZE``), so a
+large file is never held in memory whole and its first batches reach the
+store while later pages are still being read.  ``process_single_file``
+collects that stream into one list; both are designed to be fanned-out
+with ``asyncio.gather`` for concurrency.
 
 ``process_files`` is the batch entry-point that processes all files in
 parallel.
@@ -16,12 +20,15 @@ parallel.
 import asyncio
 import hashlib
 from pathlib import Path
+from typing import AsyncIterator, Iterator, Optional
+
 from langchain_community.document_loaders import TextLoader, PyPDFLoader, Docx2txtLoader
 
+from app.core.cache import CacheStats
 from app.core.config import settings
 from app.core.logging import logger
 from app.models import Document
-from .chunk import chunk_text, generate_titles, TextChunk
+from .chunk import ChunkStream, generate_titles, TextChunk
 from .embed import dense_embed
 
 
@@ -38,10 +45,31 @@ _LOADER_MAP: dict[str, type] = {
 }
 
 
-def _load_text(fpath: Path) -> str:
-    """Load text content from a file using the appropriate LangChain loader.
+def _iter_text_blocks(fpath: Path, block_chars: int) -> Iterator[str]:
+    """Yield a plain-text file in blocks of about *block_chars* characters.
 
-    Returns the concatenated page content, or empty string on failure.
+    ``TextLoader`` reads the whole file into one page.  Blocks are extended
+    to the next line end and yielded without the final newline, which
+    ``ChunkStream.feed`` puts back when it joins them.  Only a line longer
+    than *block_chars* gets a line break inserted where it is cut.
+    """
+    with open(fpath, encoding="utf-8") as f:
+        while block := f.read(block_chars):
+            if not block.endswith("\n"):
+                block += f.readline(block_chars)
+            yield block.removesuffix("\n")
+
+
+def _iter_pages(fpath: Path) -> Iterator[str]:
+    """Yield the text of each page (or whole document) of *fpath* lazily,
+    using the appropriate LangChain loader.
+
+    Plain-text files are read in blocks of ``INGEST_TEXT_BLOCK_CHARS``
+    instead.  DOCX files are still extracted whole (``docx2txt`` unpacks
+    the entire document).
+
+    A loader error is logged and re-raised, so that a file that is corrupt
+    part-way through fails instead of being ingested truncated.
     """
     ext = fpath.suffix.lower()
     loader_cls = _LOADER_MAP.get(ext)
@@ -53,13 +81,24 @@ def _load_text(fpath: Path) -> str:
 
     try:
         if loader_cls is TextLoader:
-            loader = loader_cls(str(fpath), encoding="utf-8")
-        else:
-            loader = loader_cls(str(fpath))
-        lc_docs = loader.load()
-        return "\n".join(d.page_content for d in lc_docs)
+            yield from _iter_text_blocks(fpath, settings.INGEST_TEXT_BLOCK_CHARS)
+            return
+        loader = loader_cls(str(fpath))
+        for lc_doc in loader.lazy_load():
+            yield lc_doc.page_content
     except Exception as exc:
         logger.error(f"Failed to load {fpath} with {loader_cls.__name__}: {exc}")
+        raise
+
+
+def _load_text(fpath: Path) -> str:
+    """Load text content from a file using the appropriate LangChain loader.
+
+    Returns the concatenated page content, or empty string on failure.
+    """
+    try:
+        return "\n".join(_iter_pages(fpath))
+    except Exception:
         return ""
 
 
@@ -84,62 +123,152 @@ def _stable_doc_id(source: str, chunk_index: int) -> int:
 # ---------------------------------------------------------------------------
 
 
-async def process_single_file(fpath: Path) -> list[Document]:
-    """Process one text file end-to-end: load -> chunk -> title -> embed.
+def _to_document(chunk: TextChunk, vector: list[float]) -> Document:
+    return Document(
+        doc_id=_stable_doc_id(chunk.source, chunk.index),
+        title=chunk.title,
+        metadata={
+            "source": chunk.source,
+            "chunk_index": chunk.index,
+            "start_index": chunk.start,
+            "source_filename": Path(chunk.source).name,
+        },
+        text=chunk.text,
+        dense_vector=vector,
+    )
+
+
+_DONE = object()  # end-of-stream marker between pipeline stages
+
+
+async def stream_file_documents(
+    fpath: Path, *, embed_cache_stats: Optional[CacheStats] = None
+) -> AsyncIterator[list[Document]]:
+    """Process one file as a pipeline: extract -> chunk -> title -> embed.
 
-    Returns a list of Document objects (one per chunk). Returns an empty
-    list on failure (logged, not raised).
+    Yields lists of at most ``MILVUS_INSERT_BATCH_SIZE`` Documents as soon
+    as they are embedded.  Each stage runs as its own task and hands
+    batches of ``EMBEDDING_BATCH_SIZE`` chunks to the next through a queue
+    of ``INGEST_PIPELINE_QUEUE_SIZE``, so a slow stage back-pressures the
+    ones before it and memory stays bounded by the queue sizes rather than
+    the file size.  ``EMBEDDING_MAX_CONCURRENT_BATCHES`` embed workers
+    drain the title stage, so batches may be yielded out of order.
+
+    Yields nothing for a missing or empty file; a failure in any stage
+    (including a loader error on a later page) is raised from the iterator,
+    possibly after earlier batches were yielded.  Chunk-embedding cache
+    hits and misses are added to *embed_cache_stats* if given.
     """
     path = Path(fpath)
     if not path.exists():
         logger.warning(f"File not found, skipping: {fpath}")
-        return []
-
-    # 1. Load -- run in executor since PDF/DOCX loaders do I/O
-    loop = asyncio.get_running_loop()
-    full_text = await loop.run_in_executor(None, _load_text, path)
+        return
+
+    batch_size = settings.EMBEDDING_BATCH_SIZE
+    pages: asyncio.Queue = asyncio.Queue(settings.INGEST_PIPELINE_QUEUE_SIZE)
+    chunked: asyncio.Queue = asyncio.Queue(settings.INGEST_PIPELINE_QUEUE_SIZE)
+    titled: asyncio.Queue = asyncio.Queue(settings.INGEST_PIPELINE_QUEUE_SIZE)
+    embedded: asyncio.Queue = asyncio.Queue(settings.INGEST_PIPELINE_QUEUE_SIZE)
+
+    # 1. Extract -- one page at a time in the executor (PDF/DOCX loaders do I/O)
+    async def extract() -> None:
+        loop = asyncio.get_running_loop()
+        page_iter = _iter_pages(path)
+        while True:
+            page = await loop.run_in_executor(None, next, page_iter, None)
+            if page is None:
+                break
+            await pages.put(page)
+        await pages.put(_DONE)
+
+    # 2. Chunk -- incrementally, emitting embedding-sized batches
+    async def chunk() -> None:
+        stream = ChunkStream(str(path))
+        batch: list[TextChunk] = []
+        while (page := await pages.get()) is not _DONE:
+            for c in stream.feed(page):
+                batch.append(c)
+                if len(batch) == batch_size:
+                    await chunked.put(batch)
+                    batch = []
+        batch.extend(stream.close())
+        for i in range(0, len(batch), batch_size):
+            await chunked.put(batch[i : i + batch_size])
+        await chunked.put(_DONE)
+
+    # 3. Generate titles (concurrent per chunk internally)
+    async def title() -> None:
+        while (batch := await chunked.get()) is not _DONE:
+            if settings.TITLE_GEN_ENABLED:
+                batch = await generate_titles(batch)
+            await titled.put(batch)
+        await titled.put(_DONE)
+
+    # 4. Embed via Google Gemini, several batches in flight
+    async def embed() -> None:
+        while (batch := await titled.get()) is not _DONE:
+            vectors = await dense_embed(
+                [c.text for c in batch],
+                [c.title for c in batch],
+                cache_stats=embed_cache_stats,
+            )
+            await embedded.put([_to_document(c, v) for c, v in zip(batch, vectors)])
+        await titled.put(_DONE)  # let the other workers stop too
+
+    async def run() -> None:
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(extract())
+                tg.create_task(chunk())
+                tg.create_task(title())
+                for _ in range(max(1, settings.EMBEDDING_MAX_CONCURRENT_BATCHES)):
+                    tg.create_task(embed())
+        except* Exception as group:
+            await embedded.put(group.exceptions[0])
+        else:
+            await embedded.put(_DONE)
 
-    if not full_text.strip():
+    # 5. Re-batch Documents for the store
+    insert_size = max(1, settings.MILVUS_INSERT_BATCH_SIZE)
+    runner = asyncio.create_task(run())
+    pending: list[Document] = []
+    total = 0
+    try:
+        while (item := await embedded.get()) is not _DONE:
+            if isinstance(item, Exception):
+                raise item
+            pending.extend(item)
+            total += len(item)
+            while len(pending) >= insert_size:
+                yield pending[:insert_size]
+                pending = pending[insert_size:]
+        if pending:
+            yield pending
+    finally:
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)
+
+    if total:
+        logger.info(f"Processed {total} chunks from {path.name}")
+    else:
         logger.warning(f"Empty file, skipping: {fpath}")
-        return []
 
-    # 2. Chunk
-    chunks = chunk_text(full_text, source=str(path))
-    logger.info(f"Loaded {path.name}: {len(chunks)} chunks")
-
-    if not chunks:
-        return []
 
-    # 3. Generate titles via Cerebras (concurrent per chunk internally)
-    if settings.TITLE_GEN_ENABLED:
-        logger.info(f"Generating titles for {len(chunks)} chunks from {path.name}...")
-        chunks = await generate_titles(chunks)
-    else:
-        logger.info(f"Title generation disabled, skipping title gen...")
-
-    # 4. Embed all chunks via Google Gemini
-    logger.info(f"Embedding {len(chunks)} chunks from {path.name}...")
-    titles = [c.title for c in chunks]
-    texts = [c.text for c in chunks]
-    vectors = await dense_embed(texts, titles)
+async def process_single_file(
+    fpath: Path, *, embed_cache_stats: Optional[CacheStats] = None
+) -> list[Document]:
+    """Process one text file end-to-end: load -> chunk -> title -> embed.
 
-    # 5. Assemble Document objects
+    Returns a list of Document objects (one per chunk), collected from
+    :func:`stream_file_documents`; empty for a missing or empty file.
+    Chunk-embedding cache hits and misses are added to *embed_cache_stats*
+    if given.
+    """
     documents: list[Document] = []
-    for chunk, vector in zip(chunks, vectors):
-        doc = Document(
-            doc_id=_stable_doc_id(chunk.source, chunk.index),
-            title=chunk.title,
-            metadata={
-                "source": chunk.source,
-                "chunk_index": chunk.index,
-                "source_filename": Path(chunk.source).name,
-            },
-            text=chunk.text,
-            dense_vector=vector,
-        )
-        documents.append(doc)
-
-    logger.info(f"Processed {len(documents)} chunks from {path.name}")
+    async for batch in stream_file_documents(
+        fpath, embed_cache_stats=embed_cache_stats
+    ):
+        documents.extend(batch)
     return documents
 
 
@@ -0,0 +1,76 @@
+"""Internal service: prune rerank candidates by retrieval score.
+
+With ``rerank=True`` the search overfetches ``OVERFETCH_MULTIPLIER * top_k``
+candidates and the cross-encoder scores every one of them, even those
+far behind the leaders.  Three optional rules cut the list first:
+
+- ``RERANK_PRUNE_MIN_SCORE`` — per-``search_type`` floor on the retrieval
+  score (COSINE for dense, raw BM25 for sparse, fused for hybrid; the
+  scales differ, hence one floor per type).
+- ``RERANK_PRUNE_MIN_SCORE_RATIO`` — drop hits scoring below this fraction
+  of the best hit.
+- ``RERANK_PRUNE_DENSE_RADIUS`` — Milvus range search on the dense leg, so
+  low-similarity hits are never returned at all.
+
+Pruned counts are logged per search and observed on
+``rerank_pruned_candidates``.
+"""
+
+from typing import Any
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import RERANK_PRUNED_CANDIDATES
+from app.schemas.search import SearchResult
+
+
+def pruning_options(rerank: bool) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Repository arguments the pruning rules need: ``(sparse, dense)``.
+
+    Both are empty unless a rule is configured, so plain searches keep
+    their default (score-less) repository calls.
+    """
+    if not rerank:
+        return {}, {}
+    sparse: dict[str, Any] = {}
+    if settings.RERANK_PRUNE_MIN_SCORE or settings.RERANK_PRUNE_MIN_SCORE_RATIO > 0:
+        sparse["include_scores"] = True
+    dense = dict(sparse)
+    if settings.RERANK_PRUNE_DENSE_RADIUS is not None:
+        dense["radius"] = settings.RERANK_PRUNE_DENSE_RADIUS
+    return sparse, dense
+
+
+def _score_floor(scores: list[float], search_type: str) -> float | None:
+    floors = []
+    if search_type in settings.RERANK_PRUNE_MIN_SCORE:
+        floors.append(settings.RERANK_PRUNE_MIN_SCORE[search_type])
+    best = max(scores)
+    if settings.RERANK_PRUNE_MIN_SCORE_RATIO > 0 and best > 0:
+        floors.append(best * settings.RERANK_PRUNE_MIN_SCORE_RATIO)
+    return max(floors) if floors else None
+
+
+def prune_candidates(
+    results: list[SearchResult], search_type: str
+) -> list[SearchResult]:
+    """Drop candidates below the score floor or too far behind the best hit.
+
+    Hits without a score are kept.  The input order is preserved.
+    """
+    scores = [r.score for r in results if r.score is not None]
+    floor = _score_floor(scores, search_type) if scores else None
+    if floor is None:
+        RERANK_PRUNED_CANDIDATES.observe(0)
+        return results
+
+    kept = [r for r in results if r.score is None or r.score >= floor]
+    pruned = len(results) - len(kept)
+    RERANK_PRUNED_CANDIDATES.observe(pruned)
+    if pruned:
+        logger.info(
+            f"Pruned {pruned}/{len(results)} rerank candidates "
+            f"({search_type} score < {floor:.4f})",
+            extra={"pruned_candidates": pruned},
+        )
+    return kept
@@ -0,0 +1,125 @@
+"""Internal service: route ``search_type="auto"`` queries by their shape.
+
+Product codes, file names and single rare terms are answered perfectly by
+the BM25 leg, so embedding them only adds latency.  Long natural-language
+questions, on the other hand, gain little from BM25.  The classifier is a
+handful of string checks (no model, no I/O):
+
+- **sparse** — the whole query is quoted, or two signals agree: it reads
+  as keywords (at most ``SEARCH_ROUTER_SPARSE_MAX_TOKENS`` tokens, no
+  stopwords or question words, no ``?``) *and* its terms are identifiers
+  (letters mixed with digits, ``snake_case``, paths, ``file.ext``, long
+  numbers) or rare (at least ``SEARCH_ROUTER_RARE_TOKEN_MIN_CHARS``
+  characters, or an all-caps acronym).  A short question about a rare
+  term ("what is RAG", "explain HNSW") therefore stays hybrid.
+- **dense** — at least ``SEARCH_ROUTER_DENSE_MIN_TOKENS`` tokens, no
+  identifiers, and a stopword share of at least
+  ``SEARCH_ROUTER_DENSE_MIN_STOPWORD_RATIO`` (i.e. a sentence).
+- **hybrid** — everything else.
+
+Corpus term statistics live inside Milvus' BM25 function and are not
+reachable cheaply, so "rare" is judged from the token itself.  Stopwords
+cover English and Vietnamese (the lecture corpora this service targets).
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Literal
+
+from app.core.config import settings
+from app.core.metrics import EMBEDDING_SECONDS, SEARCH_ROUTES
+
+RoutedSearchType = Literal["dense", "sparse", "hybrid"]
+
+_TOKEN_RE = re.compile(r"[^\s,;]+")
+_QUOTED_RE = re.compile(r'^\s*(["\'`]).+\1\s*$')
+_IDENTIFIER_RES = (
+    re.compile(r"^(?=.*\d)(?=.*[^\W\d_])[\w\-./:#]+$"),  # letters + digits: SKU-123
+    re.compile(r"^\w+_\w+$"),  # snake_case
+    re.compile(r"^[\w\-]+\.[A-Za-z0-9]{1,5}$"),  # file.ext
+    re.compile(r"[/\\]|::"),  # paths, qualified names
+    re.compile(r"^\d{3,}$"),  # long numbers, codes
+)
+_ACRONYM_RE = re.compile(r"^[A-Z][A-Z0-9]{1,}$")
+_STRIP_CHARS = "\"'`()[]{}?!"
+
+_STOPWORDS = frozenset(
+    """
+    a an and are as at be been but by can could did do does for from had has
+    have how i if in is it its me my of on or our should so than that the
+    their them then there these they this to was we were what when where
+    which who why will with would you your about into can't don't
+    explain define describe compare list show tell summarize give find
+    """.split()
+    # Vietnamese function and question words (one syllable per token)
+    + """
+    là gì của và các những có không được trong cho với này đó như thế nào
+    sao tại vì để một khi ai đâu bao nhiêu hãy giải thích làm cách đã sẽ
+    đang thì mà ở về từ theo bị nên hay hoặc
+    """.split()
+)
+
+_QUERY_EMBED_SECONDS = EMBEDDING_SECONDS.labels("query")
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    """Search type chosen for a query and the rule that chose it."""
+
+    search_type: RoutedSearchType
+    reason: str
+
+
+def _is_identifier(token: str) -> bool:
+    return any(pattern.search(token) for pattern in _IDENTIFIER_RES)
+
+
+def _is_rare(token: str) -> bool:
+    return (
+        len(token) >= settings.SEARCH_ROUTER_RARE_TOKEN_MIN_CHARS
+        or _ACRONYM_RE.match(token) is not None
+    )
+
+
+def classify_query(query: str) -> RouteDecision:
+    """Pick ``sparse``, ``dense`` or ``hybrid`` for *query* (see module docs)."""
+    if _QUOTED_RE.match(query):
+        return RouteDecision("sparse", "quoted")
+
+    tokens = [t.strip(_STRIP_CHARS) for t in _TOKEN_RE.findall(query)]
+    tokens = [t for t in tokens if t]
+    if not tokens:
+        return RouteDecision("hybrid", "default")
+
+    content = [t for t in tokens if t.lower() not in _STOPWORDS]
+    identifiers = sum(1 for t in content if _is_identifier(t))
+    keywords = len(content) == len(tokens) and "?" not in query
+
+    if keywords and len(content) <= settings.SEARCH_ROUTER_SPARSE_MAX_TOKENS:
+        if identifiers:
+            return RouteDecision("sparse", "identifier")
+        if all(_is_rare(t) for t in content):
+            return RouteDecision("sparse", "rare_terms")
+
+    stopword_ratio = 1 - len(content) / len(tokens)
+    if (
+        not identifiers
+        and len(tokens) >= settings.SEARCH_ROUTER_DENSE_MIN_TOKENS
+        and stopword_ratio >= settings.SEARCH_ROUTER_DENSE_MIN_STOPWORD_RATIO
+    ):
+        return RouteDecision("dense", "natural_language")
+
+    return RouteDecision("hybrid", "default")
+
+
+def route_query(query: str) -> RouteDecision:
+    """Classify *query* and count the decision on ``search_routes_total``."""
+    decision = classify_query(query)
+    SEARCH_ROUTES.labels(decision.search_type, decision.reason).inc()
+    return decision
+
+
+def expected_embedding_ms() -> float:
+    """Mean observed query-embedding latency (what a sparse route saves)."""
+    count = _QUERY_EMBED_SECONDS.count
+    return _QUERY_EMBED_SECONDS.sum / count * 1000 if count else 0.0
@@ -0,0 +1,308 @@
+"""Internal service: client-side quota governor for all Gemini traffic.
+
+Every provider request (each retry and hedge included) passes through a
+:class:`GovernedCall` for its call name and model:
+
+- **Token buckets** — ``QUOTA_MODEL_RPM[model]`` and ``QUOTA_CALL_RPM[name]``
+  (requests/minute, ``QUOTA_BURST_SEC`` of burst) are enforced across all
+  workers by a Redis script (``repositories/redis/rate_limit``), with a
+  per-process bucket as fallback when Redis is down or
+  ``QUOTA_REDIS_ENABLED`` is off.  Unconfigured buckets are not checked.
+- **AIMD concurrency** — each model has a per-process in-flight limit that
+  grows by ``1/limit`` per successful call and is multiplied by
+  ``QUOTA_AIMD_DECREASE`` on a 429 (at most once per
+  ``QUOTA_COOLDOWN_MS``), between ``QUOTA_MIN_CONCURRENCY`` and
+  ``QUOTA_MAX_CONCURRENCY``.
+- **Priority** — ``interactive`` calls (query embedding, generation) may
+  use a whole bucket and any free slot.  ``batch`` calls (ingestion) leave
+  ``QUOTA_INTERACTIVE_RESERVE`` of each bucket untouched, use at most
+  ``QUOTA_BATCH_SHARE`` of the concurrency limit, wait while an
+  interactive call is queued, and pause for ``QUOTA_COOLDOWN_MS`` after a
+  429 (on every worker when a bucket is configured for the call).
+
+Calls block (in their executor thread) until admitted, and raise
+:class:`QuotaExceededError` after ``QUOTA_MAX_WAIT_SEC``.  Callers run them
+on :attr:`GovernedCall.executor`, a pool per priority, so threads parked on
+quota never starve the default executor (Milvus, Redis, file I/O), and
+throttled batch work never holds the threads interactive calls need.
+"""
+
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Literal, TypeVar
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import QUOTA_RATE_LIMITED, QUOTA_WAIT_SECONDS
+from app.core.resilience import is_rate_limited
+from app.repositories.redis.rate_limit import (
+    bucket_key,
+    cooldown_key,
+    start_cooldown,
+    take_tokens,
+)
+
+T = TypeVar("T")
+Priority = Literal["interactive", "batch"]
+
+
+class QuotaExceededError(RuntimeError):
+    """Raised when a call could not be admitted within ``QUOTA_MAX_WAIT_SEC``."""
+
+
+class _LocalBucket:
+    """Per-process token bucket (fallback for the Redis one)."""
+
+    def __init__(self, rate_per_sec: float, capacity: float) -> None:
+        self.rate = rate_per_sec
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, cost: float, floor: float) -> float:
+        """Take *cost* tokens keeping *floor*; else return seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            if self.tokens - cost >= floor:
+                self.tokens -= cost
+                return 0.0
+            return (cost + floor - self.tokens) / self.rate
+
+
+class AIMDLimiter:
+    """Priority-aware concurrency limit with additive increase and
+    multiplicative decrease."""
+
+    def __init__(self, max_limit: int, min_limit: int, decrease: float) -> None:
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.decrease = decrease
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self.rate_limited = 0
+        self._waiting_interactive = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def _admits(self, interactive: bool) -> bool:
+        cap = max(1, int(self.limit))
+        if interactive:
+            return self.in_flight < cap
+        batch_cap = max(1, int(cap * settings.QUOTA_BATCH_SHARE))
+        return self._waiting_interactive == 0 and self.in_flight < batch_cap
+
+    def acquire(self, interactive: bool, timeout: float) -> bool:
+        """Wait up to *timeout* seconds for a slot."""
+        with self._cond:
+            if interactive:
+                self._waiting_interactive += 1
+            try:
+                admitted = self._cond.wait_for(
+                    lambda: self._admits(interactive), max(0.0, timeout)
+                )
+                if admitted:
+                    self.in_flight += 1
+                return admitted
+            finally:
+                if interactive:
+                    self._waiting_interactive -= 1
+                    self._cond.notify_all()
+
+    def release(self, rate_limited: bool = False) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if rate_limited:
+                self.rate_limited += 1
+                # One cut per congestion event, not one per failed request.
+                if now - self._last_decrease >= settings.QUOTA_COOLDOWN_MS / 1000:
+                    self.limit = max(self.min_limit, self.limit * self.decrease)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+_limiters: dict[str, AIMDLimiter] = {}
+_local_buckets: dict[str, _LocalBucket] = {}
+_local_cooldowns: dict[str, float] = {}  # model -> monotonic end
+_executors: dict[str, ThreadPoolExecutor] = {}  # priority -> pool
+_lock = threading.Lock()
+
+
+def _executor(priority: Priority) -> ThreadPoolExecutor:
+    with _lock:
+        pool = _executors.get(priority)
+        if pool is None:
+            pool = _executors[priority] = ThreadPoolExecutor(
+                max_workers=settings.QUOTA_EXECUTOR_WORKERS,
+                thread_name_prefix=f"quota-{priority}",
+            )
+        return pool
+
+
+def _limiter(model: str) -> AIMDLimiter:
+    with _lock:
+        limiter = _limiters.get(model)
+        if limiter is None:
+            limiter = AIMDLimiter(
+                settings.QUOTA_MAX_CONCURRENCY,
+                settings.QUOTA_MIN_CONCURRENCY,
+                settings.QUOTA_AIMD_DECREASE,
+            )
+            _limiters[model] = limiter
+        return limiter
+
+
+def _take(key: str, rpm: float, model: str, interactive: bool) -> float:
+    """Seconds to wait before one request may be sent (``0`` = taken)."""
+    rate = rpm / 60
+    capacity = max(1.0, rate * settings.QUOTA_BURST_SEC)
+    floor = 0.0
+    if not interactive:
+        floor = min(capacity * settings.QUOTA_INTERACTIVE_RESERVE, capacity - 1)
+
+    if settings.QUOTA_REDIS_ENABLED:
+        wait = take_tokens(
+            key,
+            rate,
+            capacity,
+            floor=floor,
+            cooldown=None if interactive else cooldown_key(model),
+        )
+        if wait is not None:
+            return wait
+
+    with _lock:
+        bucket = _local_buckets.get(key)
+        if bucket is None:
+            bucket = _local_buckets[key] = _LocalBucket(rate, capacity)
+    return bucket.take(1.0, floor)
+
+
+def _on_rate_limited(model: str) -> None:
+    QUOTA_RATE_LIMITED.labels(model).inc()
+    ms = settings.QUOTA_COOLDOWN_MS
+    _local_cooldowns[model] = time.monotonic() + ms / 1000
+    if settings.QUOTA_REDIS_ENABLED:
+        start_cooldown(model, ms)
+    logger.warning(f"Quota: '{model}' rate limited; batch calls pause {ms:.0f}ms")
+
+
+class GovernedCall:
+    """Admission control for one provider call site.
+
+    Args:
+        name: Call name, the key of ``QUOTA_CALL_RPM`` (e.g. ``"generate"``).
+        model: Model name, the key of ``QUOTA_MODEL_RPM``.
+        priority: ``"interactive"`` or ``"batch"`` (ingestion).
+    """
+
+    def __init__(
+        self, name: str, model: str, *, priority: Priority = "interactive"
+    ) -> None:
+        self.name = name
+        self.model = model
+        self.priority = priority
+        self.interactive = priority == "interactive"
+        self._wait_seconds = QUOTA_WAIT_SECONDS.labels(name, priority)
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Pool to ``run_in_executor`` this call's blocking wrapper in."""
+        return _executor(self.priority)
+
+    def _buckets(self) -> list[tuple[str, float]]:
+        buckets = []
+        model_rpm = settings.QUOTA_MODEL_RPM.get(self.model)
+        if model_rpm:
+            buckets.append((bucket_key("model", self.model), model_rpm))
+        call_rpm = settings.QUOTA_CALL_RPM.get(self.name)
+        if call_rpm:
+            buckets.append((bucket_key("call", self.name), call_rpm))
+        return buckets
+
+    def _sleep(self, wait: float, deadline: float) -> None:
+        if time.monotonic() + wait > deadline:
+            raise QuotaExceededError(
+                f"{self.name}: no quota for '{self.model}' within "
+                f"{settings.QUOTA_MAX_WAIT_SEC:.0f}s"
+            )
+        time.sleep(wait)
+
+    def _wait_for_tokens(self, deadline: float) -> None:
+        if not self.interactive:
+            cooldown = _local_cooldowns.get(self.model, 0.0) - time.monotonic()
+            if cooldown > 0:
+                self._sleep(cooldown, deadline)
+        # The cross-worker cooldown is checked by the Redis bucket script.
+        for key, rpm in self._buckets():
+            while (wait := _take(key, rpm, self.model, self.interactive)) > 0:
+                self._sleep(wait, deadline)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Block until the call is admitted; release (and adapt) on exit."""
+        if not settings.QUOTA_ENABLED:
+            yield
+            return
+
+        start = time.monotonic()
+        deadline = start + settings.QUOTA_MAX_WAIT_SEC
+        self._wait_for_tokens(deadline)
+        limiter = _limiter(self.model)
+        if not limiter.acquire(self.interactive, deadline - time.monotonic()):
+            raise QuotaExceededError(
+                f"{self.name}: no free '{self.model}' slot within "
+                f"{settings.QUOTA_MAX_WAIT_SEC:.0f}s"
+            )
+        self._wait_seconds.observe(time.monotonic() - start)
+
+        rate_limited = False
+        try:
+            yield
+        except Exception as exc:
+            rate_limited = is_rate_limited(exc)
+            if rate_limited:
+                _on_rate_limited(self.model)
+            raise
+        finally:
+            limiter.release(rate_limited)
+
+    def wrap(self, fn: Callable[..., T]) -> Callable[..., T]:
+        """Return *fn* running inside :meth:`slot` on every invocation."""
+
+        @functools.wraps(fn)
+        def governed(*args: Any, **kwargs: Any) -> T:
+            with self.slot():
+                return fn(*args, **kwargs)
+
+        return governed
+
+
+def get_quota_stats() -> dict[str, dict[str, Any]]:
+    """Return the AIMD state per model."""
+    return {
+        model: {
+            "limit": round(limiter.limit, 2),
+            "in_flight": limiter.in_flight,
+            "rate_limited": limiter.rate_limited,
+        }
+        for model, limiter in _limiters.items()
+    }
+
+
+def reset_quota() -> None:
+    """Drop all per-process limiter and bucket state (Redis is untouched)."""
+    with _lock:
+        _limiters.clear()
+        _local_buckets.clear()
+        _local_cooldowns.clear()
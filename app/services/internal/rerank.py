@@ -1,36 +1,160 @@
-"""Reranking using a CrossEncoder from Hugging Face's sentence-transformers library."""
-
+"""Reranking using a CrossEncoder from Hugging Face's sentence-transformers library.
+
+Concurrent rerank requests are funnelled through a scheduler that packs all
+(query, candidate) pairs of the jobs waiting in a short window into shared
+model batches, so N concurrent searches take the GPU lock once instead of
+N times.  Each batch's GPU-lock wait, model load and compute time are added
+to the trace of every request in the batch.
+
+Backends (``RERANKER_BACKEND``):
+    - ``torch``: full-precision PyTorch model, on CUDA when available.
+    - ``onnx-int8``: dynamically quantized ONNX export run by onnxruntime on
+      CPU, for replicas without a GPU.  The export is built once and stored
+      under ``MODEL_STORAGE_PATH``.  Requires the ``onnx`` extra
+      (``sentence-transformers[onnx]``); :func:`check_backend` fails at
+      startup when it is missing.
+"""
+
+import asyncio
+import contextvars
+import importlib.util
+import time
 import torch
 from functools import lru_cache
+from typing import Any
 from sentence_transformers import CrossEncoder
 
+from app.core.batching import MicroBatcher
 from app.core.config import settings
-from app.core.gpu import gpu_lock as _gpu_lock
+from app.core.gpu import gpu_residency
 from app.core.logging import logger
+from app.core.metrics import RERANK_BATCH_JOBS, RERANK_BATCH_PAIRS
+from app.core.tracing import Trace, current_trace, record, span, trace_ctx
+
+
+_ONNX_MODULES = ("onnxruntime", "optimum")
+
+
+def check_backend(backend: str) -> None:
+    """Raise ``RuntimeError`` if the packages *backend* needs are missing.
+
+    Called when the app is created, so a misconfigured replica fails at
+    startup instead of on its first rerank request.
+    """
+    if backend != "onnx-int8":
+        return
+    missing = [m for m in _ONNX_MODULES if importlib.util.find_spec(m) is None]
+    if missing:
+        raise RuntimeError(
+            f"RERANKER_BACKEND=onnx-int8 requires {', '.join(missing)}; install "
+            "the 'onnx' extra (uv sync --extra onnx) or set RERANKER_BACKEND=torch"
+        )
+
+
+def _onnx_session_options() -> Any:
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.inter_op_num_threads = 1  # one model graph; parallelism is intra-op
+    if settings.RERANKER_ONNX_THREADS > 0:
+        options.intra_op_num_threads = settings.RERANKER_ONNX_THREADS
+    return options
+
+
+def _load_onnx_int8(model_name: str) -> CrossEncoder:
+    """Load (exporting and quantizing on first use) an int8 ONNX CrossEncoder."""
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    export_dir = settings.MODEL_STORAGE_PATH / model_name.replace("/", "--")
+    file_name = f"model_qint8_{settings.RERANKER_ONNX_QUANTIZATION}.onnx"
+
+    if not (export_dir / "onnx" / file_name).exists():
+        logger.info(f"Exporting int8 ONNX reranker to {export_dir}")
+        fp32 = CrossEncoder(model_name, device="cpu", backend="onnx")
+        fp32.save_pretrained(str(export_dir))
+        export_dynamic_quantized_onnx_model(
+            fp32, settings.RERANKER_ONNX_QUANTIZATION, str(export_dir)
+        )
+
+    return CrossEncoder(
+        str(export_dir),
+        device="cpu",
+        backend="onnx",
+        model_kwargs={
+            "file_name": f"onnx/{file_name}",
+            "provider": "CPUExecutionProvider",
+            "session_options": _onnx_session_options(),
+        },
+    )
+
+
+def load_model(backend: str) -> CrossEncoder:
+    """Load the reranker for *backend* (``"torch"`` or ``"onnx-int8"``).
+
+    Weights are always loaded on CPU; ``rerank`` moves the torch model to
+    CUDA inside ``gpu_residency`` so it never lands on the device while
+    another owner (e.g. Whisper) holds it.
+    """
+    model_name = settings.RERANKER_MODEL
+    logger.info(f"Loading reranker model: {model_name} (backend={backend})")
+
+    if backend == "onnx-int8":
+        return _load_onnx_int8(model_name)
+
+    return CrossEncoder(model_name, device="cpu")
 
 
 @lru_cache(maxsize=1)
 def _get_model() -> CrossEncoder:
     """Load and return a CrossEncoder model for reranking."""
-
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    model_name = settings.RERANKER_MODEL
-    logger.info(f"Loading reranker model: {model_name}")
-    return CrossEncoder(model_name, device=device)
+    return load_model(settings.RERANKER_BACKEND)
 
 
-def _rerank_single(
-    model: CrossEncoder, query: str, candidates: list[str], batch_size: int = 32
-) -> list[tuple[int, float]]:
-    """Rerank candidates based on relevance to the query.
+def _score_pairs(
+    model: CrossEncoder,
+    queries: list[str],
+    candidate_lists: list[list[str]],
+    batch_size: int = 32,
+) -> list[list[tuple[int, float]]]:
+    """Score every (query, candidate) pair in shared model batches.
 
-    Returns a list of (candidate_index, score) tuples, sorted by descending score.
+    Pairs from all queries are flattened into one ``predict`` call, then
+    split back per query.  Returns, per query, a list of
+    (candidate_index, score) tuples sorted by descending score.
     """
+    pairs = [
+        (query, candidate)
+        for query, candidates in zip(queries, candidate_lists)
+        for candidate in candidates
+    ]
+    if not pairs:
+        return [[] for _ in queries]
+
+    scores = model.predict(pairs, batch_size=batch_size, show_progress_bar=False)
+
+    rankings: list[list[tuple[int, float]]] = []
+    offset = 0
+    for candidates in candidate_lists:
+        own = scores[offset : offset + len(candidates)]
+        offset += len(candidates)
+        ranking = sorted(
+            ((i, float(s)) for i, s in enumerate(own)), key=lambda x: x[1], reverse=True
+        )
+        rankings.append(ranking)
+    return rankings
+
+
+def _move_to_gpu(model: CrossEncoder) -> None:
+    if torch.cuda.is_available():
+        model.to("cuda")
 
-    out = model.rank(query=query, documents=candidates, batch_size=batch_size)
-    ranking = [(item["corpus_id"], item["score"]) for item in out]
 
-    return ranking
+def _offload(model: CrossEncoder) -> None:
+    if model.device.type == "cuda":
+        model.to("cpu")
+        torch.cuda.empty_cache()
+        logger.debug("Reranker moved to CPU, VRAM freed.")
 
 
 def rerank(
@@ -40,26 +164,92 @@ def rerank(
 
     Returns a len(queries) element list of list of (candidate_index, score) tuples, sorted by descending score.
 
-    GPU lifecycle:
-        Acquires the shared GPU lock, moves the model to CUDA, performs
-        reranking, then moves back to CPU and releases VRAM.  This prevents
-        OOM when another service (e.g. speech-to-text) also needs the GPU.
+    GPU lifecycle (torch backend; ``onnx-int8`` always runs on CPU and skips
+    it):
+        Runs under ``gpu_residency`` as the ``"reranker"`` owner.  The model
+        is moved to CUDA only if it is not already resident and stays there
+        between calls; it is moved back to CPU after ``GPU_IDLE_EVICT_SEC``
+        of inactivity or when speech-to-text claims the GPU.
     """
 
     model = _get_model()
 
-    with _gpu_lock:
-        if torch.cuda.is_available():
-            model.to("cuda")
+    if settings.RERANKER_BACKEND == "onnx-int8":
+        with span("rerank_compute"):
+            return _score_pairs(model, queries, candidate_lists, batch_size=batch_size)
+
+    start = time.perf_counter()
+    with gpu_residency.use(
+        "reranker",
+        load=lambda: _move_to_gpu(model),
+        unload=lambda: _offload(model),
+    ) as lock_wait_ms:
+        record("gpu_wait", lock_wait_ms)
+        load_ms = (time.perf_counter() - start) * 1000 - lock_wait_ms
+        if load_ms >= 1.0:
+            record("gpu_load", load_ms)
+        with span("rerank_compute"):
+            rankings = _score_pairs(
+                model, queries, candidate_lists, batch_size=batch_size
+            )
 
-        rankings = []
-        for query, candidates in zip(queries, candidate_lists):
-            ranking = _rerank_single(model, query, candidates, batch_size=batch_size)
-            rankings.append(ranking)
+    return rankings
 
-        # free up GPU memory after reranking
-        if model.device.type == "cuda":
-            model.to("cpu")
-            torch.cuda.empty_cache()
 
-    return rankings
+# ---------------------------------------------------------------------------
+# Cross-request scheduler
+# ---------------------------------------------------------------------------
+
+# (query, candidates, trace of the submitting request)
+_RerankJob = tuple[str, list[str], Trace | None]
+
+
+async def _rerank_batch(jobs: list[_RerankJob]) -> list[list[tuple[int, float]]]:
+    """Batch handler: one ``rerank`` call (one lock acquisition) for all jobs."""
+    queries = [q for q, _, _ in jobs]
+    candidate_lists = [c for _, c, _ in jobs]
+    n_pairs = sum(len(c) for c in candidate_lists)
+    RERANK_BATCH_JOBS.observe(len(jobs))
+    RERANK_BATCH_PAIRS.observe(n_pairs)
+    if len(jobs) > 1:
+        logger.debug(f"Reranking {len(jobs)} jobs ({n_pairs} pairs) in one batch")
+
+    # The batch serves several requests: time it on its own trace, then
+    # charge the stages to each of them.
+    batch_trace = Trace("rerank-batch")
+
+    def run() -> list[list[tuple[int, float]]]:
+        trace_ctx.set(batch_trace)
+        return rerank(queries, candidate_lists, settings.RERANK_MODEL_BATCH_SIZE)
+
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(None, contextvars.Context().run, run)
+    finally:
+        for _, _, trace in jobs:
+            if trace is not None:
+                trace.merge(batch_trace)
+
+
+_scheduler: MicroBatcher[_RerankJob, list[tuple[int, float]]] = MicroBatcher(
+    _rerank_batch,
+    max_items=settings.RERANK_MAX_BATCH_PAIRS,
+    max_wait_ms=settings.RERANK_MAX_WAIT_MS,
+    weigher=lambda job: len(job[1]),
+    max_weight=settings.RERANK_MAX_BATCH_PAIRS,
+)
+
+
+async def rerank_async(query: str, candidates: list[str]) -> list[tuple[int, float]]:
+    """Rerank *candidates* for *query* via the shared batch scheduler.
+
+    Returns (candidate_index, score) tuples sorted by descending score.
+    """
+    if not candidates:
+        return []
+    return await _scheduler.submit((query, candidates, current_trace()))
+
+
+def get_rerank_batch_stats() -> dict[str, Any]:
+    """Return achieved batch sizes and pair occupancy of the scheduler."""
+    return _scheduler.stats.as_dict()
@@ -0,0 +1,83 @@
+"""Internal service: cache of cross-encoder scores per (query, chunk).
+
+A cross-encoder scores each (query, candidate) pair independently, so
+scores can be cached per pair and merged with freshly computed ones.
+Follow-up questions and repeated queries then only send the chunks the
+reranker has not seen yet to the model.
+
+Keys combine ``RERANKER_MODEL``, ``RERANKER_BACKEND``, the collection and
+its version, a hash of the normalized query and the chunk ``doc_id``.  The
+version is bumped on every write (see ``repositories/redis/collection_version``),
+so re-ingested chunks are rescored.
+"""
+
+import asyncio
+import hashlib
+from typing import Any
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.repositories.redis.collection_version import get_collection_version
+from .embed import _normalize_query
+from .rerank import rerank_async
+
+_scores = LRUCache(
+    max_entries=settings.RERANK_SCORE_CACHE_MAX_ENTRIES,
+    ttl_sec=settings.RERANK_SCORE_CACHE_TTL_SEC,
+)
+
+
+def _key_prefix(collection_name: str, version: int, query: str) -> str:
+    digest = hashlib.sha256(_normalize_query(query).encode()).hexdigest()
+    return (
+        f"rscore:{settings.RERANKER_MODEL}:{settings.RERANKER_BACKEND}:"
+        f"{collection_name}:v{version}:{digest}:"
+    )
+
+
+async def rerank_cached(
+    collection_name: str,
+    query: str,
+    doc_ids: list[int],
+    candidates: list[str],
+) -> list[tuple[int, float]]:
+    """Rerank *candidates* (identified by *doc_ids*), reusing cached scores.
+
+    Only uncached pairs are sent to the reranker.  Returns
+    (candidate_index, score) tuples sorted by descending score, like
+    :func:`rerank_async`.
+    """
+    if not settings.RERANK_SCORE_CACHE_ENABLED:
+        return await rerank_async(query, candidates)
+
+    loop = asyncio.get_running_loop()
+    version = await loop.run_in_executor(None, get_collection_version, collection_name)
+    prefix = _key_prefix(collection_name, version, query)
+
+    scores: dict[int, float] = {}
+    missing: list[int] = []
+    for i, doc_id in enumerate(doc_ids):
+        score = _scores.get(f"{prefix}{doc_id}")
+        if score is None:
+            missing.append(i)
+        else:
+            scores[i] = score
+
+    if missing:
+        ranking = await rerank_async(query, [candidates[i] for i in missing])
+        for local_idx, score in ranking:
+            idx = missing[local_idx]
+            scores[idx] = score
+            _scores.set(f"{prefix}{doc_ids[idx]}", score)
+
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+
+
+def get_rerank_cache_stats() -> dict[str, Any]:
+    """Return pair-level hit/miss counters and usage of the score cache."""
+    return _scores.snapshot()
+
+
+def clear_rerank_cache() -> None:
+    """Drop all cached scores and reset counters."""
+    _scores.clear()
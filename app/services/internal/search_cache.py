@@ -0,0 +1,136 @@
+"""Internal service: versioned cache for search results.
+
+Entries are keyed on ``(collection, collection version, normalized query,
+search_type, top_k, rerank, diversify)``.  The collection version is bumped by every
+write in ``repositories/milvus/storage``, so results cached before an
+ingestion become unreachable as soon as the new version is observed.
+
+Two tiers:
+
+- **Local** — per-process LRU bounded by serialized bytes.
+- **Redis** — optional (``SEARCH_CACHE_REDIS_ENABLED``) so workers share
+  hot queries.
+
+Hit/miss counters are tracked per collection.
+"""
+
+import asyncio
+import hashlib
+from typing import Any
+
+from pydantic import TypeAdapter
+
+from app.core.cache import CacheStats, LRUCache
+from app.core.config import settings
+from app.repositories.redis.collection_version import get_collection_version
+from app.repositories.redis.result_cache import get_cached_payload, set_cached_payload
+from app.schemas.search import SearchResult
+from .embed import _normalize_query
+
+_results_adapter = TypeAdapter(list[SearchResult])
+
+# value: (results, serialized size in bytes)
+_local = LRUCache(
+    max_bytes=settings.SEARCH_CACHE_MAX_BYTES,
+    ttl_sec=settings.SEARCH_CACHE_TTL_SEC,
+    sizeof=lambda v: v[1],
+)
+_collection_stats: dict[str, CacheStats] = {}
+
+
+def _stats_for(collection_name: str) -> CacheStats:
+    stats = _collection_stats.get(collection_name)
+    if stats is None:
+        stats = _collection_stats[collection_name] = CacheStats()
+    return stats
+
+
+def _cache_key(
+    collection_name: str,
+    version: int,
+    query: str,
+    search_type: str,
+    top_k: int,
+    rerank: bool,
+    diversify: bool = False,
+) -> str:
+    digest = hashlib.sha256(_normalize_query(query).encode()).hexdigest()
+    return (
+        f"scache:{collection_name}:v{version}:{search_type}:{top_k}:"
+        f"{int(rerank)}{':mmr' if diversify else ''}:{digest}"
+    )
+
+
+async def lookup(
+    collection_name: str,
+    query: str,
+    *,
+    search_type: str,
+    top_k: int,
+    rerank: bool,
+    diversify: bool = False,
+) -> tuple[str | None, list[SearchResult] | None]:
+    """Return ``(cache_key, results)``; ``results`` is ``None`` on miss.
+
+    The key is returned so the caller can :func:`store` under the same
+    collection version it searched against.  Both are ``None`` when the
+    cache is disabled.
+    """
+    if not settings.SEARCH_CACHE_ENABLED:
+        return None, None
+
+    loop = asyncio.get_running_loop()
+    version = await loop.run_in_executor(None, get_collection_version, collection_name)
+    key = _cache_key(
+        collection_name, version, query, search_type, top_k, rerank, diversify
+    )
+    stats = _stats_for(collection_name)
+
+    entry = _local.get(key)
+    if entry is not None:
+        stats.hits += 1
+        return key, list(entry[0])
+
+    if settings.SEARCH_CACHE_REDIS_ENABLED:
+        payload = await loop.run_in_executor(None, get_cached_payload, key)
+        if payload is not None:
+            results = _results_adapter.validate_json(payload)
+            _local.set(key, (tuple(results), len(payload)))
+            stats.hits += 1
+            return key, results
+
+    stats.misses += 1
+    return key, None
+
+
+async def store(key: str | None, results: list[SearchResult]) -> None:
+    """Cache *results* under a key previously returned by :func:`lookup`."""
+    if key is None:
+        return
+    payload = _results_adapter.dump_json(results)
+    _local.set(key, (tuple(results), len(payload)))
+    if settings.SEARCH_CACHE_REDIS_ENABLED:
+        loop = asyncio.get_running_loop()
+        loop.run_in_executor(
+            None,
+            set_cached_payload,
+            key,
+            payload.decode(),
+            settings.SEARCH_CACHE_TTL_SEC,
+        )
+
+
+def get_search_cache_stats() -> dict[str, Any]:
+    """Return local tier usage plus hit ratios broken down by collection."""
+    return {
+        "local": _local.snapshot(),
+        "collections": {
+            name: stats.as_dict() for name, stats in _collection_stats.items()
+        },
+    }
+
+
+def clear_search_cache() -> None:
+    """Drop the local tier and reset all counters."""
+    _local.clear()
+    _collection_stats.clear()
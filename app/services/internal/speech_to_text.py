@@ -6,7 +6,7 @@ from pathlib import Path
 from faster_whisper import WhisperModel, BatchedInferencePipeline
 
 from app.core.config import settings
-from app.core.gpu import gpu_lock as _gpu_lock
+from app.core.gpu import gpu_residency
 from app.core.logging import logger
 
 
@@ -15,8 +15,9 @@ def _get_batched_model() -> BatchedInferencePipeline:
     """Return a cached ``BatchedInferencePipeline`` singleton.
 
     The model is created on the best available device (CUDA > CPU).
-    CTranslate2's ``load_model`` / ``unload_model`` are used later to
-    manage VRAM between transcription batches.
+    CTranslate2 places the weights at construction time, so the first call
+    must happen inside ``gpu_residency`` (see ``_load_whisper``); after
+    that ``load_model`` / ``unload_model`` manage VRAM between batches.
     """
     device = "cuda" if torch.cuda.is_available() else "cpu"
     compute_type = "float16" if device == "cuda" else "float32"
@@ -34,6 +35,31 @@ def _get_batched_model() -> BatchedInferencePipeline:
     return BatchedInferencePipeline(model=model)
 
 
+def _load_whisper() -> None:
+    """Build the model on first use, else reload its weights onto the device.
+
+    Runs as the ``gpu_residency`` load callback, i.e. with the GPU held and
+    any other resident model already evicted.
+    """
+    ct2_model = _get_batched_model().model.model
+    if not ct2_model.model_is_loaded:
+        ct2_model.load_model()
+
+
+def _unload_whisper(ct2_model) -> None:
+    """Free VRAM held by the CTranslate2 weights (no-op on CPU)."""
+    if ct2_model.device == "cuda":
+        ct2_model.unload_model()
+        torch.cuda.empty_cache()
+        logger.debug("Whisper model unloaded from CUDA, VRAM freed.")
+
+
+def _unload_cached_whisper() -> None:
+    """``gpu_residency`` unload callback; no-op if the model was never built."""
+    if _get_batched_model.cache_info().currsize:
+        _unload_whisper(_get_batched_model().model.model)
+
+
 def _transcribe_single(
     batched_model: BatchedInferencePipeline,
     audio_path: Path,
@@ -74,10 +100,13 @@ def parse_audio_to_text(
     so the event loop is not blocked.
 
     Lifecycle per call:
-      1. Acquire ``_gpu_lock``.
-      2. Ensure CTranslate2 weights are on device (``load_model``).
+      1. Claim the GPU via ``gpu_residency`` (evicting the reranker if it
+         is resident).
+      2. Build the model, or put its CTranslate2 weights back on device
+         (``_load_whisper``).
       3. Transcribe each file via ``BatchedInferencePipeline``.
-      4. Unload weights from CUDA and release VRAM.
+      4. Weights stay resident until idle for ``GPU_IDLE_EVICT_SEC`` or
+         until the reranker needs the device.
 
     Args:
         audio_paths: Paths to audio files (.mp3, .wav, .ogg, .flac, .aac).
@@ -99,39 +128,29 @@ def parse_audio_to_text(
         out_dir = Path(settings.TRANSCRIPT_STORAGE_PATH)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    batched_model = _get_batched_model()
-    ct2_model = batched_model.model.model  # ctranslate2.models.Whisper
-
     transcript_paths: list[Path] = []
 
-    with _gpu_lock:
-        # Ensure weights are on-device (no-op if already loaded).
-        ct2_model.load_model()
-
-        try:
-            for audio_path in audio_paths:
-                try:
-                    logger.info(f"Transcribing: {audio_path.name}")
-                    transcript = _transcribe_single(
-                        batched_model,
-                        audio_path,
-                        language=language,
-                        batch_size=batch_size,
-                    )
-
-                    transcript_path = out_dir / f"{audio_path.stem}.txt"
-                    transcript_path.write_text(transcript, encoding="utf-8")
-                    transcript_paths.append(transcript_path)
-
-                    logger.info(f"Transcript saved: {transcript_path}")
-                except Exception as exc:
-                    logger.error(f"Failed to transcribe {audio_path.name}: {exc}")
-                    continue
-        finally:
-            # Free VRAM after the batch is done.
-            if ct2_model.device == "cuda":
-                ct2_model.unload_model()
-                torch.cuda.empty_cache()
-                logger.debug("Whisper model unloaded from CUDA, VRAM freed.")
+    with gpu_residency.use(
+        "whisper", load=_load_whisper, unload=_unload_cached_whisper
+    ):
+        batched_model = _get_batched_model()
+        for audio_path in audio_paths:
+            try:
+                logger.info(f"Transcribing: {audio_path.name}")
+                transcript = _transcribe_single(
+                    batched_model,
+                    audio_path,
+                    language=language,
+                    batch_size=batch_size,
+                )
+
+                transcript_path = out_dir / f"{audio_path.stem}.txt"
+                transcript_path.write_text(transcript, encoding="utf-8")
+                transcript_paths.append(transcript_path)
+
+                logger.info(f"Transcript saved: {transcript_path}")
+            except Exception as exc:
+                logger.error(f"Failed to transcribe {audio_path.name}: {exc}")
+                continue
 
     return transcript_paths
@@ -8,15 +8,31 @@ Coordinates:
 
 All heavy I/O (Milvus reads/writes, embedding, LLM calls) is async or
 offloaded via ``run_in_executor`` so concurrent requests are never blocked.
+
+Each stage (history load, retrieval, prompt build, generation — with
+time-to-first-token when streaming — and persistence) is timed on the
+request trace (``core/tracing``).
+
+Under a request deadline (``core/deadline``) retrieval runs on a budget
+that leaves ``DEADLINE_GENERATION_RESERVE_MS`` for the LLM.  A non-streamed
+answer that would miss the deadline fails with 504; a stream is cut off
+and the partial answer is kept (``generation_truncated``).  Either way the
+generation worker is cancelled so it stops spending quota.  A stream's
+headers are sent before generation starts, so its degradations are
+reported in the ``done`` event rather than ``X-Degradations``.
 """
 
 import asyncio
+import threading
+import time
 import uuid
 from datetime import datetime, timezone
 from typing import Any, Literal
 
 from app.core.config import settings
+from app.core.deadline import degradations, degrade, reserve, run_within
 from app.core.logging import logger
+from app.core.tracing import record, span
 from app.models.conversation import ConversationMeta, Message
 from app.repositories.milvus.conversations import (
     create_conversation as _create_conv,
@@ -85,6 +101,16 @@ def _trim_history(
     return [{"role": m.role, "content": m.content} for m in trimmed]
 
 
+def _deadline_exceeded(stage: str):
+    from app.middleware.errors import ApiError
+
+    return ApiError(
+        code="deadline_exceeded",
+        message=f"Request deadline exceeded during {stage}.",
+        status_code=504,
+    )
+
+
 # ---------------------------------------------------------------------------
 # Conversation CRUD
 # ---------------------------------------------------------------------------
@@ -169,7 +195,7 @@ async def send_message(
     conversation_id: str,
     user_content: str,
     *,
-    search_type: Literal["dense", "sparse", "hybrid"] = "hybrid",
+    search_type: Literal["dense", "sparse", "hybrid", "auto"] = "hybrid",
     top_k: int = 5,
     rerank: bool = False,
 ) -> SendMessageResponse:
@@ -185,10 +211,11 @@ async def send_message(
     loop = asyncio.get_running_loop()
 
     # 1. Load conversation meta + existing messages concurrently
-    meta, existing_msgs = await asyncio.gather(
-        loop.run_in_executor(None, _get_conv, conversation_id),
-        loop.run_in_executor(None, _get_msgs, conversation_id),
-    )
+    with span("history_load"):
+        meta, existing_msgs = await asyncio.gather(
+            loop.run_in_executor(None, _get_conv, conversation_id),
+            loop.run_in_executor(None, _get_msgs, conversation_id),
+        )
     if meta is None:
         from app.middleware.errors import ApiError
 
@@ -199,13 +226,14 @@ async def send_message(
         )
 
     # 2. Retrieve relevant documents
-    search_results = await search_documents(
-        query=user_content,
-        collection_name=meta.collection_name,
-        search_type=search_type,
-        top_k=top_k,
-        rerank=rerank,
-    )
+    with span("retrieve"), reserve(settings.DEADLINE_GENERATION_RESERVE_MS):
+        search_results = await search_documents(
+            query=user_content,
+            collection_name=meta.collection_name,
+            search_type=search_type,
+            top_k=top_k,
+            rerank=rerank,
+        )
 
     sources: list[dict[str, Any]] = [
         {
@@ -213,21 +241,32 @@ async def send_message(
             "title": r.title,
             "text": r.text,
             "score": r.score,
+            "metadata": r.metadata,
         }
         for r in search_results
     ]
 
     # 3. Build LLM messages
-    history = _trim_history(existing_msgs, settings.GENERATION_HISTORY_TURNS)
-    context_block = build_context_block(sources)
-    llm_messages = build_messages(
-        user_query=user_content,
-        context_block=context_block,
-        history=history,
-    )
+    with span("prompt_build"):
+        history = _trim_history(existing_msgs, settings.GENERATION_HISTORY_TURNS)
+        context_block = build_context_block(sources)
+        llm_messages = build_messages(
+            user_query=user_content,
+            context_block=context_block,
+            history=history,
+        )
 
     # 4. Generate answer
-    answer = await generate(llm_messages)
+    with span("generate"):
+        cancel = threading.Event()
+        try:
+            answer = await run_within(
+                generate(llm_messages, cancel=cancel), stage="generate"
+            )
+        except TimeoutError:
+            raise _deadline_exceeded("generation") from None
+        finally:
+            cancel.set()  # no-op once finished; stops an abandoned worker
 
     # 5. Create Message objects
     now = datetime.now(timezone.utc)
@@ -248,14 +287,17 @@ async def send_message(
     )
 
     # 6. Persist messages + auto-title if first message
-    await loop.run_in_executor(None, _save_msgs, [user_msg, assistant_msg])
-
-    if not existing_msgs and not meta.title:
-        # Auto-generate title from first user message (truncate to keep it short)
-        auto_title = user_content[:100].strip()
-        if len(user_content) > 100:
-            auto_title += "..."
-        await loop.run_in_executor(None, _update_title, conversation_id, auto_title)
+    with span("persist"):
+        await loop.run_in_executor(None, _save_msgs, [user_msg, assistant_msg])
+
+        if not existing_msgs and not meta.title:
+            # Auto-generate title from first user message (truncate to keep it short)
+            auto_title = user_content[:100].strip()
+            if len(user_content) > 100:
+                auto_title += "..."
+            await loop.run_in_executor(
+                None, _update_title, conversation_id, auto_title
+            )
 
     logger.info(
         f"Chat {conversation_id}: query={user_content!r:.80}, "
@@ -265,6 +307,7 @@ async def send_message(
     return SendMessageResponse(
         user_message=_msg_to_response(user_msg),
         assistant_message=_msg_to_response(assistant_msg),
+        degradations=degradations(),
     )
 
 
@@ -277,7 +320,7 @@ async def send_message_stream(
     conversation_id: str,
     user_content: str,
     *,
-    search_type: Literal["dense", "sparse", "hybrid"] = "hybrid",
+    search_type: Literal["dense", "sparse", "hybrid", "auto"] = "hybrid",
     top_k: int = 5,
     rerank: bool = False,
 ):
@@ -290,17 +333,18 @@ async def send_message_stream(
     Yields dicts suitable for ``sse_starlette.EventSourceResponse``:
     - ``{"event": "source", "data": ...}`` — retrieved documents (sent first)
     - ``{"event": "delta", "data": ...}`` — token deltas
-    - ``{"event": "done", "data": ...}``  — final message IDs
+    - ``{"event": "done", "data": ...}``  — final message IDs and degradations
     """
     import json
 
     loop = asyncio.get_running_loop()
 
     # 1. Load conversation
-    meta, existing_msgs = await asyncio.gather(
-        loop.run_in_executor(None, _get_conv, conversation_id),
-        loop.run_in_executor(None, _get_msgs, conversation_id),
-    )
+    with span("history_load"):
+        meta, existing_msgs = await asyncio.gather(
+            loop.run_in_executor(None, _get_conv, conversation_id),
+            loop.run_in_executor(None, _get_msgs, conversation_id),
+        )
     if meta is None:
         from app.middleware.errors import ApiError
 
@@ -311,13 +355,14 @@ async def send_message_stream(
         )
 
     # 2. Retrieve documents
-    search_results = await search_documents(
-        query=user_content,
-        collection_name=meta.collection_name,
-        search_type=search_type,
-        top_k=top_k,
-        rerank=rerank,
-    )
+    with span("retrieve"), reserve(settings.DEADLINE_GENERATION_RESERVE_MS):
+        search_results = await search_documents(
+            query=user_content,
+            collection_name=meta.collection_name,
+            search_type=search_type,
+            top_k=top_k,
+            rerank=rerank,
+        )
 
     sources: list[dict[str, Any]] = [
         {
@@ -325,6 +370,7 @@ async def send_message_stream(
             "title": r.title,
             "text": r.text,
             "score": r.score,
+            "metadata": r.metadata,
         }
         for r in search_results
     ]
@@ -336,27 +382,40 @@ async def send_message_stream(
     }
 
     # 3. Build prompt
-    history = _trim_history(existing_msgs, settings.GENERATION_HISTORY_TURNS)
-    context_block = build_context_block(sources)
-    llm_messages = build_messages(
-        user_query=user_content,
-        context_block=context_block,
-        history=history,
-    )
+    with span("prompt_build"):
+        history = _trim_history(existing_msgs, settings.GENERATION_HISTORY_TURNS)
+        context_block = build_context_block(sources)
+        llm_messages = build_messages(
+            user_query=user_content,
+            context_block=context_block,
+            history=history,
+        )
 
     # 4. Stream generation
-    queue = await generate_stream(llm_messages)
+    gen_start = time.perf_counter()
+    cancel = threading.Event()
+    queue = await generate_stream(llm_messages, cancel=cancel)
     full_answer_parts: list[str] = []
 
-    while True:
-        token = await queue.get()
-        if token is None:
-            break
-        full_answer_parts.append(token)
-        yield {
-            "event": "delta",
-            "data": json.dumps({"content": token}),
-        }
+    try:
+        while True:
+            try:
+                token = await run_within(queue.get(), stage="generate")
+            except TimeoutError:
+                degrade("generation_truncated")  # keep the partial answer
+                break
+            if token is None:
+                break
+            if not full_answer_parts:
+                record("ttft", (time.perf_counter() - gen_start) * 1000)
+            full_answer_parts.append(token)
+            yield {
+                "event": "delta",
+                "data": json.dumps({"content": token}),
+            }
+    finally:
+        cancel.set()  # deadline passed or client gone: stop the producer
+    record("generate", (time.perf_counter() - gen_start) * 1000)
 
     full_answer = "".join(full_answer_parts)
 
@@ -377,13 +436,16 @@ async def send_message_stream(
         sources=sources if sources else None,
         created_at=now,
     )
-    await loop.run_in_executor(None, _save_msgs, [user_msg, assistant_msg])
+    with span("persist"):
+        await loop.run_in_executor(None, _save_msgs, [user_msg, assistant_msg])
 
-    if not existing_msgs and not meta.title:
-        auto_title = user_content[:100].strip()
-        if len(user_content) > 100:
-            auto_title += "..."
-        await loop.run_in_executor(None, _update_title, conversation_id, auto_title)
+        if not existing_msgs and not meta.title:
+            auto_title = user_content[:100].strip()
+            if len(user_content) > 100:
+                auto_title += "..."
+            await loop.run_in_executor(
+                None, _update_title, conversation_id, auto_title
+            )
 
     # 6. Done event
     yield {
@@ -392,6 +454,7 @@ async def send_message_stream(
             {
                 "user_message_id": user_msg.message_id,
                 "assistant_message_id": assistant_msg.message_id,
+                "degradations": degradations(),
             }
         ),
     }
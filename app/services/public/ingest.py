@@ -3,7 +3,8 @@
 Concurrency design:
 - Files are split into **text** files and **audio** files.
 - Text files are processed concurrently (each file independently via
-  ``process_single_file`` inside ``asyncio.gather``).
+  ``stream_file_documents`` inside ``asyncio.gather``), and each file's
+  Document batches are upserted as its pipeline produces them.
 - Audio files are transcribed to text (GPU-bound, serialised internally)
   via ``parse_audio_to_text`` in a thread-pool executor.
 - **Transcription and text-file processing run concurrently** -- the event
@@ -11,22 +12,31 @@ Concurrency design:
 - Once transcription finishes, the resulting transcript .txt files are
   processed like any other text file (also concurrently).
 - Per-file Redis status is updated throughout so clients can poll progress.
+- Throughput (files, chunks, job duration) is exported on ``GET /metrics``.
 """
 
 import asyncio
+import time
 from pathlib import Path
 
+from app.core.cache import CacheStats
 from app.core.config import settings
 from app.core.logging import logger
+from app.core.metrics import (
+    INGEST_CHUNKS,
+    INGEST_FILES,
+    INGEST_JOB_SECONDS,
+    INGEST_JOBS,
+)
 from app.models import Document
-from app.repositories.milvus import upsert_documents
+from app.repositories.milvus.aio import delete_documents, upsert_documents
 from app.repositories.redis import (
     update_job_status,
     update_file_status,
     set_job_error,
     set_job_result,
 )
-from app.services.internal import process_single_file, parse_audio_to_text
+from app.services.internal import stream_file_documents, parse_audio_to_text
 
 
 # ---------------------------------------------------------------------------
@@ -35,6 +45,10 @@ from app.services.internal import process_single_file, parse_audio_to_text
 
 _AUDIO_EXTS = set(settings.ALLOWED_AUDIO_EXTS)  # e.g. {".mp3", ".wav", ...}
 
+_FILES_COMPLETED = INGEST_FILES.labels("completed")
+_FILES_FAILED = INGEST_FILES.labels("failed")
+_JOBS_RUNNING = INGEST_JOBS.labels("running")
+
 
 def _is_audio(path: Path) -> bool:
     return path.suffix.lower() in _AUDIO_EXTS
@@ -45,26 +59,66 @@ def _is_audio(path: Path) -> bool:
 # ---------------------------------------------------------------------------
 
 
+async def _delete_partial(
+    job_id: str, fname: str, doc_ids: list[int], collection_name: str
+) -> None:
+    """Roll back the batches of a failed file that were already upserted."""
+    try:
+        deleted = await delete_documents(doc_ids, collection_name)
+        logger.info(
+            f"[job={job_id}] Removed {deleted} partial chunks of failed '{fname}'"
+        )
+    except Exception as exc:
+        logger.error(
+            f"[job={job_id}] Could not remove partial chunks of '{fname}': {exc}"
+        )
+
+
 async def _process_text_file(
     job_id: str,
     fpath: Path,
     fname: str,
     collection_name: str,
 ) -> int:
-    """Process a single text file and upsert results. Returns chunk count."""
+    """Stream a single text file into the store. Returns chunk count.
+
+    Batches are upserted as the pipeline produces them; only the last one
+    flushes (one batch is held back to know which that is).  If the file
+    fails after some batches were written, those are deleted again so a
+    failed file leaves no partial document in the collection.
+    """
     update_file_status(job_id, fname, "processing")
+    cache_stats = CacheStats()
+    written: list[int] = []
     try:
-        docs = await process_single_file(fpath)
-        if docs:
-            loop = asyncio.get_running_loop()
-            await loop.run_in_executor(None, upsert_documents, docs, collection_name)
-        chunks = len(docs)
-        update_file_status(job_id, fname, "completed", chunks=chunks)
+        chunks = 0
+        held: list[Document] = []
+        async for docs in stream_file_documents(fpath, embed_cache_stats=cache_stats):
+            if held:
+                await upsert_documents(held, collection_name, flush=False)
+                written.extend(d.doc_id for d in held)
+            held = docs
+            chunks += len(docs)
+        if held:
+            await upsert_documents(held, collection_name)
+        update_file_status(
+            job_id,
+            fname,
+            "completed",
+            chunks=chunks,
+            cache_hits=cache_stats.hits,
+            cache_misses=cache_stats.misses,
+        )
+        _FILES_COMPLETED.inc()
+        INGEST_CHUNKS.inc(chunks)
         logger.info(f"[job={job_id}] File '{fname}' ingested: {chunks} chunks")
         return chunks
     except Exception as exc:
         logger.error(f"[job={job_id}] Failed to process file '{fname}': {exc}")
+        if written:
+            await _delete_partial(job_id, fname, written, collection_name)
         update_file_status(job_id, fname, "failed", error=str(exc))
+        _FILES_FAILED.inc()
         return 0
 
 
@@ -95,6 +149,7 @@ async def _transcribe_and_process_audio(
         logger.error(f"[job={job_id}] Audio transcription failed: {exc}")
         for fname in audio_names:
             update_file_status(job_id, fname, "failed", error=str(exc))
+        _FILES_FAILED.inc(len(audio_names))
         return 0
 
     # Build a mapping: original audio name -> transcript path
@@ -114,6 +169,7 @@ async def _transcribe_and_process_audio(
             update_file_status(
                 job_id, audio_name, "failed", error="Transcription produced no output"
             )
+            _FILES_FAILED.inc()
             return 0
         return await _process_text_file(job_id, tp, audio_name, collection_name)
 
@@ -128,6 +184,7 @@ async def _transcribe_and_process_audio(
                 f"[job={job_id}] Failed transcript processing '{an}': {result}"
             )
             update_file_status(job_id, an, "failed", error=str(result))
+            _FILES_FAILED.inc()
         else:
             total_chunks += result
 
@@ -163,6 +220,8 @@ async def ingest_files(
         filenames: Original filenames (same order as *file_paths*).
         collection_name: Target Milvus collection.
     """
+    start = time.perf_counter()
+    _JOBS_RUNNING.inc()
     try:
         update_job_status(job_id, "processing")
 
@@ -216,3 +275,6 @@ async def ingest_files(
     except Exception as exc:
         logger.exception(f"[job={job_id}] Ingestion job failed: {exc}")
         set_job_error(job_id, str(exc))
+    finally:
+        _JOBS_RUNNING.dec()
+        INGEST_JOB_SECONDS.observe(time.perf_counter() - start)
@@ -0,0 +1,143 @@
+"""Public service: render the ``GET /metrics`` payload.
+
+Latency histograms and throughput counters are observed at their call
+sites (``core/metrics``).  State already tracked elsewhere (cache
+counters, Milvus pool occupancy, GPU residency, provider circuit state,
+quota limits) is exposed here through scrape-time gauges, so the request
+path pays nothing for it.
+"""
+
+from app.core.gpu import gpu_residency
+from app.core.metrics import GaugeFunc, render
+from app.core.resilience import get_resilience_stats
+from app.repositories.milvus._client import get_pool_stats
+from app.services.internal.embed import (
+    get_document_batch_stats,
+    get_query_cache_stats,
+)
+from app.services.internal.quota import get_quota_stats
+from app.services.internal.rerank_cache import get_rerank_cache_stats
+from app.services.internal.search_cache import get_search_cache_stats
+
+
+def _cache_counters() -> dict[str, tuple[int, int]]:
+    """Cache name -> (hits, misses)."""
+    query = get_query_cache_stats()
+    search = get_search_cache_stats()["collections"].values()
+    rerank = get_rerank_cache_stats()
+    return {
+        "query_embedding_local": (query["local"]["hits"], query["local"]["misses"]),
+        "query_embedding_redis": (query["redis"]["hits"], query["redis"]["misses"]),
+        "search": (sum(s["hits"] for s in search), sum(s["misses"] for s in search)),
+        "rerank_score": (rerank["hits"], rerank["misses"]),
+    }
+
+
+def _cache_requests() -> dict[tuple[str, ...], float]:
+    samples: dict[tuple[str, ...], float] = {}
+    for cache, (hits, misses) in _cache_counters().items():
+        samples[(cache, "hit")] = hits
+        samples[(cache, "miss")] = misses
+    return samples
+
+
+def _cache_hit_ratio() -> dict[tuple[str, ...], float]:
+    return {
+        (cache,): hits / (hits + misses) if hits + misses else 0.0
+        for cache, (hits, misses) in _cache_counters().items()
+    }
+
+
+def _provider_stat(key: str, scale: float = 1.0):
+    def collect() -> dict[tuple[str, ...], float]:
+        return {(call,): s[key] * scale for call, s in get_resilience_stats().items()}
+
+    return collect
+
+
+def _quota_stat(key: str):
+    def collect() -> dict[tuple[str, ...], float]:
+        return {(model,): s[key] for model, s in get_quota_stats().items()}
+
+    return collect
+
+
+def _pool_stat(key: str, scale: float = 1.0):
+    def collect() -> dict[tuple[str, ...], float]:
+        return {(pool,): s[key] * scale for pool, s in get_pool_stats().items()}
+
+    return collect
+
+
+GaugeFunc(
+    "cache_requests",
+    "Cache lookups by outcome since the counters were last reset.",
+    ("cache", "result"),
+    _cache_requests,
+)
+GaugeFunc("cache_hit_ratio", "Cache hit ratio.", ("cache",), _cache_hit_ratio)
+GaugeFunc(
+    "milvus_pool_in_use",
+    "Milvus connections currently checked out.",
+    ("pool",),
+    _pool_stat("in_use"),
+)
+GaugeFunc(
+    "milvus_pool_occupancy",
+    "Fraction of the Milvus pool checked out.",
+    ("pool",),
+    _pool_stat("occupancy"),
+)
+GaugeFunc(
+    "milvus_pool_wait_seconds_max",
+    "Longest wait for a Milvus connection.",
+    ("pool",),
+    _pool_stat("wait_ms_max", 1e-3),
+)
+GaugeFunc(
+    "milvus_pool_timeouts",
+    "Connection checkouts that timed out.",
+    ("pool",),
+    _pool_stat("timeouts"),
+)
+GaugeFunc(
+    "gpu_resident_model",
+    "1 for the model currently resident on the GPU.",
+    ("owner",),
+    lambda: {(owner,): 1 for owner in [gpu_residency.resident] if owner},
+)
+GaugeFunc(
+    "embedding_document_batch_mean_size",
+    "Mean chunks per packed document embedding request.",
+    (),
+    lambda: {(): get_document_batch_stats()["mean_batch_size"]},
+)
+GaugeFunc(
+    "provider_hedge_delay_seconds",
+    "Current adaptive hedge threshold per provider call.",
+    ("call",),
+    _provider_stat("hedge_delay_ms", 1e-3),
+)
+GaugeFunc(
+    "provider_circuit_open",
+    "1 while the provider call's circuit breaker is open.",
+    ("call",),
+    _provider_stat("circuit_open"),
+)
+GaugeFunc(
+    "quota_concurrency_limit",
+    "Current AIMD in-flight limit for Gemini calls per model.",
+    ("model",),
+    _quota_stat("limit"),
+)
+GaugeFunc(
+    "quota_in_flight",
+    "Gemini calls currently admitted per model.",
+    ("model",),
+    _quota_stat("in_flight"),
+)
+
+
+def render_metrics() -> str:
+    """Return all metrics in the Prometheus text exposition format."""
+    return render()
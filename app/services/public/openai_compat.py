@@ -1,4 +1,5 @@
 import asyncio
+import threading
 import uuid
 import time
 import json
@@ -6,7 +7,9 @@ from typing import Any
 
 from fastapi.responses import StreamingResponse
 from app.core.config import settings
+from app.core.deadline import degradations, degrade, reserve, run_within
 from app.core.logging import logger
+from app.core.tracing import record, span
 from app.repositories.milvus._client import get_client
 from app.services.internal.generate import (
     build_context_block,
@@ -100,12 +103,17 @@ def _build_streaming_chunk(
     model: str,
     content: str | None = None,
     finish_reason: str | None = None,
+    degradations: list[str] | None = None,
 ) -> str:
-    """Build a single SSE ``data:`` line in OpenAI streaming format."""
+    """Build a single SSE ``data:`` line in OpenAI streaming format.
+
+    *degradations* (final chunk only) is an extension field: the response
+    headers are already sent, so ``X-Degradations`` cannot carry them.
+    """
     delta: dict[str, str] = {}
     if content is not None:
         delta["content"] = content
-    chunk = {
+    chunk: dict[str, Any] = {
         "id": completion_id,
         "object": "chat.completion.chunk",
         "created": int(time.time()),
@@ -118,6 +126,8 @@ def _build_streaming_chunk(
             }
         ],
     }
+    if degradations:
+        chunk["degradations"] = degradations
     return f"data: {json.dumps(chunk)}\n\n"
 
 
@@ -131,18 +141,39 @@ async def _stream_response(
     model: str,
     llm_messages: list[dict[str, str]],
 ):
-    """Async generator that yields OpenAI-format SSE chunks."""
+    """Async generator that yields OpenAI-format SSE chunks.
+
+    If the request deadline passes mid-stream, the answer is cut off with
+    ``finish_reason="length"`` and the final chunk lists the degradations.
+    """
+    gen_start = time.perf_counter()
+    first_token = True
+    finish_reason = "stop"
+    cancel = threading.Event()
     try:
-        queue = await generate_stream(llm_messages)
+        queue = await generate_stream(llm_messages, cancel=cancel)
 
         while True:
-            token = await queue.get()
+            try:
+                token = await run_within(queue.get(), stage="generate")
+            except TimeoutError:
+                degrade("generation_truncated")
+                finish_reason = "length"
+                break
             if token is None:
                 break
+            if first_token:
+                record("ttft", (time.perf_counter() - gen_start) * 1000)
+                first_token = False
             yield _build_streaming_chunk(completion_id, model, content=token)
 
         # Final chunk with finish_reason
-        yield _build_streaming_chunk(completion_id, model, finish_reason="stop")
+        yield _build_streaming_chunk(
+            completion_id,
+            model,
+            finish_reason=finish_reason,
+            degradations=degradations(),
+        )
         yield "data: [DONE]\n\n"
 
     except Exception as exc:
@@ -156,6 +187,9 @@ async def _stream_response(
         }
         yield f"data: {json.dumps(error_chunk)}\n\n"
         yield "data: [DONE]\n\n"
+    finally:
+        cancel.set()  # deadline passed or client gone: stop the producer
+        record("generate", (time.perf_counter() - gen_start) * 1000)
 
 
 # ---------------------------------------------------------------------------
@@ -221,13 +255,14 @@ async def chat_completions(request: ChatCompletionRequest):
 
     # 3. Retrieve relevant documents
     try:
-        search_results = await search_documents(
-            query=user_query,
-            collection_name=collection_name,
-            search_type=settings.GENERATION_SEARCH_TYPE,
-            top_k=settings.GENERATION_RAG_TOP_K,
-            rerank=settings.OPENWEBUI_RERANKING_ENABLED,
-        )
+        with span("retrieve"), reserve(settings.DEADLINE_GENERATION_RESERVE_MS):
+            search_results = await search_documents(
+                query=user_query,
+                collection_name=collection_name,
+                search_type=settings.GENERATION_SEARCH_TYPE,
+                top_k=settings.GENERATION_RAG_TOP_K,
+                rerank=settings.OPENWEBUI_RERANKING_ENABLED,
+            )
     except Exception as exc:
         logger.error(f"Search failed for collection '{collection_name}': {exc}")
         return _openai_error(
@@ -243,17 +278,21 @@ async def chat_completions(request: ChatCompletionRequest):
             "title": r.title,
             "text": r.text,
             "score": r.score,
+            "metadata": r.metadata,
         }
         for r in search_results
     ]
 
-    history = _trim_openai_history(request.messages, settings.GENERATION_HISTORY_TURNS)
-    context_block = build_context_block(sources)
-    llm_messages = build_rag_messages(
-        user_query=user_query,
-        context_block=context_block,
-        history=history,
-    )
+    with span("prompt_build"):
+        history = _trim_openai_history(
+            request.messages, settings.GENERATION_HISTORY_TURNS
+        )
+        context_block = build_context_block(sources)
+        llm_messages = build_rag_messages(
+            user_query=user_query,
+            context_block=context_block,
+            history=history,
+        )
 
     completion_id = _make_completion_id()
 
@@ -269,8 +308,19 @@ async def chat_completions(request: ChatCompletionRequest):
         )
 
     # Non-streaming
+    cancel = threading.Event()
     try:
-        answer = await generate(llm_messages)
+        with span("generate"):
+            answer = await run_within(
+                generate(llm_messages, cancel=cancel), stage="generate"
+            )
+    except TimeoutError:
+        logger.error("Generation exceeded the request deadline")
+        return _openai_error(
+            "Request deadline exceeded during generation.",
+            code="deadline_exceeded",
+            status_code=504,
+        )
     except Exception as exc:
         logger.error(f"Generation failed: {exc}")
         return _openai_error(
@@ -278,5 +328,7 @@ async def chat_completions(request: ChatCompletionRequest):
             code="internal_error",
             status_code=500,
         )
+    finally:
+        cancel.set()  # no-op once finished; stops an abandoned worker
 
     return _build_non_streaming_response(completion_id, request.model, answer)
@@ -4,19 +4,66 @@ Orchestrates query embedding (internal service) and Milvus search
 (repository layer) to serve the ``POST /search/{collection_name}``
 endpoint.
 
-All heavy I/O (embedding API call, Milvus query) is offloaded via
-``asyncio.run_in_executor`` so searches can happen concurrently.
+Milvus is queried through the async repository (``AsyncMilvusClient``) and
+awaited directly; the embedding API call is offloaded via
+``asyncio.run_in_executor``.  Searches therefore run concurrently without
+being capped by the default thread pool.
+
+With ``HYBRID_EXECUTION_MODE="speculative"``, hybrid search sends the
+BM25 leg immediately, runs the dense leg once the query vector arrives,
+and fuses the two lists client-side (``internal/fusion``) instead of
+calling Milvus ``hybrid_search`` after the embedding round-trip.
+
+Stages (cache lookup, embedding, Milvus, rerank) are timed on the request
+trace (``core/tracing``).
+
+Under a request deadline (``core/deadline``) optional work is shed as the
+budget runs low: overfetch is dropped, then reranking, and a query whose
+embedding would not leave time for Milvus falls back to BM25 only.  Each
+decision is recorded with ``degrade``; degraded results are not cached.
+
+With ``search_type="auto"`` the query is first classified by shape
+(``internal/query_router``): keyword-style queries go to BM25 only and
+skip the embedding call, sentence-like ones go dense only, the rest run
+hybrid.
+
+Before reranking, candidates far below the leaders can be pruned by an
+absolute retrieval-score floor, a ratio to the best score, or a Milvus
+range-search radius on the dense leg (``internal/pruning``), so fewer pairs
+reach the cross-encoder.
+
+With diversity enabled (``internal/diversity``), a larger pool is
+retrieved and reduced by Maximal Marginal Relevance over the chunk vectors
+plus a per-source cap, so near-identical neighbouring chunks do not crowd
+out other sources before reranking and generation.
+
+Results are cached per collection version (see ``internal/search_cache``),
+so repeated queries skip embedding, Milvus and reranking entirely until the
+collection is written to again.
 """
 
 import asyncio
-from typing import Literal
+from typing import Any, Literal
 
 from app.core.config import settings
+from app.core.deadline import degrade, remaining_ms, run_within, shed_count
 from app.core.logging import logger
+from app.core.metrics import SEARCH_ROUTE_SAVED_SECONDS
+from app.core.tracing import span
 from app.models import Document
-from app.repositories.milvus import dense_search, sparse_search, hybrid_search
+from app.repositories.milvus.aio import dense_search, sparse_search, hybrid_search
+from app.services.internal import search_cache
 from app.services.internal.embed import embed_query
-from app.services.internal.rerank import rerank as _rerank_sync
+from app.services.internal.diversity import (
+    diversity_options,
+    pool_size,
+    resolve_diversify,
+    select_diverse,
+)
+from app.services.internal.fusion import fuse_hits
+from app.services.internal.pruning import prune_candidates, pruning_options
+from app.services.internal.query_router import expected_embedding_ms, route_query
+from app.services.internal.rerank_cache import rerank_cached
 from app.schemas.search import SearchResult
 
 
@@ -39,42 +86,164 @@ def _doc_to_result(
     )
 
 
+async def _embed_within_deadline(query: str) -> list[float] | None:
+    """Embed *query*, or return ``None`` if that would not leave time for Milvus.
+
+    The embedding call is shielded, so a late vector still fills the query
+    cache for the next request.
+    """
+    try:
+        return await run_within(
+            embed_query(query),
+            stage="embed",
+            reserve_ms=settings.DEADLINE_EMBED_RESERVE_MS,
+            shield=True,
+        )
+    except TimeoutError:
+        degrade("sparse_fallback")
+        return None
+
+
+async def _rerank_within_deadline(
+    collection_name: str, query: str, results: list[SearchResult]
+) -> list[tuple[int, float]] | None:
+    """Rerank *results*, or return ``None`` when the deadline does not allow it."""
+    budget = remaining_ms()
+    if budget is not None and budget < settings.DEADLINE_RERANK_MIN_MS:
+        degrade("rerank_skipped")
+        return None
+    try:
+        # Cached (query, doc_id) scores are reused; the remaining pairs are
+        # batched with concurrent requests by the rerank scheduler.
+        return await run_within(
+            rerank_cached(
+                collection_name,
+                query,
+                [r.doc_id for r in results],
+                [r.text for r in results],
+            ),
+            stage="rerank",
+            shield=True,
+        )
+    except TimeoutError:
+        degrade("rerank_timeout")
+        return None
+
+
+def _route(query: str, collection_name: str) -> str:
+    """Resolve ``search_type="auto"`` and log what the decision saves."""
+    decision = route_query(query)
+    if decision.search_type == "sparse":
+        saved_ms = expected_embedding_ms()
+        SEARCH_ROUTE_SAVED_SECONDS.inc(saved_ms / 1000)
+        detail = f", skipping embedding (~{saved_ms:.0f}ms saved)"
+    else:
+        detail = ""
+    logger.info(
+        f"Routed query on '{collection_name}' to {decision.search_type} "
+        f"({decision.reason}){detail}: query={query!r}",
+        extra={
+            "search_route": decision.search_type,
+            "route_reason": decision.reason,
+        },
+    )
+    return decision.search_type
+
+
 # ---------------------------------------------------------------------------
-# Search dispatchers (sync – run inside executor)
+# Search dispatchers (single query over the batched repository API)
 # ---------------------------------------------------------------------------
 
 
-def _run_dense_search(
+async def _run_dense_search(
     query_vector: list[float],
     collection_name: str,
     top_k: int,
+    **options: Any,
 ) -> list[tuple[Document, float | None]]:
     """Execute a dense (vector) search and return the first query's results."""
-    batched = dense_search([query_vector], collection_name, top_k=top_k)
+    batched = await dense_search(
+        [query_vector], collection_name, top_k=top_k, **options
+    )
     return batched[0] if batched else []
 
 
-def _run_sparse_search(
+async def _run_sparse_search(
     query_text: str,
     collection_name: str,
     top_k: int,
+    **options: Any,
 ) -> list[tuple[Document, float | None]]:
     """Execute a sparse (BM25) search and return the first query's results."""
-    batched = sparse_search([query_text], collection_name, top_k=top_k)
+    batched = await sparse_search(
+        [query_text], collection_name, top_k=top_k, **options
+    )
     return batched[0] if batched else []
 
 
-def _run_hybrid_search(
+async def _run_hybrid_search(
     query_vector: list[float],
     query_text: str,
     collection_name: str,
     top_k: int,
+    **options: Any,
 ) -> list[tuple[Document, float | None]]:
     """Execute a hybrid (dense + BM25) search and return the first query's results."""
-    batched = hybrid_search([query_vector], [query_text], collection_name, top_k=top_k)
+    batched = await hybrid_search(
+        [query_vector], [query_text], collection_name, top_k=top_k, **options
+    )
     return batched[0] if batched else []
 
 
+async def _run_speculative_hybrid_search(
+    query_text: str,
+    collection_name: str,
+    top_k: int,
+    *,
+    include_scores: bool = settings.DEBUG_MODE_ENABLED,
+    radius: float | None = None,
+    **options: Any,
+) -> list[tuple[Document, float | None]]:
+    """Hybrid search with the BM25 leg overlapping the query embedding.
+
+    The sparse search starts immediately; the dense search starts as soon
+    as ``embed_query`` returns.  Both legs fetch ``top_k`` hits with raw
+    scores and are fused client-side with the configured ranker semantics.
+    *include_scores* keeps the fused scores; *radius* range-limits the
+    dense leg; other *options* go to both legs.
+    """
+
+    async def sparse_leg() -> list[tuple[Document, float | None]]:
+        with span("milvus_sparse"):
+            batched = await sparse_search(
+                [query_text],
+                collection_name,
+                top_k=top_k,
+                include_scores=True,
+                **options,
+            )
+        return batched[0] if batched else []
+
+    async def dense_leg() -> list[tuple[Document, float | None]]:
+        with span("embed"):
+            query_vector = await _embed_within_deadline(query_text)
+        if query_vector is None:
+            return []  # BM25 hits only
+        with span("milvus_dense"):
+            batched = await dense_search(
+                [query_vector],
+                collection_name,
+                top_k=top_k,
+                include_scores=True,
+                **({"radius": radius} if radius is not None else {}),
+                **options,
+            )
+        return batched[0] if batched else []
+
+    sparse_hits, dense_hits = await asyncio.gather(sparse_leg(), dense_leg())
+    return fuse_hits(dense_hits, sparse_hits, top_k, include_score=include_scores)
+
+
 # ---------------------------------------------------------------------------
 # Public async entry-point
 # ---------------------------------------------------------------------------
@@ -84,83 +253,161 @@ async def search_documents(
     query: str,
     collection_name: str,
     *,
-    search_type: Literal["dense", "sparse", "hybrid"] = "hybrid",
+    search_type: Literal["dense", "sparse", "hybrid", "auto"] = "hybrid",
     top_k: int = 10,
     rerank: bool = False,
+    diversify: bool | None = None,
 ) -> list[SearchResult]:
     """Run a search against the vector store and return ranked results.
 
     Concurrency:
-    - Query embedding and Milvus search are both offloaded to the default
-      thread-pool executor so multiple requests are served concurrently.
+    - Query embedding is offloaded to the default thread-pool executor;
+      the Milvus search is awaited on the async client, so many requests
+      are in flight at once.
     - For *hybrid* search the query embedding is awaited first (needed as
-      input), then the Milvus hybrid search runs in the executor.
+      input), then the Milvus hybrid search is awaited.  In
+      ``speculative`` execution mode the BM25 leg runs during the
+      embedding call instead, and the legs are fused client-side.
 
     Reranking:
     - When ``rerank=True``, the search overfetches by
       ``settings.OVERFETCH_MULTIPLIER`` and then reranks with a
       cross-encoder model, returning only the top ``top_k`` results.
+      Scores of (query, chunk) pairs seen before are served from the
+      rerank score cache.
+
+    Routing:
+    - ``"auto"`` is resolved before the cache lookup, so routed queries
+      share cache entries with explicit requests for the same type.
+
+    Diversity:
+    - When *diversify* (default ``settings.DIVERSITY_ENABLED``), the
+      search retrieves ``DIVERSITY_POOL_MULTIPLIER`` times the candidates
+      it needs and keeps the most relevant non-redundant ones.
+
+    Deadline:
+    - With an active request deadline, overfetch, reranking and the dense
+      leg are shed as the budget runs low (see the module docstring).
 
     Args:
         query: Natural-language search query.
         collection_name: Target Milvus collection.
-        search_type: One of ``"dense"``, ``"sparse"``, ``"hybrid"``.
+        search_type: One of ``"dense"``, ``"sparse"``, ``"hybrid"``, or
+            ``"auto"`` to let the query router pick one of them.
         top_k: Maximum number of results to return.
         rerank: Whether to apply cross-encoder reranking.
+        diversify: Apply MMR + per-source selection (``None`` = setting).
 
     Returns:
         A list of :class:`SearchResult` in relevance order.
     """
-    loop = asyncio.get_running_loop()
+    if search_type == "auto":
+        search_type = _route(query, collection_name)
+    diversify = resolve_diversify(diversify)
+
+    with span("search_cache"):
+        cache_key, cached = await search_cache.lookup(
+            collection_name,
+            query,
+            search_type=search_type,
+            top_k=top_k,
+            rerank=rerank,
+            diversify=diversify,
+        )
+    if cached is not None:
+        logger.info(
+            f"Search ({search_type}{', reranked' if rerank else ''}) on "
+            f"'{collection_name}': cache hit, query={query!r}, top_k={top_k}"
+        )
+        return cached
+
+    shed_before = shed_count()
 
-    # When reranking, overfetch candidates so the reranker has more to work with.
-    fetch_k = int(settings.OVERFETCH_MULTIPLIER * top_k) if rerank else top_k
+    sparse_options, dense_options = pruning_options(rerank)
+
+    # When reranking, overfetch candidates so the reranker has more to work
+    # with -- unless the deadline is too close to afford the extra hits.
+    fetch_k = top_k
+    if rerank:
+        budget = remaining_ms()
+        if budget is not None and budget < settings.DEADLINE_FULL_OVERFETCH_MS:
+            degrade("overfetch_reduced")
+        else:
+            fetch_k = int(settings.OVERFETCH_MULTIPLIER * top_k)
+
+    # Diversity: retrieve a larger pool, then select fetch_k from it.
+    select_k = fetch_k
+    if diversify:
+        fetch_k = pool_size(select_k)
+        sparse_options.update(diversity_options())
+        dense_options.update(diversity_options())
 
     if search_type == "sparse":
-        hits = await loop.run_in_executor(
-            None, _run_sparse_search, query, collection_name, fetch_k
-        )
+        with span("milvus"):
+            hits = await _run_sparse_search(
+                query, collection_name, fetch_k, **sparse_options
+            )
 
-    elif search_type == "dense":
-        query_vector = await embed_query(query)
-        hits = await loop.run_in_executor(
-            None, _run_dense_search, query_vector, collection_name, fetch_k
-        )
+    elif settings.HYBRID_EXECUTION_MODE == "speculative" and search_type == "hybrid":
+        with span("hybrid_speculative"):
+            hits = await _run_speculative_hybrid_search(
+                query, collection_name, fetch_k, **dense_options
+            )
 
     else:
-        query_vector = await embed_query(query)
-        hits = await loop.run_in_executor(
-            None,
-            _run_hybrid_search,
-            query_vector,
-            query,
-            collection_name,
-            fetch_k,
-        )
+        with span("embed"):
+            query_vector = await _embed_within_deadline(query)
+        with span("milvus"):
+            if query_vector is None:
+                hits = await _run_sparse_search(
+                    query, collection_name, fetch_k, **sparse_options
+                )
+            elif search_type == "dense":
+                hits = await _run_dense_search(
+                    query_vector, collection_name, fetch_k, **dense_options
+                )
+            else:
+                hits = await _run_hybrid_search(
+                    query_vector, query, collection_name, fetch_k, **dense_options
+                )
+
+    if diversify:
+        with span("diversify"):
+            hits = select_diverse(hits, select_k)
 
     results = [_doc_to_result(doc, score) for doc, score in hits]
 
-    # ---- Rerank and trim to top_k -----------------------------------
+    # ---- Prune, rerank and trim to top_k ----------------------------
+    pruned = 0
     if rerank and results:
-        candidate_texts = [r.text for r in results]
-        rankings = await loop.run_in_executor(
-            None, _rerank_sync, [query], [candidate_texts]
-        )
-        # rankings[0] is a list of (candidate_index, score) sorted by descending score
-        reranked = rankings[0][:top_k]
-        results = [
-            SearchResult(
-                doc_id=results[idx].doc_id,
-                title=results[idx].title,
-                text=results[idx].text,
-                score=score,
-                metadata=results[idx].metadata,
-            )
-            for idx, score in reranked
-        ]
+        kept = prune_candidates(results, search_type)
+        pruned = len(results) - len(kept)
+        results = kept
+
+    if rerank and results:
+        with span("rerank"):
+            ranking = await _rerank_within_deadline(collection_name, query, results)
+        if ranking is None:
+            results = results[:top_k]  # retrieval order
+        else:
+            # ranking is (candidate_index, score) sorted by descending score
+            results = [
+                SearchResult(
+                    doc_id=results[idx].doc_id,
+                    title=results[idx].title,
+                    text=results[idx].text,
+                    score=score,
+                    metadata=results[idx].metadata,
+                )
+                for idx, score in ranking[:top_k]
+            ]
+
+    if shed_count() == shed_before:
+        await search_cache.store(cache_key, results)
 
     logger.info(
         f"Search ({search_type}{', reranked' if rerank else ''}) on '{collection_name}': "
         f"query={query!r}, top_k={top_k}, returned={len(results)}"
+        + (f", pruned={pruned}" if pruned else "")
     )
     return results
@@ -0,0 +1,145 @@
+"""Ingestion embedding throughput vs. concurrent batches in flight.
+
+Embeds ``--chunks`` document chunks, split over ``--files`` files that are
+embedded concurrently (as in an ingestion job), through ``dense_embed`` for
+each ``EMBEDDING_MAX_CONCURRENT_BATCHES`` level in ``--levels``.  Reports
+chunks/sec and the number of batches the cross-file packer sent.
+
+The Gemini client is replaced by one that POSTs each batch to a fake
+embedding server started on localhost, which answers after
+``--latency-ms`` (plus ``--per-item-ms`` per text) and fails a batch with
+HTTP 503 at ``--error-rate`` so that per-batch retries show up in the
+numbers.  The chunk-embedding cache is disabled.
+
+Usage:
+    uv run python -m benchmarks.embedding_concurrency [--levels 1 2 4 8 16]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.services.internal import embed
+
+
+class _TransientHTTPError(Exception):
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def _make_handler(latency_s: float, per_item_s: float, error_rate: float, dim: int):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            texts = json.loads(body)["texts"]
+            time.sleep(latency_s + per_item_s * len(texts))
+            if random.random() < error_rate:
+                self.send_response(503)
+                self.end_headers()
+                return
+            payload = json.dumps({"vectors": [[0.0] * dim for _ in texts]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    return Handler
+
+
+class _HttpEmbeddingClient:
+    """Stands in for ``GoogleGenerativeAIEmbeddings`` (documents only)."""
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+
+    def embed_documents(self, texts, titles=None) -> list[list[float]]:
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"texts": texts, "titles": titles}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return json.loads(response.read())["vectors"]
+        except urllib.error.HTTPError as exc:
+            raise _TransientHTTPError(exc.code) from exc
+
+
+async def _run(files: list[list[str]], level: int) -> float:
+    settings.EMBEDDING_MAX_CONCURRENT_BATCHES = level
+    start = time.perf_counter()
+    results = await asyncio.gather(*[embed.dense_embed(chunks) for chunks in files])
+    elapsed = time.perf_counter() - start
+    assert [len(r) for r in results] == [len(chunks) for chunks in files]
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--files", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=settings.EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--latency-ms", type=float, default=250.0)
+    parser.add_argument("--per-item-ms", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    args = parser.parse_args()
+
+    handler = _make_handler(
+        args.latency_ms / 1000,
+        args.per_item_ms / 1000,
+        args.error_rate,
+        settings.EMBEDDING_DIM,
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = _HttpEmbeddingClient(f"http://127.0.0.1:{server.server_port}/embed")
+
+    embed._document_batcher.max_items = args.batch_size
+    settings.CHUNK_EMBEDDING_CACHE_ENABLED = False
+    chunks = [f"chunk {i} " + "lorem ipsum " * 40 for i in range(args.chunks)]
+    files = [chunks[i :: args.files] for i in range(args.files)]
+
+    print(
+        f"\n{args.chunks} chunks from {args.files} files, "
+        f"batches of <= {args.batch_size}, "
+        f"server latency {args.latency_ms:.0f}ms + {args.per_item_ms:.1f}ms/item, "
+        f"error rate {args.error_rate:.0%}\n"
+    )
+    print(
+        f"{'in flight':>9} {'seconds':>9} {'chunks/s':>10} "
+        f"{'batches':>8} {'retries':>8}"
+    )
+    try:
+        with patch.object(
+            embed, "_get_document_embedding_client", return_value=client
+        ):
+            for level in args.levels:
+                retries_before = embed._document_calls.stats.retries
+                batches_before = embed._document_batcher.stats.batches
+                elapsed = asyncio.run(_run(files, level))
+                retries = embed._document_calls.stats.retries - retries_before
+                batches = embed._document_batcher.stats.batches - batches_before
+                print(
+                    f"{level:>9} {elapsed:>9.2f} "
+                    f"{args.chunks / elapsed:>10.0f} {batches:>8} {retries:>8}"
+                )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Hybrid search latency: server-side fusion vs speculative client-side fusion.
+
+- ``server``: ``embed_query`` → Milvus ``hybrid_search`` (both legs and
+  the ranker run on the server after the embedding round-trip);
+- ``speculative``: the BM25 leg starts immediately, the dense leg once the
+  vector arrives, and the lists are fused in ``internal/fusion``.
+
+By default the embedding call and the Milvus client are fakes with fixed
+latencies (``--embed-ms``, ``--dense-ms``, ``--sparse-ms``); the server-side
+hybrid request costs ``max(dense, sparse)``.  Pass ``--collection`` to run
+against the Milvus at ``MILVUS_URI`` and the real embedding API; the top-k
+overlap between the two modes is then reported as well.
+
+Usage:
+    uv run python -m benchmarks.hybrid_execution [--requests 50]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.repositories.milvus.aio import search as aio_search
+from app.services.public import search as search_service
+
+_QUERIES = [
+    "how does the attention mechanism work",
+    "gradient descent learning rate schedule",
+    "what is a vector database",
+    "speech recognition with transformers",
+    "retrieval augmented generation pipeline",
+]
+
+
+class _FakeAsyncClient:
+    def __init__(self, dense_s: float, sparse_s: float) -> None:
+        self.dense_s = dense_s
+        self.sparse_s = sparse_s
+
+    async def has_collection(self, name: str) -> bool:
+        return True
+
+    async def load_collection(self, name: str) -> None:
+        pass
+
+    @staticmethod
+    def _hits(limit: int, offset: int) -> list[list[dict]]:
+        return [
+            [
+                {"id": offset + i, "distance": 1.0 / (i + 1), "entity": {"text": "t"}}
+                for i in range(limit)
+            ]
+        ]
+
+    async def search(self, **kwargs) -> list[list[dict]]:
+        dense = kwargs["anns_field"] == "dense_vector"
+        await asyncio.sleep(self.dense_s if dense else self.sparse_s)
+        return self._hits(kwargs["limit"], 0 if dense else kwargs["limit"] // 2)
+
+    async def hybrid_search(self, **kwargs) -> list[list[dict]]:
+        await asyncio.sleep(max(self.dense_s, self.sparse_s))
+        return self._hits(kwargs["limit"], 0)
+
+
+async def _run(mode: str, queries: list[str], collection: str, top_k: int):
+    timings: list[float] = []
+    results: list[list[int]] = []
+    for query in queries:
+        start = time.perf_counter()
+        if mode == "speculative":
+            hits = await search_service._run_speculative_hybrid_search(
+                query, collection, top_k
+            )
+        else:
+            vector = await search_service.embed_query(query)
+            hits = await search_service._run_hybrid_search(
+                vector, query, collection, top_k
+            )
+        timings.append((time.perf_counter() - start) * 1000)
+        results.append([doc.doc_id for doc, _ in hits])
+    return timings, results
+
+
+def _pct(values: list[float], q: int) -> float:
+    if len(values) < 2:
+        return values[0]
+    return statistics.quantiles(values, n=100)[q - 1]
+
+
+async def _main(args: argparse.Namespace) -> None:
+    collection = args.collection or "bench"
+    queries = [_QUERIES[i % len(_QUERIES)] + f" #{i}" for i in range(args.requests)]
+
+    runs = {}
+    for mode in ("server", "speculative"):
+        runs[mode] = await _run(mode, queries, collection, args.top_k)
+
+    print(
+        f"\n{args.requests} hybrid searches, top_k={args.top_k}, "
+        f"fusion={settings.FUSION_METHOD}\n"
+    )
+    print(f"{'mode':<12} {'p50 ms':>8} {'p95 ms':>8}")
+    for mode, (timings, _) in runs.items():
+        print(f"{mode:<12} {_pct(timings, 50):>8.1f} {_pct(timings, 95):>8.1f}")
+
+    if args.collection:
+        overlaps = [
+            len(set(a) & set(b)) / max(1, len(a))
+            for a, b in zip(runs["server"][1], runs["speculative"][1])
+        ]
+        print(
+            f"\ntop-{args.top_k} overlap with server fusion: "
+            f"{statistics.mean(overlaps):.1%}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--embed-ms", type=float, default=120.0)
+    parser.add_argument("--dense-ms", type=float, default=15.0)
+    parser.add_argument("--sparse-ms", type=float, default=25.0)
+    parser.add_argument("--collection", help="benchmark a real collection instead")
+    args = parser.parse_args()
+
+    if args.collection:
+        asyncio.run(_main(args))
+        return
+
+    async def fake_embed(query: str) -> list[float]:
+        await asyncio.sleep(args.embed_ms / 1000)
+        return [0.0] * settings.EMBEDDING_DIM
+
+    client = _FakeAsyncClient(args.dense_ms / 1000, args.sparse_ms / 1000)
+    with (
+        patch.object(search_service, "embed_query", side_effect=fake_embed),
+        patch.object(aio_search, "get_async_client", return_value=client),
+    ):
+        asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Peak memory of ingesting one large file: buffered vs. streaming pipeline.
+
+Writes a ``--pages``-page text PDF (or, with ``--format txt``, a plain-text
+file with the same lines), then ingests it in a fresh subprocess per mode
+and reports wall time, chunk count and peak RSS:
+
+- ``buffered``: the whole-file path -- load every page, chunk the full
+  text, embed every chunk, then upsert one list of Documents.
+- ``streaming``: ``stream_file_documents`` -- bounded stage queues, with
+  each batch upserted as it is produced.
+
+Embedding returns constant ``EMBEDDING_DIM`` vectors, the upsert is a
+no-op, and the chunk-embedding cache and title generation are disabled, so
+the numbers isolate the pipeline's own memory.
+
+Usage:
+    uv run python -m benchmarks.ingest_memory [--pages 500] [--format txt]
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+_LINE = "Page {page} line {line}: the quick brown fox jumps over the lazy dog again."
+
+
+def _write_pdf(path: Path, pages: int, lines_per_page: int) -> None:
+    """Write a minimal PDF with *pages* pages of Helvetica text."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for page in range(pages):
+        ops = ["BT", "/F1 9 Tf", "11 TL", "40 800 Td"]
+        for line in range(lines_per_page):
+            ops.append(f"({_LINE.format(page=page, line=line)}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode()
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % len(objects)
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        " ".join(f"{k} 0 R" for k in kids).encode(),
+        pages,
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (i, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    path.write_bytes(bytes(out))
+
+
+def _write_txt(path: Path, pages: int, lines_per_page: int) -> None:
+    """Write the lines of ``_write_pdf`` as a plain-text file."""
+    with open(path, "w", encoding="utf-8") as f:
+        for page in range(pages):
+            for line in range(lines_per_page):
+                f.write(_LINE.format(page=page, line=line) + "\n")
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+
+async def _buffered(path: Path, upsert) -> int:
+    from app.services.internal.chunk import chunk_text
+    from app.services.internal.embed import dense_embed
+    from app.services.internal.process_files import _load_text, _to_document
+
+    loop = asyncio.get_running_loop()
+    text = await loop.run_in_executor(None, _load_text, path)
+    chunks = chunk_text(text, source=str(path))
+    vectors = await dense_embed([c.text for c in chunks], [c.title for c in chunks])
+    docs = [_to_document(c, v) for c, v in zip(chunks, vectors)]
+    upsert(docs)
+    return len(docs)
+
+
+async def _streaming(path: Path, upsert) -> int:
+    from app.services.internal.process_files import stream_file_documents
+
+    total = 0
+    async for docs in stream_file_documents(path):
+        upsert(docs)
+        total += len(docs)
+    return total
+
+
+def _child(mode: str, path: Path) -> None:
+    from app.core.config import settings
+    from app.services.internal import embed, process_files  # noqa: F401
+
+    settings.CHUNK_EMBEDDING_CACHE_ENABLED = False
+    settings.TITLE_GEN_ENABLED = False
+    dim = settings.EMBEDDING_DIM
+
+    def fake_embed(texts, titles=None):
+        return [[0.1] * dim for _ in texts]
+
+    baseline = _peak_rss_mb()
+    run = _buffered if mode == "buffered" else _streaming
+    start = time.perf_counter()
+    with patch.object(embed, "_embed_batch_sync", side_effect=fake_embed):
+        chunks = asyncio.run(run(path, lambda docs: None))
+    elapsed = time.perf_counter() - start
+    print(
+        json.dumps(
+            {
+                "chunks": chunks,
+                "seconds": elapsed,
+                "baseline_mb": baseline,
+                "peak_mb": _peak_rss_mb(),
+            }
+        )
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--lines-per-page", type=int, default=60)
+    parser.add_argument("--format", choices=["pdf", "txt"], default="pdf")
+    parser.add_argument("--child", choices=["buffered", "streaming"])
+    parser.add_argument("--file", type=Path)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.file)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / f"large.{args.format}"
+        write = _write_pdf if args.format == "pdf" else _write_txt
+        write(path, args.pages, args.lines_per_page)
+        print(
+            f"\n{args.pages}-page {args.format.upper()}, "
+            f"{path.stat().st_size / 2**20:.1f} MiB on disk\n"
+        )
+        print(
+            f"{'mode':>10} {'chunks':>7} {'seconds':>8} "
+            f"{'baseline MiB':>13} {'peak MiB':>9} {'growth MiB':>11}"
+        )
+        for mode in ("buffered", "streaming"):
+            proc = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.ingest_memory",
+                    "--child",
+                    mode,
+                    "--file",
+                    str(path),
+                ],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            r = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(
+                f"{mode:>10} {r['chunks']:>7} {r['seconds']:>8.2f} "
+                f"{r['baseline_mb']:>13.1f} {r['peak_mb']:>9.1f} "
+                f"{r['peak_mb'] - r['baseline_mb']:>11.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
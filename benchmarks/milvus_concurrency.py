@@ -0,0 +1,119 @@
+"""Search throughput: executor-wrapped sync client vs native async client.
+
+Runs N concurrent single-query dense searches through
+
+- ``executor``: the sync repository (``MilvusClient``) via
+  ``loop.run_in_executor(None, ...)`` — the previous service code path;
+- ``async``: the ``repositories.milvus.aio`` repository awaited directly.
+
+By default both clients are replaced by fakes that take ``--latency-ms``
+per search (``time.sleep`` vs ``asyncio.sleep``), which isolates the
+concurrency cap of the default thread pool from server-side cost.  Pass
+``--collection`` to run against the Milvus at ``MILVUS_URI`` instead.
+
+Usage:
+    uv run python -m benchmarks.milvus_concurrency [--levels 50 200 500]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from contextlib import nullcontext
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.repositories.milvus import search as sync_search
+from app.repositories.milvus.aio import search as aio_search
+
+
+class _FakeSyncClient:
+    def __init__(self, latency_s: float) -> None:
+        self.latency_s = latency_s
+
+    def has_collection(self, name: str) -> bool:
+        return True
+
+    def load_collection(self, name: str) -> None:
+        pass
+
+    def search(self, **kwargs) -> list[list[dict]]:
+        time.sleep(self.latency_s)
+        return [[{"id": i, "entity": {"text": "t"}} for i in range(kwargs["limit"])]]
+
+
+class _FakeAsyncClient:
+    def __init__(self, latency_s: float) -> None:
+        self.latency_s = latency_s
+
+    async def has_collection(self, name: str) -> bool:
+        return True
+
+    async def load_collection(self, name: str) -> None:
+        pass
+
+    async def search(self, **kwargs) -> list[list[dict]]:
+        await asyncio.sleep(self.latency_s)
+        return [[{"id": i, "entity": {"text": "t"}} for i in range(kwargs["limit"])]]
+
+
+def _vector() -> list[float]:
+    return [random.random() for _ in range(settings.EMBEDDING_DIM)]
+
+
+async def _run_level(mode: str, n: int, collection: str, top_k: int) -> float:
+    loop = asyncio.get_running_loop()
+    vectors = [_vector() for _ in range(n)]
+
+    async def one(vec: list[float]) -> None:
+        if mode == "executor":
+            await loop.run_in_executor(
+                None, sync_search.dense_search, [vec], collection, top_k
+            )
+        else:
+            await aio_search.dense_search([vec], collection, top_k)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(v) for v in vectors))
+    return n / (time.perf_counter() - start)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    collection = args.collection or "bench"
+    print(f"{'concurrency':>11} {'executor qps':>13} {'async qps':>10} {'speedup':>8}")
+    for n in args.levels:
+        qps = {}
+        for mode in ("executor", "async"):
+            qps[mode] = await _run_level(mode, n, collection, args.top_k)
+        print(
+            f"{n:>11} {qps['executor']:>13.0f} {qps['async']:>10.0f} "
+            f"{qps['async'] / qps['executor']:>7.1f}x"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--levels", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--collection", help="benchmark a real collection instead")
+    args = parser.parse_args()
+
+    if args.collection:
+        asyncio.run(_main(args))
+        return
+
+    latency_s = args.latency_ms / 1000
+    with (
+        patch.object(
+            sync_search, "read_client", return_value=nullcontext(_FakeSyncClient(latency_s))
+        ),
+        patch.object(
+            aio_search, "get_async_client", return_value=_FakeAsyncClient(latency_s)
+        ),
+    ):
+        asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Payload size and decode time of Milvus search hits, before/after projection.
+
+"before" mirrors the old behaviour: every field including ``dense_vector``
+is requested and each hit is decoded the old way (Python-side timestamp
+parsing, defaults filled in, vector validated).  "after" requests
+``SEARCH_OUTPUT_FIELDS`` and decodes via the lean ``_hit_to_document``.
+
+Payload bytes are estimated from the field encodings Milvus puts on the
+wire (4 bytes per FLOAT_VECTOR element, UTF-8 for strings, JSON for
+metadata); no server is needed.
+
+Usage:
+    uv run python -m benchmarks.milvus_projection [--hits 100] [--repeats 200]
+"""
+
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timezone
+
+from app import models
+from app.core.config import settings
+from app.repositories.milvus.search import SEARCH_OUTPUT_FIELDS, _hit_to_document
+
+_FULL_FIELDS = (
+    "title",
+    "author_info",
+    "tags",
+    "metadata",
+    "text",
+    "dense_vector",
+    "created_at",
+    "updated_at",
+)
+
+
+def _make_entity(i: int) -> dict:
+    return {
+        "title": f"Chunk title {i}",
+        "author_info": "speaker",
+        "tags": ["audio", "lecture"],
+        "metadata": {"source": f"lecture_{i % 7}.mp3", "chunk_index": i},
+        "text": "lorem ipsum dolor sit amet " * 35,  # ~1 KB chunk
+        "dense_vector": [0.001 * (i + j) for j in range(settings.EMBEDDING_DIM)],
+        "created_at": "2025-01-01T00:00:00Z",
+        "updated_at": "2025-01-02T00:00:00Z",
+    }
+
+
+def _field_bytes(name: str, value: object) -> int:
+    if name == "dense_vector":
+        return 4 * len(value)
+    if isinstance(value, str):
+        return len(value.encode())
+    return len(json.dumps(value).encode())
+
+
+def _project(entity: dict, fields: tuple[str, ...]) -> dict:
+    return {k: entity[k] for k in fields if k in entity}
+
+
+def _old_decode(hit: dict) -> models.Document:
+    entity = dict(hit["entity"])
+    entity["doc_id"] = int(hit["id"])
+    if not entity.get("title"):
+        entity["title"] = "untitled"
+    entity.setdefault("created_at", datetime.now(timezone.utc))
+    entity.setdefault("updated_at", None)
+    entity.setdefault("sparse_vector", None)
+    for key in ("created_at", "updated_at"):
+        v = entity.get(key)
+        if isinstance(v, str):
+            if v.endswith("Z"):
+                v = v[:-1] + "+00:00"
+            entity[key] = datetime.fromisoformat(v)
+    return models.Document(**entity)
+
+
+def _time_ms(fn, hits: list[dict], repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for hit in hits:
+            fn(hit)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hits", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    entities = [_make_entity(i) for i in range(args.hits)]
+    before = [
+        {"id": i, "distance": 0.5, "entity": _project(e, _FULL_FIELDS)}
+        for i, e in enumerate(entities)
+    ]
+    after = [
+        {"id": i, "distance": 0.5, "entity": _project(e, SEARCH_OUTPUT_FIELDS)}
+        for i, e in enumerate(entities)
+    ]
+
+    def payload(hits: list[dict]) -> int:
+        return sum(_field_bytes(k, v) for h in hits for k, v in h["entity"].items())
+
+    rows = [
+        ("before", payload(before), _time_ms(_old_decode, before, args.repeats)),
+        ("after", payload(after), _time_ms(_hit_to_document, after, args.repeats)),
+    ]
+
+    print(f"\nper {args.hits} hits (dim={settings.EMBEDDING_DIM})\n")
+    print(f"{'':<8} {'payload KB':>11} {'decode ms':>10}")
+    for name, nbytes, ms in rows:
+        print(f"{name:<8} {nbytes / 1024:>11.1f} {ms:>10.3f}")
+    (_, b_bytes, b_ms), (_, a_bytes, a_ms) = rows
+    print(f"\npayload -{1 - a_bytes / b_bytes:.0%}, decode {b_ms / a_ms:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Compare reranker backends: latency and score agreement.
+
+Loads the torch and onnx-int8 rerankers for ``RERANKER_MODEL``, scores the
+same (query, candidate) lists with both and reports per-call latency plus
+how closely the int8 ranking follows the full-precision one.
+
+Usage:
+    uv run python -m benchmarks.rerank_backends [--queries 8] [--candidates 20]
+"""
+
+import argparse
+import statistics
+import time
+
+from app.core.config import settings
+from app.services.internal.rerank import _score_pairs, load_model
+
+_QUERIES = [
+    "how does the speaker define retrieval augmented generation",
+    "what are the side effects of the new treatment",
+    "summary of the quarterly revenue discussion",
+    "giải thích về mô hình ngôn ngữ lớn",
+    "which datasets were used for evaluation",
+    "steps to reset the router password",
+    "when was the project deadline moved",
+    "main argument against remote work",
+]
+
+_PASSAGE_WORDS = (
+    "the model retrieves relevant passages from an index and conditions the "
+    "answer on them while the team reviewed revenue growth costs and the "
+    "deadline for evaluation datasets treatment results router settings "
+    "remote work policies and language models were discussed at length"
+).split()
+
+
+def _make_candidates(n: int, seed: int) -> list[str]:
+    words = _PASSAGE_WORDS
+    return [
+        " ".join(words[(seed + i * 7 + j * 3) % len(words)] for j in range(60))
+        for i in range(n)
+    ]
+
+
+def _rank_correlation(a: list[float], b: list[float]) -> float:
+    """Spearman rank correlation (no tie correction)."""
+    n = len(a)
+    if n < 2:
+        return 1.0
+    rank_a = {i: r for r, i in enumerate(sorted(range(n), key=a.__getitem__))}
+    rank_b = {i: r for r, i in enumerate(sorted(range(n), key=b.__getitem__))}
+    d2 = sum((rank_a[i] - rank_b[i]) ** 2 for i in range(n))
+    return 1 - 6 * d2 / (n * (n * n - 1))
+
+
+def _time(model, queries, candidate_lists, repeats: int) -> tuple[list, list[float]]:
+    rankings = _score_pairs(model, queries, candidate_lists)  # warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        rankings = _score_pairs(
+            model, queries, candidate_lists, batch_size=settings.RERANK_MODEL_BATCH_SIZE
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+    return rankings, timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=8)
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    queries = [_QUERIES[i % len(_QUERIES)] for i in range(args.queries)]
+    candidate_lists = [_make_candidates(args.candidates, i) for i in range(args.queries)]
+
+    results = {}
+    for backend in ("torch", "onnx-int8"):
+        model = load_model(backend)
+        results[backend] = _time(model, queries, candidate_lists, args.repeats)
+
+    pairs = args.queries * args.candidates
+    print(f"\n{pairs} pairs per call, {args.repeats} repeats\n")
+    print(f"{'backend':<10} {'median ms':>10} {'p95 ms':>10} {'pairs/s':>10}")
+    for backend, (_, timings) in results.items():
+        median = statistics.median(timings)
+        p95 = sorted(timings)[max(0, int(len(timings) * 0.95) - 1)]
+        print(f"{backend:<10} {median:>10.1f} {p95:>10.1f} {pairs / median * 1000:>10.0f}")
+
+    ref, quant = results["torch"][0], results["onnx-int8"][0]
+    correlations, overlaps, max_diff = [], [], 0.0
+    for ref_rank, quant_rank in zip(ref, quant):
+        ref_scores = dict(ref_rank)
+        quant_scores = dict(quant_rank)
+        idx = sorted(ref_scores)
+        correlations.append(
+            _rank_correlation([ref_scores[i] for i in idx], [quant_scores[i] for i in idx])
+        )
+        top_ref = {i for i, _ in ref_rank[: args.top_k]}
+        top_quant = {i for i, _ in quant_rank[: args.top_k]}
+        overlaps.append(len(top_ref & top_quant) / args.top_k)
+        max_diff = max(max_diff, max(abs(ref_scores[i] - quant_scores[i]) for i in idx))
+
+    print("\nscore agreement (onnx-int8 vs torch)")
+    print(f"  mean Spearman rho : {statistics.mean(correlations):.4f}")
+    print(f"  mean top-{args.top_k} overlap: {statistics.mean(overlaps):.2%}")
+    print(f"  max |score diff|  : {max_diff:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Shared pytest fixtures.
+
+Unit tests must never read from or write to a real shared cache: mocked
+vectors/results would leak between tests (and into a developer's Redis).
+Tests that exercise a cache opt back in with ``monkeypatch``.  Likewise a
+model left resident on the GPU by one test must not skip the load of the
+next test's mock.  Uploads and transcripts go to a per-test temporary
+``LOCAL_STORAGE_PATH`` so a test run leaves the working tree clean.
+"""
+
+import pytest
+
+from app.core.config import settings
+
+
+@pytest.fixture(autouse=True)
+def _isolate_storage(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "LOCAL_STORAGE_PATH", str(tmp_path / "storage"))
+
+
+@pytest.fixture(autouse=True)
+def _isolate_caches(monkeypatch):
+    from app.repositories.redis.collection_version import reset_collection_versions
+    from app.core.gpu import gpu_residency
+    from app.repositories.milvus._registry import reset_registry
+    from app.services.internal.embed import clear_query_cache
+    from app.services.internal.quota import reset_quota
+    from app.services.internal.rerank_cache import clear_rerank_cache
+    from app.services.internal.search_cache import clear_search_cache
+
+    monkeypatch.setattr(settings, "QUERY_EMBEDDING_CACHE_REDIS_ENABLED", False)
+    monkeypatch.setattr(settings, "SEARCH_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "SEARCH_CACHE_REDIS_ENABLED", False)
+    monkeypatch.setattr(settings, "RERANK_SCORE_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "CHUNK_EMBEDDING_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "QUOTA_REDIS_ENABLED", False)
+    clear_query_cache()
+    clear_search_cache()
+    clear_rerank_cache()
+    reset_collection_versions()
+    reset_registry()
+    reset_quota()
+    yield
+    clear_query_cache()
+    clear_search_cache()
+    clear_rerank_cache()
+    reset_collection_versions()
+    reset_registry()
+    reset_quota()
+    gpu_residency.evict()
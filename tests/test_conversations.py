@@ -12,6 +12,8 @@ All external services (Milvus, Cerebras, embedding) are mocked.
 
 import asyncio
 import json
+import threading
+import time
 import uuid
 from datetime import datetime, timezone
 from unittest.mock import patch, MagicMock, AsyncMock, call
@@ -140,6 +142,106 @@ class TestBuildContextBlock:
         result = build_context_block(sources)
         assert "relevance:" not in result
 
+    @staticmethod
+    def _chunk(
+        index: int,
+        text: str,
+        source: str = "/data/talk.txt",
+        score=0.5,
+        start: int | None = None,
+    ):
+        metadata = {"source": source, "chunk_index": index}
+        if start is not None:
+            metadata["start_index"] = start
+        return {
+            "title": f"Chunk {index}",
+            "text": text,
+            "score": score,
+            "metadata": metadata,
+        }
+
+    def test_adjacent_chunks_are_stitched_without_overlap(self):
+        from app.services.internal.generate import merge_adjacent_sources
+
+        overlap = "shared overlap sentence. "
+        first = "Opening of the first chunk, " + overlap
+        sources = [
+            self._chunk(
+                4,
+                overlap + "tail of the second chunk.",
+                score=0.9,
+                start=100 + len(first) - len(overlap),
+            ),
+            self._chunk(3, first, score=0.7, start=100),
+            self._chunk(9, "An unrelated later chunk.", score=0.6, start=900),
+        ]
+        passages, saved = merge_adjacent_sources(sources)
+
+        assert [p["text"] for p in passages] == [
+            "Opening of the first chunk, " + overlap + "tail of the second chunk.",
+            "An unrelated later chunk.",
+        ]
+        assert passages[0]["title"] == "Chunk 3"  # document order within a source
+        assert passages[0]["score"] == 0.9
+        assert saved == len(overlap)
+
+    def test_sources_keep_rank_of_their_best_chunk(self):
+        from app.services.internal.generate import merge_adjacent_sources
+
+        sources = [
+            self._chunk(1, "b-one", source="b.txt"),
+            {"title": "Plain", "text": "no position"},
+            self._chunk(0, "a-zero", source="a.txt"),
+            self._chunk(0, "b-zero", source="b.txt"),
+            self._chunk(0, "b-zero", source="b.txt"),  # retrieved twice
+        ]
+        passages, saved = merge_adjacent_sources(sources)
+
+        assert [p["text"] for p in passages] == [
+            "b-zero\nb-one",
+            "no position",
+            "a-zero",
+        ]
+        assert saved == len("b-zero")
+
+    def test_coincidental_match_is_not_trimmed(self):
+        """Text is only dropped where the offsets say the chunks overlap."""
+        from app.services.internal.chunk import chunk_text
+        from app.services.internal.generate import merge_adjacent_sources
+
+        # Chunk 1 ends, after the "\n\n" break, with the same words chunk 2
+        # starts with -- a suffix/prefix match that is not splitter overlap.
+        text = "Intro of the talk. The results are\n\nThe results are in. " * 3
+        chunks = chunk_text(text, "talk.txt", chunk_size=40, chunk_overlap=10)
+        sources = [
+            self._chunk(c.index, c.text, source="talk.txt", start=c.start)
+            for c in chunks
+        ]
+        passages, _ = merge_adjacent_sources(sources)
+
+        # No two chunks overlap here, so each one is kept whole.
+        assert [p["text"] for p in passages] == ["\n".join(c.text for c in chunks)]
+        assert merge_adjacent_sources(
+            [self._chunk(0, "x The results are"), self._chunk(1, "The results are y")]
+        )[0][0]["text"] == "x The results are\nThe results are y"  # no offsets
+
+    def test_context_block_merges_and_counts_saved_tokens(self):
+        from app.core.metrics import CONTEXT_TOKENS_SAVED
+        from app.services.internal.generate import build_context_block
+
+        before = CONTEXT_TOKENS_SAVED.labels().value
+        overlap = "x" * 40
+        result = build_context_block(
+            [
+                self._chunk(0, "a" * 10 + overlap, start=0),
+                self._chunk(1, overlap + "b" * 10, start=10),
+            ]
+        )
+
+        assert "[Document 2:" not in result
+        assert "a" * 10 + overlap + "b" * 10 in result
+        assert CONTEXT_TOKENS_SAVED.labels().value == before + 10
+
 
 class TestBuildMessages:
     """Test build_messages() prompt assembly."""
@@ -300,6 +402,60 @@ class TestGenerateStreamAsync:
         assert "partial" in tokens
 
 
+class TestGenerateCancel:
+    """A cancelled generation stops its worker and closes the provider stream."""
+
+    @staticmethod
+    def _endless_llm(closed: threading.Event) -> MagicMock:
+        def stream(messages):
+            try:
+                while True:
+                    time.sleep(0.01)
+                    yield MagicMock(content="tok ")
+            finally:
+                closed.set()
+
+        llm = MagicMock()
+        llm.stream.side_effect = stream
+        return llm
+
+    @pytest.mark.asyncio
+    async def test_stream_producer_stops_on_cancel(self):
+        from app.services.internal.generate import generate_stream
+
+        closed, cancel = threading.Event(), threading.Event()
+        with patch(
+            "app.services.internal.generate._get_llm",
+            return_value=self._endless_llm(closed),
+        ):
+            queue = await generate_stream([], cancel=cancel)
+            assert await asyncio.wait_for(queue.get(), timeout=2.0) == "tok "
+            cancel.set()
+            while await asyncio.wait_for(queue.get(), timeout=2.0) is not None:
+                pass
+
+        assert closed.is_set()
+
+    def test_generate_sync_stops_on_cancel(self):
+        from app.services.internal.generate import (
+            GenerationCancelled,
+            _generate_sync,
+        )
+
+        closed, cancel = threading.Event(), threading.Event()
+        threading.Timer(0.05, cancel.set).start()
+        with (
+            patch(
+                "app.services.internal.generate._get_llm",
+                return_value=self._endless_llm(closed),
+            ),
+            pytest.raises(GenerationCancelled),
+        ):
+            _generate_sync([], cancel)
+
+        assert closed.is_set()
+
+
 class TestGenerateSyncHelper:
     """Test _generate_sync directly (mocking the Cerebras client)."""
 
@@ -692,6 +848,48 @@ class TestSendMessage:
 
         assert exc_info.value.status_code == 404
 
+    @pytest.mark.asyncio
+    async def test_generation_past_deadline_raises_504(self):
+        """A non-streamed answer that would miss the deadline fails with 504."""
+        from app.core.deadline import Deadline, deadline_ctx
+        from app.services.public.conversations import send_message
+        from app.middleware.errors import ApiError
+
+        async def slow_generate(messages, cancel=None):
+            await asyncio.sleep(1.0)
+            return "too late"
+
+        token = deadline_ctx.set(Deadline(50))
+        try:
+            with (
+                patch(
+                    "app.services.public.conversations._get_conv",
+                    return_value=_make_meta(),
+                ),
+                patch(
+                    "app.services.public.conversations._get_msgs",
+                    return_value=[],
+                ),
+                patch(
+                    "app.services.public.conversations.search_documents",
+                    new_callable=AsyncMock,
+                    return_value=[],
+                ),
+                patch(
+                    "app.services.public.conversations.generate",
+                    side_effect=slow_generate,
+                ),
+                patch("app.services.public.conversations._save_msgs") as mock_save,
+                pytest.raises(ApiError) as exc_info,
+            ):
+                await send_message("conv-1", "hello")
+        finally:
+            deadline_ctx.reset(token)
+
+        assert exc_info.value.status_code == 504
+        assert exc_info.value.code == "deadline_exceeded"
+        mock_save.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_empty_search_results(self):
         """Pipeline works with zero search results."""
@@ -821,7 +1019,7 @@ class TestSendMessageStream:
             SearchResult(doc_id=1, title="Doc", text="Content", score=0.9),
         ]
 
-        async def fake_generate_stream(messages):
+        async def fake_generate_stream(messages, cancel=None):
             q: asyncio.Queue[str | None] = asyncio.Queue()
             q.put_nowait("Hello ")
             q.put_nowait("world")
@@ -872,6 +1070,52 @@ class TestSendMessageStream:
         assert "user_message_id" in done_data
         assert "assistant_message_id" in done_data
 
+    @pytest.mark.asyncio
+    async def test_stream_truncated_at_deadline(self):
+        """Past the deadline the stream stops and the partial answer is kept."""
+        from app.core.deadline import Deadline, deadline_ctx
+        from app.services.public.conversations import send_message_stream
+
+        cancels = []
+
+        async def stalled_generate_stream(messages, cancel=None):
+            cancels.append(cancel)
+            q: asyncio.Queue[str | None] = asyncio.Queue()
+            q.put_nowait("Partial")  # no sentinel: the LLM never finishes
+            return q
+
+        token = deadline_ctx.set(Deadline(100))
+        try:
+            with (
+                patch(
+                    "app.services.public.conversations._get_conv",
+                    return_value=_make_meta(),
+                ),
+                patch(
+                    "app.services.public.conversations._get_msgs",
+                    return_value=[],
+                ),
+                patch(
+                    "app.services.public.conversations.search_documents",
+                    new_callable=AsyncMock,
+                    return_value=[],
+                ),
+                patch(
+                    "app.services.public.conversations.generate_stream",
+                    side_effect=stalled_generate_stream,
+                ),
+                patch("app.services.public.conversations._save_msgs") as mock_save,
+            ):
+                events = [e async for e in send_message_stream("conv-1", "q")]
+        finally:
+            deadline_ctx.reset(token)
+
+        done_data = json.loads(events[-1]["data"])
+        assert done_data["degradations"] == ["generation_truncated"]
+        saved = mock_save.call_args[0][0]
+        assert saved[1].content == "Partial"
+        assert cancels[0].is_set()  # the producer is told to stop
+
     @pytest.mark.asyncio
     async def test_stream_conversation_not_found(self):
         """send_message_stream raises ApiError 404 if conversation not found."""
@@ -899,7 +1143,7 @@ class TestSendMessageStream:
         """After streaming completes, messages are persisted."""
         from app.services.public.conversations import send_message_stream
 
-        async def fake_generate_stream(messages):
+        async def fake_generate_stream(messages, cancel=None):
             q: asyncio.Queue[str | None] = asyncio.Queue()
             q.put_nowait("Response")
             q.put_nowait(None)
@@ -939,6 +1183,56 @@ class TestSendMessageStream:
         assert saved_msgs[1].role == "assistant"
         assert saved_msgs[1].content == "Response"
 
+    @pytest.mark.asyncio
+    async def test_stream_records_stage_timings(self):
+        """Every pipeline stage, including time-to-first-token, is traced."""
+        from app.core.tracing import Trace, trace_ctx
+        from app.services.public.conversations import send_message_stream
+
+        async def fake_generate_stream(messages, cancel=None):
+            q: asyncio.Queue[str | None] = asyncio.Queue()
+            q.put_nowait("Response")
+            q.put_nowait(None)
+            return q
+
+        trace = Trace("req-1")
+        token = trace_ctx.set(trace)
+        try:
+            with (
+                patch(
+                    "app.services.public.conversations._get_conv",
+                    return_value=_make_meta(),
+                ),
+                patch(
+                    "app.services.public.conversations._get_msgs",
+                    return_value=[],
+                ),
+                patch(
+                    "app.services.public.conversations.search_documents",
+                    new_callable=AsyncMock,
+                    return_value=[],
+                ),
+                patch(
+                    "app.services.public.conversations.generate_stream",
+                    side_effect=fake_generate_stream,
+                ),
+                patch("app.services.public.conversations._save_msgs"),
+                patch("app.services.public.conversations._update_title"),
+            ):
+                async for _ in send_message_stream("conv-1", "test"):
+                    pass
+        finally:
+            trace_ctx.reset(token)
+
+        assert list(trace.durations()) == [
+            "history_load",
+            "retrieve",
+            "prompt_build",
+            "ttft",
+            "generate",
+            "persist",
+        ]
+
 
 # ===================================================================
 # 4. Helper function tests
@@ -1771,7 +2065,7 @@ class TestConversationReranking:
         """send_message_stream forwards rerank=True to search_documents."""
         from app.services.public.conversations import send_message_stream
 
-        async def fake_generate_stream(messages):
+        async def fake_generate_stream(messages, cancel=None):
             q: asyncio.Queue[str | None] = asyncio.Queue()
             q.put_nowait("Response")
             q.put_nowait(None)
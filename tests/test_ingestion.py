@@ -11,10 +11,13 @@ Covers:
 - Job status tracking with transcribing state
 """
 
+import importlib
 import json
 import uuid
 import asyncio
 import tempfile
+import threading
+import time
 from pathlib import Path
 from unittest.mock import patch, MagicMock, AsyncMock
 from datetime import datetime, timezone
@@ -310,6 +313,38 @@ class TestChunkText:
             assert len(chunks[0].text) > 0
             assert len(chunks[1].text) > 0
 
+    def test_chunk_stream_matches_chunk_text_for_short_text(self):
+        from app.services.internal.chunk import ChunkStream, chunk_text
+
+        stream = ChunkStream("s.txt", chunk_size=600, chunk_overlap=50)
+        pages = ["A" * 500, "B" * 500]
+        chunks = stream.feed(pages[0]) + stream.feed(pages[1]) + stream.close()
+
+        expected = chunk_text("\n".join(pages), "s.txt", 600, 50)
+        assert [c.text for c in chunks] == [c.text for c in expected]
+
+    def test_chunk_stream_emits_incrementally(self):
+        from app.services.internal.chunk import ChunkStream
+
+        stream = ChunkStream("long.txt", chunk_size=200, chunk_overlap=50)
+        page = ". ".join(f"Sentence number {i} of the page" for i in range(40))
+        chunks = []
+        for _ in range(10):
+            emitted = stream.feed(page)
+            chunks.extend(emitted)
+            # Only a few chunks' worth of text is ever buffered.
+            assert len(stream._buffer) < 6 * 200 + len(page)
+        chunks.extend(stream.close())
+
+        assert [c.index for c in chunks] == list(range(len(chunks)))
+        assert all(0 < len(c.text) <= 200 for c in chunks)
+        assert all(c.source == "long.txt" for c in chunks)
+        # Every page's text made it through.
+        assert sum("Sentence number 39" in c.text for c in chunks) >= 10
+        # Offsets locate each chunk in the whole (page-joined) text.
+        full = "\n".join([page] * 10)
+        assert all(full[c.start : c.start + len(c.text)] == c.text for c in chunks)
+
 
 # ===================================================================
 # 3. Title generation tests (mocked Cerebras)
@@ -365,6 +400,36 @@ class TestTitleGeneration:
             assert result[1].title == "Dogs Overview"
 
 
+    @pytest.mark.asyncio
+    async def test_title_limit_is_shared_across_files(self, monkeypatch):
+        """Concurrent files share one TITLE_GEN_MAX_CONCURRENCY budget."""
+        from app.core.config import settings
+        from app.services.internal.chunk import generate_titles, TextChunk
+
+        monkeypatch.setattr(settings, "TITLE_GEN_MAX_CONCURRENCY", 2)
+        lock, active, peak = threading.Lock(), [0], [0]
+
+        def slow_title(text):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return "Title"
+
+        files = [
+            [TextChunk(text=f"c{i}", index=i, source=f"f{f}.txt") for i in range(4)]
+            for f in range(3)
+        ]
+        with patch(
+            "app.services.internal.chunk._generate_title_sync", side_effect=slow_title
+        ):
+            await asyncio.gather(*[generate_titles(chunks) for chunks in files])
+
+        assert peak[0] == 2
+
+
 # ===================================================================
 # 4. Embedding tests (mocked Google API)
 # ===================================================================
@@ -393,6 +458,159 @@ class TestDenseEncode:
         vectors = await dense_embed([])
         assert vectors == []
 
+    @pytest.mark.asyncio
+    async def test_dense_embed_chunk_cache(self, monkeypatch):
+        """Cached chunks are not re-embedded; duplicate misses embed once."""
+        from app.core.cache import CacheStats
+        from app.core.config import settings
+        from app.services.internal.embed import _chunk_cache_key, dense_embed
+
+        monkeypatch.setattr(settings, "CHUNK_EMBEDDING_CACHE_ENABLED", True)
+        cached_key = _chunk_cache_key("unchanged", "T")
+        stored: dict[str, list[float]] = {}
+
+        def fake_get_vectors(keys):
+            return [[0.9] * 4 if k == cached_key else None for k in keys]
+
+        def fake_set_vectors(vectors, ttl):
+            stored.update(vectors)
+
+        stats = CacheStats()
+        with (
+            patch("app.services.internal.embed.get_vectors", fake_get_vectors),
+            patch("app.services.internal.embed.set_vectors", fake_set_vectors),
+            patch(
+                "app.services.internal.embed._embed_batch_sync",
+                return_value=[[0.1] * 4],
+            ) as mock_embed,
+        ):
+            vectors = await dense_embed(
+                ["edited", "unchanged", "edited"], ["T", "T", "T"], cache_stats=stats
+            )
+
+        mock_embed.assert_called_once_with(["edited"], ["T"])
+        assert vectors == [[0.1] * 4, [0.9] * 4, [0.1] * 4]
+        assert list(stored) == [_chunk_cache_key("edited", "T")]
+        assert (stats.hits, stats.misses) == (1, 2)
+
+    @pytest.mark.asyncio
+    async def test_dense_embed_batches_concurrently_in_order(self, monkeypatch):
+        import threading
+        import time
+
+        from app.core.config import settings
+        from app.services.internal import embed
+
+        monkeypatch.setattr(embed._document_batcher, "max_items", 2)
+        monkeypatch.setattr(settings, "EMBEDDING_MAX_CONCURRENT_BATCHES", 3)
+        lock = threading.Lock()
+        active = peak = 0
+
+        def fake_batch(texts, titles=None):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+            return [[float(t)] for t in texts]
+
+        texts = [str(i) for i in range(12)]
+        with patch("app.services.internal.embed._embed_batch_sync", fake_batch):
+            vectors = await embed.dense_embed(texts)
+
+        assert vectors == [[float(i)] for i in range(12)]
+        assert 1 < peak <= 3
+
+    @pytest.mark.asyncio
+    async def test_dense_embed_retries_only_failed_batch(self, monkeypatch):
+        from app.services.internal import embed
+
+        monkeypatch.setattr(embed._document_batcher, "max_items", 2)
+        monkeypatch.setattr(embed._document_calls, "retry_base", 0.001)
+        calls: list[tuple[str, ...]] = []
+
+        class FlakyClient:
+            def embed_documents(self, texts, titles=None):
+                calls.append(tuple(texts))
+                if texts == ["c", "d"] and calls.count(("c", "d")) == 1:
+                    raise TimeoutError("deadline exceeded")
+                return [[1.0] for _ in texts]
+
+        with patch.object(
+            embed, "_get_document_embedding_client", return_value=FlakyClient()
+        ):
+            vectors = await embed.dense_embed(["a", "b", "c", "d", "e"])
+
+        assert len(vectors) == 5
+        assert sorted(calls) == [("a", "b"), ("c", "d"), ("c", "d"), ("e",)]
+
+    @pytest.mark.asyncio
+    async def test_dense_embed_retries_wrapped_server_error(self, monkeypatch):
+        """A 503 surfaced as LangChain's GoogleGenerativeAIError is retried."""
+        from google.genai.errors import ServerError
+        from langchain_google_genai._common import GoogleGenerativeAIError
+
+        from app.services.internal import embed
+
+        monkeypatch.setattr(embed._document_calls, "retry_base", 0.001)
+        calls = 0
+
+        class FlakyClient:
+            def embed_documents(self, texts, titles=None):
+                nonlocal calls
+                calls += 1
+                if calls == 1:
+                    try:
+                        raise ServerError(503, {"error": {"status": "UNAVAILABLE"}})
+                    except ServerError as e:
+                        raise GoogleGenerativeAIError(f"Error embedding: {e}") from e
+                return [[1.0] for _ in texts]
+
+        retries_before = embed._document_calls.stats.retries
+        with patch.object(
+            embed, "_get_document_embedding_client", return_value=FlakyClient()
+        ):
+            vectors = await embed.dense_embed(["a", "b"])
+
+        assert vectors == [[1.0], [1.0]]
+        assert calls == 2
+        assert embed._document_calls.stats.retries == retries_before + 1
+
+    @pytest.mark.asyncio
+    async def test_dense_embed_packs_chunks_across_files(self, monkeypatch):
+        """Concurrent files share batches, bounded by total characters."""
+        from app.services.internal import embed
+
+        monkeypatch.setattr(embed._document_batcher, "max_weight", 10)
+        batches: list[list[str]] = []
+
+        def fake_batch(texts, titles=None):
+            batches.append(list(texts))
+            return [[float(len(t))] for t in texts]
+
+        with patch("app.services.internal.embed._embed_batch_sync", fake_batch):
+            file_a, file_b = await asyncio.gather(
+                embed.dense_embed(["aaa", "aaaa"]),
+                embed.dense_embed(["bb", "bbbbbbbbbbbb"]),
+            )
+
+        assert file_a == [[3.0], [4.0]]
+        assert file_b == [[2.0], [12.0]]
+        # a + a + b fit in 10 chars; the oversized chunk goes alone.
+        assert batches == [["aaa", "aaaa", "bb"], ["bbbbbbbbbbbb"]]
+
+    def test_chunk_cache_key_depends_on_title_and_model(self, monkeypatch):
+        from app.core.config import settings
+        from app.services.internal.embed import _chunk_cache_key
+
+        key = _chunk_cache_key("text", "title")
+        assert key == _chunk_cache_key("text", "title")
+        assert key != _chunk_cache_key("text", "other")
+        monkeypatch.setattr(settings, "EMBEDDING_MODEL", "other-model")
+        assert key != _chunk_cache_key("text", "title")
+
 
 # ===================================================================
 # 5. Multi-format file loading tests
@@ -421,6 +639,46 @@ class TestFileLoading:
         text = _load_text(tmp_path / "missing.txt")
         assert text == ""
 
+    def test_text_file_read_in_line_aligned_blocks(self, tmp_path: Path):
+        """Plain text is never loaded whole; joined blocks restore the file."""
+        from app.services.internal.process_files import _iter_text_blocks
+
+        text = "".join(f"line {i} " + "x" * (i % 37) + "\n" for i in range(2000))
+        f = tmp_path / "big.txt"
+        f.write_text(text, encoding="utf-8")
+
+        blocks = list(_iter_text_blocks(f, 1000))
+
+        assert len(blocks) > 40
+        assert max(len(b) for b in blocks) < 1000 + 50  # block + one line
+        assert "\n".join(blocks) == text.removesuffix("\n")
+
+    @pytest.mark.asyncio
+    async def test_large_text_file_streams_like_whole_file(
+        self, tmp_path: Path, monkeypatch
+    ):
+        """Block-wise extraction yields the same chunks as the whole text."""
+        from app.core.config import settings
+        from app.services.internal.chunk import chunk_text
+        from app.services.internal.process_files import stream_file_documents
+
+        text = "\n".join(
+            " ".join(f"w{line}_{i}" for i in range(15)) for line in range(1500)
+        )
+        f = tmp_path / "large.txt"
+        f.write_text(text, encoding="utf-8")
+        monkeypatch.setattr(settings, "INGEST_TEXT_BLOCK_CHARS", 4096)
+
+        def fake_embed(texts, titles=None):
+            return [[0.5] * 8 for _ in texts]
+
+        with patch(
+            "app.services.internal.embed._embed_batch_sync", side_effect=fake_embed
+        ):
+            docs = [d async for batch in stream_file_documents(f) for d in batch]
+
+        assert [d.text for d in docs] == [c.text for c in chunk_text(text, str(f))]
+
     def test_loader_map_has_expected_types(self):
         from app.services.internal.process_files import _LOADER_MAP
 
@@ -514,6 +772,84 @@ class TestProcessFiles:
         assert len(docs) == 1
         assert docs[0].title == "Single File Title"
 
+    @pytest.mark.asyncio
+    async def test_stream_file_documents_batches(self, tmp_path: Path, monkeypatch):
+        """The pipeline yields store-sized batches covering every chunk once."""
+        from app.core.config import settings
+        from app.services.internal.process_files import stream_file_documents
+
+        f = tmp_path / "long.txt"
+        f.write_text(" ".join(f"word{i}" for i in range(3000)), encoding="utf-8")
+        monkeypatch.setattr(settings, "MAX_TOKENS", 200)
+        monkeypatch.setattr(settings, "OVERLAP_TOKENS", 20)
+        monkeypatch.setattr(settings, "EMBEDDING_BATCH_SIZE", 4)
+        monkeypatch.setattr(settings, "MILVUS_INSERT_BATCH_SIZE", 10)
+
+        def fake_embed(texts, titles=None):
+            return [[0.5] * 8 for _ in texts]
+
+        with patch(
+            "app.services.internal.embed._embed_batch_sync", side_effect=fake_embed
+        ):
+            batches = [b async for b in stream_file_documents(f)]
+
+        sizes = [len(b) for b in batches]
+        assert all(size == 10 for size in sizes[:-1])
+        assert 0 < sizes[-1] <= 10
+        indices = sorted(d.metadata["chunk_index"] for b in batches for d in b)
+        assert indices == list(range(len(indices)))
+
+    @pytest.mark.asyncio
+    async def test_stream_file_documents_raises_stage_failure(self, small_text_file):
+        from app.services.internal.process_files import stream_file_documents
+
+        with patch(
+            "app.services.internal.embed._embed_batch_sync",
+            side_effect=ValueError("bad input"),
+        ):
+            with pytest.raises(ValueError, match="bad input"):
+                async for _ in stream_file_documents(small_text_file):
+                    pass
+
+    @pytest.mark.asyncio
+    async def test_stream_file_documents_fails_on_corrupt_later_page(
+        self, tmp_path: Path, monkeypatch
+    ):
+        """A loader error after some pages fails the file, not truncates it."""
+        from langchain_core.documents import Document as LCDocument
+
+        from app.core.config import settings
+
+        process_files = importlib.import_module("app.services.internal.process_files")
+
+        class CorruptAfterTwoPages:
+            def __init__(self, path):
+                pass
+
+            def lazy_load(self):
+                for i in range(2):
+                    yield LCDocument(page_content=f"page {i} " + "text " * 400)
+                raise ValueError("bad xref at page 3")
+
+        f = tmp_path / "broken.pdf"
+        f.write_bytes(b"%PDF-1.4")
+        monkeypatch.setattr(settings, "MAX_TOKENS", 200)
+        monkeypatch.setattr(settings, "OVERLAP_TOKENS", 20)
+        monkeypatch.setattr(settings, "EMBEDDING_BATCH_SIZE", 2)
+        monkeypatch.setattr(settings, "MILVUS_INSERT_BATCH_SIZE", 2)
+
+        with (
+            patch.dict(process_files._LOADER_MAP, {".pdf": CorruptAfterTwoPages}),
+            patch(
+                "app.services.internal.embed._embed_batch_sync",
+                side_effect=lambda texts, titles=None: [[0.5] for _ in texts],
+            ),
+        ):
+            with pytest.raises(ValueError, match="bad xref"):
+                async for _ in process_files.stream_file_documents(f):
+                    pass
+            assert process_files._load_text(f) == ""
+
     @pytest.mark.asyncio
     async def test_process_nonexistent_file(self, tmp_path: Path):
         from app.services.internal.process_files import process_files
@@ -609,6 +945,33 @@ class TestSpeechToText:
 
         assert paths == []
 
+    def test_model_is_built_while_holding_the_gpu(
+        self, fake_audio_file: Path, tmp_path: Path
+    ):
+        """Whisper places weights at construction, so build it inside use()."""
+        from app.core.gpu import gpu_lock
+        from app.services.internal.speech_to_text import parse_audio_to_text
+
+        held = []
+
+        def build():
+            held.append(gpu_lock.locked())
+            return self._mock_batched_model()
+
+        with (
+            patch(
+                "app.services.internal.speech_to_text._get_batched_model",
+                side_effect=build,
+            ),
+            patch(
+                "app.services.internal.speech_to_text._transcribe_single",
+                return_value="text",
+            ),
+        ):
+            parse_audio_to_text([fake_audio_file], out_dir=tmp_path / "out")
+
+        assert held and all(held)
+
     def test_parse_audio_to_text_multiple_files(self, tmp_path: Path):
         """Multiple audio files produce multiple transcript files."""
         from app.services.internal.speech_to_text import parse_audio_to_text
@@ -747,6 +1110,26 @@ class TestJobsEndpoint:
         assert data["files"]["a.txt"]["chunks"] == 10
         assert data["files"]["b.txt"]["status"] == "pending"
 
+    @pytest.mark.usefixtures("_patch_redis")
+    def test_get_job_status_embedding_cache_hit_rate(self, client: TestClient):
+        from app.repositories.redis.job_store import create_job, update_file_status
+
+        job_id = str(uuid.uuid4())
+        create_job(job_id, "col", ["a.txt", "b.txt"])
+        update_file_status(
+            job_id, "a.txt", "completed", chunks=4, cache_hits=3, cache_misses=1
+        )
+        update_file_status(
+            job_id, "b.txt", "completed", chunks=4, cache_hits=0, cache_misses=4
+        )
+
+        data = client.get(f"/api/v1/jobs/{job_id}").json()
+        assert data["embedding_cache_hits"] == 3
+        assert data["embedding_cache_misses"] == 5
+        assert data["embedding_cache_hit_rate"] == 0.375
+        assert data["files"]["a.txt"]["embedding_cache_hits"] == 3
+        assert data["files"]["b.txt"]["embedding_cache_misses"] == 4
+
     @pytest.mark.usefixtures("_patch_redis")
     def test_get_job_status_audio_transcribing(self, client: TestClient):
         """Job status endpoint reflects 'transcribing' state for audio files."""
@@ -799,12 +1182,17 @@ class TestIngestService:
             dense_vector=[0.1] * 1024,
         )
 
+        async def mock_stream(path, **kwargs):
+            yield [mock_doc]
+
         with (
             patch(
-                "app.services.public.ingest.process_single_file",
-                return_value=[mock_doc],
+                "app.services.public.ingest.stream_file_documents",
+                side_effect=mock_stream,
             ),
-            patch("app.services.public.ingest.upsert_documents") as mock_upsert,
+            patch(
+                "app.services.public.ingest.upsert_documents", new_callable=AsyncMock
+            ) as mock_upsert,
         ):
             await ingest_files(job_id, [small_text_file], [fname], "test_col")
 
@@ -813,6 +1201,89 @@ class TestIngestService:
         assert job["documents_ingested"] == 1
         assert job["files"][fname]["status"] == "completed"
 
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("_patch_redis")
+    async def test_ingest_upserts_each_batch_and_flushes_last(
+        self, small_text_file: Path
+    ):
+        from app.services.public.ingest import ingest_files
+        from app.repositories.redis.job_store import create_job, get_job
+        from app.models import Document
+
+        job_id = str(uuid.uuid4())
+        create_job(job_id, "col", ["small.txt"])
+
+        batches = [
+            [
+                Document(doc_id=10 * b + i, text="t", dense_vector=[0.1])
+                for i in range(3)
+            ]
+            for b in range(3)
+        ]
+
+        async def mock_stream(path, **kwargs):
+            for batch in batches:
+                yield batch
+
+        with (
+            patch(
+                "app.services.public.ingest.stream_file_documents",
+                side_effect=mock_stream,
+            ),
+            patch(
+                "app.services.public.ingest.upsert_documents", new_callable=AsyncMock
+            ) as mock_upsert,
+        ):
+            await ingest_files(job_id, [small_text_file], ["small.txt"], "col")
+
+        assert [c.args[0] for c in mock_upsert.await_args_list] == batches
+        assert [c.kwargs.get("flush", True) for c in mock_upsert.await_args_list] == [
+            False,
+            False,
+            True,
+        ]
+        assert get_job(job_id)["documents_ingested"] == 9
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("_patch_redis")
+    async def test_ingest_failed_file_removes_written_batches(
+        self, small_text_file: Path
+    ):
+        from app.services.public.ingest import ingest_files
+        from app.repositories.redis.job_store import create_job, get_job
+        from app.models import Document
+
+        job_id = str(uuid.uuid4())
+        create_job(job_id, "col", ["small.txt"])
+
+        async def mock_stream(path, **kwargs):
+            for b in range(3):
+                yield [Document(doc_id=10 * b + i, text="t") for i in range(2)]
+            raise ValueError("bad xref at page 300")
+
+        with (
+            patch(
+                "app.services.public.ingest.stream_file_documents",
+                side_effect=mock_stream,
+            ),
+            patch(
+                "app.services.public.ingest.upsert_documents", new_callable=AsyncMock
+            ) as mock_upsert,
+            patch(
+                "app.services.public.ingest.delete_documents",
+                new_callable=AsyncMock,
+                return_value=4,
+            ) as mock_delete,
+        ):
+            await ingest_files(job_id, [small_text_file], ["small.txt"], "col")
+
+        # Two batches were written before the failure; the third was held.
+        assert mock_upsert.await_count == 2
+        mock_delete.assert_awaited_once_with([0, 1, 10, 11], "col")
+        job = get_job(job_id)
+        assert job["files"]["small.txt"]["status"] == "failed"
+        assert job["documents_ingested"] == 0
+
     @pytest.mark.asyncio
     @pytest.mark.usefixtures("_patch_redis")
     async def test_ingest_text_files_partial_failure(self, tmp_path: Path):
@@ -838,19 +1309,21 @@ class TestIngestService:
 
         call_count = 0
 
-        async def mock_process_single(path):
+        async def mock_stream(path, **kwargs):
             nonlocal call_count
             call_count += 1
             if "bad" in str(path):
                 raise RuntimeError("Processing failed")
-            return [mock_doc]
+            yield [mock_doc]
 
         with (
             patch(
-                "app.services.public.ingest.process_single_file",
-                side_effect=mock_process_single,
+                "app.services.public.ingest.stream_file_documents",
+                side_effect=mock_stream,
+            ),
+            patch(
+                "app.services.public.ingest.upsert_documents", new_callable=AsyncMock
             ),
-            patch("app.services.public.ingest.upsert_documents"),
         ):
             await ingest_files(
                 job_id,
@@ -892,16 +1365,21 @@ class TestIngestService:
             dense_vector=[0.3] * 1024,
         )
 
+        async def mock_stream(path, **kwargs):
+            yield [mock_doc]
+
         with (
             patch(
                 "app.services.public.ingest.parse_audio_to_text",
                 return_value=[transcript_file],
             ),
             patch(
-                "app.services.public.ingest.process_single_file",
-                return_value=[mock_doc],
+                "app.services.public.ingest.stream_file_documents",
+                side_effect=mock_stream,
+            ),
+            patch(
+                "app.services.public.ingest.upsert_documents", new_callable=AsyncMock
             ),
-            patch("app.services.public.ingest.upsert_documents"),
         ):
             await ingest_files(job_id, [audio_file], ["lecture.mp3"], "col")
 
@@ -947,11 +1425,9 @@ class TestIngestService:
 
         process_call_paths = []
 
-        async def mock_process_single(path):
+        async def mock_stream(path, **kwargs):
             process_call_paths.append(str(path))
-            if "speech" in str(path):
-                return [audio_doc]
-            return [text_doc]
+            yield [audio_doc] if "speech" in str(path) else [text_doc]
 
         with (
             patch(
@@ -959,10 +1435,12 @@ class TestIngestService:
                 return_value=[transcript_file],
             ),
             patch(
-                "app.services.public.ingest.process_single_file",
-                side_effect=mock_process_single,
+                "app.services.public.ingest.stream_file_documents",
+                side_effect=mock_stream,
+            ),
+            patch(
+                "app.services.public.ingest.upsert_documents", new_callable=AsyncMock
             ),
-            patch("app.services.public.ingest.upsert_documents"),
         ):
             await ingest_files(
                 job_id,
@@ -997,7 +1475,9 @@ class TestIngestService:
                 "app.services.public.ingest.parse_audio_to_text",
                 side_effect=RuntimeError("GPU OOM"),
             ),
-            patch("app.services.public.ingest.upsert_documents"),
+            patch(
+                "app.services.public.ingest.upsert_documents", new_callable=AsyncMock
+            ),
         ):
             await ingest_files(job_id, [audio_file], ["bad_audio.mp3"], "col")
 
@@ -532,7 +532,7 @@ class TestChatCompletionsStreaming:
     def test_streaming_returns_sse(self, client: TestClient):
         """Streaming should return text/event-stream with OpenAI chunk format."""
 
-        async def fake_generate_stream(messages):
+        async def fake_generate_stream(messages, cancel=None):
             q: asyncio.Queue[str | None] = asyncio.Queue()
             q.put_nowait("Hello")
             q.put_nowait(" world")
@@ -587,7 +587,7 @@ class TestChatCompletionsStreaming:
     def test_streaming_model_in_chunks(self, client: TestClient):
         """Each chunk should include the model ID."""
 
-        async def fake_stream(messages):
+        async def fake_stream(messages, cancel=None):
             q: asyncio.Queue[str | None] = asyncio.Queue()
             q.put_nowait("token")
             q.put_nowait(None)
@@ -652,7 +652,7 @@ class TestChatCompletionsStreaming:
     def test_streaming_consistent_completion_id(self, client: TestClient):
         """All chunks in a stream should share the same completion ID."""
 
-        async def fake_stream(messages):
+        async def fake_stream(messages, cancel=None):
             q: asyncio.Queue[str | None] = asyncio.Queue()
             q.put_nowait("a")
             q.put_nowait("b")
@@ -693,6 +693,38 @@ class TestChatCompletionsStreaming:
         assert list(ids)[0].startswith("chatcmpl-")
 
 
+    @pytest.mark.asyncio
+    async def test_streaming_truncated_at_deadline(self):
+        """A cut-off stream reports the truncation and cancels the producer."""
+        from app.core.deadline import Deadline, deadline_ctx
+        from app.services.public.openai_compat import _stream_response
+
+        cancels = []
+
+        async def stalled_stream(messages, cancel=None):
+            cancels.append(cancel)
+            q: asyncio.Queue[str | None] = asyncio.Queue()
+            q.put_nowait("Partial")  # no sentinel: the LLM never finishes
+            return q
+
+        token = deadline_ctx.set(Deadline(100))
+        try:
+            with patch(
+                "app.services.public.openai_compat.generate_stream",
+                side_effect=stalled_stream,
+            ):
+                lines = [
+                    line async for line in _stream_response("id-1", "RAG_KB/col", [])
+                ]
+        finally:
+            deadline_ctx.reset(token)
+
+        finish = json.loads(lines[-2][6:])
+        assert finish["choices"][0]["finish_reason"] == "length"
+        assert finish["degradations"] == ["generation_truncated"]
+        assert cancels[0].is_set()
+
+
 # ===================================================================
 # 5. Integration / end-to-end flow tests
 # ===================================================================
@@ -706,7 +738,7 @@ class TestEndToEndFlow:
         search_results = _make_search_results(2)
         captured_messages = []
 
-        async def capture_generate(messages):
+        async def capture_generate(messages, cancel=None):
             captured_messages.extend(messages)
             return "Answer with context"
 
@@ -953,7 +985,7 @@ class TestOpenWebUIReranking:
     def test_reranking_enabled_streaming(self, client: TestClient):
         """Streaming with OPENWEBUI_RERANKING_ENABLED=True also passes rerank=True."""
 
-        async def fake_generate_stream(messages):
+        async def fake_generate_stream(messages, cancel=None):
             q: asyncio.Queue[str | None] = asyncio.Queue()
             q.put_nowait("token")
             q.put_nowait(None)
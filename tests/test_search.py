@@ -5,10 +5,13 @@ Covers:
 - Public search service (dense, sparse, hybrid dispatching)
 - API endpoint integration via TestClient
 - Edge cases: empty results, validation errors, bad search_type
-- Concurrency: verify async offloading via run_in_executor
+- Concurrency: searches await the async Milvus repository
 """
 
 import asyncio
+import threading
+import time
+from contextlib import nullcontext
 from datetime import datetime, timezone
 from unittest.mock import patch, MagicMock, AsyncMock
 
@@ -145,6 +148,107 @@ class TestEmbedQuery:
         doc_client.embed_documents.assert_called_once()
 
 
+class TestQueryEmbeddingCache:
+    """Two-tier (in-process LRU + Redis) cache in front of embed_query."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_query_hits_local_tier(self):
+        from app.services.internal.embed import embed_query, get_query_cache_stats
+
+        with patch(
+            "app.services.internal.embed._embed_query_sync",
+            return_value=[0.3] * 768,
+        ) as mock_sync:
+            first = await embed_query("what is milvus?")
+            # Whitespace variants normalize to the same key.
+            second = await embed_query("  what   is milvus? ")
+
+        assert first == second
+        mock_sync.assert_called_once()
+        stats = get_query_cache_stats()["local"]
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_cache_key_includes_model_dim_and_task(self):
+        from app.services.internal.embed import _query_cache_key
+
+        key = _query_cache_key("q")
+        with patch("app.services.internal.embed.settings") as mock_settings:
+            mock_settings.EMBEDDING_MODEL = "other-model"
+            mock_settings.EMBEDDING_DIM = 768
+            other = _query_cache_key("q")
+
+        assert key != other
+        assert "RETRIEVAL_QUERY" in key
+
+    @pytest.mark.asyncio
+    async def test_redis_tier_hit_skips_api(self, monkeypatch):
+        from app.core.config import settings
+        from app.services.internal.embed import embed_query
+
+        monkeypatch.setattr(settings, "QUERY_EMBEDDING_CACHE_REDIS_ENABLED", True)
+        with (
+            patch(
+                "app.services.internal.embed.get_vector",
+                return_value=[0.25] * 768,
+            ) as mock_get,
+            patch("app.services.internal.embed._embed_query_sync") as mock_sync,
+        ):
+            result = await embed_query("shared across workers")
+
+        mock_get.assert_called_once()
+        mock_sync.assert_not_called()
+        assert result == [0.25] * 768
+
+    @pytest.mark.asyncio
+    async def test_redis_miss_writes_back(self, monkeypatch):
+        from app.core.config import settings
+        from app.services.internal.embed import embed_query
+
+        monkeypatch.setattr(settings, "QUERY_EMBEDDING_CACHE_REDIS_ENABLED", True)
+        with (
+            patch("app.services.internal.embed.get_vector", return_value=None),
+            patch("app.services.internal.embed.set_vector") as mock_set,
+            patch(
+                "app.services.internal.embed._embed_query_sync",
+                return_value=[0.5] * 768,
+            ),
+        ):
+            await embed_query("fresh query")
+            await asyncio.sleep(0.05)  # let the fire-and-forget write run
+
+        mock_set.assert_called_once()
+        assert mock_set.call_args.args[1] == [0.5] * 768
+
+    def test_vector_packing_roundtrip(self):
+        from app.repositories.redis.vector_cache import pack_vector, unpack_vector
+
+        vec = [0.5, -1.25, 3.0]
+        raw = pack_vector(vec)
+        assert len(raw) == 4 * len(vec)
+        assert unpack_vector(raw) == vec
+
+    def test_lru_evicts_and_expires(self):
+        from app.core.cache import LRUCache
+
+        cache = LRUCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" becomes least recently used
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.stats.evictions == 1
+
+        expiring = LRUCache(ttl_sec=0.01)
+        expiring.set("k", "v")
+        import time
+
+        time.sleep(0.02)
+        assert expiring.get("k") is None
+        assert expiring.stats.expirations == 1
+
+
 # ===================================================================
 # 2. Public search service tests
 # ===================================================================
@@ -155,7 +259,7 @@ class TestSearchDocumentsService:
 
     @pytest.mark.asyncio
     async def test_dense_search(self):
-        """Dense search: embeds query, then runs dense_search in executor."""
+        """Dense search: embeds query, then awaits dense_search."""
         from app.services.public.search import search_documents
 
         hits = _make_search_hits(3)
@@ -168,6 +272,7 @@ class TestSearchDocumentsService:
             ) as mock_embed,
             patch(
                 "app.services.public.search.dense_search",
+                new_callable=AsyncMock,
                 return_value=[hits],  # batched: outer list per-query
             ) as mock_dense,
         ):
@@ -201,6 +306,7 @@ class TestSearchDocumentsService:
             ) as mock_embed,
             patch(
                 "app.services.public.search.sparse_search",
+                new_callable=AsyncMock,
                 return_value=[hits],
             ) as mock_sparse,
         ):
@@ -231,6 +337,7 @@ class TestSearchDocumentsService:
             ) as mock_embed,
             patch(
                 "app.services.public.search.hybrid_search",
+                new_callable=AsyncMock,
                 return_value=[hits],
             ) as mock_hybrid,
         ):
@@ -258,6 +365,7 @@ class TestSearchDocumentsService:
             ),
             patch(
                 "app.services.public.search.dense_search",
+                new_callable=AsyncMock,
                 return_value=[[]],  # empty batch
             ),
         ):
@@ -290,6 +398,7 @@ class TestSearchDocumentsService:
             ),
             patch(
                 "app.services.public.search.dense_search",
+                new_callable=AsyncMock,
                 return_value=[hits],
             ),
         ):
@@ -323,6 +432,7 @@ class TestSearchDocumentsService:
             ),
             patch(
                 "app.services.public.search.dense_search",
+                new_callable=AsyncMock,
                 return_value=[hits],
             ),
         ):
@@ -347,6 +457,7 @@ class TestSearchDocumentsService:
             ),
             patch(
                 "app.services.public.search.hybrid_search",
+                new_callable=AsyncMock,
                 return_value=[[]],
             ) as mock_hybrid,
         ):
@@ -355,6 +466,192 @@ class TestSearchDocumentsService:
         mock_hybrid.assert_called_once()
 
 
+class TestQueryEmbeddingBatching:
+    """Concurrent embed_query misses are coalesced into one batched call."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_share_one_request(self):
+        from app.services.internal.embed import embed_query
+
+        client = MagicMock()
+        client.embed_documents.side_effect = lambda texts, task_type: [
+            [float(len(t))] * 768 for t in texts
+        ]
+        queries = ["a", "bb", "ccc", "dddd"]
+        with patch(
+            "app.services.internal.embed._get_query_embedding_client",
+            return_value=client,
+        ):
+            results = await asyncio.gather(*[embed_query(q) for q in queries])
+
+        client.embed_documents.assert_called_once()
+        assert client.embed_documents.call_args.kwargs["task_type"] == "RETRIEVAL_QUERY"
+        assert [r[0] for r in results] == [1.0, 2.0, 3.0, 4.0]
+
+    @pytest.mark.asyncio
+    async def test_duplicate_texts_embedded_once(self):
+        from app.services.internal.embed import embed_query
+
+        with patch(
+            "app.services.internal.embed._embed_query_sync",
+            return_value=[0.7] * 768,
+        ) as mock_sync:
+            results = await asyncio.gather(embed_query("same"), embed_query("same"))
+
+        mock_sync.assert_called_once_with("same")
+        assert results[0] == results[1]
+
+    @pytest.mark.asyncio
+    async def test_batch_error_reaches_every_caller(self):
+        from app.services.internal.embed import embed_query
+
+        client = MagicMock()
+        client.embed_documents.side_effect = RuntimeError("quota")
+        with patch(
+            "app.services.internal.embed._get_query_embedding_client",
+            return_value=client,
+        ):
+            results = await asyncio.gather(
+                embed_query("x"), embed_query("y"), return_exceptions=True
+            )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_batcher_flushes_at_max_items(self):
+        from app.core.batching import MicroBatcher
+
+        seen: list[list[int]] = []
+
+        async def handler(items):
+            seen.append(items)
+            return [i * 2 for i in items]
+
+        batcher = MicroBatcher(handler, max_items=2, max_wait_ms=1000)
+        results = await asyncio.wait_for(
+            asyncio.gather(*[batcher.submit(i) for i in range(4)]), timeout=0.5
+        )
+
+        assert results == [0, 2, 4, 6]
+        assert seen == [[0, 1], [2, 3]]
+        assert batcher.stats.occupancy == pytest.approx(1.0)
+
+
+class TestSearchResultCache:
+    """Versioned result cache in front of search_documents."""
+
+    @pytest.fixture(autouse=True)
+    def _enable_cache(self, monkeypatch):
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "SEARCH_CACHE_ENABLED", True)
+        self.version = 0
+        monkeypatch.setattr(
+            "app.services.internal.search_cache.get_collection_version",
+            lambda name: self.version,
+        )
+
+    async def _search(self, mock_dense, query="cached query"):
+        from app.services.public.search import search_documents
+
+        with (
+            patch(
+                "app.services.public.search.embed_query",
+                new_callable=AsyncMock,
+                return_value=FAKE_QUERY_VECTOR,
+            ),
+            patch("app.services.public.search.dense_search", mock_dense),
+        ):
+            return await search_documents(
+                query=query, collection_name="col", search_type="dense", top_k=3
+            )
+
+    @pytest.mark.asyncio
+    async def test_identical_query_served_from_cache(self):
+        from app.services.internal.search_cache import get_search_cache_stats
+
+        mock_dense = AsyncMock(return_value=[_make_search_hits(3)])
+        first = await self._search(mock_dense)
+        second = await self._search(mock_dense)
+
+        assert mock_dense.call_count == 1
+        assert [r.doc_id for r in first] == [r.doc_id for r in second]
+        stats = get_search_cache_stats()["collections"]["col"]
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == pytest.approx(0.5)
+
+    @pytest.mark.asyncio
+    async def test_version_bump_invalidates(self):
+        mock_dense = AsyncMock(return_value=[_make_search_hits(3)])
+        await self._search(mock_dense)
+        self.version += 1  # e.g. upsert_documents ran
+        await self._search(mock_dense)
+
+        assert mock_dense.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_different_params_are_distinct_entries(self):
+        mock_dense = AsyncMock(return_value=[_make_search_hits(3)])
+        await self._search(mock_dense, query="first")
+        await self._search(mock_dense, query="second")
+
+        assert mock_dense.call_count == 2
+
+    def test_lru_bounded_by_bytes(self):
+        from app.core.cache import LRUCache
+
+        cache = LRUCache(max_bytes=10, sizeof=lambda v: v[1])
+        cache.set("a", ("x", 6))
+        cache.set("b", ("y", 6))
+        assert cache.get("a") is None
+        assert cache.size_bytes == 6
+
+    def test_storage_writes_bump_version(self):
+        from app.repositories.milvus import storage
+
+        client = MagicMock()
+        client.has_collection.return_value = True
+        client.delete.return_value = {"delete_count": 1}
+        with (
+            patch.object(storage, "write_client", return_value=nullcontext(client)),
+            patch.object(storage, "bump_collection_version") as mock_bump,
+        ):
+            storage.delete_documents([1], "col")
+
+        mock_bump.assert_called_once_with("col")
+
+    def test_other_workers_bump_is_seen_at_once(self, monkeypatch):
+        """Without memoization every lookup reads the shared counter."""
+        from app.repositories.redis import collection_version as cv
+
+        client = MagicMock()
+        client.get.return_value = "1"
+        with patch.object(cv, "get_redis_client", return_value=client):
+            assert cv.get_collection_version("col") == 1
+            client.get.return_value = "2"  # another worker wrote
+            assert cv.get_collection_version("col") == 2
+
+            monkeypatch.setattr(cv.settings, "COLLECTION_VERSION_REFRESH_SEC", 60.0)
+            assert cv.get_collection_version("col") == 2
+            client.get.return_value = "3"
+            assert cv.get_collection_version("col") == 2  # bounded staleness
+
+    def test_local_version_fallback_when_redis_down(self):
+        import redis as redis_lib
+
+        from app.repositories.redis import collection_version as cv
+
+        broken = MagicMock()
+        broken.incr.side_effect = redis_lib.ConnectionError("down")
+        broken.get.side_effect = redis_lib.ConnectionError("down")
+        with patch.object(cv, "get_redis_client", return_value=broken):
+            assert cv.bump_collection_version("col") == 1
+            assert cv.bump_collection_version("col") == 2
+            cv._memo.clear()
+            assert cv.get_collection_version("col") == 2
+
+
 # ===================================================================
 # 3. _doc_to_result helper unit tests
 # ===================================================================
@@ -407,6 +704,360 @@ class TestDocToResult:
         assert result.metadata == {"key": "value", "num": 42}
 
 
+class TestMilvusSearchProjection:
+    """Search hits project only the fields SearchResult needs (no vectors)."""
+
+    def test_default_projection_excludes_vectors(self):
+        from app.repositories.milvus import search as milvus_search
+
+        client = MagicMock()
+        client.has_collection.return_value = True
+        client.search.return_value = [[{"id": 7, "entity": {"text": "t"}}]]
+        with patch.object(
+            milvus_search, "read_client", return_value=nullcontext(client)
+        ):
+            milvus_search.dense_search([FAKE_QUERY_VECTOR], "col", top_k=1)
+
+        fields = client.search.call_args.kwargs["output_fields"]
+        assert "dense_vector" not in fields
+        assert set(fields) == {"title", "text", "metadata"}
+
+    def test_output_fields_override(self):
+        from app.repositories.milvus import search as milvus_search
+
+        client = MagicMock()
+        client.has_collection.return_value = True
+        client.search.return_value = [[]]
+        with patch.object(
+            milvus_search, "read_client", return_value=nullcontext(client)
+        ):
+            milvus_search.sparse_search(
+                ["q"], "col", output_fields=milvus_search.ALL_SCALAR_FIELDS
+            )
+
+        fields = client.search.call_args.kwargs["output_fields"]
+        assert "created_at" in fields and "tags" in fields
+
+    def test_lean_decode_builds_document(self):
+        from app.repositories.milvus.search import _hit_to_document
+
+        doc, score = _hit_to_document(
+            {
+                "id": "42",
+                "distance": 0.5,
+                "entity": {
+                    "text": "hello",
+                    "title": "",
+                    "metadata": {"source": "a.txt"},
+                    "created_at": "2025-01-01T00:00:00Z",
+                },
+            },
+            include_score=True,
+        )
+
+        assert isinstance(doc, Document)
+        assert doc.doc_id == 42
+        assert doc.title == "untitled"
+        assert doc.metadata == {"source": "a.txt"}
+        assert doc.created_at == datetime(2025, 1, 1, tzinfo=timezone.utc)
+        assert doc.dense_vector is None
+        assert score == 0.5
+
+
+class TestCollectionRegistry:
+    """has_collection/load_collection are cached between searches."""
+
+    @staticmethod
+    def _client():
+        client = MagicMock()
+        client.has_collection.return_value = True
+        client.search.return_value = [[]]
+        return client
+
+    def test_state_cached_across_searches(self):
+        from app.repositories.milvus import search as milvus_search
+
+        client = self._client()
+        with patch.object(
+            milvus_search, "read_client", return_value=nullcontext(client)
+        ):
+            for _ in range(3):
+                milvus_search.dense_search([FAKE_QUERY_VECTOR], "col")
+
+        client.has_collection.assert_called_once_with("col")
+        client.load_collection.assert_called_once_with("col")
+        assert client.search.call_count == 3
+
+    def test_missing_collection_not_cached(self):
+        from app.repositories.milvus import search as milvus_search
+
+        client = self._client()
+        client.has_collection.return_value = False
+        with patch.object(
+            milvus_search, "read_client", return_value=nullcontext(client)
+        ):
+            milvus_search.sparse_search(["q"], "col")
+            milvus_search.sparse_search(["q"], "col")
+
+        assert client.has_collection.call_count == 2
+        client.search.assert_not_called()
+
+    def test_not_loaded_error_reloads_and_retries_once(self):
+        from pymilvus import MilvusException
+
+        from app.repositories.milvus import search as milvus_search
+
+        client = self._client()
+        client.search.side_effect = [
+            MilvusException(code=101, message="collection not loaded"),
+            [[]],
+        ]
+        with patch.object(
+            milvus_search, "read_client", return_value=nullcontext(client)
+        ):
+            assert milvus_search.dense_search([FAKE_QUERY_VECTOR], "col") == [[]]
+
+        assert client.search.call_count == 2
+        assert client.load_collection.call_count == 2  # initial + reload
+
+    def test_collection_dropped_elsewhere_returns_empty(self):
+        from pymilvus import MilvusException
+
+        from app.repositories.milvus import search as milvus_search
+
+        client = self._client()
+        with patch.object(
+            milvus_search, "read_client", return_value=nullcontext(client)
+        ):
+            milvus_search.dense_search([FAKE_QUERY_VECTOR], "col")  # cached
+            client.search.side_effect = MilvusException(
+                code=100, message="collection not found[collection=col]"
+            )
+            assert milvus_search.dense_search([FAKE_QUERY_VECTOR], "col") == [[]]
+
+            client.has_collection.return_value = False
+            assert milvus_search.sparse_search(["q"], "col") == [[]]
+
+        # The stale entry was dropped: the next search asked the server again.
+        assert client.has_collection.call_count == 2
+        assert client.search.call_count == 2
+
+    def test_collection_dropped_before_load_returns_empty(self):
+        from pymilvus import MilvusException
+
+        from app.repositories.milvus import search as milvus_search
+
+        client = self._client()
+        client.load_collection.side_effect = MilvusException(
+            code=100, message="collection not found[collection=col]"
+        )
+        with patch.object(
+            milvus_search, "read_client", return_value=nullcontext(client)
+        ):
+            assert milvus_search.dense_search([FAKE_QUERY_VECTOR], "col") == [[]]
+            client.has_collection.return_value = False
+            assert milvus_search.hybrid_search(
+                [FAKE_QUERY_VECTOR], ["q"], "col"
+            ) == [[]]
+
+        assert client.has_collection.call_count == 2
+        client.search.assert_not_called()
+        client.hybrid_search.assert_not_called()
+
+    def test_drop_invalidates(self):
+        from app.repositories.milvus import _collection, _registry
+
+        client = self._client()
+        with (
+            patch.object(_collection, "write_client", return_value=nullcontext(client)),
+            patch.object(_collection, "bump_collection_version"),
+        ):
+            _registry.ensure_loaded(client, "col")
+            _collection.delete_collection("col")
+            client.has_collection.return_value = False
+            assert _registry.has_collection(client, "col") is False
+
+
+class TestAsyncMilvusRepository:
+    """repositories.milvus.aio awaits AsyncMilvusClient directly."""
+
+    @staticmethod
+    def _client():
+        client = MagicMock()
+        client.has_collection = AsyncMock(return_value=True)
+        client.load_collection = AsyncMock()
+        client.search = AsyncMock(return_value=[[{"id": 1, "entity": {"text": "t"}}]])
+        client.upsert = AsyncMock(return_value={"upsert_count": 1})
+        client.delete = AsyncMock(return_value={"delete_count": 2})
+        client.flush = AsyncMock()
+        return client
+
+    @pytest.mark.asyncio
+    async def test_dense_search_awaits_client(self):
+        from app.repositories.milvus.aio import search as aio_search
+
+        client = self._client()
+        with patch.object(aio_search, "get_async_client", return_value=client):
+            first = await aio_search.dense_search([FAKE_QUERY_VECTOR], "col")
+            await aio_search.dense_search([FAKE_QUERY_VECTOR], "col")
+
+        assert first[0][0][0].doc_id == 1
+        assert client.search.await_count == 2
+        client.has_collection.assert_awaited_once_with("col")  # registry-cached
+        client.load_collection.assert_awaited_once_with("col")
+
+    @pytest.mark.asyncio
+    async def test_missing_collection_returns_empty_batches(self):
+        from app.repositories.milvus.aio import search as aio_search
+
+        client = self._client()
+        client.has_collection.return_value = False
+        with patch.object(aio_search, "get_async_client", return_value=client):
+            result = await aio_search.hybrid_search(
+                [FAKE_QUERY_VECTOR], ["q"], "col"
+            )
+
+        assert result == [[]]
+        client.search.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_collection_dropped_elsewhere_returns_empty(self):
+        from pymilvus import MilvusException
+
+        from app.repositories.milvus.aio import search as aio_search
+
+        client = self._client()
+        client.load_collection.side_effect = MilvusException(
+            code=100, message="collection not found[collection=col]"
+        )
+        client.hybrid_search = AsyncMock()
+        with patch.object(aio_search, "get_async_client", return_value=client):
+            dense = await aio_search.dense_search([FAKE_QUERY_VECTOR], "col")
+            hybrid = await aio_search.hybrid_search(
+                [FAKE_QUERY_VECTOR], ["q"], "col"
+            )
+
+        assert dense == [[]]
+        assert hybrid == [[]]
+        # Each search found the entry dropped and asked the server again.
+        assert client.has_collection.await_count == 2
+        client.search.assert_not_awaited()
+        client.hybrid_search.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_upsert_and_delete_bump_version(self):
+        from app.repositories.milvus.aio import storage as aio_storage
+
+        client = self._client()
+        with (
+            patch.object(aio_storage, "get_async_client", return_value=client),
+            patch.object(aio_storage, "bump_collection_version") as mock_bump,
+        ):
+            await aio_storage.upsert_documents([_make_document()], "col")
+            deleted = await aio_storage.delete_documents([1, 2], "col")
+
+        client.upsert.assert_awaited_once()
+        assert client.flush.await_count == 2
+        assert deleted == 2
+        assert mock_bump.call_count == 2
+
+
+class TestMilvusClientPool:
+    """Pooled dedicated connections: occupancy, wait stats, reconnects."""
+
+    @staticmethod
+    def _pool(size=2, **kwargs):
+        from app.repositories.milvus._client import MilvusClientPool
+
+        kwargs.setdefault("acquire_timeout", 1.0)
+        kwargs.setdefault("healthcheck_sec", 0)
+        return MilvusClientPool("test", size, factory=MagicMock, **kwargs)
+
+    def test_connections_created_lazily_and_reused(self):
+        pool = self._pool(size=2)
+        with pool.client() as first:
+            pass
+        with pool.client() as second:
+            pass
+
+        assert first is second
+        stats = pool.stats.as_dict()
+        assert stats["connects"] == 1
+        assert stats["acquisitions"] == 2
+        assert stats["in_use"] == 0
+
+    def test_occupancy_and_exhaustion(self):
+        pool = self._pool(size=1, acquire_timeout=0.05)
+        with pool.client():
+            assert pool.stats.as_dict()["occupancy"] == 1.0
+            with pytest.raises(TimeoutError):
+                with pool.client():
+                    pass
+
+        stats = pool.stats.as_dict()
+        assert stats["timeouts"] == 1
+        assert stats["peak_in_use"] == 1
+
+    def test_waiter_gets_released_connection(self):
+        pool = self._pool(size=1)
+        released = threading.Event()
+
+        def holder():
+            with pool.client():
+                released.wait(1)
+
+        t = threading.Thread(target=holder)
+        t.start()
+        threading.Timer(0.05, released.set).start()
+        while pool.stats.in_use == 0:
+            pass
+        with pool.client():
+            pass
+        t.join()
+
+        assert pool.stats.wait_ms_max > 0
+        assert pool.stats.acquisitions == 2
+
+    def test_connection_error_discards_and_reconnects(self):
+        from pymilvus.exceptions import MilvusUnavailableException
+
+        pool = self._pool(size=1)
+        with pytest.raises(MilvusUnavailableException):
+            with pool.client() as broken:
+                raise MilvusUnavailableException(message="down")
+        with pool.client() as fresh:
+            pass
+
+        broken.close.assert_called_once()
+        assert fresh is not broken
+        assert pool.stats.reconnects == 1
+
+    def test_failed_health_check_reconnects(self):
+        pool = self._pool(size=1, healthcheck_sec=0.001)
+        with pool.client() as stale:
+            stale.get_server_version.side_effect = RuntimeError("gone")
+        time.sleep(0.01)
+        with pool.client() as fresh:
+            pass
+
+        assert fresh is not stale
+        stale.close.assert_called_once()
+
+    def test_reads_and_writes_use_separate_pools(self):
+        from app.repositories.milvus import _client
+
+        _client._get_pool.cache_clear()
+        try:
+            with patch.object(_client, "MilvusClient"):
+                with _client.read_client(), _client.write_client():
+                    stats = _client.get_pool_stats()
+        finally:
+            _client._get_pool.cache_clear()
+
+        assert stats["read"]["in_use"] == 1
+        assert stats["write"]["in_use"] == 1
+
+
 # ===================================================================
 # 4. Schema validation tests
 # ===================================================================
@@ -740,10 +1391,11 @@ class TestSearchWithReranking:
             ),
             patch(
                 "app.services.public.search.dense_search",
+                new_callable=AsyncMock,
                 return_value=[hits],
             ) as mock_dense,
             patch(
-                "app.services.public.search._rerank_sync",
+                "app.services.internal.rerank.rerank",
                 return_value=[[(0, 0.95), (2, 0.90), (4, 0.85), (1, 0.80), (3, 0.75)]],
             ) as mock_rerank,
             patch(
@@ -783,10 +1435,11 @@ class TestSearchWithReranking:
             ),
             patch(
                 "app.services.public.search.sparse_search",
+                new_callable=AsyncMock,
                 return_value=[hits],
             ) as mock_sparse,
             patch(
-                "app.services.public.search._rerank_sync",
+                "app.services.internal.rerank.rerank",
                 return_value=[[(0, 0.9), (1, 0.8), (2, 0.7)]],
             ),
             patch(
@@ -822,10 +1475,11 @@ class TestSearchWithReranking:
             ),
             patch(
                 "app.services.public.search.hybrid_search",
+                new_callable=AsyncMock,
                 return_value=[hits],
             ) as mock_hybrid,
             patch(
-                "app.services.public.search._rerank_sync",
+                "app.services.internal.rerank.rerank",
                 return_value=[[(0, 0.9), (1, 0.8), (2, 0.7), (3, 0.6)]],
             ),
             patch(
@@ -862,10 +1516,11 @@ class TestSearchWithReranking:
             ),
             patch(
                 "app.services.public.search.dense_search",
+                new_callable=AsyncMock,
                 return_value=[hits],
             ),
             patch(
-                "app.services.public.search._rerank_sync",
+                "app.services.internal.rerank.rerank",
                 return_value=rerank_output,
             ),
             patch(
@@ -904,10 +1559,11 @@ class TestSearchWithReranking:
             ),
             patch(
                 "app.services.public.search.dense_search",
+                new_callable=AsyncMock,
                 return_value=[hits],
             ) as mock_dense,
             patch(
-                "app.services.public.search._rerank_sync",
+                "app.services.internal.rerank.rerank",
             ) as mock_rerank,
         ):
             results = await search_documents(
@@ -934,10 +1590,11 @@ class TestSearchWithReranking:
             ),
             patch(
                 "app.services.public.search.dense_search",
+                new_callable=AsyncMock,
                 return_value=[[]],
             ),
             patch(
-                "app.services.public.search._rerank_sync",
+                "app.services.internal.rerank.rerank",
             ) as mock_rerank,
             patch(
                 "app.services.public.search.settings",
@@ -1002,81 +1659,331 @@ class TestSearchWithReranking:
         )
 
 
-class TestSearchSchemaRerank:
-    """Test the rerank field on SearchRequest schema."""
+class TestRerankScheduler:
+    """Concurrent rerank jobs share one rerank() call (one GPU lock)."""
 
-    def test_rerank_default_false(self):
-        req = SearchRequest(query="hello")
-        assert req.rerank is False
+    @pytest.mark.asyncio
+    async def test_concurrent_jobs_packed_into_one_call(self):
+        from app.services.internal.rerank import get_rerank_batch_stats, rerank_async
 
-    def test_rerank_true(self):
-        req = SearchRequest(query="hello", rerank=True)
-        assert req.rerank is True
+        def fake_rerank(queries, candidate_lists, batch_size=32):
+            return [
+                [(i, float(len(c))) for i, c in enumerate(cands)]
+                for cands in candidate_lists
+            ]
 
-    def test_rerank_false_explicit(self):
-        req = SearchRequest(query="hello", rerank=False)
-        assert req.rerank is False
+        with patch(
+            "app.services.internal.rerank.rerank", side_effect=fake_rerank
+        ) as mock_rerank:
+            first, second = await asyncio.gather(
+                rerank_async("q1", ["a", "bb"]),
+                rerank_async("q2", ["ccc"]),
+            )
 
+        mock_rerank.assert_called_once()
+        queries, candidate_lists = mock_rerank.call_args.args[:2]
+        assert queries == ["q1", "q2"]
+        assert candidate_lists == [["a", "bb"], ["ccc"]]
+        assert first == [(0, 1.0), (1, 2.0)]
+        assert second == [(0, 3.0)]
+        assert get_rerank_batch_stats()["weight"] >= 3
 
-# ===================================================================
-# 6. Concurrency tests
-# ===================================================================
+    def test_score_pairs_splits_and_sorts_per_query(self):
+        from app.services.internal.rerank import _score_pairs
 
+        model = MagicMock()
+        model.predict.return_value = [0.1, 0.9, 0.5, 0.2]
 
-class TestSearchConcurrency:
-    """Verify the search pipeline doesn't block the event loop."""
+        rankings = _score_pairs(model, ["q1", "q2"], [["a", "b"], ["c", "d"]])
+
+        model.predict.assert_called_once()
+        assert len(model.predict.call_args.args[0]) == 4
+        assert rankings == [[(1, 0.9), (0, 0.1)], [(0, 0.5), (1, 0.2)]]
 
     @pytest.mark.asyncio
-    async def test_dense_search_uses_executor(self):
-        """Dense search should call run_in_executor for the Milvus query."""
-        from app.services.public.search import search_documents
+    async def test_empty_candidates_skip_scheduler(self):
+        from app.services.internal.rerank import rerank_async
 
-        hits = _make_search_hits(1)
+        with patch("app.services.internal.rerank.rerank") as mock_rerank:
+            assert await rerank_async("q", []) == []
+        mock_rerank.assert_not_called()
 
-        with (
-            patch(
-                "app.services.public.search.embed_query",
-                new_callable=AsyncMock,
-                return_value=FAKE_QUERY_VECTOR,
-            ),
-            patch(
-                "app.services.public.search.dense_search",
-                return_value=[hits],
-            ) as mock_dense,
-        ):
-            # Run two searches concurrently — they should not block each other
-            results = await asyncio.gather(
-                search_documents("q1", "col", search_type="dense", top_k=5),
-                search_documents("q2", "col", search_type="dense", top_k=5),
-            )
 
-        assert len(results) == 2
-        assert len(results[0]) == 1
-        assert len(results[1]) == 1
-        # dense_search was called twice (once per query)
-        assert mock_dense.call_count == 2
+class TestRerankScoreCache:
+    """Only uncached (query, doc_id) pairs reach the cross-encoder."""
 
-    @pytest.mark.asyncio
-    async def test_sparse_search_does_not_embed(self):
-        """Sparse search should never call embed_query."""
-        from app.services.public.search import search_documents
+    @pytest.fixture(autouse=True)
+    def _enable_cache(self, monkeypatch):
+        from app.core.config import settings
 
-        with (
-            patch(
-                "app.services.public.search.embed_query",
-                new_callable=AsyncMock,
-            ) as mock_embed,
-            patch(
-                "app.services.public.search.sparse_search",
-                return_value=[[]],
-            ),
-        ):
-            await search_documents("q", "col", search_type="sparse")
+        monkeypatch.setattr(settings, "RERANK_SCORE_CACHE_ENABLED", True)
+        self.version = 0
+        monkeypatch.setattr(
+            "app.services.internal.rerank_cache.get_collection_version",
+            lambda name: self.version,
+        )
 
-        mock_embed.assert_not_awaited()
+    @staticmethod
+    def _fake_rerank(queries, candidate_lists, batch_size=32):
+        # score = candidate length, so order is deterministic
+        return [
+            sorted(
+                ((i, float(len(c))) for i, c in enumerate(cands)),
+                key=lambda x: x[1],
+                reverse=True,
+            )
+            for cands in candidate_lists
+        ]
 
     @pytest.mark.asyncio
-    async def test_hybrid_search_embeds_then_searches(self):
+    async def test_only_uncached_pairs_scored_and_merged_in_order(self):
+        from app.services.internal.rerank_cache import (
+            get_rerank_cache_stats,
+            rerank_cached,
+        )
+
+        with patch(
+            "app.services.internal.rerank.rerank", side_effect=self._fake_rerank
+        ) as mock_rerank:
+            await rerank_cached("col", "q", [1, 2], ["aa", "b"])
+            ranking = await rerank_cached("col", "q", [3, 1, 2], ["cccc", "aa", "b"])
+
+        assert mock_rerank.call_count == 2
+        assert mock_rerank.call_args.args[1] == [["cccc"]]
+        assert ranking == [(0, 4.0), (1, 2.0), (2, 1.0)]
+        assert get_rerank_cache_stats()["hits"] == 2
+
+    @pytest.mark.asyncio
+    async def test_normalized_query_shares_scores(self):
+        from app.services.internal.rerank_cache import rerank_cached
+
+        with patch(
+            "app.services.internal.rerank.rerank", side_effect=self._fake_rerank
+        ) as mock_rerank:
+            await rerank_cached("col", "hello  world", [1], ["a"])
+            await rerank_cached("col", " hello world ", [1], ["a"])
+
+        mock_rerank.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_version_bump_rescores(self):
+        from app.services.internal.rerank_cache import rerank_cached
+
+        with patch(
+            "app.services.internal.rerank.rerank", side_effect=self._fake_rerank
+        ) as mock_rerank:
+            await rerank_cached("col", "q", [1], ["a"])
+            self.version += 1  # chunk re-ingested
+            await rerank_cached("col", "q", [1], ["a"])
+
+        assert mock_rerank.call_count == 2
+
+
+class TestRerankBackend:
+    """RERANKER_BACKEND selects the model loader and GPU handling."""
+
+    def test_onnx_backend_loads_quantized_export(self):
+        from app.services.internal.rerank import load_model
+
+        with patch(
+            "app.services.internal.rerank._load_onnx_int8"
+        ) as mock_onnx, patch("app.services.internal.rerank.CrossEncoder") as mock_ce:
+            model = load_model("onnx-int8")
+
+        mock_onnx.assert_called_once()
+        mock_ce.assert_not_called()
+        assert model is mock_onnx.return_value
+
+    def test_torch_backend_loads_on_cpu(self):
+        """CUDA placement is left to gpu_residency, never done at load time."""
+        from app.services.internal.rerank import load_model
+
+        with patch("app.services.internal.rerank.CrossEncoder") as mock_ce:
+            load_model("torch")
+
+        assert mock_ce.call_args.kwargs["device"] == "cpu"
+
+    def test_onnx_backend_without_extra_fails_at_startup(self):
+        from app.main import create_app
+        from app.services.internal.rerank import check_backend
+
+        check_backend("torch")  # no optional packages needed
+        with (
+            patch("app.main.settings.RERANKER_BACKEND", "onnx-int8"),
+            patch("importlib.util.find_spec", return_value=None),
+        ):
+            with pytest.raises(RuntimeError, match="'onnx' extra"):
+                create_app()
+
+    def test_onnx_backend_skips_gpu_residency(self):
+        from app.services.internal.rerank import rerank
+
+        model = MagicMock()
+        model.predict.return_value = [0.2, 0.8]
+
+        with patch(
+            "app.services.internal.rerank._get_model", return_value=model
+        ), patch(
+            "app.services.internal.rerank.settings.RERANKER_BACKEND", "onnx-int8"
+        ), patch("app.services.internal.rerank.gpu_residency") as mock_gpu:
+            rankings = rerank(["q"], [["a", "b"]])
+
+        mock_gpu.use.assert_not_called()
+        model.to.assert_not_called()
+        assert rankings == [[(1, 0.8), (0, 0.2)]]
+
+
+class TestGpuResidency:
+    """Reranker/whisper residency: load once, evict on idle or contention."""
+
+    @staticmethod
+    def _manager(idle_timeout_sec: float = 60.0):
+        import threading
+        from app.core.gpu import GpuResidency
+
+        return GpuResidency(threading.Lock(), idle_timeout_sec)
+
+    def test_resident_model_is_not_reloaded(self):
+        gpu = self._manager()
+        load, unload = MagicMock(), MagicMock()
+
+        for _ in range(3):
+            with gpu.use("reranker", load=load, unload=unload):
+                pass
+
+        load.assert_called_once()
+        unload.assert_not_called()
+        assert gpu.resident == "reranker"
+        gpu.evict()
+        unload.assert_called_once()
+
+    def test_other_owner_preempts_resident(self):
+        gpu = self._manager()
+        calls = []
+
+        with gpu.use(
+            "reranker",
+            load=lambda: calls.append("load-reranker"),
+            unload=lambda: calls.append("unload-reranker"),
+        ):
+            pass
+        with gpu.use(
+            "whisper",
+            load=lambda: calls.append("load-whisper"),
+            unload=lambda: calls.append("unload-whisper"),
+        ):
+            pass
+
+        assert calls == ["load-reranker", "unload-reranker", "load-whisper"]
+        assert gpu.snapshot()["evictions_preempted"] == 1
+        gpu.evict()
+
+    def test_zero_timeout_unloads_after_every_call(self):
+        gpu = self._manager(idle_timeout_sec=0)
+        load, unload = MagicMock(), MagicMock()
+
+        for _ in range(2):
+            with gpu.use("reranker", load=load, unload=unload):
+                pass
+
+        assert load.call_count == 2
+        assert unload.call_count == 2
+        assert gpu.resident is None
+
+    def test_idle_timer_evicts(self):
+        import time
+
+        gpu = self._manager(idle_timeout_sec=0.05)
+        unload = MagicMock()
+
+        with gpu.use("reranker", load=MagicMock(), unload=unload):
+            pass
+
+        deadline = time.monotonic() + 2.0
+        while gpu.resident is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        unload.assert_called_once()
+        assert gpu.snapshot()["evictions_idle"] == 1
+
+
+class TestSearchSchemaRerank:
+    """Test the rerank field on SearchRequest schema."""
+
+    def test_rerank_default_false(self):
+        req = SearchRequest(query="hello")
+        assert req.rerank is False
+
+    def test_rerank_true(self):
+        req = SearchRequest(query="hello", rerank=True)
+        assert req.rerank is True
+
+    def test_rerank_false_explicit(self):
+        req = SearchRequest(query="hello", rerank=False)
+        assert req.rerank is False
+
+
+# ===================================================================
+# 6. Concurrency tests
+# ===================================================================
+
+
+class TestSearchConcurrency:
+    """Verify the search pipeline doesn't block the event loop."""
+
+    @pytest.mark.asyncio
+    async def test_dense_searches_run_concurrently(self):
+        """Concurrent dense searches each await the async Milvus repository."""
+        from app.services.public.search import search_documents
+
+        hits = _make_search_hits(1)
+
+        with (
+            patch(
+                "app.services.public.search.embed_query",
+                new_callable=AsyncMock,
+                return_value=FAKE_QUERY_VECTOR,
+            ),
+            patch(
+                "app.services.public.search.dense_search",
+                new_callable=AsyncMock,
+                return_value=[hits],
+            ) as mock_dense,
+        ):
+            # Run two searches concurrently — they should not block each other
+            results = await asyncio.gather(
+                search_documents("q1", "col", search_type="dense", top_k=5),
+                search_documents("q2", "col", search_type="dense", top_k=5),
+            )
+
+        assert len(results) == 2
+        assert len(results[0]) == 1
+        assert len(results[1]) == 1
+        # dense_search was awaited twice (once per query)
+        assert mock_dense.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_sparse_search_does_not_embed(self):
+        """Sparse search should never call embed_query."""
+        from app.services.public.search import search_documents
+
+        with (
+            patch(
+                "app.services.public.search.embed_query",
+                new_callable=AsyncMock,
+            ) as mock_embed,
+            patch(
+                "app.services.public.search.sparse_search",
+                new_callable=AsyncMock,
+                return_value=[[]],
+            ),
+        ):
+            await search_documents("q", "col", search_type="sparse")
+
+        mock_embed.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_hybrid_search_embeds_then_searches(self):
         """Hybrid search should embed query first, then search with both inputs."""
         from app.services.public.search import search_documents
 
@@ -1097,6 +2004,7 @@ class TestSearchConcurrency:
             ),
             patch(
                 "app.services.public.search.hybrid_search",
+                new_callable=AsyncMock,
                 side_effect=mock_hybrid,
             ),
         ):
@@ -1113,82 +2021,1082 @@ class TestSearchConcurrency:
 
 
 class TestSearchDispatchers:
-    """Test the sync dispatcher wrappers in public/search.py."""
+    """Test the async dispatcher wrappers in public/search.py."""
 
-    def test_run_dense_search_extracts_first_batch(self):
+    @pytest.mark.asyncio
+    async def test_run_dense_search_extracts_first_batch(self):
         """_run_dense_search calls dense_search and returns batched[0]."""
         from app.services.public.search import _run_dense_search
 
         hits = _make_search_hits(2)
         with patch(
             "app.services.public.search.dense_search",
+            new_callable=AsyncMock,
             return_value=[hits],
         ) as mock:
-            result = _run_dense_search(FAKE_QUERY_VECTOR, "col", 5)
+            result = await _run_dense_search(FAKE_QUERY_VECTOR, "col", 5)
 
         assert len(result) == 2
-        mock.assert_called_once_with([FAKE_QUERY_VECTOR], "col", top_k=5)
+        mock.assert_awaited_once_with([FAKE_QUERY_VECTOR], "col", top_k=5)
 
-    def test_run_dense_search_empty_batched(self):
+    @pytest.mark.asyncio
+    async def test_run_dense_search_empty_batched(self):
         """_run_dense_search returns [] when dense_search returns empty."""
         from app.services.public.search import _run_dense_search
 
         with patch(
             "app.services.public.search.dense_search",
+            new_callable=AsyncMock,
             return_value=[],
         ):
-            result = _run_dense_search(FAKE_QUERY_VECTOR, "col", 5)
+            result = await _run_dense_search(FAKE_QUERY_VECTOR, "col", 5)
 
         assert result == []
 
-    def test_run_sparse_search_extracts_first_batch(self):
+    @pytest.mark.asyncio
+    async def test_run_sparse_search_extracts_first_batch(self):
         """_run_sparse_search calls sparse_search and returns batched[0]."""
         from app.services.public.search import _run_sparse_search
 
         hits = _make_search_hits(1)
         with patch(
             "app.services.public.search.sparse_search",
+            new_callable=AsyncMock,
             return_value=[hits],
         ) as mock:
-            result = _run_sparse_search("query text", "col", 10)
+            result = await _run_sparse_search("query text", "col", 10)
 
         assert len(result) == 1
-        mock.assert_called_once_with(["query text"], "col", top_k=10)
+        mock.assert_awaited_once_with(["query text"], "col", top_k=10)
 
-    def test_run_sparse_search_empty_batched(self):
+    @pytest.mark.asyncio
+    async def test_run_sparse_search_empty_batched(self):
         from app.services.public.search import _run_sparse_search
 
         with patch(
             "app.services.public.search.sparse_search",
+            new_callable=AsyncMock,
             return_value=[],
         ):
-            result = _run_sparse_search("query", "col", 5)
+            result = await _run_sparse_search("query", "col", 5)
 
         assert result == []
 
-    def test_run_hybrid_search_extracts_first_batch(self):
+    @pytest.mark.asyncio
+    async def test_run_hybrid_search_extracts_first_batch(self):
         """_run_hybrid_search calls hybrid_search and returns batched[0]."""
         from app.services.public.search import _run_hybrid_search
 
         hits = _make_search_hits(3)
         with patch(
             "app.services.public.search.hybrid_search",
+            new_callable=AsyncMock,
             return_value=[hits],
         ) as mock:
-            result = _run_hybrid_search(FAKE_QUERY_VECTOR, "hybrid query", "col", 5)
+            result = await _run_hybrid_search(FAKE_QUERY_VECTOR, "hybrid query", "col", 5)
 
         assert len(result) == 3
-        mock.assert_called_once_with(
+        mock.assert_awaited_once_with(
             [FAKE_QUERY_VECTOR], ["hybrid query"], "col", top_k=5
         )
 
-    def test_run_hybrid_search_empty_batched(self):
+    @pytest.mark.asyncio
+    async def test_run_hybrid_search_empty_batched(self):
         from app.services.public.search import _run_hybrid_search
 
         with patch(
             "app.services.public.search.hybrid_search",
+            new_callable=AsyncMock,
             return_value=[],
         ):
-            result = _run_hybrid_search(FAKE_QUERY_VECTOR, "query", "col", 5)
+            result = await _run_hybrid_search(FAKE_QUERY_VECTOR, "query", "col", 5)
 
         assert result == []
+
+
+class TestSpeculativeHybridSearch:
+    """Client-side fusion and the speculative hybrid execution mode."""
+
+    def test_weighted_fusion_normalizes_like_milvus(self):
+        import math
+
+        from app.services.internal.fusion import fuse_hits
+
+        a, b = _make_document(doc_id=1), _make_document(doc_id=2)
+        fused = fuse_hits(
+            [(a, 0.8)],
+            [(b, 3.0), (a, 1.0)],
+            2,
+            method="weighted",
+            alpha=0.7,
+            include_score=True,
+        )
+
+        # Milvus WeightedRanker(norm_score=True): COSINE (1+x)/2, BM25 2*atan(x)/pi
+        expected_a = 0.7 * (1 + 0.8) / 2 + 0.3 * (2 * math.atan(1.0) / math.pi)
+        expected_b = 0.3 * (2 * math.atan(3.0) / math.pi)
+        assert [d.doc_id for d, _ in fused] == [1, 2]
+        assert fused[0][1] == pytest.approx(expected_a)
+        assert fused[1][1] == pytest.approx(expected_b)
+
+    def test_rrf_fusion_uses_one_based_ranks(self):
+        from app.services.internal.fusion import fuse_hits
+
+        docs = [_make_document(doc_id=i) for i in range(3)]
+        fused = fuse_hits(
+            [(docs[0], None), (docs[1], None)],
+            [(docs[1], None), (docs[2], None)],
+            top_k=2,
+            method="rrf",
+            rrf_k=2,
+            include_score=True,
+        )
+
+        assert [d.doc_id for d, _ in fused] == [1, 0]
+        assert fused[0][1] == pytest.approx(1 / 4 + 1 / 3)
+        assert fused[1][1] == pytest.approx(1 / 3)
+
+    @pytest.mark.asyncio
+    async def test_sparse_leg_overlaps_embedding(self):
+        from app.services.public.search import _run_speculative_hybrid_search
+
+        events: list[str] = []
+
+        async def fake_embed(query):
+            events.append("embed:start")
+            await asyncio.sleep(0.01)
+            events.append("embed:end")
+            return FAKE_QUERY_VECTOR
+
+        async def fake_sparse(*args, **kwargs):
+            events.append("sparse")
+            return [[(_make_document(doc_id=2), 5.0)]]
+
+        async def fake_dense(*args, **kwargs):
+            events.append("dense")
+            return [[(_make_document(doc_id=1), 0.9)]]
+
+        with (
+            patch("app.services.public.search.embed_query", side_effect=fake_embed),
+            patch("app.services.public.search.sparse_search", side_effect=fake_sparse),
+            patch("app.services.public.search.dense_search", side_effect=fake_dense),
+        ):
+            hits = await _run_speculative_hybrid_search("q", "col", 5)
+
+        assert events.index("sparse") < events.index("embed:end")
+        assert events.index("dense") > events.index("embed:end")
+        assert {d.doc_id for d, _ in hits} == {1, 2}
+
+    @pytest.mark.asyncio
+    async def test_search_documents_dispatches_on_execution_mode(self):
+        from app.core.config import settings
+        from app.services.public.search import search_documents
+
+        with (
+            patch.object(settings, "HYBRID_EXECUTION_MODE", "speculative"),
+            patch(
+                "app.services.public.search._run_speculative_hybrid_search",
+                new_callable=AsyncMock,
+                return_value=_make_search_hits(1),
+            ) as mock_spec,
+            patch(
+                "app.services.public.search.hybrid_search", new_callable=AsyncMock
+            ) as mock_server,
+        ):
+            results = await search_documents("q", "col", search_type="hybrid", top_k=3)
+
+        mock_spec.assert_awaited_once_with("q", "col", 3)
+        mock_server.assert_not_awaited()
+        assert len(results) == 1
+
+
+class TestRequestTracing:
+    """Per-stage timings: spans, batch attribution, Server-Timing header."""
+
+    def test_span_records_on_active_trace_only(self):
+        from app.core.tracing import Trace, record, span, trace_ctx
+
+        with span("orphan"):
+            pass  # no active trace: nothing to record, no error
+
+        trace = Trace("req-1")
+        token = trace_ctx.set(trace)
+        try:
+            with span("embed"):
+                pass
+            record("milvus", 2.0)
+            record("milvus", 3.0)
+        finally:
+            trace_ctx.reset(token)
+
+        durations = trace.durations()
+        assert list(durations) == ["embed", "milvus"]
+        assert durations["milvus"] == pytest.approx(5.0)
+        assert trace.server_timing().startswith("embed;dur=")
+        assert "milvus;dur=5.0" in trace.server_timing()
+
+    @pytest.mark.asyncio
+    async def test_rerank_batch_stages_charged_to_each_request(self):
+        from app.core.tracing import Trace, record, trace_ctx
+        from app.services.internal.rerank import rerank_async
+
+        def fake_rerank(queries, candidate_lists, batch_size=32):
+            record("gpu_wait", 4.0)
+            return [[(0, 1.0)] for _ in candidate_lists]
+
+        async def traced(query: str) -> Trace:
+            trace = Trace(query)
+            trace_ctx.set(trace)
+            await rerank_async(query, ["a"])
+            return trace
+
+        with patch("app.services.internal.rerank.rerank", side_effect=fake_rerank):
+            traces = await asyncio.gather(traced("q1"), traced("q2"))
+
+        for trace in traces:
+            assert trace.durations()["gpu_wait"] == pytest.approx(4.0)
+
+    def test_gpu_residency_yields_lock_wait(self):
+        from app.core.gpu import GpuResidency
+
+        residency = GpuResidency(threading.Lock(), idle_timeout_sec=0)
+        with residency.use("m", load=lambda: None, unload=lambda: None) as wait_ms:
+            assert wait_ms >= 0.0
+
+    def test_search_endpoint_sets_server_timing(self, client: TestClient):
+        from app.core.tracing import record
+
+        async def fake_search(**kwargs):
+            record("embed", 12.5)
+            return []
+
+        with patch(
+            "app.api.v1.endpoints.search.search_documents", side_effect=fake_search
+        ):
+            response = client.post(
+                "/api/v1/search/my_collection", json={"query": "q", "top_k": 5}
+            )
+
+        assert response.status_code == 200
+        timing = response.headers["server-timing"]
+        assert "embed;dur=12.5" in timing
+        assert "total;dur=" in timing
+        assert response.headers["x-request-id"]
+
+
+class TestMetrics:
+    """Prometheus registry, histogram rendering and the /metrics endpoint."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        from app.core.metrics import Histogram, _registry
+
+        hist = Histogram("test_latency_seconds", "Test.", ("op",), buckets=(0.1, 1.0))
+        try:
+            child = hist.labels("search")
+            assert hist.labels("search") is child  # children are cached
+            for value in (0.05, 0.1, 0.5, 2.0):
+                child.observe(value)
+            text = hist.render()
+        finally:
+            _registry.remove(hist)
+
+        assert "# TYPE test_latency_seconds histogram" in text
+        assert 'test_latency_seconds_bucket{op="search",le="0.1"} 2' in text
+        assert 'test_latency_seconds_bucket{op="search",le="1"} 3' in text
+        assert 'test_latency_seconds_bucket{op="search",le="+Inf"} 4' in text
+        assert 'test_latency_seconds_count{op="search"} 4' in text
+        assert child.count == 4
+        assert child.sum == pytest.approx(2.65)
+
+    def test_labels_arity_is_checked(self):
+        from app.core.metrics import MILVUS_OP_SECONDS
+
+        with pytest.raises(ValueError):
+            MILVUS_OP_SECONDS.labels("search", "extra")
+
+    def test_gpu_lock_wait_observed_per_owner(self):
+        from app.core.gpu import GpuResidency
+        from app.core.metrics import GPU_LOCK_HOLD_SECONDS, GPU_LOCK_WAIT_SECONDS
+
+        wait = GPU_LOCK_WAIT_SECONDS.labels("metrics-test")
+        hold = GPU_LOCK_HOLD_SECONDS.labels("metrics-test")
+        before = wait.count, hold.count
+
+        residency = GpuResidency(threading.Lock(), idle_timeout_sec=0)
+        with residency.use("metrics-test", load=lambda: None, unload=lambda: None):
+            pass
+
+        assert (wait.count, hold.count) == (before[0] + 1, before[1] + 1)
+
+    def test_metrics_endpoint_reports_route_latency(self, client: TestClient):
+        with patch(
+            "app.api.v1.endpoints.search.search_documents",
+            new_callable=AsyncMock,
+            return_value=[],
+        ):
+            client.post("/api/v1/search/my_collection", json={"query": "q"})
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = response.text
+        assert (
+            'http_request_duration_seconds_count{method="POST",'
+            'route="/api/v1/search/{collection_name}",status="200"}'
+        ) in body
+        assert "# TYPE milvus_operation_duration_seconds histogram" in body
+        assert 'cache_hit_ratio{cache="search"}' in body
+        assert 'milvus_pool_occupancy{pool="read"}' in body
+
+
+class TestRequestDeadline:
+    """Deadline propagation and graceful degradation in the search pipeline."""
+
+    @pytest.mark.asyncio
+    async def test_tight_budget_skips_rerank_and_overfetch(self):
+        from app.core.deadline import Deadline, deadline_ctx
+        from app.services.public.search import search_documents
+
+        d = Deadline(100)  # below DEADLINE_RERANK_MIN_MS
+        token = deadline_ctx.set(d)
+        try:
+            with (
+                patch(
+                    "app.services.public.search.sparse_search",
+                    new_callable=AsyncMock,
+                    return_value=[_make_search_hits(3)],
+                ) as mock_sparse,
+                patch(
+                    "app.services.public.search.rerank_cached", new_callable=AsyncMock
+                ) as mock_rerank,
+                patch("app.services.public.search.search_cache.store") as mock_store,
+            ):
+                results = await search_documents(
+                    "q", "col", search_type="sparse", top_k=2, rerank=True
+                )
+        finally:
+            deadline_ctx.reset(token)
+
+        assert mock_sparse.call_args.kwargs["top_k"] == 2  # no overfetch
+        mock_rerank.assert_not_awaited()
+        assert len(results) == 2
+        assert d.degradations == ["overfetch_reduced", "rerank_skipped"]
+        mock_store.assert_not_called()  # degraded results are not cached
+
+    @pytest.mark.asyncio
+    async def test_slow_embedding_falls_back_to_sparse(self):
+        from app.core.config import settings
+        from app.core.deadline import Deadline, deadline_ctx
+        from app.services.public.search import search_documents
+
+        async def slow_embed(text):
+            await asyncio.sleep(0.5)
+            return [0.1] * 4
+
+        d = Deadline(settings.DEADLINE_EMBED_RESERVE_MS + 50)
+        token = deadline_ctx.set(d)
+        try:
+            with (
+                patch("app.services.public.search.embed_query", side_effect=slow_embed),
+                patch(
+                    "app.services.public.search.sparse_search",
+                    new_callable=AsyncMock,
+                    return_value=[_make_search_hits(1)],
+                ) as mock_sparse,
+                patch(
+                    "app.services.public.search.hybrid_search", new_callable=AsyncMock
+                ) as mock_hybrid,
+            ):
+                results = await search_documents("q", "col", search_type="hybrid")
+        finally:
+            deadline_ctx.reset(token)
+
+        mock_sparse.assert_awaited_once()
+        mock_hybrid.assert_not_awaited()
+        assert len(results) == 1
+        assert d.degradations == ["sparse_fallback"]
+
+    @pytest.mark.asyncio
+    async def test_no_deadline_runs_full_pipeline(self):
+        from app.services.public.search import search_documents
+
+        with (
+            patch(
+                "app.services.public.search.sparse_search",
+                new_callable=AsyncMock,
+                return_value=[_make_search_hits(4)],
+            ) as mock_sparse,
+            patch(
+                "app.services.public.search.rerank_cached",
+                new_callable=AsyncMock,
+                return_value=[(1, 0.9), (0, 0.5)],
+            ) as mock_rerank,
+        ):
+            await search_documents(
+                "q", "col", search_type="sparse", top_k=2, rerank=True
+            )
+
+        assert mock_sparse.call_args.kwargs["top_k"] == 4  # OVERFETCH_MULTIPLIER
+        mock_rerank.assert_awaited_once()
+
+    def test_header_budget_and_degradations_reported(self, client: TestClient):
+        from app.core.deadline import degrade, remaining_ms
+
+        seen: dict[str, float | None] = {}
+
+        async def fake_search(**kwargs):
+            seen["remaining"] = remaining_ms()
+            degrade("rerank_skipped")
+            return []
+
+        with patch(
+            "app.api.v1.endpoints.search.search_documents", side_effect=fake_search
+        ):
+            response = client.post(
+                "/api/v1/search/my_collection",
+                json={"query": "q", "rerank": True},
+                headers={"X-Request-Deadline-Ms": "800"},
+            )
+
+        assert response.status_code == 200
+        assert 0 < seen["remaining"] <= 800
+        assert response.json()["degradations"] == ["rerank_skipped"]
+        assert response.headers["x-degradations"] == "rerank_skipped"
+
+    def test_route_default_budget(self):
+        from starlette.requests import Request
+
+        from app.core.config import settings
+        from app.middleware.deadline import _budget_ms
+
+        def request(path: str) -> Request:
+            return Request({"type": "http", "path": path, "headers": []})
+
+        defaults = {"/api/v1": 0.0, "/api/v1/search": 900.0}
+        with patch.object(settings, "DEADLINE_ROUTE_DEFAULTS_MS", defaults):
+            assert _budget_ms(request("/api/v1/search/col")) == 900.0
+            assert _budget_ms(request("/api/v1/jobs/x")) is None  # 0 = unbounded
+            assert _budget_ms(request("/metrics")) is None
+
+
+class TestResilientCall:
+    """Hedging, retries and circuit breaking of blocking provider calls."""
+
+    @pytest.fixture
+    def make_call(self):
+        from app.core import resilience
+
+        names: list[str] = []
+
+        def make(name: str, **kwargs):
+            names.append(name)
+            return resilience.ResilientCall(name, **kwargs)
+
+        yield make
+        for name in names:
+            resilience._registry.pop(name, None)
+
+    def test_slow_primary_is_hedged_and_hedge_wins(self, make_call):
+        attempts = []
+
+        def flaky_latency(x):
+            attempts.append(x)
+            if len(attempts) == 1:
+                time.sleep(0.5)  # the tail-latency straggler
+                return "slow"
+            return "fast"
+
+        call = make_call(
+            "test-hedge",
+            hedge_min_samples=0,
+            hedge_min_delay_ms=20,
+            hedge_max_delay_ms=20,
+        )
+        start = time.perf_counter()
+        assert call.call(flaky_latency, 1) == "fast"
+        assert time.perf_counter() - start < 0.4
+        assert len(attempts) == 2
+        assert (call.stats.hedges_fired, call.stats.hedges_won) == (1, 1)
+
+    def test_fast_call_is_not_hedged(self, make_call):
+        call = make_call("test-no-hedge", hedge_max_delay_ms=1000)
+        assert call.call(lambda: 42) == 42
+        assert call.stats.hedges_fired == 0
+
+    def test_hedge_delay_adapts_to_observed_quantile(self, make_call):
+        call = make_call(
+            "test-adaptive",
+            hedge_quantile=0.9,
+            hedge_min_samples=10,
+            hedge_min_delay_ms=5,
+            hedge_max_delay_ms=1000,
+        )
+        assert call.hedge_delay() == 1.0  # not warmed up yet: the cap
+        for ms in range(1, 11):
+            call.latencies.add(ms / 100)
+        assert call.hedge_delay() == pytest.approx(0.10)
+
+    def test_transient_errors_are_retried(self, make_call):
+        results = iter([TimeoutError("slow"), ConnectionError("reset"), "ok"])
+
+        def fn():
+            item = next(results)
+            if isinstance(item, Exception):
+                raise item
+            return item
+
+        call = make_call("test-retry", hedge=False, max_attempts=3, retry_base_ms=1)
+        assert call.call(fn) == "ok"
+        assert call.stats.retries == 2
+        assert call.stats.failures == 0
+
+    def test_hedge_pool_queue_time_is_recorded(self, make_call, monkeypatch):
+        """Latency samples are measured from submission, not from dequeue."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        from app.core import resilience
+
+        pool = ThreadPoolExecutor(max_workers=1)
+        monkeypatch.setattr(resilience, "_pool", pool)
+        pool.submit(time.sleep, 0.1)  # another call holds the only thread
+
+        call = make_call("test-queued", hedge_max_delay_ms=1000)
+        assert call.call(lambda: "ok") == "ok"
+        assert call.latencies.quantile(1.0) >= 0.09
+        pool.shutdown()
+
+    def test_no_retry_past_the_deadline(self, make_call):
+        from app.core.deadline import Deadline, deadline_ctx
+
+        fn = MagicMock(side_effect=TimeoutError("slow"))
+        call = make_call("test-deadline", hedge=False, max_attempts=3)
+
+        token = deadline_ctx.set(Deadline(50))
+        try:
+            with (
+                patch("app.core.resilience.random.uniform", return_value=0.2),
+                pytest.raises(TimeoutError),
+            ):
+                start = time.perf_counter()
+                call.call(fn)
+        finally:
+            deadline_ctx.reset(token)
+
+        assert time.perf_counter() - start < 0.1  # the 200ms backoff was skipped
+        assert fn.call_count == 1
+        assert (call.stats.retries, call.stats.failures) == (0, 1)
+
+    def test_non_transient_errors_are_not_retried(self, make_call):
+        fn = MagicMock(side_effect=ValueError("bad request"))
+        call = make_call("test-permanent", hedge=False, max_attempts=3)
+
+        with pytest.raises(ValueError):
+            call.call(fn)
+        assert fn.call_count == 1
+        assert not call.breaker.is_open
+
+    def test_status_code_classification(self):
+        from google.genai.errors import ClientError, ServerError
+        from langchain_google_genai._common import GoogleGenerativeAIError
+        from langchain_google_genai.chat_models import GoogleRateLimitError
+
+        from app.core.resilience import is_transient
+
+        def wrapped(cause):
+            # How langchain-google-genai's embeddings surface API errors.
+            try:
+                raise GoogleGenerativeAIError("Error embedding content") from cause
+            except GoogleGenerativeAIError as exc:
+                return exc
+
+        assert is_transient(ClientError(429, {"error": {}}))
+        assert is_transient(wrapped(ServerError(503, {"error": {}})))
+        assert is_transient(wrapped(ClientError(429, {"error": {}})))
+        assert is_transient(GoogleRateLimitError("quota"))
+        assert not is_transient(wrapped(ClientError(400, {"error": {}})))
+        assert not is_transient(GoogleGenerativeAIError("bad request"))
+
+    def test_breaker_opens_and_half_open_trial_closes_it(self, make_call):
+        from app.core.resilience import CircuitOpenError
+
+        fn = MagicMock(side_effect=TimeoutError("down"))
+        call = make_call(
+            "test-breaker",
+            hedge=False,
+            max_attempts=1,
+            breaker_failures=2,
+            breaker_reset_sec=0.05,
+        )
+        for _ in range(2):
+            with pytest.raises(TimeoutError):
+                call.call(fn)
+        assert call.breaker.is_open
+
+        with pytest.raises(CircuitOpenError):
+            call.call(fn)  # fails fast
+        assert fn.call_count == 2
+        assert call.stats.breaker_rejected == 1
+
+        time.sleep(0.06)
+        fn.side_effect = None
+        fn.return_value = "back"
+        assert call.call(fn) == "back"  # half-open trial succeeds
+        assert not call.breaker.is_open
+
+    def test_non_transient_trial_failure_does_not_wedge_breaker(self, make_call):
+        fn = MagicMock(side_effect=TimeoutError("down"))
+        call = make_call(
+            "test-breaker-trial",
+            hedge=False,
+            max_attempts=1,
+            breaker_failures=1,
+            breaker_reset_sec=0.05,
+        )
+        with pytest.raises(TimeoutError):
+            call.call(fn)
+        assert call.breaker.is_open
+
+        time.sleep(0.06)
+        fn.side_effect = ValueError("bad request")
+        with pytest.raises(ValueError):
+            call.call(fn)  # the half-open trial fails non-transiently
+
+        fn.side_effect = None
+        fn.return_value = "back"
+        assert call.call(fn) == "back"  # next call is the new trial
+        assert not call.breaker.is_open
+
+
+class TestQuotaGovernor:
+    """Token buckets, AIMD concurrency and priority for Gemini calls."""
+
+    @pytest.fixture(autouse=True)
+    def _quota_settings(self, monkeypatch):
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "QUOTA_ENABLED", True)
+        monkeypatch.setattr(settings, "QUOTA_MAX_CONCURRENCY", 4)
+        monkeypatch.setattr(settings, "QUOTA_BATCH_SHARE", 0.5)
+        monkeypatch.setattr(settings, "QUOTA_COOLDOWN_MS", 50.0)
+        return settings
+
+    def test_429_halves_limit_once_then_recovers(self):
+        from app.services.internal.quota import AIMDLimiter
+
+        limiter = AIMDLimiter(max_limit=8, min_limit=1, decrease=0.5)
+        for _ in range(3):  # one congestion event: a single cut
+            assert limiter.acquire(interactive=True, timeout=0)
+            limiter.release(rate_limited=True)
+        assert limiter.limit == 4.0
+        assert limiter.rate_limited == 3
+
+        for _ in range(40):  # additive increase: ~limit successes per +1
+            assert limiter.acquire(interactive=True, timeout=0)
+            limiter.release()
+        assert limiter.limit == 8.0
+
+    def test_batch_calls_leave_slots_for_interactive(self):
+        from app.services.internal.quota import AIMDLimiter
+
+        limiter = AIMDLimiter(max_limit=4, min_limit=1, decrease=0.5)
+        assert limiter.acquire(interactive=False, timeout=0)
+        assert limiter.acquire(interactive=False, timeout=0)
+        # QUOTA_BATCH_SHARE=0.5 of 4 slots are for batch work.
+        assert not limiter.acquire(interactive=False, timeout=0.01)
+        assert limiter.acquire(interactive=True, timeout=0)
+        assert limiter.acquire(interactive=True, timeout=0)
+        assert limiter.in_flight == 4
+
+    def test_batch_bucket_keeps_interactive_reserve(
+        self, _quota_settings, monkeypatch
+    ):
+        from app.services.internal.quota import GovernedCall, QuotaExceededError
+
+        monkeypatch.setattr(_quota_settings, "QUOTA_CALL_RPM", {"t_batch": 600.0})
+        monkeypatch.setattr(_quota_settings, "QUOTA_BURST_SEC", 1.0)  # 10 tokens
+        monkeypatch.setattr(_quota_settings, "QUOTA_INTERACTIVE_RESERVE", 0.2)
+        monkeypatch.setattr(_quota_settings, "QUOTA_MAX_WAIT_SEC", 0.01)
+
+        batch = GovernedCall("t_batch", "m", priority="batch")
+        interactive = GovernedCall("t_batch", "m")
+        for _ in range(8):
+            with batch.slot():
+                pass
+        with pytest.raises(QuotaExceededError):
+            with batch.slot():
+                pass
+        for _ in range(2):  # the reserve is still there
+            with interactive.slot():
+                pass
+
+    def test_rate_limited_call_shrinks_limit_and_pauses_batch(self, _quota_settings):
+        from app.services.internal.quota import (
+            GovernedCall,
+            QuotaExceededError,
+            get_quota_stats,
+        )
+
+        from langchain_google_genai.chat_models import GoogleRateLimitError
+
+        def rejected():
+            raise GoogleRateLimitError("429 quota exceeded")
+
+        interactive = GovernedCall("t_call", "m429")
+        with pytest.raises(GoogleRateLimitError):
+            interactive.wrap(rejected)()
+        assert get_quota_stats()["m429"] == {
+            "limit": 2.0,
+            "in_flight": 0,
+            "rate_limited": 1,
+        }
+
+        batch = GovernedCall("t_call", "m429", priority="batch")
+        with patch.object(_quota_settings, "QUOTA_MAX_WAIT_SEC", 0.01):
+            with pytest.raises(QuotaExceededError):
+                with batch.slot():
+                    pass
+        time.sleep(0.06)  # QUOTA_COOLDOWN_MS elapsed
+        assert batch.wrap(lambda: "ok")() == "ok"
+
+    def test_wrapped_embedding_429_starts_cooldown(self, _quota_settings, monkeypatch):
+        from google.genai.errors import ClientError
+        from langchain_google_genai._common import GoogleGenerativeAIError
+
+        from app.services.internal import quota
+        from app.services.internal.quota import GovernedCall, get_quota_stats
+
+        def rejected():
+            # How langchain-google-genai's embeddings surface a 429.
+            try:
+                raise ClientError(429, {"error": {"status": "RESOURCE_EXHAUSTED"}})
+            except ClientError as e:
+                raise GoogleGenerativeAIError("Error embedding content") from e
+
+        monkeypatch.setattr(_quota_settings, "QUOTA_REDIS_ENABLED", True)
+        call = GovernedCall("t_embed", "m_embed", priority="batch")
+        with patch.object(quota, "start_cooldown") as mock_cooldown:
+            with pytest.raises(GoogleGenerativeAIError):
+                call.wrap(rejected)()
+
+        mock_cooldown.assert_called_once_with("m_embed", 50.0)  # quota:cooldown
+
+        assert get_quota_stats()["m_embed"]["limit"] == 2.0  # 4 halved
+        assert get_quota_stats()["m_embed"]["rate_limited"] == 1
+        assert quota._local_cooldowns["m_embed"] > time.monotonic()
+
+
+    @pytest.mark.asyncio
+    async def test_governed_calls_wait_off_the_default_executor(self):
+        """Throttled provider calls sleep in the quota pools, not the default one."""
+        from app.services.internal.embed import _embed_query_batch
+        from app.services.internal.generate import generate
+
+        threads = {}
+
+        def record(name):
+            def fn(*args):
+                threads[name] = threading.current_thread().name
+                return [[0.0]] if name == "embed" else "answer"
+
+            return fn
+
+        with (
+            patch(
+                "app.services.internal.embed._embed_queries_sync",
+                side_effect=record("embed"),
+            ),
+            patch(
+                "app.services.internal.generate._generate_sync",
+                side_effect=record("generate"),
+            ),
+        ):
+            await _embed_query_batch(["q"])
+            await generate([])
+
+        assert threads["embed"].startswith("quota-interactive")
+        assert threads["generate"].startswith("quota-interactive")
+
+
+class TestRedisTokenBucket:
+    """The shared bucket Lua script, run by fakeredis' embedded Lua."""
+
+    @pytest.fixture(autouse=True)
+    def _redis(self):
+        import fakeredis
+
+        from app.repositories.redis import rate_limit
+
+        rate_limit._take_script = None  # registered on the fake client
+        with patch.object(
+            rate_limit,
+            "get_redis_client",
+            return_value=fakeredis.FakeRedis(decode_responses=True),
+        ):
+            yield
+        rate_limit._take_script = None
+
+    def test_bucket_empties_then_asks_to_wait(self):
+        from app.repositories.redis.rate_limit import take_tokens
+
+        for _ in range(3):
+            assert take_tokens("quota:call:t", 1.0, 3.0) == 0.0
+        assert 0 < take_tokens("quota:call:t", 1.0, 3.0) <= 1.0
+
+    def test_floor_keeps_reserve(self):
+        from app.repositories.redis.rate_limit import take_tokens
+
+        assert take_tokens("quota:call:t", 1.0, 3.0, floor=2.0) == 0.0
+        assert take_tokens("quota:call:t", 1.0, 3.0, floor=2.0) > 0
+        assert take_tokens("quota:call:t", 1.0, 3.0) == 0.0  # reserve is usable
+
+    @pytest.mark.parametrize("floor", [0.0, 1.0])
+    def test_cooldown_blocks_whatever_the_floor(self, floor):
+        """A capacity-1 batch bucket has floor 0; the cooldown still applies."""
+        from app.repositories.redis.rate_limit import (
+            cooldown_key,
+            start_cooldown,
+            take_tokens,
+        )
+
+        start_cooldown("m", 5_000)
+        wait = take_tokens(
+            "quota:call:t", 1.0, 3.0, floor=floor, cooldown=cooldown_key("m")
+        )
+        assert 4.0 < wait <= 5.0
+        assert take_tokens("quota:call:t", 1.0, 3.0) == 0.0  # no cooldown key
+
+
+class TestQueryRouter:
+    """search_type="auto": cheap query classification and routing."""
+
+    @pytest.mark.parametrize(
+        "query,expected",
+        [
+            ("SKU-12345", ("sparse", "identifier")),
+            ("report_2023.pdf", ("sparse", "identifier")),
+            ("kubernetes", ("sparse", "rare_terms")),
+            ('"exact phrase match"', ("sparse", "quoted")),
+            ("machine learning", ("hybrid", "default")),
+            (
+                "How do I reset my password when the email link expired?",
+                ("dense", "natural_language"),
+            ),
+            # One signal is not enough: short questions stay hybrid.
+            ("what is RAG", ("hybrid", "default")),
+            ("explain HNSW", ("hybrid", "default")),
+            ("kubernetes?", ("hybrid", "default")),
+            ("manual for SKU-12345", ("hybrid", "default")),
+            ("RAG là gì", ("hybrid", "default")),
+            (
+                "Làm thế nào để đặt lại mật khẩu khi liên kết email đã hết hạn",
+                ("dense", "natural_language"),
+            ),
+        ],
+    )
+    def test_classify_query(self, query, expected):
+        from app.services.internal.query_router import classify_query
+
+        decision = classify_query(query)
+        assert (decision.search_type, decision.reason) == expected
+
+    def test_thresholds_are_configurable(self):
+        from app.core.config import settings
+        from app.services.internal.query_router import classify_query
+
+        with patch.object(settings, "SEARCH_ROUTER_RARE_TOKEN_MIN_CHARS", 20):
+            assert classify_query("kubernetes").search_type == "hybrid"
+
+    @pytest.mark.asyncio
+    async def test_auto_keyword_query_skips_embedding(self):
+        from app.core.metrics import SEARCH_ROUTES
+        from app.services.public.search import search_documents
+
+        routed = SEARCH_ROUTES.labels("sparse", "identifier")
+        before = routed.value
+        with (
+            patch(
+                "app.services.public.search.embed_query", new_callable=AsyncMock
+            ) as mock_embed,
+            patch(
+                "app.services.public.search.sparse_search",
+                new_callable=AsyncMock,
+                return_value=[_make_search_hits(1)],
+            ) as mock_sparse,
+        ):
+            results = await search_documents("ERR-4021", "col", search_type="auto")
+
+        mock_embed.assert_not_awaited()
+        mock_sparse.assert_awaited_once()
+        assert len(results) == 1
+        assert routed.value == before + 1
+
+    @pytest.mark.asyncio
+    async def test_auto_sentence_query_goes_dense(self):
+        from app.services.public.search import search_documents
+
+        with (
+            patch(
+                "app.services.public.search.embed_query",
+                new_callable=AsyncMock,
+                return_value=FAKE_QUERY_VECTOR,
+            ),
+            patch(
+                "app.services.public.search.dense_search",
+                new_callable=AsyncMock,
+                return_value=[_make_search_hits(2)],
+            ) as mock_dense,
+            patch(
+                "app.services.public.search.hybrid_search", new_callable=AsyncMock
+            ) as mock_hybrid,
+        ):
+            await search_documents(
+                "what did the speaker say about the budget for this year",
+                "col",
+                search_type="auto",
+            )
+
+        mock_dense.assert_awaited_once()
+        mock_hybrid.assert_not_awaited()
+
+
+class TestCandidatePruning:
+    """Score-based pruning of rerank candidates."""
+
+    @pytest.mark.asyncio
+    async def test_ratio_prunes_candidates_before_rerank(self):
+        from app.core.config import settings
+        from app.services.public.search import search_documents
+
+        with (
+            patch.object(settings, "RERANK_PRUNE_MIN_SCORE_RATIO", 0.8),
+            patch(
+                "app.services.public.search.sparse_search",
+                new_callable=AsyncMock,
+                return_value=[_make_search_hits(6)],  # scores 0.8 .. 0.3
+            ) as mock_sparse,
+            patch(
+                "app.services.public.search.rerank_cached",
+                new_callable=AsyncMock,
+                return_value=[(1, 0.9), (0, 0.5)],
+            ) as mock_rerank,
+        ):
+            results = await search_documents(
+                "q", "col", search_type="sparse", top_k=3, rerank=True
+            )
+
+        assert mock_sparse.call_args.kwargs["include_scores"] is True
+        doc_ids = mock_rerank.call_args.args[2]
+        assert doc_ids == [1, 2]  # 0.8 and 0.7 survive the 0.64 floor
+        assert [r.doc_id for r in results] == [2, 1]
+
+    def test_per_type_floor_keeps_unscored_hits(self):
+        from app.core.config import settings
+        from app.services.internal.pruning import prune_candidates
+
+        results = [
+            SearchResult(doc_id=1, title="a", text="a", score=12.0),
+            SearchResult(doc_id=2, title="b", text="b", score=3.0),
+            SearchResult(doc_id=3, title="c", text="c", score=None),
+        ]
+        with patch.object(settings, "RERANK_PRUNE_MIN_SCORE", {"sparse": 5.0}):
+            assert [r.doc_id for r in prune_candidates(results, "sparse")] == [1, 3]
+            assert len(prune_candidates(results, "dense")) == 3  # no floor set
+
+    @pytest.mark.asyncio
+    async def test_radius_turns_dense_leg_into_range_search(self):
+        from app.core.config import settings
+        from app.services.public.search import search_documents
+
+        with (
+            patch.object(settings, "RERANK_PRUNE_DENSE_RADIUS", 0.4),
+            patch(
+                "app.services.public.search.embed_query",
+                new_callable=AsyncMock,
+                return_value=FAKE_QUERY_VECTOR,
+            ),
+            patch(
+                "app.services.public.search.dense_search",
+                new_callable=AsyncMock,
+                return_value=[_make_search_hits(2)],
+            ) as mock_dense,
+            patch(
+                "app.services.public.search.rerank_cached",
+                new_callable=AsyncMock,
+                return_value=[(0, 0.9), (1, 0.5)],
+            ),
+        ):
+            await search_documents("q", "col", search_type="dense", rerank=True)
+
+        assert mock_dense.call_args.kwargs["radius"] == 0.4
+
+    def test_dense_search_params_with_radius(self):
+        from app.repositories.milvus.search import _dense_search_params
+
+        params = _dense_search_params(0.4)
+        assert params["metric_type"] == "COSINE"
+        assert params["params"]["radius"] == 0.4
+        assert "radius" not in _dense_search_params()["params"]
+
+
+class TestDiversitySelection:
+    """MMR over chunk vectors and the per-source cap."""
+
+    @staticmethod
+    def _hit(doc_id: int, vector: list[float], source: str):
+        doc = _make_document(doc_id=doc_id, dense_vector=vector)
+        doc.metadata = {"source_filename": source}
+        return doc, None
+
+    def test_mmr_skips_near_duplicate_neighbours(self):
+        from app.services.internal.diversity import select_diverse
+
+        hits = [
+            self._hit(1, [1.0, 0.0, 0.0], "a.txt"),
+            self._hit(2, [0.99, 0.01, 0.0], "a.txt"),  # overlapping chunk
+            self._hit(3, [0.98, 0.02, 0.0], "a.txt"),
+            self._hit(4, [0.0, 1.0, 0.0], "b.txt"),
+        ]
+        selected = select_diverse(hits, 2, mmr_lambda=0.5, max_per_source=0)
+
+        assert [doc.doc_id for doc, _ in selected] == [1, 4]
+        assert all(doc.dense_vector is None for doc, _ in selected)
+
+    def test_lambda_one_with_cap_keeps_order_within_sources(self):
+        from app.services.internal.diversity import select_diverse
+
+        hits = [self._hit(i, [1.0, 0.0], "a.txt") for i in range(1, 5)]
+        hits += [self._hit(i, [1.0, 0.0], "b.txt") for i in range(5, 7)]
+        selected = select_diverse(hits, 4, mmr_lambda=1.0, max_per_source=2)
+
+        assert [doc.doc_id for doc, _ in selected] == [1, 2, 5, 6]
+
+    @pytest.mark.asyncio
+    async def test_search_fetches_vectors_and_selects_from_larger_pool(self):
+        from app.core.config import settings
+        from app.services.public.search import search_documents
+
+        hits = [
+            (_make_document(doc_id=i, text=f"Content {i}"), None) for i in range(1, 5)
+        ]
+        with (
+            patch.object(settings, "DIVERSITY_MAX_PER_SOURCE", 1),
+            patch(
+                "app.services.public.search.embed_query",
+                new_callable=AsyncMock,
+                return_value=FAKE_QUERY_VECTOR,
+            ),
+            patch(
+                "app.services.public.search.dense_search",
+                new_callable=AsyncMock,
+                return_value=[hits],
+            ) as mock_dense,
+        ):
+            results = await search_documents(
+                "q", "col", search_type="dense", top_k=2, diversify=True
+            )
+
+        kwargs = mock_dense.call_args.kwargs
+        assert kwargs["top_k"] == 4  # DIVERSITY_POOL_MULTIPLIER * top_k
+        assert "dense_vector" in kwargs["output_fields"]
+        assert [r.doc_id for r in results] == [1]  # one chunk per source